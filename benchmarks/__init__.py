@@ -0,0 +1,6 @@
+"""Synthetic data generator and performance benchmarks for the analysis stack.
+
+- ``benchmarks.synthetic_data``: parametric orders / stock / history generator
+- ``benchmarks.run_benchmarks``: times the hot paths at several scales and
+  stores machine-readable results for comparison across versions
+"""
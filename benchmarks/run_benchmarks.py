@@ -0,0 +1,302 @@
+"""Benchmark suite for the analysis hot paths.
+
+Generates a synthetic dataset per scale (see ``benchmarks.synthetic_data``)
+and times:
+
+- ``run_analysis``
+- ``RuleEngine.apply``
+- ``enrich_dataframe_with_weights``
+- ``create_packing_list``
+- ``build_packing_order_data`` (once per order, as the JSON exports do)
+- ``recalculate_statistics``
+
+Each target runs ``--repeat`` times on a fresh copy of its input. Results
+are written as JSON (tool version, git commit, environment, generator
+parameters and per-run timings) so two versions can be compared:
+
+    python -m benchmarks.run_benchmarks --scales 10k,100k
+    python -m benchmarks.run_benchmarks --scales 10k --compare benchmarks/results/old.json
+"""
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import generate_for_line_items
+
+RESULTS_SCHEMA_VERSION = 1
+DEFAULT_RESULTS_DIR = Path(__file__).parent / "results"
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+TARGETS = [
+    "run_analysis",
+    "RuleEngine.apply",
+    "enrich_dataframe_with_weights",
+    "create_packing_list",
+    "build_packing_order_data",
+    "recalculate_statistics",
+]
+# A target is flagged when it got slower than this factor
+DEFAULT_REGRESSION_THRESHOLD = 1.2
+
+
+def parse_scale(value: str) -> int:
+    """Accepts a preset name ("10k") or a plain line item count."""
+    key = value.strip().lower()
+    if key in SCALES:
+        return SCALES[key]
+    return int(key.replace("_", ""))
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+            capture_output=True, text=True, timeout=10,
+        )
+        return result.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def environment_info() -> Dict:
+    """Describes the interpreter and library versions of this run."""
+    from shopify_tool import __version__
+
+    return {
+        "tool_version": __version__,
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+    }
+
+
+def time_target(func: Callable, setup: Callable, repeat: int) -> Dict:
+    """Times ``func(setup())`` ``repeat`` times; setup is not timed."""
+    seconds = []
+    for _ in range(repeat):
+        argument = setup()
+        started = time.perf_counter()
+        func(argument)
+        seconds.append(time.perf_counter() - started)
+    return {
+        "seconds": [round(s, 6) for s in seconds],
+        "min": round(min(seconds), 6),
+        "median": round(statistics.median(seconds), 6),
+    }
+
+
+def _build_packing_data_for_all_orders(final_df: pd.DataFrame) -> int:
+    from shopify_tool.core import build_packing_order_data
+
+    count = 0
+    for order_number, group in final_df.groupby("Order_Number", sort=False, observed=True):
+        build_packing_order_data(order_number, group)
+        count += 1
+    return count
+
+
+def benchmark_scale(line_items: int, repeat: int = 3, targets: Optional[List[str]] = None, **generator_kwargs) -> Dict:
+    """Generates one dataset and times every selected target on it.
+
+    Args:
+        line_items: Approximate number of order lines
+        repeat: Timed runs per target
+        targets: Subset of ``TARGETS`` (all if None)
+        **generator_kwargs: Passed to ``generate_for_line_items``
+
+    Returns:
+        dict: Scale entry with dataset sizes, generator params and results.
+    """
+    from shopify_tool.analysis import recalculate_statistics, run_analysis
+    from shopify_tool.packing_lists import create_packing_list
+    from shopify_tool.rules import RuleEngine
+    from shopify_tool.weight_calculator import enrich_dataframe_with_weights
+
+    targets = targets or TARGETS
+    started = time.perf_counter()
+    dataset = generate_for_line_items(line_items, **generator_kwargs)
+    generation_seconds = time.perf_counter() - started
+    config = dataset.config
+
+    def analyze(_):
+        return run_analysis(
+            dataset.stock_df, dataset.orders_df, dataset.history_df,
+            dataset.analysis_mappings(), config["courier_mappings"],
+        )
+
+    # The other targets work on the analysis result, as in run_full_analysis
+    final_df = analyze(None)[0]
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="shopify_bench_") as tmp:
+        packing_config = config["packing_list_configs"][0]
+        runners = {
+            "run_analysis": (analyze, lambda: None),
+            "RuleEngine.apply": (lambda df: RuleEngine(config["rules"]).apply(df), final_df.copy),
+            "enrich_dataframe_with_weights": (
+                lambda df: enrich_dataframe_with_weights(df, config["weight_config"]), final_df.copy
+            ),
+            "create_packing_list": (
+                lambda df: create_packing_list(
+                    df, str(Path(tmp) / "packing_list.xlsx"), packing_config["name"],
+                    packing_config["filters"], packing_config["exclude_skus"],
+                ),
+                final_df.copy,
+            ),
+            "build_packing_order_data": (_build_packing_data_for_all_orders, lambda: final_df),
+            "recalculate_statistics": (recalculate_statistics, lambda: final_df),
+        }
+        for name in targets:
+            func, setup = runners[name]
+            results[name] = time_target(func, setup, repeat)
+            print(f"[benchmark] {line_items} lines: {name} median {results[name]['median']:.3f}s", file=sys.stderr)
+
+    return {
+        "line_items": dataset.line_items,
+        "orders": int(dataset.orders_df["Name"].nunique()),
+        "skus": len(dataset.stock_df),
+        "history_rows": len(dataset.history_df),
+        "result_rows": len(final_df),
+        "generation_seconds": round(generation_seconds, 6),
+        "params": dataset.params,
+        "results": results,
+    }
+
+
+def run_suite(scales: List[int], repeat: int = 3, targets: Optional[List[str]] = None, **generator_kwargs) -> Dict:
+    """Runs ``benchmark_scale`` for every scale.
+
+    Returns:
+        dict: Result document (see ``save_results``).
+    """
+    return {
+        "schema_version": RESULTS_SCHEMA_VERSION,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "environment": environment_info(),
+        "repeat": repeat,
+        "scales": [benchmark_scale(scale, repeat, targets, **generator_kwargs) for scale in scales],
+    }
+
+
+def save_results(document: Dict, output: Optional[str] = None) -> Path:
+    """Writes a result document; defaults to results/<version>_<commit>_<time>.json."""
+    if output is None:
+        environment = document["environment"]
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = f"{environment['tool_version']}_{environment['git_commit'] or 'nogit'}_{stamp}.json"
+        output = DEFAULT_RESULTS_DIR / name
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(document, f, indent=2)
+    return output
+
+
+def compare_results(baseline: Dict, current: Dict, threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[Dict]:
+    """Compares median timings of targets present in both documents.
+
+    Scales are matched by their ``params`` (same generator input).
+
+    Returns:
+        list[dict]: One row per target with baseline / current medians, the
+            ratio and whether it is a regression (ratio above threshold).
+    """
+    baseline_scales = {json.dumps(s["params"], sort_keys=True): s for s in baseline["scales"]}
+    rows = []
+    for scale in current["scales"]:
+        base = baseline_scales.get(json.dumps(scale["params"], sort_keys=True))
+        if base is None:
+            continue
+        for target, result in scale["results"].items():
+            if target not in base["results"]:
+                continue
+            before = base["results"][target]["median"]
+            after = result["median"]
+            ratio = after / before if before > 0 else float("inf")
+            rows.append({
+                "line_items": scale["line_items"],
+                "target": target,
+                "baseline": before,
+                "current": after,
+                "ratio": round(ratio, 3),
+                "regression": ratio > threshold,
+            })
+    return rows
+
+
+def _print_results(document: Dict) -> None:
+    print(f"{'Lines':>9}  {'Target':<32}{'Median s':>10}{'Min s':>10}")
+    for scale in document["scales"]:
+        for target, result in scale["results"].items():
+            print(f"{scale['line_items']:>9}  {target:<32}{result['median']:>10.3f}{result['min']:>10.3f}")
+
+
+def _print_comparison(rows: List[Dict]) -> None:
+    print(f"\n{'Lines':>9}  {'Target':<32}{'Before':>9}{'After':>9}{'Ratio':>8}")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(
+            f"{row['line_items']:>9}  {row['target']:<32}{row['baseline']:>9.3f}"
+            f"{row['current']:>9.3f}{row['ratio']:>8.2f}{flag}"
+        )
+
+
+def main(argv=None) -> int:
+    """Command-line entry point.
+
+    Returns:
+        int: 1 if a comparison found regressions, 0 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run_benchmarks", description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="10k,100k", help="Comma-separated line item counts or presets (1k, 10k, 100k, 1m)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per target")
+    parser.add_argument("--targets", help=f"Comma-separated subset of: {', '.join(TARGETS)}")
+    parser.add_argument("--set-share", type=float, help="Share of lines ordering a set SKU")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<version>_<commit>_<time>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Slowdown factor reported as a regression")
+    args = parser.parse_args(argv)
+
+    # The analysis logs every phase at INFO; keep the benchmark output readable
+    logging.disable(logging.INFO)
+
+    targets = [t.strip() for t in args.targets.split(",")] if args.targets else None
+    unknown = sorted(set(targets or []) - set(TARGETS))
+    if unknown:
+        parser.error(f"Unknown targets: {', '.join(unknown)}")
+    generator_kwargs = {"seed": args.seed}
+    if args.set_share is not None:
+        generator_kwargs["set_share"] = args.set_share
+
+    document = run_suite([parse_scale(s) for s in args.scales.split(",")], args.repeat, targets, **generator_kwargs)
+    path = save_results(document, args.output)
+    _print_results(document)
+    print(f"\nResults saved to {path}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            rows = compare_results(json.load(f), document, args.threshold)
+        _print_comparison(rows)
+        if any(row["regression"] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,346 @@
+"""Parametric synthetic dataset generator.
+
+Unlike ``scripts/create_comprehensive_test_data.py``, which hand-builds one
+order per scenario, this module generates datasets of any size from a few
+knobs so the analysis can be measured at 10k, 100k or 1M line items:
+
+- ``n_orders``: number of orders
+- ``lines_per_order``: distribution of line items per order ({lines: weight})
+- ``n_skus`` / ``popularity_skew``: catalog size and Zipf-like skew of SKU
+  popularity (0 = uniform)
+- ``stock_scarcity``: share of SKUs stocked below their demand
+- ``set_share``: share of line items that order a set (bundle) SKU
+- ``tag_density``: share of orders carrying Shopify tags
+- ``history_size``: previously fulfilled orders, ``repeat_share`` of which
+  are orders of the current export (to exercise repeat detection)
+
+Orders and stock use the raw Shopify / warehouse CSV headers, with
+order-level fields only on the first line of each order as in a real
+export. The dataset also carries a matching client config (set decoders,
+courier mappings, rules, weight config and a packing list filter).
+
+Usage:
+    python -m benchmarks.synthetic_data --lines 100000 --output data/bench_100k
+"""
+
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_LINES_PER_ORDER = {1: 0.55, 2: 0.25, 3: 0.12, 4: 0.05, 5: 0.03}
+
+COURIERS = {
+    "DHL": ["DHL Express Shipping", "dhl standard"],
+    "DPD": ["DPD Classic", "dpd home"],
+    "Speedy": ["Speedy Office", "speedy address"],
+    "PostOne": ["PostOne International"],
+}
+COUNTRIES = ["Bulgaria", "Romania", "Greece", "Germany", "Austria", "Italy"]
+TAG_POOL = ["VIP", "Wholesale", "Gift", "Priority", "Influencer", "Fragile", "B2B", "Promo"]
+
+
+class SyntheticDataset:
+    """Generated inputs for one benchmark scale.
+
+    Attributes:
+        orders_df: Orders with raw Shopify export headers
+        stock_df: Stock with raw warehouse headers
+        history_df: Fulfillment history (Order_Number, Execution_Date)
+        config: Client config (column_mappings, set_decoders,
+            courier_mappings, rules, weight_config, packing_list_configs)
+        params: The generator parameters, for result files
+    """
+
+    def __init__(self, orders_df, stock_df, history_df, config, params):
+        self.orders_df = orders_df
+        self.stock_df = stock_df
+        self.history_df = history_df
+        self.config = config
+        self.params = params
+
+    @property
+    def line_items(self) -> int:
+        return len(self.orders_df)
+
+    def analysis_mappings(self) -> Dict:
+        """Returns the column_mappings argument ``run_analysis`` expects."""
+        return dict(self.config["column_mappings"], set_decoders=self.config["set_decoders"])
+
+    def write_csv(self, directory) -> Dict[str, Path]:
+        """Writes orders, stock and history CSVs the way the GUI loads them.
+
+        Returns:
+            dict: Paths under the keys "orders", "stock" and "history".
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = {
+            "orders": directory / "orders_export.csv",
+            "stock": directory / "inventory.csv",
+            "history": directory / "fulfillment_history.csv",
+        }
+        self.orders_df.to_csv(paths["orders"], index=False)
+        self.stock_df.to_csv(paths["stock"], index=False, sep=";")
+        self.history_df.to_csv(paths["history"], index=False)
+        return paths
+
+
+def _popularity(n_skus: int, skew: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, n_skus + 1) ** skew
+    return weights / weights.sum()
+
+
+def _build_config(catalog: np.ndarray, set_decoders: Dict, rng: np.random.Generator) -> Dict:
+    courier_mappings = {code: {"patterns": [p.lower() for p in patterns]} for code, patterns in COURIERS.items()}
+    rules = [
+        {"name": "VIP orders", "conditions": [{"field": "Tags", "operator": "contains", "value": "VIP"}],
+         "actions": [{"type": "ADD_INTERNAL_TAG", "value": "VIP"}, {"type": "ADD_TAG", "value": "VIP-CHECK"}]},
+        {"name": "Bulk lines", "match": "ALL",
+         "conditions": [{"field": "Quantity", "operator": "is greater than", "value": "2"},
+                        {"field": "Order_Fulfillment_Status", "operator": "equals", "value": "Fulfillable"}],
+         "actions": [{"type": "ADD_INTERNAL_TAG", "value": "bulk"}]},
+        {"name": "Export countries", "match": "ANY",
+         "conditions": [{"field": "Destination_Country", "operator": "in list", "value": "Germany, Austria, Italy"}],
+         "actions": [{"type": "ADD_TAG", "value": "EXPORT"}]},
+        {"name": "Catalog prefix", "conditions": [{"field": "SKU", "operator": "starts with", "value": "SKU-000"}],
+         "actions": [{"type": "ADD_INTERNAL_TAG", "value": "top-seller"}]},
+        {"name": "Big orders", "level": "order", "match": "ALL",
+         "conditions": [{"field": "item_count", "operator": "is greater than or equal", "value": "4"}],
+         "actions": [{"type": "ADD_INTERNAL_TAG", "value": "packaging:box"}]},
+        {"name": "Orders with top SKU", "level": "order", "match": "ANY",
+         "conditions": [{"field": "has_sku", "operator": "equals", "value": str(catalog[0])}],
+         "actions": [{"type": "ADD_ORDER_TAG", "value": "TOP"}]},
+    ]
+
+    dimensioned = catalog[: max(1, len(catalog) // 4)]
+    products = {
+        str(sku): {
+            "length_cm": float(rng.integers(5, 40)),
+            "width_cm": float(rng.integers(5, 30)),
+            "height_cm": float(rng.integers(1, 15)),
+            "no_packaging": bool(rng.random() < 0.05),
+        }
+        for sku in dimensioned
+    }
+    weight_config = {
+        "volumetric_divisor": 6000,
+        "products": products,
+        "boxes": [
+            {"name": "S", "length_cm": 28, "width_cm": 15.5, "height_cm": 10},
+            {"name": "M", "length_cm": 35, "width_cm": 25, "height_cm": 15},
+            {"name": "L", "length_cm": 50, "width_cm": 40, "height_cm": 30},
+        ],
+    }
+
+    return {
+        "column_mappings": {
+            "orders": {
+                "Name": "Order_Number", "Lineitem sku": "SKU", "Lineitem quantity": "Quantity",
+                "Lineitem name": "Product_Name", "Shipping Method": "Shipping_Method",
+                "Shipping Country": "Shipping_Country", "Tags": "Tags", "Notes": "Notes",
+                "Total": "Total_Price", "Subtotal": "Subtotal",
+            },
+            "stock": {"Артикул": "SKU", "Име": "Product_Name", "Наличност": "Stock"},
+        },
+        "set_decoders": set_decoders,
+        "courier_mappings": courier_mappings,
+        "rules": rules,
+        "weight_config": weight_config,
+        "packing_list_configs": [{
+            "name": "DHL Orders",
+            "filters": [{"field": "Shipping_Provider", "operator": "==", "value": "DHL"}],
+            "exclude_skus": [str(catalog[-1])],
+        }],
+    }
+
+
+def generate_dataset(
+    n_orders: int = 10_000,
+    lines_per_order: Optional[Dict[int, float]] = None,
+    n_skus: int = 2_000,
+    popularity_skew: float = 1.0,
+    stock_scarcity: float = 0.2,
+    set_share: float = 0.05,
+    tag_density: float = 0.3,
+    history_size: int = 5_000,
+    repeat_share: float = 0.05,
+    seed: int = 42
+) -> SyntheticDataset:
+    """Generates a reproducible dataset.
+
+    Args:
+        n_orders: Number of orders
+        lines_per_order: {line count: weight}; defaults to a Shopify-like
+            mix dominated by single-item orders
+        n_skus: Catalog size (set SKUs are added on top)
+        popularity_skew: Exponent of the Zipf-like SKU popularity
+        stock_scarcity: Share of SKUs whose stock is below their demand
+        set_share: Share of line items that order a set SKU
+        tag_density: Share of orders with Shopify tags
+        history_size: Number of previously fulfilled orders
+        repeat_share: Share of the history that are orders of this export
+        seed: Random seed
+
+    Returns:
+        SyntheticDataset: The generated inputs and config.
+    """
+    lines_per_order = lines_per_order or DEFAULT_LINES_PER_ORDER
+    params = {
+        "n_orders": n_orders, "lines_per_order": {str(k): v for k, v in lines_per_order.items()},
+        "n_skus": n_skus, "popularity_skew": popularity_skew, "stock_scarcity": stock_scarcity,
+        "set_share": set_share, "tag_density": tag_density, "history_size": history_size,
+        "repeat_share": repeat_share, "seed": seed,
+    }
+    rng = np.random.default_rng(seed)
+
+    catalog = np.array([f"SKU-{i:06d}" for i in range(n_skus)], dtype=object)
+    n_sets = max(1, n_skus // 50) if set_share > 0 else 0
+    set_skus = np.array([f"SET-{i:05d}" for i in range(n_sets)], dtype=object)
+    set_decoders = {
+        str(set_sku): [
+            {"sku": str(component), "quantity": int(rng.integers(1, 3))}
+            for component in rng.choice(catalog, size=int(rng.integers(2, 5)), replace=False)
+        ]
+        for set_sku in set_skus
+    }
+
+    # Orders and their lines
+    counts = np.array(sorted(lines_per_order), dtype=np.int64)
+    weights = np.array([lines_per_order[c] for c in counts], dtype=float)
+    lines = rng.choice(counts, size=n_orders, p=weights / weights.sum())
+    n_lines = int(lines.sum())
+    order_ids = np.arange(100_000, 100_000 + n_orders)
+    order_of_line = np.repeat(np.arange(n_orders), lines)
+    first_line = np.r_[True, order_of_line[1:] != order_of_line[:-1]]
+
+    skus = rng.choice(catalog, size=n_lines, p=_popularity(n_skus, popularity_skew))
+    if n_sets:
+        is_set = rng.random(n_lines) < set_share
+        skus[is_set] = rng.choice(set_skus, size=int(is_set.sum()))
+    quantities = rng.choice([1, 1, 1, 1, 2, 2, 3, 5], size=n_lines)
+    prices = rng.integers(500, 15_000, size=n_lines) / 100
+
+    methods = np.array([method for patterns in COURIERS.values() for method in patterns], dtype=object)
+    method_of_order = rng.choice(methods, size=n_orders)
+    country_of_order = rng.choice(np.array(COUNTRIES, dtype=object), size=n_orders)
+
+    tags_of_order = np.full(n_orders, "", dtype=object)
+    tagged = np.flatnonzero(rng.random(n_orders) < tag_density)
+    tag_counts = rng.integers(1, 4, size=len(tagged))
+    for position, count in zip(tagged, tag_counts):
+        tags_of_order[position] = ", ".join(rng.choice(TAG_POOL, size=count, replace=False))
+
+    order_totals = np.bincount(order_of_line, weights=prices * quantities, minlength=n_orders).round(2)
+
+    def order_level(values):
+        column = np.asarray(values, dtype=object)[order_of_line]
+        column[~first_line] = None
+        return column
+
+    # Shopify repeats the order number on every line
+    orders_df = pd.DataFrame({
+        "Name": np.asarray([f"#{i}" for i in order_ids], dtype=object)[order_of_line],
+        "Lineitem sku": skus,
+        "Lineitem quantity": quantities,
+        "Lineitem name": [f"Product {sku}" for sku in skus],
+        "Lineitem price": prices,
+        "Shipping Method": order_level(method_of_order),
+        "Shipping Country": order_level(country_of_order),
+        "Tags": order_level(tags_of_order),
+        "Notes": order_level(np.where(rng.random(n_orders) < 0.02, "Leave at the door", "")),
+        "Subtotal": order_level(order_totals),
+        "Total": order_level((order_totals + 5).round(2)),
+    })
+
+    # Stock follows demand (sets count through their components)
+    demand = pd.Series(quantities, index=skus).groupby(level=0).sum()
+    for set_sku, components in set_decoders.items():
+        set_quantity = demand.pop(set_sku) if set_sku in demand.index else 0
+        for component in components:
+            demand[component["sku"]] = demand.get(component["sku"], 0) + set_quantity * component["quantity"]
+    demand = demand.reindex(catalog, fill_value=0).to_numpy()
+    scarce = rng.random(n_skus) < stock_scarcity
+    stock = np.where(
+        scarce,
+        np.floor(demand * rng.random(n_skus)),
+        demand + rng.integers(0, 25, size=n_skus),
+    ).astype(np.int64)
+    stock_df = pd.DataFrame({
+        "Артикул": catalog,
+        "Име": [f"Warehouse product {sku}" for sku in catalog],
+        "Наличност": stock,
+    })
+
+    # History: older fulfilments plus some orders of this export (repeats)
+    n_repeats = min(int(history_size * repeat_share), n_orders)
+    n_old = history_size - n_repeats
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    old_dates = today - pd.to_timedelta(rng.integers(2, 365, size=n_old), unit="D")
+    history_df = pd.DataFrame({
+        "Order_Number": np.concatenate([
+            np.array([f"#{i}" for i in range(100_000 - n_old, 100_000)], dtype=object),
+            np.array([f"#{i}" for i in rng.choice(order_ids, size=n_repeats, replace=False)], dtype=object),
+        ]),
+        "Execution_Date": np.concatenate([
+            pd.DatetimeIndex(old_dates).strftime("%Y-%m-%d").to_numpy(dtype=object),
+            np.full(n_repeats, (today - timedelta(days=1)).strftime("%Y-%m-%d"), dtype=object),
+        ]),
+    })
+
+    config = _build_config(catalog, set_decoders, rng)
+    return SyntheticDataset(orders_df, stock_df, history_df, config, params)
+
+
+def generate_for_line_items(line_items: int, **kwargs) -> SyntheticDataset:
+    """Generates a dataset with about ``line_items`` order lines.
+
+    The order count is derived from the mean of ``lines_per_order``; the
+    catalog and history grow with the scale unless given explicitly.
+    """
+    lines_per_order = kwargs.get("lines_per_order") or DEFAULT_LINES_PER_ORDER
+    total = sum(lines_per_order.values())
+    mean_lines = sum(count * weight for count, weight in lines_per_order.items()) / total
+    n_orders = max(1, int(round(line_items / mean_lines)))
+    kwargs.setdefault("n_skus", int(min(50_000, max(200, line_items // 20))))
+    kwargs.setdefault("history_size", n_orders // 2)
+    return generate_dataset(n_orders=n_orders, **kwargs)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.synthetic_data",
+        description="Generate a synthetic orders / stock / history dataset as CSV files.",
+    )
+    parser.add_argument("--lines", type=int, default=10_000, help="Approximate number of order lines")
+    parser.add_argument("--skus", type=int, help="Catalog size")
+    parser.add_argument("--skew", type=float, default=1.0, help="SKU popularity skew (0 = uniform)")
+    parser.add_argument("--scarcity", type=float, default=0.2, help="Share of SKUs stocked below demand")
+    parser.add_argument("--set-share", type=float, default=0.05, help="Share of lines ordering a set")
+    parser.add_argument("--tag-density", type=float, default=0.3, help="Share of orders with tags")
+    parser.add_argument("--history", type=int, help="History size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", required=True, help="Output directory")
+    args = parser.parse_args(argv)
+
+    kwargs = {
+        "popularity_skew": args.skew, "stock_scarcity": args.scarcity, "set_share": args.set_share,
+        "tag_density": args.tag_density, "seed": args.seed,
+    }
+    if args.skus:
+        kwargs["n_skus"] = args.skus
+    if args.history is not None:
+        kwargs["history_size"] = args.history
+    dataset = generate_for_line_items(args.lines, **kwargs)
+    paths = dataset.write_csv(args.output)
+    print(f"{dataset.line_items} order lines, {len(dataset.stock_df)} SKUs, {len(dataset.history_df)} history rows")
+    for name, path in paths.items():
+        print(f"  {name}: {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
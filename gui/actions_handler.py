@@ -1,6 +1,7 @@
 import os
 import logging
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
 from PySide6.QtCore import QObject, Signal
@@ -12,6 +13,11 @@ from shopify_tool.analysis import toggle_order_fulfillment
 from shopify_tool import packing_lists
 from shopify_tool import stock_export
 from shopify_tool.session_manager import SessionManagerError
+from shopify_tool.stats_accumulator import StatsAccumulator
+from shopify_tool.order_index import order_index_for, synced_order_index
+from shopify_tool.stock_ledger import StockLedger
+from shopify_tool.rule_plan import compile_rules
+from shopify_tool.rules import RuleEngine
 from gui.settings_window_pyside import SettingsWindow
 from gui.report_selection_dialog import ReportSelectionDialog
 from gui.tag_categories_dialog import TagCategoriesDialog
@@ -50,6 +56,7 @@ class ActionsHandler(QObject):
         super().__init__()
         self.mw = main_window
         self.log = logging.getLogger(__name__)
+        self._rule_engine = None
 
     def create_new_session(self):
         """Creates a new session using SessionManager.
@@ -833,17 +840,18 @@ class ActionsHandler(QObject):
             order_number (str): The order number to modify.
         """
         # Get affected rows BEFORE operation
-        affected_rows = self.mw.analysis_results_df[
-            self.mw.analysis_results_df["Order_Number"].astype(str).str.strip() == str(order_number).strip()
-        ].copy()
+        index = order_index_for(self.mw)
+        order_rows = index.rows(order_number)
+        affected_rows = self.mw.analysis_results_df.iloc[order_rows].copy()
+        stats = self._stats_accumulator()
 
-        success, result, updated_df = toggle_order_fulfillment(self.mw.analysis_results_df, order_number)
+        success, result, updated_df = toggle_order_fulfillment(
+            self.mw.analysis_results_df, order_number, ledger=self._stock_ledger(), index=index
+        )
         if success:
             self.mw.analysis_results_df = updated_df
 
-            # Use consistent filtering approach with type conversion and strip
-            mask = updated_df["Order_Number"].astype(str).str.strip() == str(order_number).strip()
-            matching_rows = updated_df.loc[mask, "Order_Fulfillment_Status"]
+            matching_rows = updated_df["Order_Fulfillment_Status"].iloc[order_rows]
 
             if matching_rows.empty:
                 self.log.error(f"Order {order_number} not found after toggle operation")
@@ -851,6 +859,14 @@ class ActionsHandler(QObject):
                 return
 
             new_status = matching_rows.iloc[0]
+            self._apply_stats_delta(stats, removed=affected_rows, added=updated_df.iloc[order_rows])
+
+            # Final_Stock changed on every row of the order's SKUs
+            skus = updated_df["SKU"].iloc[order_rows].dropna().unique() if "SKU" in updated_df.columns else []
+            stock_rows = [index.sku_rows(sku) for sku in skus]
+            self._reapply_rules(order_rows, ["Order_Fulfillment_Status", "Final_Stock"])
+            if stock_rows:
+                self._reapply_rules(np.concatenate(stock_rows), ["Final_Stock"])
 
             # Record for undo
             self.mw.undo_manager.record_operation(
@@ -879,13 +895,10 @@ class ActionsHandler(QObject):
         tag_to_add, ok = QInputDialog.getText(self.mw, "Add Manual Tag", "Enter tag to add:")
         if ok and tag_to_add:
             # Get affected rows BEFORE operation
-            affected_rows = self.mw.analysis_results_df[
-                self.mw.analysis_results_df["Order_Number"] == order_number
-            ].copy()
+            order_rows_indices = self.mw.analysis_results_df.index[order_index_for(self.mw).rows(order_number)]
+            affected_rows = self.mw.analysis_results_df.loc[order_rows_indices].copy()
 
-            order_rows_indices = self.mw.analysis_results_df[
-                self.mw.analysis_results_df["Order_Number"] == order_number
-            ].index
+            stats = self._stats_accumulator()
             if "Status_Note" not in self.mw.analysis_results_df.columns:
                 self.mw.analysis_results_df["Status_Note"] = ""
             for index in order_rows_indices:
@@ -897,6 +910,8 @@ class ActionsHandler(QObject):
                 else:
                     new_notes = current_notes
                 self.mw.analysis_results_df.loc[index, "Status_Note"] = new_notes
+            # Status_Note does not feed the statistics - nothing to apply
+            self._apply_stats_delta(stats)
 
             # Record for undo
             self.mw.undo_manager.record_operation(
@@ -928,17 +943,15 @@ class ActionsHandler(QObject):
         )
         if reply == QMessageBox.Yes:
             # Find and remove the specific row by order number and SKU
-            # Convert to string for comparison to handle int/float order numbers
-            order_number_str = str(order_number).strip()
-            sku_str = str(sku).strip()
-            order_mask = self.mw.analysis_results_df["Order_Number"].astype(str).str.strip() == order_number_str
-            sku_mask = self.mw.analysis_results_df["SKU"].astype(str).str.strip() == sku_str
-            mask = order_mask & sku_mask
+            positions = order_index_for(self.mw).order_sku_rows(order_number, sku)
 
             # Get affected rows BEFORE operation
-            affected_rows = self.mw.analysis_results_df[mask].copy()
+            affected_rows = self.mw.analysis_results_df.iloc[positions].copy()
+            stats = self._stats_accumulator()
 
-            self.mw.analysis_results_df = self.mw.analysis_results_df[~mask].reset_index(drop=True)
+            self._drop_rows(positions)
+            self._apply_stats_delta(stats, removed=affected_rows)
+            self._reapply_rules(order_index_for(self.mw).rows(order_number))
 
             # Record for undo
             self.mw.undo_manager.record_operation(
@@ -968,17 +981,14 @@ class ActionsHandler(QObject):
             QMessageBox.No,
         )
         if reply == QMessageBox.Yes:
-            # Convert to string for comparison to handle int/float order numbers
-            order_number_str = str(order_number).strip()
+            positions = order_index_for(self.mw).rows(order_number)
 
             # Get affected rows BEFORE operation
-            affected_rows = self.mw.analysis_results_df[
-                self.mw.analysis_results_df["Order_Number"].astype(str).str.strip() == order_number_str
-            ].copy()
-
-            order_mask = self.mw.analysis_results_df["Order_Number"].astype(str).str.strip() != order_number_str
+            affected_rows = self.mw.analysis_results_df.iloc[positions].copy()
+            stats = self._stats_accumulator()
 
-            self.mw.analysis_results_df = self.mw.analysis_results_df[order_mask].reset_index(drop=True)
+            self._drop_rows(positions)
+            self._apply_stats_delta(stats, removed=affected_rows)
 
             # Record for undo
             self.mw.undo_manager.record_operation(
@@ -1072,10 +1082,8 @@ class ActionsHandler(QObject):
 
         # Then, override with Final_Stock values from analysis (more current)
         if "Final_Stock" in self.mw.analysis_results_df.columns:
-            for _, row in self.mw.analysis_results_df.iterrows():
-                sku = row["SKU"]
-                final_stock = row["Final_Stock"]
-                if pd.notna(sku) and pd.notna(final_stock):
+            for sku, final_stock in self._stock_ledger().snapshot().items():
+                if pd.notna(final_stock):
                     try:
                         live_stock[str(sku).strip()] = int(final_stock)
                     except (ValueError, TypeError):
@@ -1121,10 +1129,8 @@ class ActionsHandler(QObject):
         self.log.info(f"Adding {quantity}x {sku} to order {order_num}")
 
         # Step 1: Get existing row as template
-        # Convert Order_Number to string for comparison (might be int/float)
-        existing_rows = self.mw.analysis_results_df[
-            self.mw.analysis_results_df["Order_Number"].astype(str) == str(order_num)
-        ]
+        index = order_index_for(self.mw)
+        existing_rows = self.mw.analysis_results_df.iloc[index.rows(order_num)]
 
         if existing_rows.empty:
             self.log.error(f"Order {order_num} not found")
@@ -1168,15 +1174,20 @@ class ActionsHandler(QObject):
         new_row["Final_Stock"] = current_live_stock
 
         # Step 5: Append to DataFrame
+        ledger = self._stock_ledger()
         self.mw.analysis_results_df = pd.concat(
             [self.mw.analysis_results_df, pd.DataFrame([new_row])],
             ignore_index=True
         )
+        new_position = len(self.mw.analysis_results_df) - 1
+        ledger.append_rows(self.mw.analysis_results_df, [new_position])
+        index.append_rows(self.mw.analysis_results_df, [new_position])
 
         self.log.info(f"Row added to analysis_results_df")
 
         # Step 6: Recalculate fulfillment for THIS ORDER ONLY
-        self._recalculate_order_fulfillment(order_num)
+        self._recalculate_order_fulfillment(order_num, added_positions=[new_position])
+        self._reapply_rules(order_index_for(self.mw).rows(order_num))
 
         # Step 7: Save to session
         self._save_manual_addition(product_data)
@@ -1197,68 +1208,47 @@ class ActionsHandler(QObject):
 
         self.mw.log_activity("Manual Addition", f"Added {quantity}x {sku} to order {order_num}")
 
-    def _recalculate_order_fulfillment(self, order_number):
+    def _recalculate_order_fulfillment(self, order_number, added_positions=()):
         """
         Recalculate fulfillment status for ONE specific order.
 
         CRITICAL: Does NOT touch other orders or re-run analysis!
         This preserves repeated order detection logic.
 
+        If the order was fulfillable, the stock it held is released first,
+        then the whole order is allocated again against the live stock.
+
         Args:
             order_number: Order to recalculate
+            added_positions: Row positions just added to the order; they
+                did not hold any stock yet
         """
         self.log.info(f"Recalculating fulfillment for order {order_number}")
 
-        # Get all items for this order
-        # Convert Order_Number to string for comparison (might be int/float)
-        order_items = self.mw.analysis_results_df[
-            self.mw.analysis_results_df["Order_Number"].astype(str) == str(order_number)
-        ]
+        df = self.mw.analysis_results_df
+        ledger = self._stock_ledger()
 
-        # Rebuild live stock tracking from Final_Stock
-        live_stock = {}
-        for _, row in self.mw.analysis_results_df.iterrows():
-            sku = row["SKU"]
-            final_stock = row["Final_Stock"]
-            if pd.notna(sku) and pd.notna(final_stock):
-                live_stock[sku] = final_stock
+        # Get all items for this order
+        order_positions = order_index_for(self.mw).rows(order_number)
+        held_positions = order_positions[~np.isin(order_positions, list(added_positions))]
+        held_rows = df.iloc[held_positions]
+        if not held_rows.empty and held_rows["Order_Fulfillment_Status"].iloc[0] == "Fulfillable":
+            ledger.release(df, StockLedger.order_demand(held_rows))
 
         # Check if all items can be fulfilled with current live stock
-        can_fulfill = True
-
-        for _, item in order_items.iterrows():
-            sku = item["SKU"]
-            required_qty = item["Quantity"]
-            available = live_stock.get(sku, 0)
-
-            if required_qty > available:
-                can_fulfill = False
-                self.log.debug(f"  {sku}: need {required_qty}, have {available} - NOT OK")
-                break
-            else:
-                self.log.debug(f"  {sku}: need {required_qty}, have {available} - OK")
+        demand = StockLedger.order_demand(df.iloc[order_positions])
+        lacking_skus = ledger.lacking(demand)
+        for sku in lacking_skus:
+            self.log.debug(f"  {sku}: need {demand[sku]}, have {ledger.available(sku)} - NOT OK")
+        can_fulfill = not lacking_skus
 
         # Update fulfillment status for ALL items in this order
         new_status = "Fulfillable" if can_fulfill else "Not Fulfillable"
-
-        # Convert Order_Number to string for comparison (might be int/float)
-        self.mw.analysis_results_df.loc[
-            self.mw.analysis_results_df["Order_Number"].astype(str) == str(order_number),
-            "Order_Fulfillment_Status"
-        ] = new_status
+        df.iloc[order_positions, df.columns.get_loc("Order_Fulfillment_Status")] = new_status
 
         # If fulfillable, update Final_Stock (simulate allocation)
         if can_fulfill:
-            for _, item in order_items.iterrows():
-                sku = item["SKU"]
-                qty = item["Quantity"]
-                new_stock = live_stock.get(sku, 0) - qty
-                # Update Final_Stock for ALL rows with this SKU
-                self.mw.analysis_results_df.loc[
-                    self.mw.analysis_results_df["SKU"] == sku,
-                    "Final_Stock"
-                ] = new_stock
-
+            ledger.consume(df, demand)
             self.log.info(f"Order {order_number} marked as Fulfillable, stock updated")
         else:
             self.log.info(f"Order {order_number} marked as Not Fulfillable")
@@ -1302,6 +1292,106 @@ class ActionsHandler(QObject):
         except Exception as e:
             self.log.error(f"Failed to save manual additions: {e}")
 
+    def _reapply_rules(self, positions, columns=None):
+        """Brings the rule tags of edited orders up to date.
+
+        Runs ``RuleEngine.reapply`` with the rules of the active profile and
+        applies the changed rows to the statistics.
+
+        Args:
+            positions (array-like): Row positions of the edited rows.
+            columns (list, optional): Columns the edit changed; None if rows
+                were added or removed.
+        """
+        rules = (self.mw.active_profile_config or {}).get("rules")
+        df = self.mw.analysis_results_df
+        if not rules or df is None or not len(positions):
+            return
+
+        plan = compile_rules(rules)
+        if self._rule_engine is None or self._rule_engine.plan is not plan:
+            self._rule_engine = RuleEngine(plan)
+
+        try:
+            rows = self._rule_engine.rows_to_reapply(df, positions, columns)
+            if not len(rows):
+                return
+            stats = self._stats_accumulator()
+            before = df.iloc[rows].copy()
+            self._rule_engine.reapply(df, rows, columns)
+            self._apply_stats_delta(stats, removed=before, added=df.iloc[rows])
+        except Exception as e:
+            self.log.error(f"Failed to re-apply rules after edit: {e}", exc_info=True)
+
+    def _stats_accumulator(self):
+        """Returns a StatsAccumulator matching the current DataFrame.
+
+        Must be called before the DataFrame is modified. Returns None if
+        the statistics cannot be tracked incrementally (missing columns),
+        in which case the next refresh recomputes them in full.
+        """
+        accumulator = getattr(self.mw, "stats_accumulator", None)
+        df = self.mw.analysis_results_df
+        if accumulator is None or not accumulator.reflects(df):
+            try:
+                accumulator = StatsAccumulator(df)
+            except (ValueError, KeyError) as e:
+                self.log.debug(f"Incremental statistics unavailable: {e}")
+                accumulator = None
+            self.mw.stats_accumulator = accumulator
+        return accumulator
+
+    def _drop_rows(self, positions):
+        """Removes rows by position and re-indexes the DataFrame from 0.
+
+        The order index and stock ledger are kept in sync when they matched
+        the DataFrame before the removal.
+
+        Args:
+            positions (array-like): Row positions to remove.
+        """
+        df = self.mw.analysis_results_df
+        index = synced_order_index(self.mw)
+        ledger = self._stock_ledger(build=False)
+
+        keep = np.ones(len(df), dtype=bool)
+        keep[np.asarray(positions, dtype=np.int64)] = False
+        self.mw.analysis_results_df = df[keep].reset_index(drop=True)
+
+        if index is not None:
+            index.remove_rows(self.mw.analysis_results_df, positions)
+        if ledger is not None:
+            ledger.remove_rows(self.mw.analysis_results_df, positions)
+
+    def _stock_ledger(self, build=True):
+        """Returns the StockLedger of the current DataFrame.
+
+        Args:
+            build (bool): Build a new ledger if there is none for the current
+                DataFrame. With False, returns None in that case (an edit that
+                only needs to keep an existing ledger in sync).
+        """
+        df = self.mw.analysis_results_df
+        ledger = getattr(self.mw, "stock_ledger", None)
+        if ledger is not None and ledger.reflects(df):
+            return ledger
+        self.mw.stock_ledger = StockLedger(df) if build else None
+        return self.mw.stock_ledger
+
+    def _apply_stats_delta(self, accumulator, removed=None, added=None):
+        """Applies an edit's row delta so the next refresh skips the full recompute.
+
+        Args:
+            accumulator (StatsAccumulator | None): From `_stats_accumulator`.
+            removed (pd.DataFrame, optional): Rows as they were before the edit.
+            added (pd.DataFrame, optional): Rows as they are after the edit.
+        """
+        if accumulator is None:
+            return
+        accumulator.remove_rows(removed)
+        accumulator.add_rows(added)
+        accumulator.mark_synced(self.mw.analysis_results_df)
+
     def _update_undo_button(self):
         """Update undo button state and tooltip."""
         if hasattr(self.mw, 'undo_button'):
@@ -1359,10 +1449,14 @@ class ActionsHandler(QObject):
         # Get affected rows BEFORE modification
         selected_indexes = self.mw.selection_helper.get_selected_source_rows()
         affected_rows_before = self.mw.analysis_results_df.loc[selected_indexes].copy()
+        stats = self._stats_accumulator()
 
         # Perform bulk status change
         new_status = "Fulfillable" if is_fulfillable else "Not Fulfillable"
         self.mw.analysis_results_df.loc[selected_indexes, "Order_Fulfillment_Status"] = new_status
+        self._apply_stats_delta(
+            stats, removed=affected_rows_before, added=self.mw.analysis_results_df.loc[selected_indexes]
+        )
 
         # Record undo operation
         self.mw.undo_manager.record_operation(
@@ -1466,16 +1560,13 @@ class ActionsHandler(QObject):
         unique_orders = selected_df['Order_Number'].unique()
 
         # Get first row index for each unique order (representative row)
-        representative_indexes = []
-        for order_num in unique_orders:
-            order_rows = self.mw.analysis_results_df[
-                self.mw.analysis_results_df['Order_Number'] == order_num
-            ].index.tolist()
-            if order_rows:
-                representative_indexes.append(order_rows[0])
+        representative_indexes = self.mw.analysis_results_df.index[
+            order_index_for(self.mw).first_rows(unique_orders)
+        ].tolist()
 
         # Store affected rows BEFORE modification (only representatives)
         affected_rows_before = self.mw.analysis_results_df.loc[representative_indexes].copy()
+        stats = self._stats_accumulator()
 
         # Ensure Internal_Tags column exists
         if "Internal_Tags" not in self.mw.analysis_results_df.columns:
@@ -1485,6 +1576,10 @@ class ActionsHandler(QObject):
         current_tags = self.mw.analysis_results_df.loc[representative_indexes, "Internal_Tags"]
         new_tags = current_tags.apply(lambda t: add_tag(t, tag_value))
         self.mw.analysis_results_df.loc[representative_indexes, "Internal_Tags"] = new_tags
+        self._apply_stats_delta(
+            stats, removed=affected_rows_before,
+            added=self.mw.analysis_results_df.loc[representative_indexes]
+        )
 
         # Record undo operation (with representative indexes)
         self.mw.undo_manager.record_operation(
@@ -1581,21 +1676,22 @@ class ActionsHandler(QObject):
         unique_orders = selected_df_full['Order_Number'].unique()
 
         # Get first row index for each unique order (representative row)
-        representative_indexes = []
-        for order_num in unique_orders:
-            order_rows = self.mw.analysis_results_df[
-                self.mw.analysis_results_df['Order_Number'] == order_num
-            ].index.tolist()
-            if order_rows:
-                representative_indexes.append(order_rows[0])
+        representative_indexes = self.mw.analysis_results_df.index[
+            order_index_for(self.mw).first_rows(unique_orders)
+        ].tolist()
 
         # Store affected rows BEFORE modification (only representatives)
         affected_rows_before = self.mw.analysis_results_df.loc[representative_indexes].copy()
+        stats = self._stats_accumulator()
 
         # Apply tag removal to representative rows only (first row of each order)
         current_tags = self.mw.analysis_results_df.loc[representative_indexes, "Internal_Tags"]
         new_tags = current_tags.apply(lambda t: remove_tag(t, tag))
         self.mw.analysis_results_df.loc[representative_indexes, "Internal_Tags"] = new_tags
+        self._apply_stats_delta(
+            stats, removed=affected_rows_before,
+            added=self.mw.analysis_results_df.loc[representative_indexes]
+        )
 
         # Record undo operation (with representative indexes)
         self.mw.undo_manager.record_operation(
@@ -1682,10 +1778,11 @@ class ActionsHandler(QObject):
 
         # Get affected rows BEFORE modification
         affected_rows_before = rows_to_remove.copy()
+        stats = self._stats_accumulator()
 
         # Perform removal
-        self.mw.analysis_results_df = self.mw.analysis_results_df.drop(rows_to_remove.index)
-        self.mw.analysis_results_df = self.mw.analysis_results_df.reset_index(drop=True)
+        self._drop_rows(self.mw.analysis_results_df.index.get_indexer(rows_to_remove.index))
+        self._apply_stats_delta(stats, removed=affected_rows_before)
 
         # Record undo operation
         self.mw.undo_manager.record_operation(
@@ -1777,10 +1874,11 @@ class ActionsHandler(QObject):
 
         # Get affected rows BEFORE modification
         affected_rows_before = rows_to_remove.copy()
+        stats = self._stats_accumulator()
 
         # Perform removal
-        self.mw.analysis_results_df = self.mw.analysis_results_df.drop(rows_to_remove.index)
-        self.mw.analysis_results_df = self.mw.analysis_results_df.reset_index(drop=True)
+        self._drop_rows(self.mw.analysis_results_df.index.get_indexer(rows_to_remove.index))
+        self._apply_stats_delta(stats, removed=affected_rows_before)
 
         # Record undo operation
         self.mw.undo_manager.record_operation(
@@ -1843,10 +1941,11 @@ class ActionsHandler(QObject):
         # Get affected rows BEFORE modification
         selected_indexes = self.mw.selection_helper.get_selected_source_rows()
         affected_rows_before = self.mw.analysis_results_df.loc[selected_indexes].copy()
+        stats = self._stats_accumulator()
 
         # Perform deletion
-        self.mw.analysis_results_df = self.mw.analysis_results_df.drop(selected_indexes)
-        self.mw.analysis_results_df = self.mw.analysis_results_df.reset_index(drop=True)
+        self._drop_rows(self.mw.analysis_results_df.index.get_indexer(selected_indexes))
+        self._apply_stats_delta(stats, removed=affected_rows_before)
 
         # Record undo operation
         self.mw.undo_manager.record_operation(
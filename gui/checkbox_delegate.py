@@ -8,6 +8,8 @@ from PySide6.QtWidgets import QStyledItemDelegate, QStyleOptionButton, QApplicat
 from PySide6.QtCore import Qt, QRect, QEvent
 from PySide6.QtGui import QPainter
 
+from shopify_tool.order_index import order_index_for
+
 
 class CheckboxDelegate(QStyledItemDelegate):
     """Renders checkbox in first column for bulk selection.
@@ -47,11 +49,12 @@ class CheckboxDelegate(QStyledItemDelegate):
             return True  # Fallback: show checkbox
 
         order_number = df.loc[source_row, 'Order_Number']
-        # Find all rows with this order number
-        order_rows = df[df['Order_Number'] == order_number].index.tolist()
+        # Row positions of this order, in ascending order
+        positions = order_index_for(self.selection_helper.main_window).rows(order_number)
+        if not len(positions):
+            return True
 
-        # This is the first row if it's the minimum index
-        return source_row == min(order_rows)
+        return source_row == df.index[positions[0]]
 
     def paint(self, painter: QPainter, option, index):
         """Draw checkbox in cell.
@@ -19,6 +19,7 @@ from shopify_tool.profile_manager import ProfileManager, NetworkError
 from shopify_tool.session_manager import SessionManager
 from shopify_tool.groups_manager import GroupsManager
 from shopify_tool.undo_manager import UndoManager
+from shopify_tool.order_index import order_index_for
 from shopify_tool.tag_manager import _normalize_tag_categories
 from gui.log_handler import QtLogHandler
 from gui.ui_manager import UIManager
@@ -75,6 +76,12 @@ class MainWindow(QMainWindow):
         self.stock_file_path = None
         self.analysis_results_df = None
         self.analysis_stats = None
+        # Incremental statistics, kept in sync by row-level edit handlers
+        self.stats_accumulator = None
+        # Live stock per SKU for manual toggles / product additions
+        self.stock_ledger = None
+        # Order / SKU -> row positions of analysis_results_df
+        self.order_index = None
         self.threadpool = QThreadPool()
         self._analysis_running = False  # Guard against duplicate analysis runs
 
@@ -372,13 +379,13 @@ class MainWindow(QMainWindow):
             self.analysis_results_df["Internal_Tags"] = "[]"
 
         # Get affected rows (all items in the order) BEFORE modification
-        mask = self.analysis_results_df["Order_Number"] == order_number
-        affected_rows_before = self.analysis_results_df[mask].copy()
+        order_labels = self.analysis_results_df.index[order_index_for(self).rows(order_number)]
+        affected_rows_before = self.analysis_results_df.loc[order_labels].copy()
 
         # Update tags for all items in the order
-        current_tags = self.analysis_results_df.loc[mask, "Internal_Tags"]
+        current_tags = self.analysis_results_df.loc[order_labels, "Internal_Tags"]
         new_tags = current_tags.apply(lambda t: add_tag(t, tag))
-        self.analysis_results_df.loc[mask, "Internal_Tags"] = new_tags
+        self.analysis_results_df.loc[order_labels, "Internal_Tags"] = new_tags
 
         # Record operation for undo (AFTER modification)
         self.undo_manager.record_operation(
@@ -428,13 +435,13 @@ class MainWindow(QMainWindow):
             return
 
         # Get affected rows (all items in the order) BEFORE modification
-        mask = self.analysis_results_df["Order_Number"] == order_number
-        affected_rows_before = self.analysis_results_df[mask].copy()
+        order_labels = self.analysis_results_df.index[order_index_for(self).rows(order_number)]
+        affected_rows_before = self.analysis_results_df.loc[order_labels].copy()
 
         # Update tags for all items in the order
-        current_tags = self.analysis_results_df.loc[mask, "Internal_Tags"]
+        current_tags = self.analysis_results_df.loc[order_labels, "Internal_Tags"]
         new_tags = current_tags.apply(lambda t: remove_tag(t, tag))
-        self.analysis_results_df.loc[mask, "Internal_Tags"] = new_tags
+        self.analysis_results_df.loc[order_labels, "Internal_Tags"] = new_tags
 
         # Record operation for undo (AFTER modification)
         self.undo_manager.record_operation(
@@ -1075,7 +1082,13 @@ class MainWindow(QMainWindow):
         # Update statistics ONLY if analysis results exist
         if self.analysis_results_df is not None and not self.analysis_results_df.empty:
             try:
-                self.analysis_stats = recalculate_statistics(self.analysis_results_df)
+                accumulator = self.stats_accumulator
+                if accumulator is not None and accumulator.consume_sync(self.analysis_results_df):
+                    # The edit handler already applied its row delta
+                    self.analysis_stats = accumulator.stats()
+                else:
+                    self.stats_accumulator = None
+                    self.analysis_stats = recalculate_statistics(self.analysis_results_df)
                 self.ui_manager.update_results_table(self.analysis_results_df)
                 self.update_statistics_tab()
                 # Update summary bar in Tab 2
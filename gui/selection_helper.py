@@ -8,6 +8,8 @@ from typing import List, Tuple, Set
 import pandas as pd
 from PySide6.QtCore import QModelIndex
 
+from shopify_tool.order_index import order_index_for
+
 
 class SelectionHelper:
     """Manages table selection and checkbox state for bulk operations.
@@ -105,7 +107,7 @@ class SelectionHelper:
         order_number = df.loc[source_row_index, 'Order_Number']
 
         # Find all rows with the same Order_Number
-        order_rows = df[df['Order_Number'] == order_number].index.tolist()
+        order_rows = df.index[order_index_for(self.main_window).rows(order_number)].tolist()
 
         # Check if any row of this order is currently checked
         is_order_checked = any(row in self.checked_rows for row in order_rows)
@@ -31,6 +31,7 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, QTimer, QDate
 
 from shopify_tool.core import get_unique_column_values
+from shopify_tool.rule_plan import compile_rules
 from gui.column_mapping_widget import ColumnMappingWidget
 from gui.wheel_ignore_combobox import WheelIgnoreComboBox
 from shopify_tool.set_decoder import import_sets_from_csv, export_sets_to_csv
@@ -2888,6 +2889,24 @@ class SettingsWindow(QDialog):
 
             self.config_data["rules"] = new_rules
 
+            # Compile once here; the analysis then reuses the cached plan
+            rule_issues = compile_rules(new_rules).issues
+            if rule_issues:
+                details = "\n".join(
+                    f"• {issue.removeprefix('[RULE ENGINE] ')}" for issue in rule_issues[:10]
+                )
+                if len(rule_issues) > 10:
+                    details += f"\n... and {len(rule_issues) - 10} more"
+                reply = QMessageBox.question(
+                    self,
+                    "Rule Problems",
+                    f"Some rule conditions have problems:\n\n{details}\n\nSave anyway?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                    QMessageBox.StandardButton.No
+                )
+                if reply != QMessageBox.StandardButton.Yes:
+                    return
+
             # ========================================
             # Packing Lists Tab
             # ========================================
@@ -0,0 +1,85 @@
+"""Before/after memory report for the compact analysis DataFrame schema.
+
+Builds a synthetic dataset, runs the analysis and prints per-column memory
+of the result with plain object/int64 columns versus the compact schema.
+
+Usage:
+    python scripts/schema_memory_report.py
+    python scripts/schema_memory_report.py --rows 500000
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from shopify_tool.analysis import run_analysis
+from shopify_tool.schema import INTEGER_COLUMNS, memory_report
+
+
+def build_dataset(rows, seed=42):
+    """Create orders/stock DataFrames with about ``rows`` order lines."""
+    rng = np.random.default_rng(seed)
+    n_orders = rows // 2
+    lines = rng.integers(1, 4, size=n_orders)
+    lines = lines[: np.searchsorted(np.cumsum(lines), rows) + 1]
+    order_numbers = np.repeat([f"#{100000 + i}" for i in range(len(lines))], lines)[:rows]
+    n_skus = 5000
+    skus = rng.choice([f"SKU-{i:05d}" for i in range(n_skus)], size=rows)
+
+    orders_df = pd.DataFrame({
+        "Order_Number": order_numbers,
+        "SKU": skus,
+        "Quantity": rng.integers(1, 4, size=rows),
+        "Shipping_Method": rng.choice(["DHL Express", "DPD Classic", "Speedy", "PostOne"], size=rows),
+        "Shipping_Country": rng.choice(["BG", "RO", "GR", "DE", "AT"], size=rows),
+        "Product_Name": [f"Product {s}" for s in skus],
+        "Tags": rng.choice(["", "VIP", "Wholesale"], size=rows),
+        "Notes": "",
+    })
+    stock_df = pd.DataFrame({
+        "SKU": [f"SKU-{i:05d}" for i in range(n_skus)],
+        "Product_Name": [f"Warehouse product {i}" for i in range(n_skus)],
+        "Stock": rng.integers(0, 200, size=n_skus),
+    })
+    return orders_df, stock_df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000, help="Number of order lines")
+    args = parser.parse_args()
+
+    orders_df, stock_df = build_dataset(args.rows)
+    courier_mappings = {
+        "DHL": {"patterns": ["dhl"]},
+        "DPD": {"patterns": ["dpd"]},
+        "Speedy": {"patterns": ["speedy"]},
+        "PostOne": {"patterns": ["postone"]},
+    }
+    final_df, _, _, _ = run_analysis(
+        stock_df, orders_df, pd.DataFrame({"Order_Number": []}), None, courier_mappings
+    )
+
+    # Rebuild the plain representation the analysis produced before the schema
+    plain = final_df.copy()
+    for column in plain.columns:
+        if isinstance(plain[column].dtype, pd.CategoricalDtype):
+            plain[column] = plain[column].astype(object)
+        elif column in INTEGER_COLUMNS and plain[column].dtype == np.int32:
+            plain[column] = plain[column].astype(np.int64)
+
+    report = memory_report(plain)
+    with pd.option_context("display.width", 120, "display.max_rows", None):
+        print(f"Rows: {len(final_df)}")
+        print(report)
+    total = report.loc["TOTAL"]
+    print(f"\nTotal: {total['Before_Bytes'] / 2**20:.1f} MiB -> {total['After_Bytes'] / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
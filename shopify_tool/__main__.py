@@ -0,0 +1,8 @@
+"""Allows running the headless CLI with ``python -m shopify_tool``."""
+
+import sys
+
+from shopify_tool.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+"""
+Pre-grouped stock allocation engine.
+
+The fulfillment simulation walks orders one by one in priority sequence,
+so the loop itself cannot be vectorized. What can be avoided is the
+per-order work on the full DataFrame: instead of masking the whole frame
+and running a fresh groupby for every order, the order lines are grouped
+ONCE into flat arrays (CSR layout):
+
+    offsets[i]:offsets[i + 1]  -> slice of order i's lines
+    sku_codes[slice]           -> integer-encoded SKUs of that order
+    quantities[slice]          -> required quantity per SKU
+
+SKUs are encoded against a single vocabulary (stock SKUs first, then SKUs
+that only appear in orders), so live stock is a plain integer-indexed
+vector. The priority loop then only touches the handful of entries that
+belong to the current order.
+"""
+
+import logging
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Columns of the shortage table produced by allocate_stock()
+SHORTAGE_COLUMNS = ["Order_Number", "SKU", "Needed", "Available", "Kind"]
+
+# Values of the shortage table "Kind" column
+SHORTAGE_OUT_OF_STOCK = "out_of_stock"
+SHORTAGE_INSUFFICIENT = "insufficient"
+
+
+class OrderLines:
+    """Order lines grouped once into per-order (SKU code, quantity) arrays.
+
+    Lines of the same SKU within an order are summed, and SKUs inside each
+    order are kept in sorted order so results match a per-order
+    ``groupby("SKU")``.
+
+    Attributes:
+        order_keys (pd.Index): Order numbers, one per grouped order.
+        offsets (np.ndarray): CSR offsets, ``len(order_keys) + 1`` entries.
+        sku_codes (np.ndarray): Integer SKU code for every grouped line.
+        quantities (np.ndarray): Summed required quantity for every grouped line.
+        sku_vocab (pd.Index): SKU value for every SKU code.
+    """
+
+    def __init__(self, order_keys, offsets, sku_codes, quantities, sku_vocab):
+        self.order_keys = order_keys
+        self.offsets = offsets
+        self.sku_codes = sku_codes
+        self.quantities = quantities
+        self.sku_vocab = sku_vocab
+
+    @classmethod
+    def from_dataframe(cls, orders_df: pd.DataFrame, stock_skus=None) -> "OrderLines":
+        """Group order lines into CSR arrays with a single groupby.
+
+        Args:
+            orders_df: Orders DataFrame with Order_Number, SKU and Quantity columns.
+                Rows must already be filtered to the lines that consume stock.
+            stock_skus: Optional sequence of unique stock SKUs. They receive the
+                first codes (in the given order) so a stock vector can be built
+                directly from the stock file.
+
+        Returns:
+            OrderLines instance
+        """
+        grouped = orders_df.groupby(["Order_Number", "SKU"], sort=True)["Quantity"].sum()
+
+        order_level = grouped.index.get_level_values(0)
+        sku_level = grouped.index.get_level_values(1)
+
+        order_codes, order_keys = pd.factorize(order_level)
+        counts = np.bincount(order_codes, minlength=len(order_keys))
+        offsets = np.zeros(len(order_keys) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        sku_vocab = pd.Index(stock_skus if stock_skus is not None else [], dtype=object)
+        sku_codes = sku_vocab.get_indexer(sku_level)
+        unknown = sku_codes < 0
+        if unknown.any():
+            extra_codes, extra_skus = pd.factorize(sku_level[unknown])
+            sku_codes[unknown] = extra_codes + len(sku_vocab)
+            sku_vocab = sku_vocab.append(pd.Index(extra_skus, dtype=object))
+
+        return cls(
+            order_keys=order_keys,
+            offsets=offsets,
+            sku_codes=sku_codes.astype(np.int64),
+            quantities=grouped.to_numpy(),
+            sku_vocab=sku_vocab,
+        )
+
+    def __len__(self) -> int:
+        return len(self.order_keys)
+
+
+def build_stock_vector(stock_df: pd.DataFrame, sku_vocab: pd.Index) -> list:
+    """Build the integer-indexed stock vector for a SKU vocabulary.
+
+    SKUs missing from the stock file get 0. If the stock file contains the
+    same SKU more than once, the last value wins (same as building a dict).
+    Values keep their original numeric type so Final_Stock keeps the dtype
+    of the Stock column.
+
+    Args:
+        stock_df: Stock DataFrame with SKU and Stock columns
+        sku_vocab: SKU value for every SKU code
+
+    Returns:
+        List with one stock value per SKU code
+    """
+    stock_lookup = dict(zip(stock_df["SKU"], stock_df["Stock"].tolist()))
+    return [stock_lookup.get(sku, 0) for sku in sku_vocab]
+
+
+class AllocationLedger:
+    """Structured result of a stock allocation run.
+
+    Holds everything the allocation loop decided, so later phases can read
+    it instead of replaying orders against the DataFrame again:
+
+    - fulfillment_results: order_number -> {"fulfillable", "reason"}
+    - per-order SKU deductions of every fulfilled order
+    - a columnar shortage table for every unfulfillable order
+    - initial and final stock vector over the SKU vocabulary
+
+    Attributes:
+        lines (OrderLines): Grouped order lines the allocation walked.
+        fulfillment_results (dict): Status and reason per order number.
+        fulfilled_positions (list[int]): Positions (into ``lines``) of the
+            fulfilled orders, in allocation order.
+        shortages (pd.DataFrame): One row per lacking SKU of an unfulfillable
+            order, see SHORTAGE_COLUMNS.
+        initial_stock (list): Stock per SKU code before allocation.
+        final_stock (list): Stock per SKU code after allocation.
+        stock_sku_count (int): Number of SKU codes that come from the stock file.
+    """
+
+    def __init__(
+        self,
+        lines: OrderLines,
+        fulfillment_results: Dict[str, dict],
+        fulfilled_positions: List[int],
+        shortages: pd.DataFrame,
+        initial_stock: list,
+        final_stock: list,
+        stock_sku_count: int
+    ):
+        self.lines = lines
+        self.fulfillment_results = fulfillment_results
+        self.fulfilled_positions = fulfilled_positions
+        self.shortages = shortages
+        self.initial_stock = initial_stock
+        self.final_stock = final_stock
+        self.stock_sku_count = stock_sku_count
+
+    def final_stock_levels(self) -> pd.DataFrame:
+        """Final stock for every SKU of the stock file.
+
+        Returns:
+            DataFrame with columns ["SKU", "Final_Stock"], in stock file order
+        """
+        count = self.stock_sku_count
+        live_stock = dict(zip(self.lines.sku_vocab[:count], self.final_stock[:count]))
+        final_stock = pd.Series(live_stock, name="Final_Stock")
+        return final_stock.reset_index().rename(columns={"index": "SKU"})
+
+    def deductions(self) -> pd.DataFrame:
+        """Per-order SKU deductions of all fulfilled orders.
+
+        Returns:
+            DataFrame with columns ["Order_Number", "SKU", "Quantity"],
+            in allocation order
+        """
+        lines = self.lines
+        positions = np.asarray(self.fulfilled_positions, dtype=np.int64)
+        starts = lines.offsets[positions]
+        lengths = lines.offsets[positions + 1] - starts
+        # Expand each fulfilled order's [start, end) slice into line indices
+        lengths_before = np.cumsum(lengths) - lengths
+        line_index = np.repeat(starts - lengths_before, lengths) + np.arange(lengths.sum())
+
+        return pd.DataFrame({
+            "Order_Number": lines.order_keys.take(np.repeat(positions, lengths)),
+            "SKU": lines.sku_vocab.take(lines.sku_codes[line_index]),
+            "Quantity": lines.quantities[line_index],
+        })
+
+    def consumed_by_sku(self) -> pd.Series:
+        """Total quantity allocated per SKU across fulfilled orders.
+
+        Returns:
+            Series indexed by SKU (only SKUs that were consumed)
+        """
+        deductions = self.deductions()
+        return deductions.groupby("SKU", sort=False)["Quantity"].sum()
+
+
+def allocate_stock(
+    orders_df: pd.DataFrame,
+    stock_df: pd.DataFrame,
+    prioritized_order_numbers
+) -> AllocationLedger:
+    """Allocate stock to orders in priority sequence.
+
+    An order is fulfillable only if every SKU it needs is available in the
+    required quantity; in that case the stock is deducted. Otherwise every
+    lacking SKU is recorded in the ledger's shortage table.
+
+    Args:
+        orders_df: Orders DataFrame restricted to lines that consume stock
+        stock_df: Stock DataFrame with SKU and Stock columns
+        prioritized_order_numbers: Order numbers in allocation order
+
+    Returns:
+        AllocationLedger with fulfillment results, deductions and final stock
+    """
+    stock_skus = pd.unique(pd.Series(stock_df["SKU"].to_numpy(), dtype=object))
+    lines = OrderLines.from_dataframe(orders_df, stock_skus=stock_skus)
+    initial_stock = build_stock_vector(stock_df, lines.sku_vocab)
+    stock = list(initial_stock)
+
+    offsets = lines.offsets.tolist()
+    sku_codes = lines.sku_codes.tolist()
+    quantities = lines.quantities.tolist()
+    sku_vocab = lines.sku_vocab
+    order_positions = lines.order_keys.get_indexer(pd.Index(prioritized_order_numbers)).tolist()
+
+    fulfillment_results = {}
+    fulfilled_positions = []
+    # Shortage table columns, filled as plain lists inside the loop
+    short_positions, short_codes, short_needed, short_available = [], [], [], []
+    for order_number, position in zip(prioritized_order_numbers, order_positions):
+        if position < 0:
+            # Order has no stock-consuming lines (e.g. only NO_SKU rows)
+            fulfillment_results[order_number] = {"fulfillable": True, "reason": ""}
+            continue
+
+        start, end = offsets[position], offsets[position + 1]
+        can_fulfill_order = True
+        for i in range(start, end):
+            available = stock[sku_codes[i]]
+            if available == 0 or quantities[i] > available:
+                can_fulfill_order = False
+                short_positions.append(position)
+                short_codes.append(sku_codes[i])
+                short_needed.append(quantities[i])
+                short_available.append(available)
+
+        if can_fulfill_order:
+            fulfillment_results[order_number] = {"fulfillable": True, "reason": ""}
+            fulfilled_positions.append(position)
+            for i in range(start, end):
+                stock[sku_codes[i]] -= quantities[i]
+        else:
+            fulfillment_results[order_number] = {"fulfillable": False, "reason": ""}
+
+    short_available = pd.Series(short_available, dtype=np.float64)
+    shortages = pd.DataFrame({
+        "Order_Number": lines.order_keys.take(np.asarray(short_positions, dtype=np.int64)),
+        "SKU": sku_vocab.take(np.asarray(short_codes, dtype=np.int64)),
+        "Needed": pd.Series(short_needed, dtype=lines.quantities.dtype),
+        "Available": short_available,
+        "Kind": np.where(short_available == 0, SHORTAGE_OUT_OF_STOCK, SHORTAGE_INSUFFICIENT),
+    }, columns=SHORTAGE_COLUMNS)
+
+    # Human-readable reasons are derived from the table, not built in the loop
+    for order_number, reason in format_shortage_reasons(shortages).items():
+        fulfillment_results[order_number]["reason"] = reason
+
+    return AllocationLedger(
+        lines=lines,
+        fulfillment_results=fulfillment_results,
+        fulfilled_positions=fulfilled_positions,
+        shortages=shortages,
+        initial_stock=initial_stock,
+        final_stock=stock,
+        stock_sku_count=len(stock_skus),
+    )
+
+
+def format_shortage_reasons(shortages: pd.DataFrame) -> pd.Series:
+    """Build the "; "-joined reason text per order from a shortage table.
+
+    Format per SKU: "<SKU>: Out of stock" or
+    "<SKU>: Insufficient stock (need N, have M)".
+
+    Args:
+        shortages: Shortage table with SHORTAGE_COLUMNS
+
+    Returns:
+        Series indexed by Order_Number with the reason text, in table order
+    """
+    if shortages.empty:
+        return pd.Series(dtype=object)
+
+    sku_text = shortages["SKU"].astype(str)
+    needed_text = shortages["Needed"].astype(np.float64).astype(np.int64).astype(str)
+    available_text = shortages["Available"].astype(np.float64).astype(np.int64).astype(str)
+    reason_text = np.where(
+        shortages["Kind"] == SHORTAGE_OUT_OF_STOCK,
+        sku_text + ": Out of stock",
+        sku_text + ": Insufficient stock (need " + needed_text + ", have " + available_text + ")"
+    )
+
+    return (
+        pd.Series(reason_text, index=pd.Index(shortages["Order_Number"]), dtype=object)
+        .groupby(level=0, sort=False)
+        .agg("; ".join)
+    )
+
+
+def summarize_shortages_by_sku(shortages: pd.DataFrame) -> pd.DataFrame:
+    """Aggregate a shortage table into a "missing stock by SKU" view.
+
+    Args:
+        shortages: Shortage table with SHORTAGE_COLUMNS
+
+    Returns:
+        DataFrame with columns ["SKU", "Orders_Blocked", "Total_Needed",
+        "Out_Of_Stock_Orders"], sorted by Orders_Blocked (descending)
+    """
+    columns = ["SKU", "Orders_Blocked", "Total_Needed", "Out_Of_Stock_Orders"]
+    if shortages.empty:
+        return pd.DataFrame(columns=columns)
+
+    summary = (
+        shortages.assign(_out=shortages["Kind"] == SHORTAGE_OUT_OF_STOCK)
+        .groupby("SKU", sort=False)
+        .agg(
+            Orders_Blocked=("Order_Number", "nunique"),
+            Total_Needed=("Needed", "sum"),
+            Out_Of_Stock_Orders=("_out", "sum"),
+        )
+        .reset_index()
+        .sort_values("Orders_Blocked", ascending=False, kind="stable")
+        .reset_index(drop=True)
+    )
+    return summary[columns]
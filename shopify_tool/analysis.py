@@ -1,8 +1,16 @@
 import pandas as pd
 import numpy as np
+import re
 from typing import Tuple, Dict, List, Optional
 import logging
 
+from .allocation import AllocationLedger, allocate_stock, format_shortage_reasons
+from .order_index import normalize_order_key
+from .profiling import phase
+from .repeat_detection import RepeatDetector
+from .schema import apply_compact_schema
+from .stock_ledger import StockLedger
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,59 +52,109 @@ def _clean_and_prepare_data(
     """
     logger.debug("Phase 1/7: Cleaning and preparing data...")
 
-    # --- Step 0: Apply Column Mappings ---
+    orders_mappings, stock_mappings = _resolve_column_mappings(
+        orders_df.columns, stock_df.columns, column_mappings
+    )
+    set_decoders = column_mappings.get("set_decoders", {}) if column_mappings else {}
+
+    orders_clean_df = _clean_orders_data(
+        orders_df, orders_mappings, additional_columns_config, set_decoders
+    )
+    stock_clean_df = _clean_stock_data(stock_df, stock_mappings)
+
+    logger.debug(f"Cleaned {len(orders_clean_df)} order rows, {len(stock_clean_df)} SKUs")
+    return orders_clean_df, stock_clean_df
+
+
+# Default mappings for backward compatibility (Shopify + Bulgarian warehouse)
+DEFAULT_COLUMN_MAPPINGS = {
+    "orders": {
+        "Name": "Order_Number",
+        "Lineitem sku": "SKU",
+        "Lineitem quantity": "Quantity",
+        "Lineitem name": "Product_Name",
+        "Shipping Method": "Shipping_Method",
+        "Shipping Country": "Shipping_Country",
+        "Tags": "Tags",
+        "Notes": "Notes",
+        "Total": "Total_Price",
+        "Subtotal": "Subtotal"
+    },
+    "stock": {
+        "Артикул": "SKU",
+        "Име": "Product_Name",
+        "Наличност": "Stock"
+    }
+}
+
+# Order-level columns that are only filled on the first line of each order
+FORWARD_FILL_COLUMNS = ["Order_Number", "Shipping_Method", "Shipping_Country", "Total_Price", "Subtotal"]
+
+
+def _resolve_column_mappings(
+    orders_columns,
+    stock_columns,
+    column_mappings: Optional[dict] = None
+) -> Tuple[dict, dict]:
+    """
+    Pick the orders and stock column mappings to apply.
+
+    Args:
+        orders_columns: Column labels of the raw orders data
+        stock_columns: Column labels of the raw stock data
+        column_mappings: Configured mappings, or None for the defaults
+
+    Returns:
+        Tuple of (orders_mappings, stock_mappings). Both are empty when the
+        data already uses internal names and no mappings were configured.
+    """
     # Check if DataFrames already have internal names (backward compatibility for tests)
     orders_has_internal_names = all(
-        col in orders_df.columns for col in ["Order_Number", "SKU", "Quantity"]
+        col in orders_columns for col in ["Order_Number", "SKU", "Quantity"]
     )
     stock_has_internal_names = all(
-        col in stock_df.columns for col in ["SKU", "Stock"]
+        col in stock_columns for col in ["SKU", "Stock"]
     )
 
     # If DataFrames already have internal names, skip mapping
     if orders_has_internal_names and stock_has_internal_names and column_mappings is None:
         # Already using internal names (e.g., in tests), no mapping needed
-        pass
-    else:
-        # Apply column mappings
-        # Default mappings for backward compatibility (Shopify + Bulgarian warehouse)
-        if column_mappings is None:
-            column_mappings = {
-                "orders": {
-                    "Name": "Order_Number",
-                    "Lineitem sku": "SKU",
-                    "Lineitem quantity": "Quantity",
-                    "Lineitem name": "Product_Name",
-                    "Shipping Method": "Shipping_Method",
-                    "Shipping Country": "Shipping_Country",
-                    "Tags": "Tags",
-                    "Notes": "Notes",
-                    "Total": "Total_Price",
-                    "Subtotal": "Subtotal"
-                },
-                "stock": {
-                    "Артикул": "SKU",
-                    "Име": "Product_Name",
-                    "Наличност": "Stock"
-                }
-            }
+        return {}, {}
 
-        # Get mappings for orders and stock
-        orders_mappings = column_mappings.get("orders", {})
-        stock_mappings = column_mappings.get("stock", {})
+    if column_mappings is None:
+        column_mappings = DEFAULT_COLUMN_MAPPINGS
+    return column_mappings.get("orders", {}), column_mappings.get("stock", {})
 
-        # Apply mappings to orders DataFrame
-        # Only rename columns that exist in the DataFrame AND are different from internal names
-        orders_rename_map = {csv_col: internal_col for csv_col, internal_col in orders_mappings.items()
-                             if csv_col in orders_df.columns and csv_col != internal_col}
-        if orders_rename_map:
-            orders_df = orders_df.rename(columns=orders_rename_map)
 
-        # Apply mappings to stock DataFrame
-        stock_rename_map = {csv_col: internal_col for csv_col, internal_col in stock_mappings.items()
-                            if csv_col in stock_df.columns and csv_col != internal_col}
-        if stock_rename_map:
-            stock_df = stock_df.rename(columns=stock_rename_map)
+def _clean_orders_data(
+    orders_df: pd.DataFrame,
+    orders_mappings: dict,
+    additional_columns_config: Optional[List[dict]] = None,
+    set_decoders: Optional[dict] = None,
+    ffill_carry: Optional[dict] = None
+) -> pd.DataFrame:
+    """
+    Map, clean and normalize order lines (the orders half of Phase 1).
+
+    Args:
+        orders_df: Raw orders DataFrame (or one chunk of it)
+        orders_mappings: External -> internal column names for orders
+        additional_columns_config: Additional columns configuration
+        set_decoders: Set/bundle definitions to expand
+        ffill_carry: When cleaning a file chunk by chunk, the last value of
+            each forward-filled column seen so far. Leading blanks of the
+            chunk are filled from it and it is updated in place, so that
+            forward-filling across chunks matches the whole-file result.
+
+    Returns:
+        Cleaned orders DataFrame
+    """
+    # Apply mappings to orders DataFrame
+    # Only rename columns that exist in the DataFrame AND are different from internal names
+    orders_rename_map = {csv_col: internal_col for csv_col, internal_col in orders_mappings.items()
+                         if csv_col in orders_df.columns and csv_col != internal_col}
+    if orders_rename_map:
+        orders_df = orders_df.rename(columns=orders_rename_map)
 
     # Rename additional columns from CSV names to internal names
     if additional_columns_config:
@@ -113,29 +171,23 @@ def _clean_and_prepare_data(
             logger.info("No additional columns to rename (none enabled or found in CSV)")
 
     # --- Step 1: Data Cleaning (now using internal standard names) ---
-    # Forward-fill order-level columns
-    if "Order_Number" in orders_df.columns:
-        orders_df["Order_Number"] = orders_df["Order_Number"].ffill()
-    if "Shipping_Method" in orders_df.columns:
-        orders_df["Shipping_Method"] = orders_df["Shipping_Method"].ffill()
-    if "Shipping_Country" in orders_df.columns:
-        orders_df["Shipping_Country"] = orders_df["Shipping_Country"].ffill()
-    if "Total_Price" in orders_df.columns:
-        orders_df["Total_Price"] = orders_df["Total_Price"].ffill()
-    if "Subtotal" in orders_df.columns:
-        orders_df["Subtotal"] = orders_df["Subtotal"].ffill()
-
-    # Forward-fill additional order-level columns from config
+    # Forward-fill order-level columns, including order-level additional columns from config
+    ffill_columns = list(FORWARD_FILL_COLUMNS)
     if additional_columns_config:
-        order_level_additional = [
+        ffill_columns += [
             col["internal_name"]
             for col in additional_columns_config
             if col.get("is_order_level", False) and col.get("enabled", True)
         ]
-        for col_name in order_level_additional:
-            if col_name in orders_df.columns:
-                orders_df[col_name] = orders_df[col_name].ffill()
-                logger.debug(f"Forward-filled order-level additional column: {col_name}")
+    for col_name in ffill_columns:
+        if col_name in orders_df.columns:
+            orders_df[col_name] = orders_df[col_name].ffill()
+            if ffill_carry is not None and not orders_df.empty:
+                if col_name in ffill_carry:
+                    orders_df[col_name] = orders_df[col_name].fillna(ffill_carry[col_name])
+                last_value = orders_df[col_name].iloc[-1]
+                if pd.notna(last_value):
+                    ffill_carry[col_name] = last_value
 
     # Keep only relevant columns (internal names)
     # Base columns (critical + standard optional)
@@ -219,45 +271,29 @@ def _clean_and_prepare_data(
     orders_clean_df.loc[orders_clean_df["Has_SKU"], "SKU"] = \
         orders_clean_df.loc[orders_clean_df["Has_SKU"], "SKU"].apply(normalize_sku)
 
-    # Clean stock DataFrame (internal names)
-    required_stock_cols = ["SKU", "Stock"]
-    stock_cols_to_keep = [col for col in ["SKU", "Product_Name", "Stock"] if col in stock_df.columns]
-
-    # Verify required columns exist
-    missing_stock_cols = [col for col in required_stock_cols if col not in stock_df.columns]
-    if missing_stock_cols:
-        raise ValueError(f"Missing required columns in stock DataFrame after mapping: {missing_stock_cols}")
-
-    stock_clean_df = stock_df[stock_cols_to_keep].copy()
-    stock_clean_df = stock_clean_df.dropna(subset=["SKU"])
-    stock_clean_df = stock_clean_df.drop_duplicates(subset=["SKU"], keep="first")
-
-    # CRITICAL: Normalize SKU to standard format for consistent merging
-    # This handles float artifacts (5170.0 → "5170"), whitespace, and leading zeros
-    stock_clean_df["SKU"] = stock_clean_df["SKU"].apply(normalize_sku)
-
     # --- Set/Bundle Decoding ---
     # Expand sets into component SKUs before fulfillment simulation
     # Skip NO_SKU items (they don't participate in set expansion)
     from .set_decoder import decode_sets_in_orders
 
-    set_decoders = column_mappings.get("set_decoders", {}) if column_mappings else {}
     if set_decoders:
         logger.info(f"Decoding sets: {len(set_decoders)} definitions")
         # Only expand sets for items with actual SKU (skip NO_SKU)
-        items_with_sku = orders_clean_df[orders_clean_df["Has_SKU"] == True].copy()
-        no_sku_items = orders_clean_df[orders_clean_df["Has_SKU"] == False].copy()
+        with phase("set_decoding", rows_in=len(orders_clean_df)) as record:
+            items_with_sku = orders_clean_df[orders_clean_df["Has_SKU"] == True].copy()
+            no_sku_items = orders_clean_df[orders_clean_df["Has_SKU"] == False].copy()
 
-        expanded_items = decode_sets_in_orders(items_with_sku, set_decoders)
+            expanded_items = decode_sets_in_orders(items_with_sku, set_decoders)
 
-        # Add tracking columns to NO_SKU items for consistency
-        if not no_sku_items.empty:
-            no_sku_items["Original_SKU"] = no_sku_items["SKU"]
-            no_sku_items["Original_Quantity"] = no_sku_items["Quantity"]
-            no_sku_items["Is_Set_Component"] = False
+            # Add tracking columns to NO_SKU items for consistency
+            if not no_sku_items.empty:
+                no_sku_items["Original_SKU"] = no_sku_items["SKU"]
+                no_sku_items["Original_Quantity"] = no_sku_items["Quantity"]
+                no_sku_items["Is_Set_Component"] = False
 
-        # Combine expanded items with NO_SKU items (unchanged)
-        orders_clean_df = pd.concat([expanded_items, no_sku_items], ignore_index=True)
+            # Combine expanded items with NO_SKU items (unchanged)
+            orders_clean_df = pd.concat([expanded_items, no_sku_items], ignore_index=True)
+            record.rows_out = len(orders_clean_df)
         logger.info(f"Orders after expansion: {len(orders_clean_df)} rows")
     else:
         # No sets defined - add tracking columns anyway for consistency
@@ -265,8 +301,49 @@ def _clean_and_prepare_data(
         orders_clean_df["Original_Quantity"] = orders_clean_df["Quantity"]
         orders_clean_df["Is_Set_Component"] = False
 
-    logger.debug(f"Cleaned {len(orders_clean_df)} order rows, {len(stock_clean_df)} SKUs")
-    return orders_clean_df, stock_clean_df
+    return orders_clean_df
+
+
+def _clean_stock_data(stock_df: pd.DataFrame, stock_mappings: dict) -> pd.DataFrame:
+    """
+    Map and clean stock data (the stock half of Phase 1).
+
+    Args:
+        stock_df: Raw stock DataFrame
+        stock_mappings: External -> internal column names for stock
+
+    Returns:
+        Stock DataFrame with unique, normalized SKUs
+
+    Raises:
+        ValueError: If required columns missing after mapping
+    """
+    from .csv_utils import normalize_sku
+
+    # Apply mappings to stock DataFrame
+    stock_rename_map = {csv_col: internal_col for csv_col, internal_col in stock_mappings.items()
+                        if csv_col in stock_df.columns and csv_col != internal_col}
+    if stock_rename_map:
+        stock_df = stock_df.rename(columns=stock_rename_map)
+
+    # Clean stock DataFrame (internal names)
+    required_stock_cols = ["SKU", "Stock"]
+    stock_cols_to_keep = [col for col in ["SKU", "Product_Name", "Stock"] if col in stock_df.columns]
+
+    # Verify required columns exist
+    missing_stock_cols = [col for col in required_stock_cols if col not in stock_df.columns]
+    if missing_stock_cols:
+        raise ValueError(f"Missing required columns in stock DataFrame after mapping: {missing_stock_cols}")
+
+    stock_clean_df = stock_df[stock_cols_to_keep].copy()
+    stock_clean_df = stock_clean_df.dropna(subset=["SKU"])
+    stock_clean_df = stock_clean_df.drop_duplicates(subset=["SKU"], keep="first")
+
+    # CRITICAL: Normalize SKU to standard format for consistent merging
+    # This handles float artifacts (5170.0 → "5170"), whitespace, and leading zeros
+    stock_clean_df["SKU"] = stock_clean_df["SKU"].apply(normalize_sku)
+
+    return stock_clean_df
 
 
 def _prioritize_orders(orders_df: pd.DataFrame) -> pd.DataFrame:
@@ -315,23 +392,24 @@ def _simulate_stock_allocation(
     orders_df: pd.DataFrame,
     stock_df: pd.DataFrame,
     prioritized_orders: pd.DataFrame
-) -> Dict[str, str]:
+) -> AllocationLedger:
     """
     Simulate stock allocation across prioritized orders.
 
     Algorithm:
-    1. Initialize stock availability dict from stock DataFrame
+    1. Initialize stock availability vector from stock DataFrame
     2. Process orders in priority sequence
     3. For each order, check if all items available
     4. Mark order as fulfillable/not fulfillable
-    5. Deduct stock for fulfillable orders
+    5. Deduct stock for fulfillable orders (recorded in the allocation ledger)
 
     Skips items without SKU (Has_SKU=False) as they don't consume stock.
 
     Performance:
-    Uses VECTORIZED operations where possible. The main loop iterates over
-    unique orders (not individual items), which is necessary for the sequential
-    stock allocation logic.
+    Order lines are grouped ONCE into CSR-style arrays (see allocation.py).
+    The main loop still iterates over unique orders, which is necessary for
+    the sequential stock allocation logic, but each step only touches the
+    lines of the current order instead of re-filtering the whole DataFrame.
 
     Args:
         orders_df: Cleaned orders DataFrame with item counts
@@ -339,8 +417,11 @@ def _simulate_stock_allocation(
         prioritized_orders: DataFrame with ["Order_Number", "item_count"] in priority order
 
     Returns:
-        Dictionary mapping order_number to fulfillment status
-        Format: {"ORDER-123": "Fulfillable", "ORDER-124": "Not Fulfillable"}
+        AllocationLedger with:
+        - fulfillment_results: dict mapping order_number to fulfillment status
+          Format: {"ORDER-123": {"fulfillable": True, "reason": ""}, ...}
+        - per-order SKU deductions of fulfilled orders
+        - final stock vector (read by _calculate_final_stock)
 
     Note:
         This is the core fulfillment simulation algorithm.
@@ -357,103 +438,76 @@ def _simulate_stock_allocation(
     else:
         orders_for_simulation = orders_df.copy()
 
-    # Initialize stock tracking - VECTORIZED dict creation
-    live_stock = pd.Series(stock_df.Stock.values, index=stock_df.SKU).to_dict()
-    fulfillment_results = {}
-
-    # Add item_count to orders for filtering
-    order_item_counts = orders_for_simulation.groupby("Order_Number").size().rename("item_count")
-    orders_with_counts = pd.merge(orders_for_simulation, order_item_counts, on="Order_Number")
-
-    # Iterate over prioritized orders (necessary for sequential allocation)
-    for order_number in prioritized_orders["Order_Number"]:
-        # Get all items for this order - VECTORIZED filter
-        order_items = orders_with_counts[orders_with_counts["Order_Number"] == order_number]
-
-        # Check if order can be fulfilled - VECTORIZED check
-        # Group by SKU to handle multiple line items of same SKU
-        required_quantities = order_items.groupby("SKU")["Quantity"].sum()
-
-        can_fulfill_order = True
-        unfulfillable_reasons = []
-
-        for sku, required_qty in required_quantities.items():
-            available = live_stock.get(sku, 0)
-            if available == 0:
-                unfulfillable_reasons.append(f"{sku}: Out of stock")
-                can_fulfill_order = False
-            elif required_qty > available:
-                unfulfillable_reasons.append(
-                    f"{sku}: Insufficient stock (need {int(required_qty)}, have {int(available)})"
-                )
-                can_fulfill_order = False
-
-        # Update fulfillment status and deduct stock if fulfillable
-        if can_fulfill_order:
-            fulfillment_results[order_number] = {
-                "fulfillable": True,
-                "reason": ""
-            }
-            # Deduct stock - VECTORIZED operation
-            for sku, qty in required_quantities.items():
-                live_stock[sku] -= qty
-        else:
-            fulfillment_results[order_number] = {
-                "fulfillable": False,
-                "reason": "; ".join(unfulfillable_reasons)
-            }
+    # Group order lines once into per-order (SKU code, quantity) arrays and
+    # walk them in priority sequence against an integer-indexed stock vector
+    ledger = allocate_stock(
+        orders_for_simulation, stock_df, prioritized_orders["Order_Number"]
+    )
 
+    fulfillment_results = ledger.fulfillment_results
     fulfillable_count = sum(1 for result in fulfillment_results.values() if result.get("fulfillable", False))
     logger.debug(f"Fulfillable: {fulfillable_count}/{len(fulfillment_results)} orders")
 
-    return fulfillment_results
+    return ledger
 
 
-def _calculate_final_stock(
-    stock_df: pd.DataFrame,
-    fulfillment_results: Dict[str, str],
-    orders_df: pd.DataFrame
-) -> pd.DataFrame:
+def _calculate_final_stock(ledger: AllocationLedger) -> pd.DataFrame:
     """
     Calculate final stock levels after fulfillment simulation.
 
-    Recalculates stock by replaying the fulfillment decisions to determine
-    remaining stock for each SKU.
+    The allocation step already tracked remaining stock per SKU, so the
+    final levels are read straight from its ledger instead of replaying
+    every fulfillable order against the DataFrame.
 
     Args:
-        stock_df: Initial stock DataFrame
-        fulfillment_results: Dict of order_number -> status from simulation
-        orders_df: Orders DataFrame
+        ledger: AllocationLedger returned by _simulate_stock_allocation
 
     Returns:
         DataFrame with columns ["SKU", "Final_Stock"]
-
-    Note:
-        This recreates the stock calculation based on fulfillment results.
     """
     logger.debug("Phase 4/7: Calculating final stock levels...")
 
-    # Initialize final stock from initial stock
-    live_stock = pd.Series(stock_df.Stock.values, index=stock_df.SKU).to_dict()
-
-    # Replay fulfillment to calculate final stock
-    for order_number, result in fulfillment_results.items():
-        if result.get("fulfillable", False):
-            # Get items for this order
-            order_items = orders_df[orders_df["Order_Number"] == order_number]
-            # Deduct stock - VECTORIZED groupby
-            # Skip NO_SKU items (they don't consume stock)
-            for sku, qty in order_items.groupby("SKU")["Quantity"].sum().items():
-                if sku in live_stock:  # Only deduct if SKU exists in stock
-                    live_stock[sku] -= qty
-
-    # Convert to DataFrame
-    final_stock_levels = pd.Series(live_stock, name="Final_Stock").reset_index().rename(columns={"index": "SKU"})
+    final_stock_levels = ledger.final_stock_levels()
 
     logger.debug(f"Calculated final stock for {len(final_stock_levels)} SKUs")
     return final_stock_levels
 
 
+def _repeated_order_numbers(history_df: pd.DataFrame, repeat_window_days: int = 1):
+    """
+    Order numbers from history that count as repeats today.
+
+    These are the orders executed at least ``repeat_window_days`` days ago
+    (see ``_detect_repeated_orders``), or the whole history when it has no
+    usable Execution_Date. The result depends only on the history and
+    today's date, so it also identifies the history "version" an analysis
+    result depends on (see result_cache.py).
+
+    Args:
+        history_df: Historical orders DataFrame with Order_Number, Execution_Date columns
+        repeat_window_days: Minimum number of days that must pass (default: 1)
+
+    Returns:
+        Array of Order_Number values (str)
+    """
+    try:
+        detector = RepeatDetector.for_history(history_df)
+    except Exception as e:
+        logger.error(f"Failed to parse history dates: {e}", exc_info=True)
+        # Fallback to full history
+        logger.warning("Falling back to full history due to date parsing error")
+        return history_df["Order_Number"].unique() if not history_df.empty else []
+
+    repeated_orders = detector.repeated_order_numbers(repeat_window_days)
+    if detector.dated:
+        cutoff_date = RepeatDetector.cutoff_date(repeat_window_days)
+        logger.info(
+            f"Using {len(repeated_orders)} old history orders (>= {repeat_window_days} days ago) "
+            f"(total: {len(detector)}, cutoff: < {cutoff_date.strftime('%Y-%m-%d')})"
+        )
+    return repeated_orders
+
+
 def _detect_repeated_orders(
     final_df: pd.DataFrame,
     history_df: pd.DataFrame,
@@ -491,61 +545,16 @@ def _detect_repeated_orders(
     """
     logger.debug(f"Phase 5/7: Detecting repeated orders (window: {repeat_window_days} days)...")
 
-    # Handle empty history or missing date column (backward compatibility)
-    if history_df.empty or "Execution_Date" not in history_df.columns:
-        logger.warning("History has no Execution_Date column, using full history")
-        repeated_orders = history_df["Order_Number"].unique() if not history_df.empty else []
-    else:
-        # FILTER history by date window
-        from datetime import datetime, timedelta
-
-        try:
-            # Parse dates (handle errors gracefully)
-            history_df_copy = history_df.copy()
-            history_df_copy["Execution_Date_Parsed"] = pd.to_datetime(
-                history_df_copy["Execution_Date"],
-                errors='coerce'
-            )
+    try:
+        detector = RepeatDetector.for_history(history_df)
+        is_repeat = detector.repeated_mask(final_df["Order_Number"], repeat_window_days)
+    except Exception as e:
+        logger.error(f"Failed to parse history dates: {e}", exc_info=True)
+        logger.warning("Falling back to full history due to date parsing error")
+        is_repeat = final_df["Order_Number"].isin(history_df["Order_Number"].unique())
 
-            # Check if all dates are invalid (NaT)
-            if history_df_copy["Execution_Date_Parsed"].isna().all():
-                logger.warning("All dates in history are invalid, using full history")
-                repeated_orders = history_df["Order_Number"].unique()
-            else:
-                # Normalize to date-only (remove time component) for consistent comparison
-                history_df_copy["Execution_Date_Parsed"] = history_df_copy["Execution_Date_Parsed"].dt.normalize()
-
-                # Calculate cutoff: today minus N days
-                # We want orders that are STRICTLY older than (today - N days)
-                # Example: if repeat_window_days=1 and today=2026-01-16:
-                #   - cutoff = 2026-01-16 (today)
-                #   - We want: Execution_Date < 2026-01-16 (i.e., 2026-01-15 and earlier)
-                today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-                cutoff_date = today - timedelta(days=repeat_window_days - 1)
-
-                # Filter history: only orders executed BEFORE cutoff (>= N days ago)
-                old_history = history_df_copy[
-                    history_df_copy["Execution_Date_Parsed"] < cutoff_date
-                ]
-
-                repeated_orders = old_history["Order_Number"].unique()
-
-                logger.info(
-                    f"Using {len(old_history)} old history records (>= {repeat_window_days} days ago) "
-                    f"(total: {len(history_df)}, cutoff: < {cutoff_date.strftime('%Y-%m-%d')})"
-                )
-        except Exception as e:
-            logger.error(f"Failed to parse history dates: {e}", exc_info=True)
-            # Fallback to full history
-            repeated_orders = history_df["Order_Number"].unique()
-            logger.warning("Falling back to full history due to date parsing error")
-
-    # VECTORIZED: Check if Order_Number exists in filtered history
-    repeated = np.where(
-        final_df["Order_Number"].isin(repeated_orders),
-        "Repeat",
-        ""
-    )
+    # VECTORIZED: one binary search of all order numbers in the sorted history
+    repeated = np.where(is_repeat, "Repeat", "")
 
     repeated_count = (repeated == "Repeat").sum()
     logger.debug(f"Found {repeated_count} repeated orders within {repeat_window_days} days")
@@ -574,16 +583,25 @@ def _migrate_packaging_tags(final_df: pd.DataFrame) -> pd.DataFrame:
 
         logger.info("Migrating Packaging_Tags to Internal_Tags")
 
-        # VECTORIZED approach: Apply function to each row
-        # While apply() is not fully vectorized, it's better than iterrows()
-        # and necessary here because add_tag modifies a JSON string
-        def migrate_tag(row):
-            packaging_tag = row["Packaging_Tags"]
-            if pd.notna(packaging_tag) and packaging_tag != "":
-                return add_tag(row["Internal_Tags"], str(packaging_tag))
-            return row["Internal_Tags"]
-
-        final_df["Internal_Tags"] = final_df.apply(migrate_tag, axis=1)
+        # VECTORIZED approach: add_tag() works on JSON strings, so it is only
+        # evaluated once per unique (Internal_Tags, Packaging_Tags) pair and the
+        # results are merged back onto the rows
+        packaging_tags = final_df["Packaging_Tags"]
+        has_packaging_tag = packaging_tags.notna() & (packaging_tags != "")
+        if has_packaging_tag.any():
+            pairs = pd.DataFrame({
+                "Internal_Tags": final_df.loc[has_packaging_tag, "Internal_Tags"].to_numpy(),
+                "Packaging_Tags": packaging_tags[has_packaging_tag].astype(str).to_numpy(),
+            })
+            unique_pairs = pairs.drop_duplicates().copy()
+            unique_pairs["Migrated_Tags"] = [
+                add_tag(internal_tags, packaging_tag)
+                for internal_tags, packaging_tag in zip(
+                    unique_pairs["Internal_Tags"], unique_pairs["Packaging_Tags"]
+                )
+            ]
+            migrated = pairs.merge(unique_pairs, on=["Internal_Tags", "Packaging_Tags"], how="left")
+            final_df.loc[has_packaging_tag, "Internal_Tags"] = migrated["Migrated_Tags"].to_numpy()
         logger.info("Packaging_Tags migration completed")
 
     return final_df
@@ -598,7 +616,8 @@ def _merge_results_to_dataframe(
     history_df: pd.DataFrame,
     courier_mappings: Optional[dict] = None,
     repeat_window_days: int = 1,
-    additional_columns_config: Optional[list] = None
+    additional_columns_config: Optional[list] = None,
+    shortages: Optional[pd.DataFrame] = None
 ) -> pd.DataFrame:
     """
     Merge all analysis results into final output DataFrame.
@@ -621,6 +640,9 @@ def _merge_results_to_dataframe(
         fulfillment_results: Dict of order fulfillment statuses
         history_df: Historical fulfillment data
         courier_mappings: Optional courier mapping configuration
+        shortages: Optional shortage table from the allocation ledger. When
+            given, "Cannot fulfill" notes are built from it; otherwise from
+            the reason strings in fulfillment_results.
 
     Returns:
         Complete analyzed DataFrame ready for reporting
@@ -696,23 +718,27 @@ def _merge_results_to_dataframe(
     final_df["Stock"] = final_df["Stock"].fillna(0)
 
     # Use Shipping_Method with underscore (internal name)
+    # VECTORIZED: courier patterns are compiled once and only unique methods are matched
     if "Shipping_Method" in final_df.columns:
-        final_df["Shipping_Provider"] = final_df["Shipping_Method"].apply(
-            lambda method: _generalize_shipping_method(method, courier_mappings)
+        final_df["Shipping_Provider"] = CourierMatcher(courier_mappings).map_series(
+            final_df["Shipping_Method"]
         )
     else:
         final_df["Shipping_Provider"] = "Unknown"
 
-    # Map fulfillment results
-    # Extract status from the new dict structure
-    def get_fulfillment_status(order_number):
-        result = fulfillment_results.get(order_number, {})
-        if isinstance(result, dict):
-            return "Fulfillable" if result.get("fulfillable", False) else "Not Fulfillable"
-        # Backward compatibility: if result is a string
-        return result
-
-    final_df["Order_Fulfillment_Status"] = final_df["Order_Number"].map(get_fulfillment_status)
+    # Map fulfillment results - VECTORIZED lookup keyed on Order_Number
+    # Orders missing from the results default to "Not Fulfillable"
+    status_by_order = {
+        order_number: (
+            ("Fulfillable" if result.get("fulfillable", False) else "Not Fulfillable")
+            if isinstance(result, dict)
+            else result  # Backward compatibility: result is already a status string
+        )
+        for order_number, result in fulfillment_results.items()
+    }
+    final_df["Order_Fulfillment_Status"] = (
+        final_df["Order_Number"].map(status_by_order).fillna("Not Fulfillable")
+    )
 
     # Destination_Country now populated for ALL couriers (not just DHL)
     # All major couriers (DHL, PostOne, DPD) ship internationally
@@ -725,33 +751,37 @@ def _merge_results_to_dataframe(
     # Detect repeated orders - VECTORIZED
     final_df["System_note"] = _detect_repeated_orders(final_df, history_df, repeat_window_days)
 
-    # Add unfulfillable reasons to System_note
-    def add_fulfillment_reason(row):
-        order_number = row["Order_Number"]
-        result = fulfillment_results.get(order_number, {})
-
-        if isinstance(result, dict) and not result.get("fulfillable", True):
-            reason = result.get("reason", "Unknown reason")
-            existing_note = row["System_note"]
-
-            # Append reason to existing note
-            if pd.notna(existing_note) and existing_note != "":
-                return f"{existing_note}; Cannot fulfill: {reason}"
-            else:
-                return f"Cannot fulfill: {reason}"
-
-        return row["System_note"]
-
-    final_df["System_note"] = final_df.apply(add_fulfillment_reason, axis=1)
+    # Add unfulfillable reasons to System_note - VECTORIZED join on Order_Number
+    if shortages is not None:
+        reasons = format_shortage_reasons(shortages).to_dict()
+    else:
+        reasons = {
+            order_number: result.get("reason", "Unknown reason")
+            for order_number, result in fulfillment_results.items()
+            if isinstance(result, dict) and not result.get("fulfillable", True)
+        }
+    reason_notes = final_df["Order_Number"].map(
+        {order_number: f"Cannot fulfill: {reason}" for order_number, reason in reasons.items()}
+    )
+    has_reason = reason_notes.notna()
+    if has_reason.any():
+        existing_notes = final_df["System_note"]
+        has_existing = existing_notes.notna() & (existing_notes != "")
+        final_df["System_note"] = existing_notes.mask(
+            has_reason,
+            reason_notes.mask(has_existing, existing_notes + "; " + reason_notes)
+        )
 
     # Mark NO_SKU orders as Not Fulfillable with explanation
     if "Has_SKU" in final_df.columns:
         no_sku_mask = final_df["Has_SKU"] == False
         if no_sku_mask.any():
             final_df.loc[no_sku_mask, "Order_Fulfillment_Status"] = "Not Fulfillable"
-            # Add NO_SKU tag to System_note
-            final_df.loc[no_sku_mask, "System_note"] = final_df.loc[no_sku_mask, "System_note"].apply(
-                lambda note: f"{note} [NO_SKU]" if pd.notna(note) and note != "" else "[NO_SKU]"
+            # Add NO_SKU tag to System_note - VECTORIZED
+            no_sku_notes = final_df.loc[no_sku_mask, "System_note"]
+            has_note = no_sku_notes.notna() & (no_sku_notes != "")
+            final_df.loc[no_sku_mask, "System_note"] = np.where(
+                has_note, no_sku_notes.astype(str) + " [NO_SKU]", "[NO_SKU]"
             )
             logger.info(f"Marked {no_sku_mask.sum()} NO_SKU items as Not Fulfillable")
 
@@ -894,6 +924,105 @@ def _generate_summary_reports(
     return summary_present_df, summary_missing_df
 
 
+# Hardcoded courier rules used when no courier_mappings are configured
+DEFAULT_COURIER_PATTERNS = [
+    ("DHL", ["dhl"]),
+    ("DPD", ["dpd"]),
+    ("PostOne", ["international shipping"]),
+]
+
+
+class CourierMatcher:
+    """Maps raw shipping method names to standardized courier codes.
+
+    Built once from courier_mappings: all couriers are compiled into a single
+    regex with one anchored lookahead alternative per courier, e.g.
+
+        ^(?:(?=.*?(?:dhl|dhl express))(?P<c0>)|(?=.*?(?:dpd))(?P<c1>))
+
+    The regex engine tries the alternatives in order, so the first courier
+    (in mapping order) with any pattern contained in the method wins, exactly
+    like checking couriers one by one.
+
+    The courier_mappings formats are the same as for
+    _generalize_shipping_method().
+
+    Example:
+        >>> matcher = CourierMatcher({"DHL": {"patterns": ["dhl"]}})
+        >>> matcher.match("dhl express")
+        'DHL'
+        >>> matcher.map_series(orders_df["Shipping_Method"])
+    """
+
+    def __init__(self, courier_mappings=None):
+        """Compile the matcher.
+
+        Args:
+            courier_mappings (dict, optional): Courier mapping configuration.
+                If None or empty, uses hardcoded fallback rules.
+        """
+        if courier_mappings:
+            rules = []
+            for courier_code, mapping_data in courier_mappings.items():
+                if isinstance(mapping_data, dict):
+                    # New format: {"DHL": {"patterns": ["dhl", "dhl express"]}}
+                    rules.append((courier_code, mapping_data.get("patterns", [])))
+                else:
+                    # Legacy format: {"dhl": "DHL"} - the key is the pattern
+                    rules.append((mapping_data, [courier_code]))
+        else:
+            rules = DEFAULT_COURIER_PATTERNS
+
+        self._couriers = []
+        alternatives = []
+        for courier, patterns in rules:
+            if not patterns:
+                continue
+            group_name = f"c{len(self._couriers)}"
+            self._couriers.append(courier)
+            pattern_regex = "|".join(re.escape(pattern.lower()) for pattern in patterns)
+            alternatives.append(f"(?=.*?(?:{pattern_regex}))(?P<{group_name}>)")
+
+        self._regex = re.compile(f"^(?:{'|'.join(alternatives)})", re.DOTALL) if alternatives else None
+
+    def match(self, method):
+        """Standardize a single shipping method.
+
+        Args:
+            method (str | float): Raw shipping method, NaN for empty values.
+
+        Returns:
+            str: Courier code, 'Unknown' for empty values, or the title-cased
+            method if no courier matches.
+        """
+        if pd.isna(method):
+            return "Unknown"
+        method_str = str(method)
+        if not method_str.strip():
+            return "Unknown"
+
+        if self._regex is not None:
+            found = self._regex.match(method_str.lower())
+            if found:
+                return self._couriers[int(found.lastgroup[1:])]
+
+        return method_str.title()
+
+    def map_series(self, methods: pd.Series) -> pd.Series:
+        """Standardize a whole column, matching each unique value only once.
+
+        Args:
+            methods: Series of raw shipping methods
+
+        Returns:
+            Series of courier codes aligned with ``methods``
+        """
+        codes, uniques = pd.factorize(methods, use_na_sentinel=True)
+        # Last slot is used for missing values (code -1)
+        mapped = np.array([self.match(method) for method in uniques] + ["Unknown"], dtype=object)
+        return pd.Series(mapped[codes], index=methods.index, name=methods.name)
+
+
 def _generalize_shipping_method(method, courier_mappings=None):
     """Standardizes raw shipping method names to a consistent format.
 
@@ -910,6 +1039,9 @@ def _generalize_shipping_method(method, courier_mappings=None):
     If the method is not recognized, it returns a title-cased version of the
     input. Handles NaN values by returning 'Unknown'.
 
+    For whole columns use CourierMatcher directly: it compiles the mappings
+    once and matches each unique method only once.
+
     Args:
         method (str | float): The raw shipping method from the orders file.
             Can be a float (NaN) for empty values.
@@ -928,42 +1060,7 @@ def _generalize_shipping_method(method, courier_mappings=None):
         >>> _generalize_shipping_method(None)
         'Unknown'
     """
-    # Handle NaN and empty values
-    if pd.isna(method):
-        return "Unknown"
-    method_str = str(method)
-    if not method_str.strip():
-        return "Unknown"
-
-    method_lower = method_str.lower()
-
-    # If courier_mappings provided and not empty, use dynamic mapping
-    if courier_mappings:
-        # Check if new format (dict of dicts with "patterns" key)
-        # or legacy format (simple dict mapping)
-        for courier_code, mapping_data in courier_mappings.items():
-            if isinstance(mapping_data, dict):
-                # New format: {"DHL": {"patterns": ["dhl", "dhl express"]}}
-                patterns = mapping_data.get("patterns", [])
-                for pattern in patterns:
-                    if pattern.lower() in method_lower:
-                        return courier_code
-            else:
-                # Legacy format: {"dhl": "DHL"}
-                # Check if the pattern (key) is in the method
-                if courier_code.lower() in method_lower:
-                    return mapping_data
-    else:
-        # Fallback to hardcoded rules for backward compatibility
-        if "dhl" in method_lower:
-            return "DHL"
-        if "dpd" in method_lower:
-            return "DPD"
-        if "international shipping" in method_lower:
-            return "PostOne"
-
-    # If no match found, return title-cased version
-    return method_str.title()
+    return CourierMatcher(courier_mappings).match(method)
 
 
 def run_analysis(stock_df, orders_df, history_df, column_mappings=None, courier_mappings=None, repeat_window_days=1):
@@ -1048,45 +1145,61 @@ def run_analysis(stock_df, orders_df, history_df, column_mappings=None, courier_
         if enabled_additional:
             logger.info(f"Enabled columns: {[col['csv_name'] for col in enabled_additional]}")
 
-        orders_clean, stock_clean = _clean_and_prepare_data(
-            orders_df, stock_df, column_mappings, additional_columns_config
-        )
+        with phase("clean", rows_in=len(orders_df)) as record:
+            orders_clean, stock_clean = _clean_and_prepare_data(
+                orders_df, stock_df, column_mappings, additional_columns_config
+            )
+            record.rows_out = len(orders_clean)
 
         logger.info(f"After cleaning: orders_clean has {len(orders_clean.columns)} columns: {list(orders_clean.columns)}")
 
         # Phase 2: Prioritize orders
         logger.info("Phase 2/7: Order prioritization (multi-item first)")
-        prioritized_orders = _prioritize_orders(orders_clean)
+        with phase("prioritize", rows_in=len(orders_clean)) as record:
+            prioritized_orders = _prioritize_orders(orders_clean)
+            record.rows_out = len(prioritized_orders)
 
         # Phase 3: Simulate stock allocation
         logger.info("Phase 3/7: Stock allocation simulation")
-        fulfillment_results = _simulate_stock_allocation(
-            orders_clean, stock_clean, prioritized_orders
-        )
+        with phase("allocate", rows_in=len(orders_clean)) as record:
+            ledger = _simulate_stock_allocation(
+                orders_clean, stock_clean, prioritized_orders
+            )
+            fulfillment_results = ledger.fulfillment_results
 
-        # Phase 4: Calculate final stock
-        logger.info("Phase 4/7: Final stock calculations")
-        final_stock = _calculate_final_stock(
-            stock_clean, fulfillment_results, orders_clean
-        )
+            # Phase 4: Calculate final stock (read from the allocation ledger)
+            logger.info("Phase 4/7: Final stock calculations")
+            final_stock = _calculate_final_stock(ledger)
+            record.rows_out = len(fulfillment_results)
 
         # Phase 5: Already handled in Phase 6 (_detect_repeated_orders is called there)
         # Phase 6: Merge all results
         logger.info("Phase 5/7: Merging results to final DataFrame")
-        order_item_counts = orders_clean.groupby("Order_Number").size().rename("item_count")
-        final_df = _merge_results_to_dataframe(
-            orders_clean, stock_clean, order_item_counts, final_stock,
-            fulfillment_results, history_df, courier_mappings, repeat_window_days,
-            additional_columns_config
-        )
+        with phase("merge", rows_in=len(orders_clean)) as record:
+            order_item_counts = orders_clean.groupby("Order_Number").size().rename("item_count")
+            final_df = _merge_results_to_dataframe(
+                orders_clean, stock_clean, order_item_counts, final_stock,
+                fulfillment_results, history_df, courier_mappings, repeat_window_days,
+                additional_columns_config, shortages=ledger.shortages
+            )
+            record.rows_out = len(final_df)
 
         # Phase 7: Generate summary reports
         logger.info("Phase 6/7: Generating summary reports")
-        summary_present_df, summary_missing_df = _generate_summary_reports(final_df)
+        with phase("summaries", rows_in=len(final_df)) as record:
+            summary_present_df, summary_missing_df = _generate_summary_reports(final_df)
+            record.rows_out = len(summary_present_df) + len(summary_missing_df)
 
         # Phase 8: Calculate statistics
         logger.info("Phase 7/7: Calculating statistics")
-        stats = recalculate_statistics(final_df)
+        with phase("statistics", rows_in=len(final_df)):
+            stats = recalculate_statistics(final_df)
+
+        # Store the result with the compact column schema (categoricals,
+        # Arrow strings, int32 counters) before handing it to the caller
+        with phase("compact_schema", rows_in=len(final_df)) as record:
+            final_df = apply_compact_schema(final_df)
+            record.rows_out = len(final_df)
 
         logger.info("=" * 60)
         logger.info("ANALYSIS COMPLETED SUCCESSFULLY")
@@ -1109,6 +1222,48 @@ def run_analysis(stock_df, orders_df, history_df, column_mappings=None, courier_
         raise
 
 
+def _count_distinct(codes, n_codes):
+    """Counts distinct non-negative values in an array of factorized codes."""
+    seen = np.zeros(n_codes, dtype=bool)
+    seen[codes[codes >= 0]] = True
+    return int(np.count_nonzero(seen))
+
+
+def _count_distinct_per_group(group_codes, codes, n_groups, n_codes):
+    """Counts distinct non-negative ``codes`` within each group, in one pass.
+
+    Each (group, code) pair is encoded as one integer; the distinct pairs
+    are then counted per group.
+    """
+    valid = codes >= 0
+    pairs = np.unique(group_codes[valid].astype(np.int64) * n_codes + codes[valid])
+    return np.bincount(pairs // max(n_codes, 1), minlength=n_groups)
+
+
+def _sum_per_group(values, codes, n_groups):
+    """Sums ``values`` per group code, skipping missing codes and values.
+
+    Integer input gives integer sums, like ``groupby().sum()``.
+    """
+    valid = codes >= 0
+    weights = np.nan_to_num(values.to_numpy(dtype=np.float64)[valid])
+    sums = np.bincount(codes[valid], weights=weights, minlength=n_groups)
+    if pd.api.types.is_integer_dtype(values.dtype):
+        return sums.astype(np.int64)
+    return sums
+
+
+def _first_valid_per_group(values, codes, n_groups):
+    """Returns the first non-null value of each group, like ``groupby().first()``."""
+    rows = np.flatnonzero((codes >= 0) & values.notna().to_numpy())
+    first = np.full(n_groups, len(values), dtype=np.intp)
+    np.minimum.at(first, codes[rows], rows)
+    found = first < len(values)
+    result = pd.Series(np.nan, index=range(n_groups), dtype=object)
+    result[found] = values.iloc[first[found]].tolist()
+    return result
+
+
 def recalculate_statistics(df):
     """Calculates statistics based on the provided analysis DataFrame.
 
@@ -1145,54 +1300,71 @@ def recalculate_statistics(df):
         logger.error(f"Available columns: {list(df.columns)}")
         raise ValueError(f"DataFrame missing required columns: {missing}")
 
-    # Add Shipping_Provider if missing (older sessions may not have it)
+    # Shipping_Provider is missing in older sessions - treat it as 'Unknown'
     if "Shipping_Provider" not in df.columns:
         import logging
         logger = logging.getLogger("ShopifyToolLogger")
         logger.warning("Shipping_Provider column missing - defaulting to 'Unknown'")
-        df = df.copy()
-        df["Shipping_Provider"] = "Unknown"
 
-    stats = {}
-    completed_orders_df = df[df["Order_Fulfillment_Status"] == "Fulfillable"].copy()
-    not_completed_orders_df = df[df["Order_Fulfillment_Status"] == "Not Fulfillable"]
+    # Factorize the key columns once; everything below works on the codes
+    status = df["Order_Fulfillment_Status"]
+    completed = (status == "Fulfillable").to_numpy()
+    not_completed = (status == "Not Fulfillable").to_numpy()
+    order_codes, order_uniques = pd.factorize(df["Order_Number"])
+    n_orders = len(order_uniques)
+    quantity = df["Quantity"]
 
-    stats["total_orders_completed"] = int(completed_orders_df["Order_Number"].nunique())
-    stats["total_orders_not_completed"] = int(not_completed_orders_df["Order_Number"].nunique())
-    stats["total_items_to_write_off"] = int(completed_orders_df["Quantity"].sum())
-    stats["total_items_not_to_write_off"] = int(not_completed_orders_df["Quantity"].sum())
+    stats = {}
+    stats["total_orders_completed"] = _count_distinct(order_codes[completed], n_orders)
+    stats["total_orders_not_completed"] = _count_distinct(order_codes[not_completed], n_orders)
+    stats["total_items_to_write_off"] = int(quantity[completed].sum())
+    stats["total_items_not_to_write_off"] = int(quantity[not_completed].sum())
 
     courier_stats = []
-    if not completed_orders_df.empty:
-        # Fill NA to include 'Unknown' providers in the stats
-        completed_orders_df.loc[:, "Shipping_Provider"] = completed_orders_df["Shipping_Provider"].fillna("Unknown")
-        grouped_by_courier = completed_orders_df.groupby("Shipping_Provider")
-        for provider, group in grouped_by_courier:
-            courier_data = {
-                "courier_id": provider,
-                "orders_assigned": int(group["Order_Number"].nunique()),
-                "repeated_orders_found": int(group[group["System_note"] == "Repeat"]["Order_Number"].nunique()),
-            }
-            courier_stats.append(courier_data)
+    if completed.any():
+        if "Shipping_Provider" in df.columns:
+            provider_codes, providers = pd.factorize(df["Shipping_Provider"][completed])
+            providers = list(providers)
+        else:
+            provider_codes = np.full(int(completed.sum()), -1, dtype=np.intp)
+            providers = []
+        # Missing providers are reported as 'Unknown'
+        if (provider_codes < 0).any():
+            if "Unknown" not in providers:
+                providers.append("Unknown")
+            provider_codes = np.where(provider_codes < 0, providers.index("Unknown"), provider_codes)
+
+        completed_orders = order_codes[completed]
+        repeat = (df["System_note"][completed] == "Repeat").to_numpy()
+        assigned = _count_distinct_per_group(provider_codes, completed_orders, len(providers), n_orders)
+        repeated = _count_distinct_per_group(
+            provider_codes[repeat], completed_orders[repeat], len(providers), n_orders
+        )
+        for code in sorted(range(len(providers)), key=lambda c: providers[c]):
+            courier_stats.append({
+                "courier_id": providers[code],
+                "orders_assigned": int(assigned[code]),
+                "repeated_orders_found": int(repeated[code]),
+            })
     # Keep empty list as is - UI will handle display appropriately
     stats["couriers_stats"] = courier_stats
 
-    # === NEW: Tags Breakdown ===
+    # === Tags Breakdown ===
     tags_breakdown = None
     if "Internal_Tags" in df.columns:
         try:
-            # Parse all tags from Internal_Tags column (JSON format)
             from shopify_tool.tag_manager import parse_tags
 
-            # Collect all tags across all orders
-            all_tags = []
-            for tags_json in df["Internal_Tags"].dropna():
-                tags = parse_tags(tags_json)  # Returns list of tag strings
-                all_tags.extend(tags)
+            # Parse each distinct tag string once and weight it by how often
+            # it occurs. Uniques keep first-appearance order, so ties sort
+            # exactly like a row-by-row count.
+            tag_codes, tag_strings = pd.factorize(df["Internal_Tags"])
+            frequencies = np.bincount(tag_codes[tag_codes >= 0], minlength=len(tag_strings))
 
-            # Count occurrences
-            from collections import Counter
-            tag_counts = Counter(all_tags)
+            tag_counts = {}
+            for tags_json, frequency in zip(tag_strings, frequencies.tolist()):
+                for tag in parse_tags(tags_json):
+                    tag_counts[tag] = tag_counts.get(tag, 0) + frequency
 
             # Convert to sorted dict (by count, descending)
             tags_breakdown = dict(sorted(
@@ -1211,26 +1383,22 @@ def recalculate_statistics(df):
             logger.error(f"Failed to calculate tags breakdown: {e}", exc_info=True)
             tags_breakdown = None
 
-    # === NEW: SKU Summary ===
+    # === SKU Summary ===
     sku_summary = None
     try:
-        # Create a helper column for fulfillable quantity
-        df_temp = df.copy()
-        df_temp["Fulfillable_Qty"] = df_temp.apply(
-            lambda row: row["Quantity"] if row["Order_Fulfillment_Status"] == "Fulfillable" else 0,
-            axis=1
-        )
-
-        # Group by SKU and aggregate
-        sku_groups = df_temp.groupby("SKU").agg({
-            "Quantity": "sum",  # Total quantity across all orders
-            "Product_Name": "first",  # Product name (should be same for all rows)
-            "Warehouse_Name": "first",  # Warehouse name from stock
-            "Fulfillable_Qty": "sum"  # Sum of fulfillable quantities
-        }).reset_index()
-
-        # Rename columns for clarity
-        sku_groups.columns = ["SKU", "Total_Quantity", "Product_Name", "Warehouse_Name", "Fulfillable_Items"]
+        # Sorted SKU codes give the same group order as groupby("SKU")
+        sku_codes, skus = pd.factorize(df["SKU"], sort=True)
+        n_skus = len(skus)
+        total_quantity = _sum_per_group(quantity, sku_codes, n_skus)
+        fulfillable_items = _sum_per_group(quantity[completed], sku_codes[completed], n_skus)
+
+        sku_groups = pd.DataFrame({
+            "SKU": skus,
+            "Total_Quantity": total_quantity,
+            "Product_Name": _first_valid_per_group(df["Product_Name"], sku_codes, n_skus),
+            "Warehouse_Name": _first_valid_per_group(df["Warehouse_Name"], sku_codes, n_skus),
+            "Fulfillable_Items": fulfillable_items,
+        })
 
         # Calculate not fulfillable items
         sku_groups["Not_Fulfillable_Items"] = sku_groups["Total_Quantity"] - sku_groups["Fulfillable_Items"]
@@ -1238,8 +1406,13 @@ def recalculate_statistics(df):
         # Sort by total quantity (descending)
         sku_groups = sku_groups.sort_values("Total_Quantity", ascending=False)
 
-        # Convert to list of dicts
-        sku_summary = sku_groups.to_dict("records")
+        # Convert to list of dicts (column-wise tolist is much cheaper than
+        # boxing every cell through to_dict)
+        columns = list(sku_groups.columns)
+        sku_summary = [
+            dict(zip(columns, values))
+            for values in zip(*(sku_groups[col].tolist() for col in columns))
+        ]
 
         import logging
         logger = logging.getLogger("ShopifyToolLogger")
@@ -1257,7 +1430,7 @@ def recalculate_statistics(df):
     return stats
 
 
-def toggle_order_fulfillment(df, order_number):
+def toggle_order_fulfillment(df, order_number, ledger=None, index=None):
     """Manually toggles the fulfillment status of an order and recalculates stock.
 
     This function allows a user to manually override the automated fulfillment
@@ -1271,11 +1444,16 @@ def toggle_order_fulfillment(df, order_number):
       enough 'Final_Stock' to cover the order. If not, it fails. If there is
       enough stock, it deducts the required quantities from 'Final_Stock'.
 
-    The function operates on and returns a modified copy of the input DataFrame.
+    Only the rows of the order's SKUs are written. The function modifies the
+    input DataFrame in place and returns it.
 
     Args:
         df (pd.DataFrame): The main analysis DataFrame.
         order_number (str): The order number to toggle.
+        ledger (StockLedger, optional): Live stock of ``df`` kept between
+            edits. Built from ``df`` if missing or out of date.
+        index (OrderIndex, optional): Row index of ``df`` to locate the
+            order without scanning the Order_Number column.
 
     Returns:
         tuple[bool, str | None, pd.DataFrame]: A tuple containing:
@@ -1287,66 +1465,41 @@ def toggle_order_fulfillment(df, order_number):
     if df is None:
         return False, "DataFrame is None.", df
 
-    # Convert order_number to string for comparison (handles int/float order numbers)
-    order_number_str = str(order_number).strip()
-    order_numbers_str = df["Order_Number"].astype(str).str.strip()
+    if index is not None and index.reflects(df):
+        order_rows = index.rows(order_number)
+    else:
+        # Convert order_number to string for comparison (handles int/float order numbers)
+        order_numbers_str = df["Order_Number"].astype(str).str.strip()
+        order_rows = np.flatnonzero((order_numbers_str == normalize_order_key(order_number)).to_numpy())
 
-    if order_number_str not in order_numbers_str.values:
+    if len(order_rows) == 0:
         return False, "Order number not found.", df
 
     # Find current status (assuming all rows for an order have the same status)
-    # Use string comparison for finding the order
-    order_mask = order_numbers_str == order_number_str
-    current_status = df.loc[order_mask, "Order_Fulfillment_Status"].iloc[0]
+    status_column = df.columns.get_loc("Order_Fulfillment_Status")
+    current_status = df.iat[order_rows[0], status_column]
+
+    ledger = StockLedger.for_frame(df, ledger)
+    # Aggregate quantities for each SKU in the order
+    demand = StockLedger.order_demand(df.iloc[order_rows])
 
     if current_status == "Fulfillable":
         # --- Logic to UN-FULFILL an order ---
         new_status = "Not Fulfillable"
-        order_items = df.loc[order_mask]
-
-        # Aggregate quantities for each SKU in the order
-        stock_to_return = order_items.groupby("SKU")["Quantity"].sum()
-
-        for sku, quantity in stock_to_return.items():
-            # Add the quantity back to the 'Final_Stock' for all rows with this SKU
-            df.loc[df["SKU"] == sku, "Final_Stock"] += quantity
+        ledger.release(df, demand)
     else:
         # --- Logic to FORCE-FULFILL an order ---
         new_status = "Fulfillable"
-        order_items = df.loc[order_mask]
-        items_needed = order_items.groupby("SKU")["Quantity"].sum()
 
         # Pre-flight check for stock availability
-        lacking_skus = []
-        for sku, needed_qty in items_needed.items():
-            # Check if the SKU is even in our dataframe (for the unlisted stock case)
-            if sku not in df["SKU"].unique():
-                continue  # This is an unlisted item, we assume it's on hand
-
-            # Get current final stock for this SKU
-            current_stock = df.loc[df["SKU"] == sku, "Final_Stock"].iloc[0]
-
-            if needed_qty > current_stock:
-                lacking_skus.append(sku)
-
+        lacking_skus = ledger.lacking(demand)
         if lacking_skus:
-            error_message = f"Cannot force fulfill. Insufficient stock for SKUs: {', '.join(lacking_skus)}"
+            error_message = f"Cannot force fulfill. Insufficient stock for SKUs: {', '.join(map(str, lacking_skus))}"
             return False, error_message, df  # Abort the toggle
 
-        # If check passes, deduct stock
-        for sku, needed_qty in items_needed.items():
-            # For unlisted SKUs, we need to add them to the df to track their negative stock
-            if sku not in df["SKU"].unique():
-                # Find one of the order rows to copy base data from
-                template_row = order_items.iloc[0].to_dict()
-                new_row = {key: (None if key not in ["SKU", "Quantity"] else template_row[key]) for key in df.columns}
-                new_row.update({"SKU": sku, "Quantity": 0, "Stock": 0, "Final_Stock": 0})
-                # Use pd.concat instead of df.loc[len(df)] for robustness
-                df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
-
-            df.loc[df["SKU"] == sku, "Final_Stock"] -= needed_qty
+        ledger.consume(df, demand)
 
     # Update the DataFrame with the new status
-    df.loc[order_mask, "Order_Fulfillment_Status"] = new_status
+    df.iloc[order_rows, status_column] = new_status
 
     return True, None, df
@@ -0,0 +1,268 @@
+"""Parallel multi-client batch analysis.
+
+Runs the headless analysis (``cli.analyze_client``) for a list of clients
+in a process pool. Every client runs in its own worker process with its
+own ProfileManager / SessionManager, so configs, histories and sessions
+stay separate. Each client also writes to its own log file. A failure of one
+client (bad input, missing config, even a crashed worker) is recorded in
+its result and does not stop the others.
+
+The number of concurrent clients is capped by ``max_workers`` so a batch
+does not saturate the file server.
+
+Manifest format (JSON):
+
+    {
+        "server_path": "/mnt/fulfillment",                    (optional)
+        "max_workers": 3,                                     (optional)
+        "jobs": [
+            {"client_id": "M", "orders": "...csv", "stock": "...csv"},
+            {"client_id": "K", "orders": "...csv", "stock": "...csv",
+             "session": "2025-11-05_1", "reports": false, "chunked": true,
+             "cache": false}
+        ]
+    }
+
+Usage:
+    python -m shopify_tool.batch_runner batch.json
+    python -m shopify_tool.batch_runner batch.json --max-workers 2 --json
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Default number of clients analyzed at the same time
+DEFAULT_MAX_WORKERS = 2
+
+
+def _configure_client_logging(log_file: Path) -> None:
+    """Sends all log records of this worker process to one client's file."""
+    from shopify_tool.logger_config import JSONFormatter
+
+    handler = logging.FileHandler(log_file, encoding="utf-8")
+    handler.setLevel(logging.INFO)
+    handler.setFormatter(JSONFormatter(tool_name="shopify_tool"))
+
+    app_logger = logging.getLogger("ShopifyToolLogger")
+    app_logger.handlers.clear()
+    app_logger.propagate = True
+
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def run_client_job(job: Dict, server_path: Optional[str], log_dir: str) -> Dict:
+    """Worker entry point: analyzes one client and never raises.
+
+    Args:
+        job: Job entry from the manifest
+        server_path: File server base path (None for auto-detection)
+        log_dir: Directory for the per-client log files
+
+    Returns:
+        dict: ``cli.analyze_client`` summary plus client_id, log_file and
+            error (traceback text) on failure.
+    """
+    client_id = str(job.get("client_id", "")).upper()
+    log_file = Path(log_dir) / f"CLIENT_{client_id}.log"
+    started = time.perf_counter()
+    try:
+        _configure_client_logging(log_file)
+
+        from shopify_tool.cli import analyze_client
+        from shopify_tool.profile_manager import ProfileManager
+        from shopify_tool.session_manager import SessionManager
+
+        profile_manager = ProfileManager(server_path)
+        session_manager = SessionManager(profile_manager)
+        result = analyze_client(
+            profile_manager, session_manager, client_id, job["orders"], job["stock"],
+            session=job.get("session"),
+            generate_reports=job.get("reports", True),
+            chunked=job.get("chunked", False),
+            use_cache=job.get("cache", True),
+        )
+        result["error"] = None if result["success"] else result["message"]
+    except Exception as e:
+        logging.getLogger("ShopifyToolLogger").error(f"Batch job failed: {e}", exc_info=True)
+        result = {
+            "success": False,
+            "client_id": client_id,
+            "message": str(e),
+            "session_path": None,
+            "statistics": None,
+            "reports": [],
+            "timings": {},
+            "error": traceback.format_exc(),
+        }
+    result["log_file"] = str(log_file)
+    result["timings"]["total_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def _failed_result(job: Dict, message: str, log_file: Optional[str] = None) -> Dict:
+    return {
+        "success": False,
+        "client_id": str(job.get("client_id", "")).upper(),
+        "message": message,
+        "session_path": None,
+        "statistics": None,
+        "reports": [],
+        "timings": {},
+        "error": message,
+        "log_file": log_file,
+    }
+
+
+def run_batch(
+    jobs: List[Dict],
+    server_path: Optional[str] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    log_dir: Optional[str] = None
+) -> Dict:
+    """Runs the analysis for several clients in parallel.
+
+    Jobs are validated first (client exists, input files given); invalid
+    jobs are reported as failed without being started.
+
+    Args:
+        jobs: Job entries (client_id, orders, stock and optional session,
+            reports, chunked, cache)
+        server_path: File server base path (None for auto-detection)
+        max_workers: Maximum number of clients analyzed at the same time
+        log_dir: Directory for per-client logs and the batch summary.
+            Defaults to ``Logs/shopify_tool/batch_<timestamp>`` on the server.
+
+    Returns:
+        dict: Consolidated summary with "results" (in job order),
+            "succeeded", "failed", "max_workers", "wall_seconds" and "log_dir".
+    """
+    from shopify_tool.profile_manager import ProfileManager
+
+    started = time.perf_counter()
+    profile_manager = ProfileManager(server_path)
+    if log_dir is None:
+        log_dir = profile_manager.get_logs_path() / f"batch_{datetime.now().strftime('%Y-%m-%d_%H%M%S')}"
+    log_dir = Path(log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    results: List[Optional[Dict]] = [None] * len(jobs)
+    runnable = []
+    seen_clients = set()
+    for position, job in enumerate(jobs):
+        client_id = str(job.get("client_id", "")).upper()
+        if not client_id or not profile_manager.client_exists(client_id):
+            results[position] = _failed_result(job, f"Client does not exist: CLIENT_{client_id}")
+        elif not job.get("orders") or not job.get("stock"):
+            results[position] = _failed_result(job, "Job needs both 'orders' and 'stock' paths")
+        elif client_id in seen_clients:
+            # Two runs of one client would race on its history file
+            results[position] = _failed_result(job, f"CLIENT_{client_id} is listed more than once")
+        else:
+            seen_clients.add(client_id)
+            runnable.append(position)
+
+    max_workers = max(1, min(max_workers, len(runnable) or 1))
+    logger = logging.getLogger("ShopifyToolLogger")
+    logger.info(f"Batch: {len(runnable)} of {len(jobs)} clients, {max_workers} in parallel")
+
+    if runnable:
+        # spawn: workers start clean (no inherited Qt state or log handlers),
+        # the same on Windows and Linux
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context) as pool:
+            futures = {
+                position: pool.submit(run_client_job, jobs[position], server_path, str(log_dir))
+                for position in runnable
+            }
+            for position, future in futures.items():
+                try:
+                    results[position] = future.result()
+                except Exception as e:  # e.g. BrokenProcessPool when a worker crashes
+                    client_id = str(jobs[position].get("client_id", "")).upper()
+                    results[position] = _failed_result(
+                        jobs[position], f"Worker failed: {e!r}", str(log_dir / f"CLIENT_{client_id}.log")
+                    )
+
+    succeeded = sum(1 for result in results if result["success"])
+    summary = {
+        "results": results,
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "max_workers": max_workers,
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "log_dir": str(log_dir),
+    }
+    with open(log_dir / "batch_summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2, default=str)
+    logger.info(f"Batch finished: {succeeded} succeeded, {summary['failed']} failed")
+    return summary
+
+
+def _print_summary(summary: Dict) -> None:
+    print(f"{'Client':<14}{'Status':<8}{'Fulfillable':>12}{'Not':>6}{'Seconds':>9}  Details")
+    for result in summary["results"]:
+        stats = result["statistics"] or {}
+        status = "ok" if result["success"] else "FAILED"
+        details = result["session_path"] if result["success"] else result["message"]
+        print(
+            f"{'CLIENT_' + result['client_id']:<14}{status:<8}"
+            f"{stats.get('total_orders_completed', '-'):>12}{stats.get('total_orders_not_completed', '-'):>6}"
+            f"{result['timings'].get('total_seconds', 0):>9.1f}  {details}"
+        )
+    print(
+        f"\n{summary['succeeded']} succeeded, {summary['failed']} failed in {summary['wall_seconds']:.1f}s "
+        f"({summary['max_workers']} parallel). Logs: {summary['log_dir']}"
+    )
+
+
+def main(argv=None) -> int:
+    """Command-line entry point.
+
+    Returns:
+        int: 0 if every client succeeded, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m shopify_tool.batch_runner",
+        description="Run the fulfillment analysis for several clients in parallel.",
+    )
+    parser.add_argument("manifest", help="JSON file with the batch jobs")
+    parser.add_argument("--max-workers", type=int, help="Clients analyzed at the same time (overrides the manifest)")
+    parser.add_argument("--server-path", help="File server base path (overrides the manifest)")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.manifest, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    max_workers = args.max_workers or manifest.get("max_workers", DEFAULT_MAX_WORKERS)
+
+    try:
+        summary = run_batch(
+            manifest.get("jobs", []),
+            server_path=args.server_path or manifest.get("server_path"),
+            max_workers=max_workers,
+        )
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2, default=str))
+    else:
+        _print_summary(summary)
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""Chunked (out-of-core) analysis mode for very large order exports.
+
+``run_analysis`` keeps the raw orders file and several cleaned copies of it
+in memory at the same time. For multi-million-line exports this mode
+streams the orders instead:
+
+1. The orders are read in chunks; each chunk is mapped, cleaned and
+   set-decoded on its own and spilled to a ``ColumnSpillStore`` on disk.
+   Forward-filled order-level columns are carried over chunk borders.
+2. Prioritization and stock allocation only need Order_Number, SKU,
+   Quantity and Has_SKU, so only those columns are read back.
+3. The merge runs part by part against the allocation results and spills
+   its output again; the final DataFrame is then assembled one column at a
+   time, with the compact schema applied per column.
+
+Peak memory is bounded by the chunk size plus the allocation key columns
+and the final (compact) result, instead of several copies of the whole
+export. The result is identical to ``run_analysis`` on the same data.
+"""
+
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+from .analysis import (
+    _clean_orders_data,
+    _clean_stock_data,
+    _generate_summary_reports,
+    _merge_results_to_dataframe,
+    _prioritize_orders,
+    _resolve_column_mappings,
+    _simulate_stock_allocation,
+    recalculate_statistics,
+    run_analysis,
+)
+from .profiling import phase
+from .schema import apply_compact_schema
+
+logger = logging.getLogger("ShopifyToolLogger")
+
+# Default number of order lines per chunk
+DEFAULT_CHUNK_ROWS = 200_000
+
+# Columns the prioritization and allocation phases read back
+ALLOCATION_COLUMNS = ["Order_Number", "SKU", "Quantity", "Has_SKU"]
+
+SUMMARY_COLUMNS = ["Name", "SKU", "Total Quantity"]
+
+
+class ColumnSpillStore:
+    """Column-partitioned on-disk store for DataFrame parts.
+
+    Every appended part is written as one pickle file per column, so a
+    reader can load just the columns it needs. All parts must have the same
+    columns. Use as a context manager to remove the files afterwards.
+
+    Args:
+        directory (str | Path, optional): Parent directory for the store
+            (e.g. the session's analysis folder). A temporary directory
+            is used when omitted.
+    """
+
+    def __init__(self, directory=None):
+        if directory is not None:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+        self.path = Path(tempfile.mkdtemp(prefix="spill_", dir=directory))
+        self.columns = None
+        self.parts = []
+
+    def append(self, df: pd.DataFrame) -> int:
+        """Writes ``df`` as a new part and returns its part number."""
+        if self.columns is None:
+            self.columns = list(df.columns)
+        elif list(df.columns) != self.columns:
+            raise ValueError(f"Spill part columns {list(df.columns)} do not match {self.columns}")
+
+        part = len(self.parts)
+        part_dir = self.path / f"part_{part:05d}"
+        part_dir.mkdir()
+        df = df.reset_index(drop=True)
+        for position in range(len(self.columns)):
+            df.iloc[:, position].to_pickle(part_dir / f"{position}.pkl")
+        self.parts.append(len(df))
+        return part
+
+    def read(self, part: int, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Loads one part, optionally restricted to ``columns``."""
+        columns = self.columns if columns is None else columns
+        part_dir = self.path / f"part_{part:05d}"
+        return pd.DataFrame({
+            column: pd.read_pickle(part_dir / f"{self.columns.index(column)}.pkl")
+            for column in columns
+        })
+
+    def read_column(self, column: str, parts: Optional[List[int]] = None) -> pd.Series:
+        """Loads one column across ``parts`` (default: all, in order)."""
+        parts = range(len(self.parts)) if parts is None else parts
+        position = self.columns.index(column)
+        return _concat_pieces([
+            pd.read_pickle(self.path / f"part_{part:05d}" / f"{position}.pkl")
+            for part in parts
+        ])
+
+    @property
+    def total_rows(self) -> int:
+        return sum(self.parts)
+
+    def close(self) -> None:
+        """Deletes the store from disk."""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def _concat_pieces(pieces: List[pd.Series]) -> pd.Series:
+    """Concatenates column pieces into the dtype a whole-file read gives.
+
+    A chunk where a text column is entirely blank is parsed as float64 (or
+    becomes object after filling), while the whole file gives the string
+    dtype. Concatenating such pieces falls back to object, so the string
+    dtype is restored when all values are strings.
+    """
+    if not pieces:
+        return pd.Series(dtype=object)
+    result = pd.concat(pieces, ignore_index=True)
+    if result.dtype == object and len({str(piece.dtype) for piece in pieces}) > 1:
+        string_dtypes = [piece.dtype for piece in pieces if isinstance(piece.dtype, pd.StringDtype)]
+        if string_dtypes and infer_dtype(result, skipna=True) in ("string", "empty"):
+            result = result.astype(string_dtypes[0])
+    return result
+
+
+def _concat_frames(frames: List[pd.DataFrame]) -> pd.DataFrame:
+    """Column-wise ``_concat_pieces`` for frames with the same columns."""
+    return pd.DataFrame({
+        column: _concat_pieces([frame[column] for frame in frames])
+        for column in frames[0].columns
+    })
+
+
+def _combine_summaries(partials: List[pd.DataFrame], empty_when_missing: bool) -> Optional[pd.DataFrame]:
+    """Re-aggregates per-part summary reports into the whole-data report."""
+    partials = [partial for partial in partials if not partial.empty]
+    if not partials:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS) if empty_when_missing else None
+    combined = _concat_frames(partials)
+    combined = combined.groupby(["SKU", "Name"], as_index=False)["Total Quantity"].sum()
+    return combined[SUMMARY_COLUMNS]
+
+
+def run_analysis_chunked(
+    stock_df: pd.DataFrame,
+    order_chunks: Iterable[pd.DataFrame],
+    history_df: pd.DataFrame,
+    column_mappings: Optional[dict] = None,
+    courier_mappings: Optional[dict] = None,
+    repeat_window_days: int = 1,
+    spill_dir=None
+):
+    """Runs the fulfillment analysis over orders streamed in chunks.
+
+    Same inputs and outputs as ``run_analysis``, except that the orders are
+    an iterable of DataFrames, e.g. ``pd.read_csv(path, chunksize=...)``.
+    Chunks may split an order; forward-filled columns are carried over.
+
+    Args:
+        stock_df (pd.DataFrame): Stock levels for each SKU.
+        order_chunks (Iterable[pd.DataFrame]): Consecutive pieces of the
+            orders export, all with the same columns.
+        history_df (pd.DataFrame): Previously fulfilled orders.
+        column_mappings (dict, optional): See ``run_analysis``.
+        courier_mappings (dict, optional): See ``run_analysis``.
+        repeat_window_days (int, optional): See ``run_analysis``.
+        spill_dir (str | Path, optional): Directory for the on-disk spill
+            store, e.g. the session's analysis folder. Removed afterwards.
+
+    Returns:
+        tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, dict]:
+            ``(final_df, summary_present_df, summary_missing_df, stats)``
+    """
+    logger.info("=" * 60)
+    logger.info("STARTING CHUNKED ORDER FULFILLMENT ANALYSIS")
+    logger.info("=" * 60)
+
+    additional_columns_config = column_mappings.get("additional_columns", []) if column_mappings else []
+    set_decoders = column_mappings.get("set_decoders", {}) if column_mappings else {}
+
+    with ColumnSpillStore(spill_dir) as cleaned, ColumnSpillStore(spill_dir) as merged:
+        # Phase 1: clean each chunk and spill it. With set decoding the
+        # in-memory path moves NO_SKU lines behind all other lines, so they
+        # are spilled separately and appended last.
+        logger.info("Phase 1/7: Cleaning orders chunk by chunk")
+        template = None
+        orders_mappings = stock_clean = None
+        ffill_carry = {}
+        order_parts, no_sku_parts = [], []
+        with phase("clean", rows_in=0) as record:
+            for chunk_number, chunk in enumerate(order_chunks, start=1):
+                if template is None:
+                    template = chunk.iloc[:0]
+                    orders_mappings, stock_mappings = _resolve_column_mappings(
+                        chunk.columns, stock_df.columns, column_mappings
+                    )
+                if chunk.empty:
+                    continue
+                record.rows_in += len(chunk)
+                clean = _clean_orders_data(
+                    chunk, orders_mappings, additional_columns_config, set_decoders, ffill_carry
+                )
+                if set_decoders:
+                    has_sku = clean["Has_SKU"] == True
+                    if has_sku.any():
+                        order_parts.append(cleaned.append(clean[has_sku]))
+                    if not has_sku.all():
+                        no_sku_parts.append(cleaned.append(clean[~has_sku]))
+                else:
+                    order_parts.append(cleaned.append(clean))
+                logger.debug(f"Chunk {chunk_number}: {len(chunk)} lines cleaned and spilled")
+            record.rows_out = cleaned.total_rows
+
+        if template is None or not cleaned.parts:
+            logger.info("Orders are empty, falling back to in-memory analysis")
+            empty_orders = template if template is not None else pd.DataFrame()
+            return run_analysis(
+                stock_df, empty_orders, history_df, column_mappings, courier_mappings,
+                repeat_window_days=repeat_window_days
+            )
+
+        stock_clean = _clean_stock_data(stock_df, stock_mappings)
+        parts = order_parts + no_sku_parts
+        logger.info(f"Spilled {cleaned.total_rows} order rows in {len(parts)} parts to {cleaned.path}")
+
+        # Phases 2-4: allocation works on the key columns only
+        keys = pd.DataFrame({
+            column: cleaned.read_column(column, parts) for column in ALLOCATION_COLUMNS
+        })
+        logger.info("Phase 2/7: Order prioritization (multi-item first)")
+        with phase("prioritize", rows_in=len(keys)) as record:
+            prioritized_orders = _prioritize_orders(keys)
+            record.rows_out = len(prioritized_orders)
+        logger.info("Phase 3/7: Stock allocation simulation")
+        with phase("allocate", rows_in=len(keys)) as record:
+            ledger = _simulate_stock_allocation(keys, stock_clean, prioritized_orders)
+            final_stock = ledger.final_stock_levels()
+            record.rows_out = len(ledger.fulfillment_results)
+        order_item_counts = keys.groupby("Order_Number").size().rename("item_count")
+        del keys, prioritized_orders
+
+        # Phase 5-6: merge part by part, keeping per-part summaries
+        logger.info("Phase 5/7: Merging results part by part")
+        present_partials, missing_partials = [], []
+        with phase("merge", rows_in=cleaned.total_rows) as record:
+            for part in parts:
+                part_df = _merge_results_to_dataframe(
+                    cleaned.read(part), stock_clean, order_item_counts, final_stock,
+                    ledger.fulfillment_results, history_df, courier_mappings, repeat_window_days,
+                    additional_columns_config, shortages=ledger.shortages
+                )
+                present, missing = _generate_summary_reports(part_df)
+                present_partials.append(present)
+                missing_partials.append(missing)
+                if not part_df.empty:
+                    merged.append(part_df)
+            record.rows_out = merged.total_rows
+
+        logger.info("Phase 6/7: Assembling the final DataFrame")
+        with phase("assemble", rows_in=merged.total_rows) as record:
+            if merged.parts:
+                final_df = pd.DataFrame({
+                    column: apply_compact_schema(merged.read_column(column).to_frame())[column]
+                    for column in merged.columns
+                })
+            else:
+                final_df = apply_compact_schema(part_df)
+            record.rows_out = len(final_df)
+
+        summary_present_df = _combine_summaries(present_partials, empty_when_missing=False)
+        if summary_present_df is None:
+            summary_present_df = present_partials[0]
+        summary_missing_df = _combine_summaries(missing_partials, empty_when_missing=True)
+
+    logger.info("Phase 7/7: Calculating statistics")
+    with phase("statistics", rows_in=len(final_df)):
+        stats = recalculate_statistics(final_df)
+
+    logger.info("=" * 60)
+    logger.info("CHUNKED ANALYSIS COMPLETED SUCCESSFULLY")
+    logger.info(f"Final DataFrame: {len(final_df)} rows, {len(final_df.columns)} columns")
+    logger.info("=" * 60)
+
+    return final_df, summary_present_df, summary_missing_df, stats
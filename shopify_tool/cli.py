@@ -0,0 +1,280 @@
+"""Headless command-line interface: ``python -m shopify_tool``.
+
+Runs the same workflow as the GUI's "Run Analysis" button for one client
+and session, then generates every packing list and stock export that is
+configured for the client. Meant for scripted / nightly pre-analysis on
+machines without a display.
+
+Only the standard library is imported at module level. The analysis stack
+(pandas, core, profile and session managers) is imported on first use, and
+GUI / PDF libraries (PySide6, reportlab, pypdf, PIL) are never imported.
+
+Usage:
+    python -m shopify_tool --client M --orders orders.csv --stock stock.csv
+    python -m shopify_tool --client M --orders orders.csv --stock stock.csv --session 2025-11-05_1
+    python -m shopify_tool --client M --orders orders.csv --stock stock.csv --no-reports --json
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Optional
+
+_STARTED_AT = time.perf_counter()
+
+# Libraries the headless workflow must never load
+HEAVY_MODULES = ("PySide6", "reportlab", "pypdf", "PIL")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Builds the argument parser for the CLI."""
+    parser = argparse.ArgumentParser(
+        prog="python -m shopify_tool",
+        description="Run the fulfillment analysis for a client without the GUI.",
+    )
+    parser.add_argument("--client", required=True, help="Client ID (e.g. M for CLIENT_M)")
+    parser.add_argument("--orders", required=True, help="Path to the orders CSV export")
+    parser.add_argument("--stock", required=True, help="Path to the stock CSV file")
+    parser.add_argument(
+        "--session",
+        help="Existing session name (e.g. 2025-11-05_1) or path. A new session is created if omitted.",
+    )
+    parser.add_argument(
+        "--server-path",
+        help="File server base path. Defaults to FULFILLMENT_SERVER_PATH or the production server.",
+    )
+    parser.add_argument("--no-reports", action="store_true", help="Skip packing lists and stock exports")
+    parser.add_argument("--chunked", action="store_true", help="Use the chunked analysis mode for very large exports")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute even if a cached result for the same inputs exists")
+    parser.add_argument("--json", action="store_true", help="Print the summary as JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show INFO log messages on the console")
+    return parser
+
+
+def _quiet_console_logging(verbose: bool) -> None:
+    """Limits the application logger's console output to warnings."""
+    if verbose:
+        return
+    for handler in logging.getLogger("ShopifyToolLogger").handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setLevel(logging.WARNING)
+
+
+def _with_output_filename(report_config: dict, report_type: str) -> dict:
+    """Fills in the default output file name the GUI would use."""
+    if report_config.get("output_filename"):
+        return report_config
+    report_name = report_config.get("name", "Unknown")
+    if report_type == "packing_lists":
+        filename = f"{report_name}.xlsx"
+    else:
+        filename = f"{report_name}_{datetime.now().strftime('%Y-%m-%d')}.xls"
+    return dict(report_config, output_filename=filename)
+
+
+def _generate_reports(final_df, config, session_manager, session_path) -> list:
+    """Generates all configured packing lists and stock exports.
+
+    Returns:
+        list[dict]: One entry per report with type, name, success and message.
+    """
+    from shopify_tool import core
+
+    results = []
+    for report_config in config.get("packing_list_configs", []):
+        success, message = core.create_packing_list_report(
+            final_df, _with_output_filename(report_config, "packing_lists"),
+            session_manager=session_manager, session_path=session_path,
+        )
+        results.append({
+            "type": "packing_list", "name": report_config.get("name", "Unknown"),
+            "success": success, "message": message,
+        })
+
+    tag_categories = config.get("tag_categories", {})
+    for report_config in config.get("stock_export_configs", []):
+        success, message = core.create_stock_export_report(
+            final_df, _with_output_filename(report_config, "stock_exports"),
+            session_manager=session_manager, session_path=session_path,
+            tag_categories=tag_categories,
+        )
+        results.append({
+            "type": "stock_export", "name": report_config.get("name", "Unknown"),
+            "success": success, "message": message,
+        })
+    return results
+
+
+def _resolve_session_path(session_manager, client_id: str, session: str) -> str:
+    """Accepts a session directory path or a session name of the client."""
+    if os.path.isdir(session):
+        return session
+    session_path = session_manager.get_session_path(client_id, session)
+    if not session_path.is_dir():
+        raise ValueError(f"Session not found for CLIENT_{client_id.upper()}: {session}")
+    return str(session_path)
+
+
+def analyze_client(
+    profile_manager,
+    session_manager,
+    client_id: str,
+    orders_path: str,
+    stock_path: str,
+    session: Optional[str] = None,
+    generate_reports: bool = True,
+    chunked: bool = False,
+    use_cache: bool = True
+) -> dict:
+    """Runs analysis and report generation for one client.
+
+    Args:
+        profile_manager: ProfileManager for the file server
+        session_manager: SessionManager built on profile_manager
+        client_id: Client ID (e.g. "M")
+        orders_path: Orders CSV export
+        stock_path: Stock CSV file
+        session: Existing session name or path; a new session if None
+        generate_reports: Whether to generate the configured reports
+        chunked: Force the chunked analysis mode
+        use_cache: Allow restoring a cached result for the same inputs
+
+    Returns:
+        dict: Summary with success flag, session path, statistics, reports
+            and analysis / report timings.
+
+    Raises:
+        ValueError: If the client, its configuration or the session is missing
+    """
+    from shopify_tool import core
+
+    if not profile_manager.client_exists(client_id):
+        raise ValueError(f"Client does not exist: CLIENT_{client_id.upper()}")
+    config = profile_manager.load_shopify_config(client_id)
+    if not config:
+        raise ValueError(f"No configuration found for CLIENT_{client_id.upper()}")
+    overrides = {}
+    if chunked:
+        overrides["chunked_analysis"] = True
+    if not use_cache:
+        overrides["analysis_cache_enabled"] = False
+    if overrides:
+        # Copy so the ProfileManager's cached config is left untouched
+        config = dict(config, settings=dict(config.get("settings", {}), **overrides))
+
+    session_path = None
+    if session:
+        session_path = _resolve_session_path(session_manager, client_id, session)
+
+    settings = config.get("settings", {})
+    analysis_started = time.perf_counter()
+    success, message, final_df, stats = core.run_full_analysis(
+        stock_path,
+        orders_path,
+        None,  # output_dir_path (not used in session mode)
+        settings.get("stock_csv_delimiter", ";"),
+        settings.get("orders_csv_delimiter", ","),
+        config,
+        client_id=client_id,
+        session_manager=session_manager,
+        profile_manager=profile_manager,
+        session_path=session_path,
+    )
+
+    summary = {
+        "success": success,
+        "client_id": client_id.upper(),
+        "message": message,
+        "session_path": message if success else session_path,
+        "statistics": None,
+        "reports": [],
+        "timings": {"analysis_seconds": round(time.perf_counter() - analysis_started, 3)},
+    }
+    if not success:
+        return summary
+
+    summary["statistics"] = {
+        key: stats.get(key)
+        for key in [
+            "total_orders_completed", "total_orders_not_completed",
+            "total_items_to_write_off", "total_items_not_to_write_off",
+        ]
+    }
+
+    if generate_reports:
+        reports_started = time.perf_counter()
+        summary["reports"] = _generate_reports(final_df, config, session_manager, message)
+        summary["timings"]["reports_seconds"] = round(time.perf_counter() - reports_started, 3)
+        summary["success"] = all(report["success"] for report in summary["reports"])
+
+    return summary
+
+
+def run(args: argparse.Namespace) -> dict:
+    """Runs the CLI workflow for parsed arguments (see ``build_parser``).
+
+    Returns:
+        dict: The ``analyze_client`` summary plus the startup time.
+    """
+    from shopify_tool.profile_manager import ProfileManager
+    from shopify_tool.session_manager import SessionManager
+
+    profile_manager = ProfileManager(args.server_path)
+    session_manager = SessionManager(profile_manager)
+    startup_seconds = time.perf_counter() - _STARTED_AT
+
+    summary = analyze_client(
+        profile_manager, session_manager, args.client, args.orders, args.stock,
+        session=args.session, generate_reports=not args.no_reports, chunked=args.chunked,
+        use_cache=not args.no_cache,
+    )
+    summary["timings"] = {"startup_seconds": round(startup_seconds, 3), **summary["timings"]}
+    return summary
+
+
+def _print_summary(summary: dict) -> None:
+    timings = summary["timings"]
+    print(f"Client:   CLIENT_{summary['client_id']}")
+    print(f"Startup:  {timings['startup_seconds']:.2f}s")
+    print(f"Analysis: {timings['analysis_seconds']:.2f}s")
+    if summary["statistics"] is None:
+        print(f"FAILED:   {summary['message']}")
+        return
+    print(f"Session:  {summary['session_path']}")
+    stats = summary["statistics"]
+    print(
+        f"Orders:   {stats['total_orders_completed']} fulfillable, "
+        f"{stats['total_orders_not_completed']} not fulfillable"
+    )
+    for report in summary["reports"]:
+        status = "ok" if report["success"] else "FAILED"
+        print(f"  [{status}] {report['type']}: {report['name']} - {report['message']}")
+    if "reports_seconds" in timings:
+        print(f"Reports:  {timings['reports_seconds']:.2f}s")
+
+
+def main(argv=None) -> int:
+    """CLI entry point.
+
+    Returns:
+        int: Process exit code (0 on success, 1 on any failure).
+    """
+    args = build_parser().parse_args(argv)
+    _quiet_console_logging(args.verbose)
+
+    try:
+        summary = run(args)
+    except Exception as e:
+        logging.getLogger("ShopifyToolLogger").error(f"Headless analysis failed: {e}", exc_info=args.verbose)
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2, default=str))
+    else:
+        _print_summary(summary)
+    return 0 if summary["success"] else 1
@@ -5,11 +5,13 @@ import json
 import shutil
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple, Dict, Any, List
+from typing import Optional, Tuple, Dict, Any, List, Callable
 from . import analysis, packing_lists, stock_export
 from .rules import RuleEngine
+from .rule_plan import compile_rules
 from .utils import get_persistent_data_path
 from .csv_utils import normalize_sku
+from .profiling import PERF_FILENAME, PhaseProfiler, phase
 from .session_manager import SessionManagerError
 import numpy as np
 
@@ -432,13 +434,67 @@ def _validate_and_prepare_inputs(
     return use_session_mode, working_path, None, session_path
 
 
+def _prepare_append_inputs(
+    stock_file_path: Optional[str],
+    orders_file_path: Optional[str],
+    client_id: Optional[str],
+    session_manager: Optional[Any],
+    session_path: Optional[str]
+) -> str:
+    """Validates an append run and copies the additional orders file to the session.
+
+    The session's original input files are left untouched: the additional
+    orders are copied to session/input/orders_append_N.csv and listed in
+    session_info.json under "appended_orders_files".
+
+    Args:
+        stock_file_path: Stock CSV file, or None for the session's inventory.csv
+        orders_file_path: CSV file with the additional orders
+        client_id: Client identifier
+        session_manager: SessionManager instance
+        session_path: Session to append to
+
+    Returns:
+        str: Path of the stock file to analyze against
+
+    Raises:
+        ValueError: If no session is given or its files are missing
+    """
+    if session_manager is None or client_id is None or session_path is None:
+        raise ValueError("Appending orders requires an existing session (client_id, session_manager and session_path)")
+    if not orders_file_path:
+        raise ValueError("Appending orders requires an orders file")
+
+    input_dir = Path(session_manager.get_input_dir(session_path))
+    if stock_file_path is None:
+        stock_file_path = str(input_dir / "inventory.csv")
+    if not os.path.exists(stock_file_path):
+        raise ValueError(f"Stock file of the session not found: {stock_file_path}")
+
+    try:
+        session_info = session_manager.get_session_info(session_path) or {}
+        appended_files = list(session_info.get("appended_orders_files", []))
+        orders_dest = input_dir / f"orders_append_{len(appended_files) + 1}.csv"
+        logger.info(f"Copying additional orders file to: {orders_dest}")
+        shutil.copy2(orders_file_path, orders_dest)
+        appended_files.append(orders_dest.name)
+        session_manager.update_session_info(session_path, {"appended_orders_files": appended_files})
+    except FileNotFoundError as e:
+        raise ValueError(f"Input file not found during session setup: {e}")
+    except (OSError, SessionManagerError) as e:
+        raise ValueError(f"Could not add the orders file to the session: {e}")
+
+    return stock_file_path
+
+
 def _load_and_validate_files(
     stock_file_path: Optional[str],
     orders_file_path: Optional[str],
     stock_delimiter: str,
     orders_delimiter: str,
-    config: dict
-) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    config: dict,
+    orders_chunk_rows: Optional[int] = None
+) -> Tuple[Any, pd.DataFrame]:
     """Loads and validates CSV files.
 
     Loads stock and orders CSV files, applies proper encoding and
@@ -451,9 +507,13 @@ def _load_and_validate_files(
         stock_delimiter: Delimiter for stock file
         orders_delimiter: Delimiter for orders file
         config: Configuration dict containing column_mappings and test data
+        orders_chunk_rows: If set, only the orders header is read here and
+            the orders are returned as a chunked CSV reader with this many
+            rows per chunk (see chunked_analysis.py)
 
     Returns:
-        Tuple of (orders_df, stock_df)
+        Tuple of (orders_df, stock_df). orders_df is a
+        ``pd.io.parsers.TextFileReader`` when orders_chunk_rows is set.
 
     Raises:
         FileNotFoundError: If input files don't exist
@@ -521,13 +581,35 @@ def _load_and_validate_files(
         # Load orders file with error handling
         try:
             logger.info(f"Reading orders file from normalized path: {orders_file_path}")
-            orders_df = pd.read_csv(
-                orders_file_path,
-                delimiter=orders_delimiter,
-                encoding='utf-8-sig',
-                dtype=orders_dtype
-            )
-            logger.info(f"Orders data loaded: {len(orders_df)} rows, {len(orders_df.columns)} columns")
+            if orders_chunk_rows:
+                # Chunked mode: validate the header now, stream the rows later
+                orders_header = pd.read_csv(
+                    orders_file_path,
+                    delimiter=orders_delimiter,
+                    encoding='utf-8-sig',
+                    dtype=orders_dtype,
+                    nrows=0
+                )
+                orders_df = pd.read_csv(
+                    orders_file_path,
+                    delimiter=orders_delimiter,
+                    encoding='utf-8-sig',
+                    dtype=orders_dtype,
+                    chunksize=orders_chunk_rows
+                )
+                logger.info(
+                    f"Orders file opened for chunked reading: {len(orders_header.columns)} columns, "
+                    f"{orders_chunk_rows} rows per chunk"
+                )
+            else:
+                orders_df = pd.read_csv(
+                    orders_file_path,
+                    delimiter=orders_delimiter,
+                    encoding='utf-8-sig',
+                    dtype=orders_dtype
+                )
+                orders_header = orders_df
+                logger.info(f"Orders data loaded: {len(orders_df)} rows, {len(orders_df.columns)} columns")
         except pd.errors.ParserError as e:
             error_msg = (
                 f"Failed to parse orders file. The file may have incorrect delimiter.\n"
@@ -563,14 +645,17 @@ def _load_and_validate_files(
         # For testing: allow passing DataFrames directly
         stock_df = config.get("test_stock_df")
         orders_df = config.get("test_orders_df")
+        orders_header = orders_df
 
     logger.info("Data loaded successfully.")
 
     # Validate dataframes
-    validation_errors = _validate_dataframes(orders_df, stock_df, config)
+    validation_errors = _validate_dataframes(orders_header, stock_df, config)
     if validation_errors:
         error_message = "\n".join(validation_errors)
         logger.error(f"Validation Error: {error_message}")
+        if orders_header is not orders_df:
+            orders_df.close()
         raise ValueError(error_message)
 
     return orders_df, stock_df
@@ -585,8 +670,9 @@ def _load_history_data(
 ) -> pd.DataFrame:
     """Loads fulfillment history from appropriate storage location.
 
-    Determines the correct history file path based on whether profile_manager
-    is available (server-based storage) or fallback to local storage.
+    With a profile_manager and client_id the history comes from the client's
+    append-only history store (see history_store.py), with Execution_Date
+    already parsed. Otherwise the local fallback CSV file is read.
     Handles various error conditions gracefully.
 
     Args:
@@ -604,80 +690,71 @@ def _load_history_data(
     """
     logger.info("Loading fulfillment history...")
 
-    # Determine history file location
+    if stock_file_path is None or orders_file_path is None:
+        # Test mode
+        return config.get("test_history_df", pd.DataFrame({"Order_Number": []}))
+
     if profile_manager and client_id:
         # Server-based storage in client directory
-        client_dir = profile_manager.get_client_directory(client_id)
-        history_path = client_dir / "fulfillment_history.csv"
-        logger.info(f"Using server-based history: {history_path}")
-    else:
-        # Fallback to local storage for tests/compatibility
-        history_path = get_persistent_data_path("fulfillment_history.csv")
-        logger.warning("Using local history fallback (no profile manager)")
+        from .history_store import FulfillmentHistoryStore
 
-    # Load history
-    if stock_file_path is not None and orders_file_path is not None:
         try:
-            if isinstance(history_path, Path):
-                history_path_str = str(history_path)
-            else:
-                history_path_str = history_path
-
-            # Force SKU column to string to prevent dtype issues
-            history_dtype = {"SKU": str} if "SKU" in pd.read_csv(
-                history_path_str, nrows=0, encoding='utf-8-sig'
-            ).columns else {}
-            history_df = pd.read_csv(history_path_str, encoding='utf-8-sig', dtype=history_dtype)
-            logger.info(f"Loaded {len(history_df)} records from fulfillment history: {history_path}")
-
-            # Apply SKU normalization if SKU column exists
-            if not history_df.empty and "SKU" in history_df.columns:
-                history_df["SKU"] = history_df["SKU"].apply(normalize_sku)
-                logger.debug("Applied SKU normalization to history data")
-        except FileNotFoundError:
-            history_df = pd.DataFrame(columns=["Order_Number", "Execution_Date"])
-            logger.info("No history file found. Starting with empty history.")
-        except pd.errors.ParserError as e:
-            logger.warning(f"Failed to parse history file: {e}")
-            history_df = pd.DataFrame(columns=["Order_Number", "Execution_Date"])
-        except UnicodeDecodeError as e:
-            logger.warning(f"Encoding error in history file: {e}")
-            history_df = pd.DataFrame(columns=["Order_Number", "Execution_Date"])
+            store = FulfillmentHistoryStore.for_client(profile_manager, client_id, config.get("settings", {}))
+            history_df = store.load()
+            logger.info(f"Loaded {len(history_df)} records from fulfillment history store: {store.root}")
         except Exception as e:
-            logger.warning(f"Could not load history file: {e}")
+            logger.warning(f"Could not load history store: {e}")
             history_df = pd.DataFrame(columns=["Order_Number", "Execution_Date"])
-    else:
-        # Test mode
-        history_df = config.get("test_history_df", pd.DataFrame({"Order_Number": []}))
+        return history_df
 
-    return history_df
+    # Fallback to local storage for tests/compatibility
+    history_path = get_persistent_data_path("fulfillment_history.csv")
+    logger.warning("Using local history fallback (no profile manager)")
 
+    try:
+        if isinstance(history_path, Path):
+            history_path_str = str(history_path)
+        else:
+            history_path_str = history_path
+
+        # Force SKU column to string to prevent dtype issues
+        history_dtype = {"SKU": str} if "SKU" in pd.read_csv(
+            history_path_str, nrows=0, encoding='utf-8-sig'
+        ).columns else {}
+        history_df = pd.read_csv(history_path_str, encoding='utf-8-sig', dtype=history_dtype)
+        logger.info(f"Loaded {len(history_df)} records from fulfillment history: {history_path}")
+
+        # Apply SKU normalization if SKU column exists
+        if not history_df.empty and "SKU" in history_df.columns:
+            history_df["SKU"] = history_df["SKU"].apply(normalize_sku)
+            logger.debug("Applied SKU normalization to history data")
+    except FileNotFoundError:
+        history_df = pd.DataFrame(columns=["Order_Number", "Execution_Date"])
+        logger.info("No history file found. Starting with empty history.")
+    except pd.errors.ParserError as e:
+        logger.warning(f"Failed to parse history file: {e}")
+        history_df = pd.DataFrame(columns=["Order_Number", "Execution_Date"])
+    except UnicodeDecodeError as e:
+        logger.warning(f"Encoding error in history file: {e}")
+        history_df = pd.DataFrame(columns=["Order_Number", "Execution_Date"])
+    except Exception as e:
+        logger.warning(f"Could not load history file: {e}")
+        history_df = pd.DataFrame(columns=["Order_Number", "Execution_Date"])
 
-def _run_analysis_and_rules(
-    orders_df: pd.DataFrame,
-    stock_df: pd.DataFrame,
-    history_df: pd.DataFrame,
-    config: dict
-) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, dict]:
-    """Runs analysis simulation and applies business rules.
+    return history_df
 
-    Executes the core fulfillment analysis, applies low stock alerts,
-    and processes custom tagging rules from configuration.
+
+def _analysis_parameters(config: dict) -> Tuple[dict, dict, int]:
+    """Collects the analysis parameters from the client config.
 
     Args:
-        orders_df: Orders DataFrame
-        stock_df: Stock DataFrame
-        history_df: History DataFrame
-        config: Configuration dict with column_mappings, courier_mappings, rules, settings
+        config: Configuration dict with column_mappings, set_decoders,
+            courier_mappings, settings and _client_config
 
     Returns:
-        Tuple of (final_df, summary_present_df, summary_missing_df, stats)
-
-    Raises:
-        Exception: Propagated from analysis.run_analysis()
+        Tuple of (column_mappings, courier_mappings, repeat_window_days).
+        column_mappings includes set_decoders and additional_columns.
     """
-    logger.info("Running fulfillment simulation...")
-
     # Get column mappings from config and pass to analysis
     column_mappings = config.get("column_mappings", {})
     # Add set_decoders to column_mappings for set expansion
@@ -703,25 +780,11 @@ def _run_analysis_and_rules(
     # Get repeat detection window from config
     repeat_window_days = config.get("settings", {}).get("repeat_detection_days", 1)
 
-    # Run core analysis
-    final_df, summary_present_df, summary_missing_df, stats = analysis.run_analysis(
-        stock_df, orders_df, history_df, column_mappings, courier_mappings,
-        repeat_window_days=repeat_window_days
-    )
-    logger.info("Analysis computation complete.")
+    return column_mappings, courier_mappings, repeat_window_days
 
-    # Debug logging: Verify DataFrame structure
-    logger.debug(f"Analysis result columns: {list(final_df.columns)}")
-    logger.debug(f"DataFrame shape: {final_df.shape}")
-    if not final_df.empty:
-        logger.debug(f"Sample row (first): {final_df.iloc[0].to_dict()}")
-    if "Order_Fulfillment_Status" in final_df.columns:
-        status_counts = final_df["Order_Fulfillment_Status"].value_counts().to_dict()
-        logger.debug(f"Order_Fulfillment_Status distribution: {status_counts}")
-    else:
-        logger.error("CRITICAL: Order_Fulfillment_Status column is missing from analysis result!")
 
-    # Add stock alerts based on config
+def _apply_low_stock_alert(final_df: pd.DataFrame, config: dict) -> pd.DataFrame:
+    """Sets Stock_Alert from the low_stock_threshold setting, if configured."""
     low_stock_threshold = config.get("settings", {}).get("low_stock_threshold")
     if low_stock_threshold is not None and "Final_Stock" in final_df.columns:
         logger.info(f"Applying low stock threshold: < {low_stock_threshold}")
@@ -730,24 +793,160 @@ def _run_analysis_and_rules(
             "Low Stock",
             ""
         )
+    return final_df
 
+
+def _apply_weights_and_rules(final_df: pd.DataFrame, config: dict) -> pd.DataFrame:
+    """Enriches the analysis result with weights and applies the rule engine."""
     # Enrich DataFrame with volumetric weights before Rule Engine
     weight_config = config.get("weight_config", {})
     if weight_config and weight_config.get("products"):
         from .weight_calculator import enrich_dataframe_with_weights
-        final_df = enrich_dataframe_with_weights(final_df, weight_config)
+        with phase("weights", rows_in=len(final_df)) as record:
+            final_df = enrich_dataframe_with_weights(final_df, weight_config)
+            record.rows_out = len(final_df)
 
     # Apply the rule engine
     rules = config.get("rules", [])
     if rules:
         logger.info("Applying rule engine...")
-        engine = RuleEngine(rules)
-        final_df = engine.apply(final_df)
+        with phase("rules", rows_in=len(final_df)) as record:
+            engine = RuleEngine(compile_rules(rules))
+            final_df = engine.apply(final_df)
+            record.rows_out = len(final_df)
         logger.info("Rule engine application complete.")
 
+    return final_df
+
+
+def _run_analysis_and_rules(
+    orders_df: pd.DataFrame,
+    stock_df: pd.DataFrame,
+    history_df: pd.DataFrame,
+    config: dict,
+    spill_dir: Optional[str] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, dict]:
+    """Runs analysis simulation and applies business rules.
+
+    Executes the core fulfillment analysis, applies low stock alerts,
+    and processes custom tagging rules from configuration.
+
+    Args:
+        orders_df: Orders DataFrame, or an iterable of orders chunks for
+            the chunked analysis mode
+        stock_df: Stock DataFrame
+        history_df: History DataFrame
+        config: Configuration dict with column_mappings, courier_mappings, rules, settings
+        spill_dir: Directory for the chunked mode's on-disk spill store
+
+    Returns:
+        Tuple of (final_df, summary_present_df, summary_missing_df, stats)
+
+    Raises:
+        Exception: Propagated from analysis.run_analysis()
+    """
+    logger.info("Running fulfillment simulation...")
+
+    column_mappings, courier_mappings, repeat_window_days = _analysis_parameters(config)
+
+    # Run core analysis
+    if isinstance(orders_df, pd.DataFrame):
+        with phase("analysis", rows_in=len(orders_df)) as record:
+            final_df, summary_present_df, summary_missing_df, stats = analysis.run_analysis(
+                stock_df, orders_df, history_df, column_mappings, courier_mappings,
+                repeat_window_days=repeat_window_days
+            )
+            record.rows_out = len(final_df)
+    else:
+        from .chunked_analysis import run_analysis_chunked
+
+        try:
+            with phase("analysis") as record:
+                final_df, summary_present_df, summary_missing_df, stats = run_analysis_chunked(
+                    stock_df, orders_df, history_df, column_mappings, courier_mappings,
+                    repeat_window_days=repeat_window_days, spill_dir=spill_dir
+                )
+                record.rows_out = len(final_df)
+        finally:
+            if hasattr(orders_df, "close"):
+                orders_df.close()
+    logger.info("Analysis computation complete.")
+
+    # Debug logging: Verify DataFrame structure
+    logger.debug(f"Analysis result columns: {list(final_df.columns)}")
+    logger.debug(f"DataFrame shape: {final_df.shape}")
+    if not final_df.empty:
+        logger.debug(f"Sample row (first): {final_df.iloc[0].to_dict()}")
+    if "Order_Fulfillment_Status" in final_df.columns:
+        status_counts = final_df["Order_Fulfillment_Status"].value_counts().to_dict()
+        logger.debug(f"Order_Fulfillment_Status distribution: {status_counts}")
+    else:
+        logger.error("CRITICAL: Order_Fulfillment_Status column is missing from analysis result!")
+
+    # Add stock alerts based on config
+    final_df = _apply_low_stock_alert(final_df, config)
+
+    final_df = _apply_weights_and_rules(final_df, config)
+
     return final_df, summary_present_df, summary_missing_df, stats
 
 
+def _run_delta_analysis_and_rules(
+    orders_df: pd.DataFrame,
+    stock_df: pd.DataFrame,
+    history_df: pd.DataFrame,
+    existing_df: pd.DataFrame,
+    config: dict
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame, dict]:
+    """Analyzes appended orders against a session's remaining stock.
+
+    Only the new orders are allocated, alerted, weighed and run through the
+    rule engine (see delta_analysis.py); summaries and statistics cover the
+    whole combined frame.
+
+    Args:
+        orders_df: Orders DataFrame with the additional orders
+        stock_df: The session's stock DataFrame
+        history_df: History DataFrame
+        existing_df: The session's current analysis frame
+        config: Configuration dict as for _run_analysis_and_rules
+
+    Returns:
+        Tuple of (final_df, new_df, summary_present_df, summary_missing_df, stats)
+        where new_df holds just the appended rows
+    """
+    from .delta_analysis import allocate_appended_orders, append_rows
+
+    logger.info("Running delta analysis on appended orders...")
+    column_mappings, courier_mappings, repeat_window_days = _analysis_parameters(config)
+
+    with phase("analysis", rows_in=len(orders_df)) as record:
+        new_df, existing_df = allocate_appended_orders(
+            stock_df, orders_df, existing_df, history_df, column_mappings, courier_mappings,
+            repeat_window_days=repeat_window_days
+        )
+        record.rows_out = len(new_df)
+
+    if not new_df.empty:
+        # Existing rows of the consumed SKUs only get their alert refreshed
+        low_stock_threshold = config.get("settings", {}).get("low_stock_threshold")
+        touched = existing_df["SKU"].isin(new_df["SKU"])
+        if low_stock_threshold is not None and touched.any():
+            existing_df.loc[touched, "Stock_Alert"] = np.where(
+                existing_df.loc[touched, "Final_Stock"] < low_stock_threshold, "Low Stock", ""
+            )
+        new_df = _apply_low_stock_alert(new_df, config)
+        new_df = _apply_weights_and_rules(new_df, config)
+
+    final_df = append_rows(existing_df, new_df)
+    with phase("summaries", rows_in=len(final_df)):
+        summary_present_df, summary_missing_df = analysis._generate_summary_reports(final_df)
+    with phase("statistics", rows_in=len(final_df)):
+        stats = analysis.recalculate_statistics(final_df)
+
+    return final_df, new_df, summary_present_df, summary_missing_df, stats
+
+
 def _save_results_and_reports(
     final_df: pd.DataFrame,
     summary_present_df: pd.DataFrame,
@@ -761,7 +960,9 @@ def _save_results_and_reports(
     output_dir_path: str,
     session_manager: Optional[Any],
     client_id: Optional[str],
-    profile_manager: Optional[Any]
+    profile_manager: Optional[Any],
+    appended_df: Optional[pd.DataFrame] = None,
+    settings: Optional[dict] = None
 ) -> Tuple[str, Optional[str]]:
     """Saves all analysis results, reports, and updates history.
 
@@ -783,6 +984,10 @@ def _save_results_and_reports(
         session_manager: SessionManager instance
         client_id: Client identifier
         profile_manager: ProfileManager instance
+        appended_df: Rows added by an append run. When given, only their
+            orders are added to the history and the session's packing list
+            statistics are kept.
+        settings: Client settings (history retention and compaction)
 
     Returns:
         Tuple of (primary_output_path, secondary_output_path)
@@ -813,162 +1018,183 @@ def _save_results_and_reports(
         output_file_path = os.path.join(output_dir_path, "fulfillment_analysis.xlsx")
 
     # Save Excel report with multiple sheets
-    with pd.ExcelWriter(output_file_path, engine="xlsxwriter") as writer:
-        final_df.to_excel(writer, sheet_name="fulfillment_analysis", index=False)
-        summary_present_df.to_excel(writer, sheet_name="Summary_Present", index=False)
-        summary_missing_df.to_excel(writer, sheet_name="Summary_Missing", index=False)
-
-        workbook = writer.book
-        report_info_sheet = workbook.add_worksheet("Report Info")
-        generation_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        report_info_sheet.write("A1", "Report Generated On:")
-        report_info_sheet.write("B1", generation_time)
-        report_info_sheet.set_column("A:B", 25)
-
-        worksheet = writer.sheets["fulfillment_analysis"]
-        highlight_format = workbook.add_format({"bg_color": "#FFC7CE", "font_color": "#9C0006"})
-        for idx, col in enumerate(final_df.columns):
-            try:
-                # Convert to string and handle NaN values before calculating length
-                col_data = final_df[col]
-                # Ensure we have a Series, not DataFrame
-                if isinstance(col_data, pd.DataFrame):
-                    col_data = col_data.iloc[:, 0]
-
-                col_strings = col_data.astype(str).fillna('')
-
-                # Calculate max length safely
-                if len(col_strings) > 0:
-                    max_data_len = col_strings.str.len().max()
-                    max_len = max(max_data_len, len(str(col))) + 2
-                else:
-                    max_len = len(str(col)) + 2
-
-                worksheet.set_column(idx, idx, max_len)
-            except Exception as e:
-                # If column width calculation fails, use default width
-                logger.warning(f"Could not calculate width for column '{col}': {e}")
-                worksheet.set_column(idx, idx, 15)  # Default width
-        for row_num, status in enumerate(final_df["Order_Fulfillment_Status"]):
-            if status == "Not Fulfillable":
-                worksheet.set_row(row_num + 1, None, highlight_format)
+    with phase("save_excel", rows_in=len(final_df)):
+        with pd.ExcelWriter(output_file_path, engine="xlsxwriter") as writer:
+            final_df.to_excel(writer, sheet_name="fulfillment_analysis", index=False)
+            summary_present_df.to_excel(writer, sheet_name="Summary_Present", index=False)
+            summary_missing_df.to_excel(writer, sheet_name="Summary_Missing", index=False)
+
+            workbook = writer.book
+            report_info_sheet = workbook.add_worksheet("Report Info")
+            generation_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            report_info_sheet.write("A1", "Report Generated On:")
+            report_info_sheet.write("B1", generation_time)
+            report_info_sheet.set_column("A:B", 25)
+
+            worksheet = writer.sheets["fulfillment_analysis"]
+            highlight_format = workbook.add_format({"bg_color": "#FFC7CE", "font_color": "#9C0006"})
+            for idx, col in enumerate(final_df.columns):
+                try:
+                    # Convert to string and handle NaN values before calculating length
+                    col_data = final_df[col]
+                    # Ensure we have a Series, not DataFrame
+                    if isinstance(col_data, pd.DataFrame):
+                        col_data = col_data.iloc[:, 0]
+
+                    col_strings = col_data.astype(str).fillna('')
+
+                    # Calculate max length safely
+                    if len(col_strings) > 0:
+                        max_data_len = col_strings.str.len().max()
+                        max_len = max(max_data_len, len(str(col))) + 2
+                    else:
+                        max_len = len(str(col)) + 2
+
+                    worksheet.set_column(idx, idx, max_len)
+                except Exception as e:
+                    # If column width calculation fails, use default width
+                    logger.warning(f"Could not calculate width for column '{col}': {e}")
+                    worksheet.set_column(idx, idx, 15)  # Default width
+            for row_num, status in enumerate(final_df["Order_Fulfillment_Status"]):
+                if status == "Not Fulfillable":
+                    worksheet.set_row(row_num + 1, None, highlight_format)
     logger.info(f"Excel report saved to '{output_file_path}'")
 
     # Save initial state files (current_state.pkl, current_state.xlsx, analysis_stats.json)
     if use_session_mode:
-        try:
-            logger.info("Saving initial session state files...")
-
-            # Define file paths
-            current_state_pkl = Path(analysis_dir) / "current_state.pkl"
-            current_state_xlsx = Path(analysis_dir) / "current_state.xlsx"
-            stats_json = Path(analysis_dir) / "analysis_stats.json"
-
-            # Save DataFrame to pickle (fast loading)
-            logger.info(f"Saving current_state.pkl: {current_state_pkl}")
-            final_df.to_pickle(current_state_pkl)
-
-            # Save DataFrame to Excel (backup, human-readable)
-            logger.info(f"Saving current_state.xlsx: {current_state_xlsx}")
-            final_df.to_excel(current_state_xlsx, index=False)
-
-            # Save statistics to JSON
-            logger.info(f"Saving analysis_stats.json: {stats_json}")
-            with open(stats_json, 'w', encoding='utf-8') as f:
-                json.dump(stats, f, indent=2, ensure_ascii=False)
-
-            logger.info("Initial session state files saved successfully")
-
-        except PermissionError as e:
-            logger.error(f"Permission denied saving session state files: {e}")
-            # Continue with the workflow even if initial state save fails
-        except OSError as e:
-            logger.error(f"File system error saving session state (disk full or invalid path?): {e}")
-            # Continue with the workflow even if initial state save fails
-        except Exception as e:
-            logger.error(f"Unexpected error saving initial session state: {e}", exc_info=True)
-            # Continue with the workflow even if initial state save fails
+        with phase("save_session_state", rows_in=len(final_df)):
+            try:
+                logger.info("Saving initial session state files...")
+
+                # Define file paths
+                current_state_pkl = Path(analysis_dir) / "current_state.pkl"
+                current_state_xlsx = Path(analysis_dir) / "current_state.xlsx"
+                stats_json = Path(analysis_dir) / "analysis_stats.json"
+
+                # Save DataFrame to pickle (fast loading)
+                logger.info(f"Saving current_state.pkl: {current_state_pkl}")
+                final_df.to_pickle(current_state_pkl)
+
+                # Save DataFrame to Excel (backup, human-readable)
+                logger.info(f"Saving current_state.xlsx: {current_state_xlsx}")
+                final_df.to_excel(current_state_xlsx, index=False)
+
+                # Save statistics to JSON
+                logger.info(f"Saving analysis_stats.json: {stats_json}")
+                with open(stats_json, 'w', encoding='utf-8') as f:
+                    json.dump(stats, f, indent=2, ensure_ascii=False)
+
+                logger.info("Initial session state files saved successfully")
+
+            except PermissionError as e:
+                logger.error(f"Permission denied saving session state files: {e}")
+                # Continue with the workflow even if initial state save fails
+            except OSError as e:
+                logger.error(f"File system error saving session state (disk full or invalid path?): {e}")
+                # Continue with the workflow even if initial state save fails
+            except Exception as e:
+                logger.error(f"Unexpected error saving initial session state: {e}", exc_info=True)
+                # Continue with the workflow even if initial state save fails
 
     # Session mode: Export analysis_data.json and update session_info
     if use_session_mode:
-        try:
-            logger.info("Exporting analysis_data.json for Packing Tool integration...")
-            analysis_data = _create_analysis_data_for_packing(final_df)
+        with phase("save_json", rows_in=len(final_df)):
+            try:
+                logger.info("Exporting analysis_data.json for Packing Tool integration...")
+                analysis_data = _create_analysis_data_for_packing(final_df)
 
-            # Save analysis_data.json
-            analysis_data_path = Path(analysis_dir) / "analysis_data.json"
-            with open(analysis_data_path, 'w', encoding='utf-8') as f:
-                json.dump(analysis_data, f, indent=2, ensure_ascii=False)
+                # Save analysis_data.json
+                analysis_data_path = Path(analysis_dir) / "analysis_data.json"
+                with open(analysis_data_path, 'w', encoding='utf-8') as f:
+                    json.dump(analysis_data, f, indent=2, ensure_ascii=False)
 
-            logger.info(f"analysis_data.json saved to: {analysis_data_path}")
+                logger.info(f"analysis_data.json saved to: {analysis_data_path}")
 
-            # Update session_info.json with analysis results and statistics
-            session_manager.update_session_info(working_path, {
-                "analysis_completed": True,
-                "analysis_completed_at": datetime.now().isoformat(),
-                "total_orders": analysis_data["total_orders"],
-                "fulfillable_orders": analysis_data["fulfillable_orders"],
-                "not_fulfillable_orders": analysis_data["not_fulfillable_orders"],
-                "analysis_report_path": "analysis/analysis_report.xlsx",
-                "statistics": {
+                statistics = {
                     "total_orders": len(final_df["Order_Number"].unique()),
                     "total_items": len(final_df),
                     "packing_lists_count": 0,
                     "packing_lists": []
                 }
-            })
+                if appended_df is not None:
+                    # Packing lists generated before the append stay valid
+                    previous = (session_manager.get_session_info(working_path) or {}).get("statistics", {})
+                    statistics["packing_lists_count"] = previous.get("packing_lists_count", 0)
+                    statistics["packing_lists"] = previous.get("packing_lists", [])
+
+                # Update session_info.json with analysis results and statistics
+                session_manager.update_session_info(working_path, {
+                    "analysis_completed": True,
+                    "analysis_completed_at": datetime.now().isoformat(),
+                    "total_orders": analysis_data["total_orders"],
+                    "fulfillable_orders": analysis_data["fulfillable_orders"],
+                    "not_fulfillable_orders": analysis_data["not_fulfillable_orders"],
+                    "analysis_report_path": "analysis/analysis_report.xlsx",
+                    "statistics": statistics
+                })
+
+                logger.info("Session info updated with analysis results and statistics")
+
+            except PermissionError as e:
+                logger.error(f"Permission denied exporting analysis data: {e}")
+                # Continue with the workflow even if export fails
+            except OSError as e:
+                logger.error(f"File system error exporting analysis data (disk full or invalid path?): {e}")
+                # Continue with the workflow even if export fails
+            except SessionManagerError as e:
+                logger.error(f"Session manager error updating session info: {e}", exc_info=True)
+                # Continue with the workflow even if export fails
+            except Exception as e:
+                logger.error(f"Unexpected error exporting analysis data: {e}", exc_info=True)
+                # Continue with the workflow even if export fails
 
-            logger.info("Session info updated with analysis results and statistics")
+    # Update fulfillment history
+    with phase("history_update", rows_in=len(history_df)) as record:
+        logger.info("Updating fulfillment history...")
+        history_source = final_df if appended_df is None else appended_df
+        newly_fulfilled = history_source[history_source["Order_Fulfillment_Status"] == "Fulfillable"][
+            ["Order_Number"]
+        ].drop_duplicates()
 
-        except PermissionError as e:
-            logger.error(f"Permission denied exporting analysis data: {e}")
-            # Continue with the workflow even if export fails
-        except OSError as e:
-            logger.error(f"File system error exporting analysis data (disk full or invalid path?): {e}")
-            # Continue with the workflow even if export fails
-        except SessionManagerError as e:
-            logger.error(f"Session manager error updating session info: {e}", exc_info=True)
-            # Continue with the workflow even if export fails
-        except Exception as e:
-            logger.error(f"Unexpected error exporting analysis data: {e}", exc_info=True)
-            # Continue with the workflow even if export fails
+        if not newly_fulfilled.empty and profile_manager and client_id:
+            # Client history store: only the new records are written
+            from .history_store import FulfillmentHistoryStore
 
-    # Update fulfillment history
-    logger.info("Updating fulfillment history...")
-    newly_fulfilled = final_df[final_df["Order_Fulfillment_Status"] == "Fulfillable"][
-        ["Order_Number"]
-    ].drop_duplicates()
-
-    if not newly_fulfilled.empty:
-        newly_fulfilled["Execution_Date"] = datetime.now().strftime("%Y-%m-%d")
-        updated_history = pd.concat([history_df, newly_fulfilled]).drop_duplicates(
-            subset=["Order_Number"], keep="last"
-        )
+            try:
+                store = FulfillmentHistoryStore.for_client(profile_manager, client_id, settings)
+                store.append(newly_fulfilled["Order_Number"])
+                record.rows_out = len(newly_fulfilled)
+                logger.info(f"History updated in {store.root} ({len(newly_fulfilled)} new records)")
+            except Exception as e:
+                logger.error(f"Failed to save history: {e}")
+                # Don't fail the entire analysis if history save fails
+        elif not newly_fulfilled.empty:
+            newly_fulfilled["Execution_Date"] = datetime.now().strftime("%Y-%m-%d")
+            updated_history = pd.concat([history_df, newly_fulfilled]).drop_duplicates(
+                subset=["Order_Number"], keep="last"
+            )
 
-        # Determine history path (same logic as load)
-        if profile_manager and client_id:
-            client_dir = profile_manager.get_client_directory(client_id)
-            history_path = client_dir / "fulfillment_history.csv"
-        else:
+            # Local fallback history (same path as load)
             history_path = get_persistent_data_path("fulfillment_history.csv")
 
-        # Save updated history
-        try:
-            # Ensure parent directory exists
-            if isinstance(history_path, Path):
-                history_path.parent.mkdir(parents=True, exist_ok=True)
-                history_path_str = str(history_path)
-            else:
-                history_path_str = history_path
-                parent_dir = os.path.dirname(history_path_str)
-                if parent_dir:
-                    os.makedirs(parent_dir, exist_ok=True)
-
-            updated_history.to_csv(history_path_str, index=False)
-            logger.info(f"History updated and saved to: {history_path} ({len(newly_fulfilled)} new records)")
-        except Exception as e:
-            logger.error(f"Failed to save history: {e}")
-            # Don't fail the entire analysis if history save fails
+            # Save updated history
+            try:
+                # Ensure parent directory exists
+                if isinstance(history_path, Path):
+                    history_path.parent.mkdir(parents=True, exist_ok=True)
+                    history_path_str = str(history_path)
+                else:
+                    history_path_str = history_path
+                    parent_dir = os.path.dirname(history_path_str)
+                    if parent_dir:
+                        os.makedirs(parent_dir, exist_ok=True)
+
+                updated_history.to_csv(history_path_str, index=False)
+                record.rows_out = len(updated_history)
+                logger.info(f"History updated and saved to: {history_path} ({len(newly_fulfilled)} new records)")
+            except Exception as e:
+                logger.error(f"Failed to save history: {e}")
+                # Don't fail the entire analysis if history save fails
 
     # Return appropriate path based on mode
     if use_session_mode:
@@ -977,6 +1203,90 @@ def _save_results_and_reports(
         return output_file_path, None
 
 
+def _lookup_cached_result(
+    stock_file_path: Optional[str],
+    orders_file_path: Optional[str],
+    stock_delimiter: str,
+    orders_delimiter: str,
+    config: dict,
+    history_df: pd.DataFrame,
+    client_id: Optional[str],
+    profile_manager: Optional[Any]
+) -> Tuple[Optional[Any], Optional[str], Optional[tuple]]:
+    """Looks up an earlier result for the same inputs (see result_cache.py).
+
+    The cache is used for client runs on real files unless the
+    ``analysis_cache_enabled`` setting is False. Cache problems are logged
+    and never fail the analysis.
+
+    Returns:
+        Tuple of (cache, key, cached result). cache and key are None when
+        caching is off; the cached result is None on a miss.
+    """
+    settings = config.get("settings", {})
+    if (
+        not settings.get("analysis_cache_enabled", True)
+        or not (profile_manager and client_id)
+        or stock_file_path is None
+        or orders_file_path is None
+    ):
+        return None, None, None
+
+    from .result_cache import AnalysisResultCache, compute_cache_key
+
+    try:
+        with phase("cache_lookup"):
+            result_cache = AnalysisResultCache.for_client(profile_manager, client_id, settings)
+            cache_key = compute_cache_key(
+                _normalize_unc_path(orders_file_path), _normalize_unc_path(stock_file_path),
+                orders_delimiter, stock_delimiter, config, history_df
+            )
+            cached = result_cache.get(cache_key)
+    except Exception as e:
+        # A missing input file is reported by _load_and_validate_files
+        logger.warning(f"Analysis cache unavailable: {e}")
+        return None, None, None
+
+    if cached is not None:
+        logger.info(f"Analysis cache hit ({cache_key[:12]}): restored {len(cached[0])} rows, skipping analysis")
+    else:
+        logger.info(f"Analysis cache miss ({cache_key[:12]})")
+    return result_cache, cache_key, cached
+
+
+def _store_cached_result(
+    result_cache: Any,
+    cache_key: str,
+    final_df: pd.DataFrame,
+    summary_present_df: pd.DataFrame,
+    summary_missing_df: pd.DataFrame,
+    stats: dict,
+    stock_file_path: str,
+    orders_file_path: str
+) -> None:
+    """Stores a fresh result in the analysis cache; failures are only logged."""
+    try:
+        with phase("cache_store", rows_in=len(final_df)):
+            result_cache.put(
+                cache_key, final_df, summary_present_df, summary_missing_df, stats,
+                info={
+                    "orders_file": os.path.basename(str(orders_file_path)),
+                    "stock_file": os.path.basename(str(stock_file_path)),
+                },
+            )
+    except Exception as e:
+        logger.warning(f"Could not store analysis result in cache: {e}")
+
+
+def _save_perf_report(profiler: PhaseProfiler, analysis_dir) -> None:
+    """Writes the run's phase measurements to analysis_dir/perf.json."""
+    try:
+        perf_path = profiler.save(Path(analysis_dir) / PERF_FILENAME)
+        logger.info(f"Performance profile saved to: {perf_path}")
+    except OSError as e:
+        logger.warning(f"Could not save performance profile: {e}")
+
+
 def run_full_analysis(
     stock_file_path,
     orders_file_path,
@@ -987,7 +1297,9 @@ def run_full_analysis(
     client_id: Optional[str] = None,
     session_manager: Optional[Any] = None,
     profile_manager: Optional[Any] = None,
-    session_path: Optional[str] = None
+    session_path: Optional[str] = None,
+    profile_callback: Optional[Callable[[str, Any], None]] = None,
+    append_to_session: bool = False
 ):
     """Orchestrates the entire fulfillment analysis process.
 
@@ -997,8 +1309,9 @@ def run_full_analysis(
 
     Workflow Steps:
     1. Validate inputs and prepare session/working paths
-    2. Load and validate CSV files
-    3. Load fulfillment history
+    2. Load fulfillment history (and look up a cached result for the same
+       inputs, see result_cache.py; steps 3-4 are skipped on a hit)
+    3. Load and validate CSV files
     4. Run analysis simulation and apply business rules
     5. Save results, reports, and update history
 
@@ -1008,6 +1321,17 @@ def run_full_analysis(
     - Saves analysis results to session/analysis/
     - Exports analysis_data.json for Packing Tool integration
     - Updates session_info.json with results
+    - Writes perf.json (per-phase wall/CPU time, peak RSS growth and row
+      counts, see profiling.PhaseProfiler) to session/analysis/
+
+    Append Workflow (append_to_session=True, session mode with session_path):
+    - orders_file_path holds additional orders for an analyzed session
+    - Only orders not yet in the session are allocated, against the stock
+      that is still free after the session's allocations (Final_Stock), see
+      delta_analysis.py; existing rows keep their status
+    - Rules and weights run on the new rows only
+    - Existing sequential numbers and packing lists are kept; new
+      fulfillable orders are numbered after the existing ones
 
     Legacy Workflow:
     - Saves results to specified output_dir_path
@@ -1015,7 +1339,8 @@ def run_full_analysis(
 
     Args:
         stock_file_path (str | None): Path to the stock data CSV file. Can be
-            None for testing purposes if a DataFrame is provided in `config`.
+            None for testing purposes if a DataFrame is provided in `config`,
+            or in append mode to use the session's stock file.
         orders_file_path (str | None): Path to the Shopify orders export CSV
             file. Can be None for testing.
         output_dir_path (str): Path to the directory where the output report
@@ -1030,6 +1355,12 @@ def run_full_analysis(
         profile_manager (ProfileManager, optional): Profile manager instance.
         session_path (str, optional): Path to existing session directory (new workflow).
             If not provided in session mode, a new session will be created automatically.
+        profile_callback (callable, optional): Called as
+            ``profile_callback(event, record)`` with event "start" / "end" and a
+            profiling.PhaseRecord at every phase boundary, for external profilers.
+        append_to_session (bool, optional): Append the orders of
+            orders_file_path to the analyzed session at session_path instead
+            of analyzing from scratch (see Append Workflow).
 
     Returns:
         tuple[bool, str | None, pd.DataFrame | None, dict | None]:
@@ -1045,120 +1376,205 @@ def run_full_analysis(
     """
     logger.info("--- Starting Full Analysis Process ---")
 
-    try:
-        # Step 1: Validate and prepare inputs
-        logger.info("Step 1: Validating and preparing inputs...")
-        use_session_mode, working_path, _, session_path = _validate_and_prepare_inputs(
-            stock_file_path,
-            orders_file_path,
-            output_dir_path,
-            client_id,
-            session_manager,
-            session_path
-        )
-
-        # Step 2: Load and validate files
-        logger.info("Step 2: Loading and validating CSV files...")
-        orders_df, stock_df = _load_and_validate_files(
-            stock_file_path,
-            orders_file_path,
-            stock_delimiter,
-            orders_delimiter,
-            config
-        )
-
-        # Step 3: Load history data
-        logger.info("Step 3: Loading fulfillment history...")
-        history_df = _load_history_data(
-            stock_file_path,
-            orders_file_path,
-            client_id,
-            profile_manager,
-            config
-        )
+    profiler = PhaseProfiler(callback=profile_callback)
+    perf_dir = None
 
-        # Step 4: Run analysis and apply rules
-        logger.info("Step 4: Running analysis and applying rules...")
-
-        # ALWAYS reload client config from disk to get fresh configuration
-        # (GUI may have stale config in memory if user changed settings)
-        if profile_manager and client_id:
-            logger.info("Reloading fresh client config from disk...")
-            client_config = profile_manager.load_client_config(client_id)
-            config["_client_config"] = client_config
-
-            # Check if there are additional columns configured
-            additional_cols = client_config.get("ui_settings", {}).get("table_view", {}).get("additional_columns", [])
-            enabled_cols = [col for col in additional_cols if col.get("enabled", False)]
-            logger.info(f"Loaded client config: {len(additional_cols)} additional columns configured, {len(enabled_cols)} enabled")
-            if enabled_cols:
-                logger.info(f"Enabled additional columns: {[col['csv_name'] for col in enabled_cols]}")
-        else:
-            logger.warning(f"Cannot load client config: profile_manager={profile_manager is not None}, client_id={client_id}")
-
-        final_df, summary_present_df, summary_missing_df, stats = _run_analysis_and_rules(
-            orders_df,
-            stock_df,
-            history_df,
-            config
-        )
-
-        # Step 5: Save results and reports
-        logger.info("Step 5: Saving results and reports...")
-        primary_path, _ = _save_results_and_reports(
-            final_df,
-            summary_present_df,
-            summary_missing_df,
-            stats,
-            history_df,
-            stock_file_path,
-            orders_file_path,
-            use_session_mode,
-            working_path,
-            output_dir_path,
-            session_manager,
-            client_id,
-            profile_manager
-        )
-
-        # Generate sequential order map for barcode/reference labels
-        # This provides consistent numbering across all label types
-        if use_session_mode and session_path:
-            try:
-                from shopify_tool.sequential_order import generate_sequential_order_map
-
-                sequential_map = generate_sequential_order_map(
-                    final_df,
-                    Path(session_path),
-                    force_regenerate=False  # Don't overwrite existing numbering
+    with profiler.activate():
+        try:
+            # Step 1: Validate and prepare inputs
+            logger.info("Step 1: Validating and preparing inputs...")
+            if append_to_session:
+                stock_file_path = _prepare_append_inputs(
+                    stock_file_path, orders_file_path, client_id, session_manager, session_path
+                )
+                use_session_mode, working_path = True, session_path
+            else:
+                use_session_mode, working_path, _, session_path = _validate_and_prepare_inputs(
+                    stock_file_path,
+                    orders_file_path,
+                    output_dir_path,
+                    client_id,
+                    session_manager,
+                    session_path
+                )
+            if use_session_mode:
+                perf_dir = session_manager.get_analysis_dir(working_path)
+
+            # Step 2: Load history data
+            logger.info("Step 2: Loading fulfillment history...")
+            with phase("load_history") as record:
+                history_df = _load_history_data(
+                    stock_file_path,
+                    orders_file_path,
+                    client_id,
+                    profile_manager,
+                    config
+                )
+                record.rows_out = len(history_df)
+
+            # ALWAYS reload client config from disk to get fresh configuration
+            # (GUI may have stale config in memory if user changed settings)
+            if profile_manager and client_id:
+                logger.info("Reloading fresh client config from disk...")
+                client_config = profile_manager.load_client_config(client_id)
+                config["_client_config"] = client_config
+
+                # Check if there are additional columns configured
+                additional_cols = client_config.get("ui_settings", {}).get("table_view", {}).get("additional_columns", [])
+                enabled_cols = [col for col in additional_cols if col.get("enabled", False)]
+                logger.info(f"Loaded client config: {len(additional_cols)} additional columns configured, {len(enabled_cols)} enabled")
+                if enabled_cols:
+                    logger.info(f"Enabled additional columns: {[col['csv_name'] for col in enabled_cols]}")
+            else:
+                logger.warning(f"Cannot load client config: profile_manager={profile_manager is not None}, client_id={client_id}")
+
+            # Same inputs as an earlier run: restore its result instead of recomputing
+            settings = config.get("settings", {})
+            appended_df = None
+            result_cache, cache_key, cached = None, None, None
+            if not append_to_session:
+                result_cache, cache_key, cached = _lookup_cached_result(
+                    stock_file_path, orders_file_path, stock_delimiter, orders_delimiter,
+                    config, history_df, client_id, profile_manager
                 )
 
-                logger.info(f"Sequential order map: {len(sequential_map)} orders numbered")
+            if append_to_session:
+                # Steps 3-4 for the additional orders only
+                from .delta_analysis import load_session_state
+
+                logger.info("Step 3: Loading additional orders and session state...")
+                with phase("load") as record:
+                    orders_df, stock_df = _load_and_validate_files(
+                        stock_file_path,
+                        orders_file_path,
+                        stock_delimiter,
+                        orders_delimiter,
+                        config
+                    )
+                    existing_df = load_session_state(perf_dir)
+                    record.rows_out = len(orders_df)
+
+                logger.info("Step 4: Allocating appended orders and applying rules...")
+                final_df, appended_df, summary_present_df, summary_missing_df, stats = _run_delta_analysis_and_rules(
+                    orders_df,
+                    stock_df,
+                    history_df,
+                    existing_df,
+                    config
+                )
+            elif cached is not None:
+                final_df, summary_present_df, summary_missing_df, stats = cached
+            else:
+                # Step 3: Load and validate files
+                # Chunked mode streams very large orders exports instead of loading them whole
+                logger.info("Step 3: Loading and validating CSV files...")
+                orders_chunk_rows = None
+                if settings.get("chunked_analysis", False):
+                    from .chunked_analysis import DEFAULT_CHUNK_ROWS
+                    orders_chunk_rows = settings.get("analysis_chunk_rows", DEFAULT_CHUNK_ROWS)
+                    logger.info(f"Chunked analysis enabled: {orders_chunk_rows} rows per chunk")
+                with phase("load") as record:
+                    orders_df, stock_df = _load_and_validate_files(
+                        stock_file_path,
+                        orders_file_path,
+                        stock_delimiter,
+                        orders_delimiter,
+                        config,
+                        orders_chunk_rows=orders_chunk_rows
+                    )
+                    if isinstance(orders_df, pd.DataFrame):
+                        record.rows_out = len(orders_df)
+
+                # Step 4: Run analysis and apply rules
+                logger.info("Step 4: Running analysis and applying rules...")
+                spill_dir = None
+                if use_session_mode and not isinstance(orders_df, pd.DataFrame):
+                    spill_dir = str(session_manager.get_analysis_dir(working_path))
+
+                final_df, summary_present_df, summary_missing_df, stats = _run_analysis_and_rules(
+                    orders_df,
+                    stock_df,
+                    history_df,
+                    config,
+                    spill_dir=spill_dir
+                )
 
-            except Exception as e:
-                logger.error(f"Failed to generate sequential order map: {e}")
-                # Non-critical error - continue without sequential numbering
+                if result_cache is not None:
+                    _store_cached_result(
+                        result_cache, cache_key, final_df, summary_present_df, summary_missing_df,
+                        stats, stock_file_path, orders_file_path
+                    )
+
+            # Step 5: Save results and reports
+            logger.info("Step 5: Saving results and reports...")
+            primary_path, _ = _save_results_and_reports(
+                final_df,
+                summary_present_df,
+                summary_missing_df,
+                stats,
+                history_df,
+                stock_file_path,
+                orders_file_path,
+                use_session_mode,
+                working_path,
+                output_dir_path,
+                session_manager,
+                client_id,
+                profile_manager,
+                appended_df=appended_df,
+                settings=settings
+            )
 
-        # Return success
-        logger.info("Analysis completed successfully!")
-        return True, primary_path, final_df, stats
+            # Generate sequential order map for barcode/reference labels
+            # This provides consistent numbering across all label types
+            if use_session_mode and session_path:
+                try:
+                    from shopify_tool.sequential_order import (
+                        extend_sequential_order_map,
+                        generate_sequential_order_map,
+                    )
+
+                    with phase("sequential_order", rows_in=len(final_df)):
+                        if append_to_session:
+                            # Keep printed numbers, number the new orders after them
+                            sequential_map = extend_sequential_order_map(final_df, Path(session_path))
+                        else:
+                            sequential_map = generate_sequential_order_map(
+                                final_df,
+                                Path(session_path),
+                                force_regenerate=False  # Don't overwrite existing numbering
+                            )
+
+                    logger.info(f"Sequential order map: {len(sequential_map)} orders numbered")
+
+                except Exception as e:
+                    logger.error(f"Failed to generate sequential order map: {e}")
+                    # Non-critical error - continue without sequential numbering
+
+            # Return success
+            logger.info("Analysis completed successfully!")
+            return True, primary_path, final_df, stats
 
-    except FileNotFoundError as e:
-        error_msg = f"File not found: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        return False, error_msg, None, None
-    except ValueError as e:
-        error_msg = f"Validation error: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        return False, error_msg, None, None
-    except pd.errors.ParserError as e:
-        error_msg = f"CSV parsing error: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        return False, error_msg, None, None
-    except Exception as e:
-        error_msg = f"Analysis failed: {str(e)}"
-        logger.error(error_msg, exc_info=True)
-        return False, error_msg, None, None
+        except FileNotFoundError as e:
+            error_msg = f"File not found: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, None, None
+        except ValueError as e:
+            error_msg = f"Validation error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, None, None
+        except pd.errors.ParserError as e:
+            error_msg = f"CSV parsing error: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, None, None
+        except Exception as e:
+            error_msg = f"Analysis failed: {str(e)}"
+            logger.error(error_msg, exc_info=True)
+            return False, error_msg, None, None
+        finally:
+            # Written on failure too, so the last record shows where it stopped
+            if perf_dir is not None:
+                _save_perf_report(profiler, perf_dir)
 
 
 def create_packing_list_report(
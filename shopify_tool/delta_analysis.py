@@ -0,0 +1,193 @@
+"""Delta re-analysis of orders appended to an existing session.
+
+When late orders arrive after a session was analyzed, re-running the whole
+analysis would re-allocate every order against the original stock and could
+change the status of orders that are already being packed. This mode keeps
+the session's allocation state instead:
+
+1. The session's current analysis frame (``current_state.pkl``) is loaded;
+   its ``Final_Stock`` per SKU is the stock that is still free (manual
+   toggles update it too).
+2. Only the orders that are not yet in the session are cleaned, prioritized
+   and allocated, against that remaining stock.
+3. The new rows are appended to the session frame, and ``Final_Stock`` of
+   existing rows of the SKUs they consumed is lowered accordingly.
+
+Existing rows keep their status, notes and rule results. Rules and weights
+are applied to the new rows only (see ``core.run_full_analysis``).
+"""
+
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .analysis import (
+    _calculate_final_stock,
+    _clean_and_prepare_data,
+    _merge_results_to_dataframe,
+    _prioritize_orders,
+    _simulate_stock_allocation,
+)
+from .profiling import phase
+from .schema import apply_compact_schema
+
+logger = logging.getLogger("ShopifyToolLogger")
+
+SESSION_STATE_FILENAME = "current_state.pkl"
+
+
+def load_session_state(analysis_dir) -> pd.DataFrame:
+    """Loads the analysis frame saved in a session's analysis directory.
+
+    Raises:
+        ValueError: If the session has no analysis result yet
+    """
+    state_path = Path(analysis_dir) / SESSION_STATE_FILENAME
+    if not state_path.exists():
+        raise ValueError(f"Session has no analysis result to append to: {state_path} not found")
+    return pd.read_pickle(state_path)
+
+
+def _replace_rows(column: pd.Series, mask: pd.Series, values: pd.Series) -> np.ndarray:
+    """Returns ``column`` with the ``mask`` rows replaced by ``values``.
+
+    The result dtype fits both sides, so int32 (compact schema) columns
+    can take int64 values without pandas refusing the upcast.
+    """
+    new_values = values.to_numpy()
+    result = column.to_numpy()
+    result = result.astype(np.result_type(result, new_values))
+    result[mask.to_numpy()] = new_values
+    return result
+
+
+def _remaining_stock(stock_clean: pd.DataFrame, existing_df: pd.DataFrame) -> pd.DataFrame:
+    """Stock that is still free after the session's allocations.
+
+    SKUs of the session frame take their Final_Stock, all other SKUs of the
+    stock file their full stock. SKUs that are only in the session frame
+    (not in the stock file) are added with their Final_Stock, so a negative
+    balance from a force-fulfilled order is not handed out again.
+    """
+    session_stock = existing_df.drop_duplicates("SKU").set_index("SKU")["Final_Stock"]
+    session_stock = session_stock[session_stock.notna()]
+
+    remaining = stock_clean.copy()
+    in_session = remaining["SKU"].isin(session_stock.index)
+    remaining["Stock"] = _replace_rows(
+        remaining["Stock"], in_session, remaining.loc[in_session, "SKU"].map(session_stock)
+    )
+
+    unlisted = session_stock[~session_stock.index.isin(remaining["SKU"])]
+    if not unlisted.empty:
+        remaining = pd.concat(
+            [remaining, pd.DataFrame({"SKU": unlisted.index.to_numpy(), "Stock": unlisted.to_numpy()})],
+            ignore_index=True,
+        )
+    return remaining
+
+
+def allocate_appended_orders(
+    stock_df: pd.DataFrame,
+    orders_df: pd.DataFrame,
+    existing_df: pd.DataFrame,
+    history_df: pd.DataFrame,
+    column_mappings: Optional[dict] = None,
+    courier_mappings: Optional[dict] = None,
+    repeat_window_days: int = 1
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Allocates the orders that are not in the session yet.
+
+    Args:
+        stock_df: Raw stock DataFrame (the session's stock file)
+        orders_df: Raw orders DataFrame with the additional orders. Orders
+            already in the session are skipped, so a full re-export works too.
+        existing_df: The session's current analysis frame
+        history_df: Fulfillment history, for repeat detection of new orders
+        column_mappings: Same as for run_analysis
+        courier_mappings: Same as for run_analysis
+        repeat_window_days: Same as for run_analysis
+
+    Returns:
+        Tuple of (new_df, existing_df): the analyzed new rows with the
+        compact schema applied, and a copy of the session frame with
+        Final_Stock updated for the SKUs the new orders consumed.
+    """
+    additional_columns_config = column_mappings.get("additional_columns", []) if column_mappings else []
+
+    with phase("clean", rows_in=len(orders_df)) as record:
+        orders_clean, stock_clean = _clean_and_prepare_data(
+            orders_df, stock_df, column_mappings, additional_columns_config
+        )
+        known_orders = pd.Index(existing_df["Order_Number"].astype(str).unique())
+        is_known = orders_clean["Order_Number"].astype(str).isin(known_orders)
+        if is_known.any():
+            logger.info(
+                f"Delta analysis: skipping {orders_clean.loc[is_known, 'Order_Number'].nunique()} "
+                f"orders already in the session"
+            )
+            orders_clean = orders_clean[~is_known].reset_index(drop=True)
+        record.rows_out = len(orders_clean)
+
+    existing_df = existing_df.copy()
+    if orders_clean.empty:
+        logger.info("Delta analysis: no new orders to append")
+        return existing_df.iloc[0:0].copy(), existing_df
+
+    with phase("allocate", rows_in=len(orders_clean)) as record:
+        remaining = _remaining_stock(stock_clean, existing_df)
+        prioritized_orders = _prioritize_orders(orders_clean)
+        ledger = _simulate_stock_allocation(orders_clean, remaining, prioritized_orders)
+        final_stock = _calculate_final_stock(ledger)
+        record.rows_out = len(ledger.fulfillment_results)
+
+    with phase("merge", rows_in=len(orders_clean)) as record:
+        order_item_counts = orders_clean.groupby("Order_Number").size().rename("item_count")
+        new_df = _merge_results_to_dataframe(
+            orders_clean, remaining, order_item_counts, final_stock,
+            ledger.fulfillment_results, history_df, courier_mappings, repeat_window_days,
+            additional_columns_config, shortages=ledger.shortages
+        )
+
+        # The merge took Stock from the remaining stock; like every other row,
+        # the new rows report the stock of the stock file (0 if unlisted)
+        initial_stock = pd.concat([
+            existing_df.drop_duplicates("SKU").set_index("SKU")["Stock"],
+            stock_clean.set_index("SKU")["Stock"],
+        ])
+        initial_stock = initial_stock[~initial_stock.index.duplicated(keep="first")]
+        new_df["Stock"] = new_df["SKU"].map(initial_stock).fillna(0).to_numpy()
+        new_df = apply_compact_schema(new_df)
+
+        # Existing rows of the consumed SKUs see the new remaining stock
+        consumed = final_stock[final_stock["SKU"].isin(orders_clean["SKU"])].set_index("SKU")["Final_Stock"]
+        touched = existing_df["SKU"].isin(consumed.index)
+        if touched.any():
+            existing_df["Final_Stock"] = _replace_rows(
+                existing_df["Final_Stock"], touched, existing_df.loc[touched, "SKU"].map(consumed)
+            )
+        record.rows_out = len(new_df)
+
+    fulfillable = new_df.loc[new_df["Order_Fulfillment_Status"] == "Fulfillable", "Order_Number"].nunique()
+    logger.info(
+        f"Delta analysis: {new_df['Order_Number'].nunique()} new orders "
+        f"({fulfillable} fulfillable), {len(new_df)} rows"
+    )
+    return new_df, existing_df
+
+
+def append_rows(existing_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+    """Appends the analyzed new rows to the session frame.
+
+    Existing rows keep their position, the new rows follow. Columns only
+    one side has are filled with NaN on the other.
+    """
+    if new_df.empty:
+        return existing_df
+    # Categoricals with different categories concatenate to object columns;
+    # the compact schema turns them back into categoricals
+    combined = pd.concat([existing_df, new_df], ignore_index=True)
+    return apply_compact_schema(combined)
@@ -0,0 +1,327 @@
+"""Append-only fulfillment history store.
+
+The history used to be a single ``fulfillment_history.csv`` that every
+analysis read completely and rewrote completely on the file server. The
+store keeps it in a directory per client instead:
+
+    Clients/CLIENT_{ID}/fulfillment_history/
+        index.pkl          # compacted history, one row per order
+        segments/*.csv     # one small file per analysis run (append-only)
+        meta.json          # format version, last compaction, migration info
+
+- Writes only add a segment file, so concurrent runs on different machines
+  never overwrite each other.
+- ``index.pkl`` holds the Order_Number column sorted, with Execution_Date
+  already parsed to datetime64, so loading needs no CSV parsing and order
+  lookups are a binary search.
+- Once enough segments have piled up they are compacted into the index;
+  records older than the retention period are dropped at that point.
+- An existing ``fulfillment_history.csv`` is imported once; the file itself
+  is left in place.
+
+A record written later always wins over an older one for the same order,
+as with the old concat / drop_duplicates(keep="last").
+"""
+
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .repeat_detection import HISTORY_VERSION_ATTR, RepeatDetector
+
+logger = logging.getLogger("ShopifyToolLogger")
+
+HISTORY_FORMAT_VERSION = 1
+HISTORY_DIRNAME = "fulfillment_history"
+LEGACY_HISTORY_FILENAME = "fulfillment_history.csv"
+HISTORY_COLUMNS = ["Order_Number", "Execution_Date"]
+
+# Segments that trigger a compaction when appending
+DEFAULT_COMPACT_SEGMENTS = 50
+# Records older than this are dropped on compaction (None keeps everything)
+DEFAULT_RETENTION_DAYS = 730
+# A compaction lock older than this is considered abandoned
+_LOCK_STALE_SECONDS = 600
+
+
+def _empty_history() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Order_Number": pd.Series([], dtype=object),
+        "Execution_Date": pd.Series([], dtype="datetime64[ns]"),
+    })
+
+
+def _normalize_records(df: pd.DataFrame) -> pd.DataFrame:
+    """Brings raw records to the store schema: str order numbers, parsed dates."""
+    if "Order_Number" not in df.columns:
+        return _empty_history()
+    records = pd.DataFrame({
+        "Order_Number": df["Order_Number"].astype(str).str.strip().to_numpy(dtype=object),
+        "Execution_Date": (
+            pd.to_datetime(df["Execution_Date"], errors="coerce").dt.normalize().astype("datetime64[ns]").to_numpy()
+            if "Execution_Date" in df.columns
+            else np.full(len(df), np.datetime64("NaT"), dtype="datetime64[ns]")
+        ),
+    })
+    return records[records["Order_Number"].ne("") & df["Order_Number"].notna().to_numpy()]
+
+
+def _latest_per_order(records: pd.DataFrame) -> pd.DataFrame:
+    """Keeps the last written record of every order, sorted by Order_Number."""
+    latest = records.drop_duplicates(subset=["Order_Number"], keep="last")
+    return latest.sort_values("Order_Number", kind="stable").reset_index(drop=True)
+
+
+class FulfillmentHistoryStore:
+    """Fulfillment history of one client.
+
+    Args:
+        root: Store directory (``Clients/CLIENT_{ID}/fulfillment_history``)
+        retention_days: Records older than this are dropped on compaction;
+            None keeps everything
+        compact_segments: Number of segments that triggers a compaction
+            after an append
+        legacy_csv: Old single-file history to import on first use
+    """
+
+    def __init__(
+        self,
+        root,
+        retention_days: Optional[int] = DEFAULT_RETENTION_DAYS,
+        compact_segments: int = DEFAULT_COMPACT_SEGMENTS,
+        legacy_csv=None
+    ):
+        self.root = Path(root)
+        self.retention_days = retention_days
+        self.compact_segments = compact_segments
+        self.legacy_csv = Path(legacy_csv) if legacy_csv is not None else None
+
+    @classmethod
+    def for_client(cls, profile_manager, client_id: str, settings: Optional[dict] = None) -> "FulfillmentHistoryStore":
+        """Creates the store in the client's directory, configured from settings.
+
+        The retention is never shorter than the repeat detection window.
+        """
+        settings = settings or {}
+        client_dir = profile_manager.get_client_directory(client_id)
+        retention_days = settings.get("history_retention_days", DEFAULT_RETENTION_DAYS)
+        if retention_days is not None:
+            retention_days = max(int(retention_days), int(settings.get("repeat_detection_days", 1)))
+        return cls(
+            client_dir / HISTORY_DIRNAME,
+            retention_days=retention_days,
+            compact_segments=settings.get("history_compact_segments", DEFAULT_COMPACT_SEGMENTS),
+            legacy_csv=client_dir / LEGACY_HISTORY_FILENAME,
+        )
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / "index.pkl"
+
+    @property
+    def segments_dir(self) -> Path:
+        return self.root / "segments"
+
+    def _read_meta(self) -> dict:
+        try:
+            with open(self.root / "meta.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_meta(self, updates: dict) -> None:
+        meta = self._read_meta()
+        meta.update(updates, format_version=HISTORY_FORMAT_VERSION)
+        tmp_path = self.root / f".meta.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, self.root / "meta.json")
+
+    def _segment_paths(self) -> List[Path]:
+        if not self.segments_dir.is_dir():
+            return []
+        # Names start with a sortable timestamp, so this is write order
+        return sorted(p for p in self.segments_dir.iterdir() if p.suffix == ".csv")
+
+    def _ensure_initialized(self) -> None:
+        """Creates the directories and imports the legacy CSV on first use."""
+        if self.index_path.exists():
+            return
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
+
+        records = _empty_history()
+        migrated_from = None
+        if self.legacy_csv is not None and self.legacy_csv.exists():
+            try:
+                legacy = pd.read_csv(self.legacy_csv, encoding="utf-8-sig", dtype={"Order_Number": str})
+                records = _normalize_records(legacy)
+                migrated_from = self.legacy_csv.name
+                logger.info(f"Imported {len(records)} records from legacy history {self.legacy_csv}")
+            except Exception as e:
+                logger.warning(f"Could not import legacy history {self.legacy_csv}: {e}")
+
+        self._write_index(_latest_per_order(records))
+        self._write_meta({"created_at": datetime.now().isoformat(timespec="seconds"), "migrated_from": migrated_from})
+
+    def _write_index(self, history: pd.DataFrame) -> None:
+        tmp_path = self.root / f".index.{uuid.uuid4().hex[:8]}.tmp"
+        history.to_pickle(tmp_path)
+        os.replace(tmp_path, self.index_path)
+
+    def _read_index(self) -> pd.DataFrame:
+        try:
+            return pd.read_pickle(self.index_path)
+        except FileNotFoundError:
+            return _empty_history()
+
+    @staticmethod
+    def _read_segment(path: Path) -> pd.DataFrame:
+        try:
+            return pd.read_csv(path, encoding="utf-8", dtype={"Order_Number": str})
+        except (OSError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+            # A segment being written by another machine right now, or damaged
+            logger.warning(f"Skipping unreadable history segment {path.name}: {e}")
+            return pd.DataFrame(columns=HISTORY_COLUMNS)
+
+    def _read_all(self, segment_paths: List[Path]) -> pd.DataFrame:
+        parts = [self._read_index()]
+        parts.extend(_normalize_records(self._read_segment(p)) for p in segment_paths)
+        parts = [part for part in parts if not part.empty]
+        if not parts:
+            return _empty_history()
+        return _latest_per_order(pd.concat(parts, ignore_index=True))
+
+    def load(self) -> pd.DataFrame:
+        """Returns the whole history.
+
+        Returns:
+            DataFrame with Order_Number (str) and Execution_Date
+            (datetime64, NaT if unknown), one row per order, sorted by
+            Order_Number.
+        """
+        self._ensure_initialized()
+        segment_paths = self._segment_paths()
+        history = self._read_all(segment_paths)
+        history.attrs[HISTORY_VERSION_ATTR] = self._version(segment_paths)
+        return history
+
+    def _version(self, segment_paths: List[Path]) -> str:
+        """Identifies the stored content: the index file plus the segment names.
+
+        Segments are never modified after they are written and the index is
+        replaced as a whole, so this changes whenever the history does.
+        """
+        try:
+            stat = self.index_path.stat()
+            index_id = f"{stat.st_mtime_ns}:{stat.st_size}"
+        except OSError:
+            index_id = "-"
+        names = ",".join(p.name for p in segment_paths)
+        return f"{self.root.resolve()}|{index_id}|{names}"
+
+    def repeat_detector(self) -> RepeatDetector:
+        """Returns the (cached) repeat detector of the current history.
+
+        Besides the repeat check it answers when an order was last
+        fulfilled, see ``RepeatDetector.last_seen``.
+        """
+        return RepeatDetector.for_history(self.load())
+
+    def lookup(self, order_numbers: Iterable) -> pd.DataFrame:
+        """Returns the history records of the given orders only.
+
+        Uses a binary search on the sorted Order_Number column instead of
+        scanning the history.
+        """
+        history = self.load()
+        keys = pd.unique(pd.Series(list(order_numbers), dtype=object).astype(str))
+        sorted_numbers = history["Order_Number"].to_numpy(dtype=object)
+        positions = np.searchsorted(sorted_numbers, keys)
+        in_range = positions < len(sorted_numbers)
+        found = np.zeros(len(keys), dtype=bool)
+        found[in_range] = sorted_numbers[positions[in_range]] == keys[in_range]
+        return history.iloc[np.sort(positions[found])].reset_index(drop=True)
+
+    def append(self, order_numbers: Iterable, execution_date: Optional[str] = None) -> Optional[Path]:
+        """Records orders as fulfilled, writing one new segment file.
+
+        Args:
+            order_numbers: Fulfilled order numbers
+            execution_date: Date to record (default: today, YYYY-MM-DD)
+
+        Returns:
+            Path of the written segment, or None if there was nothing to write.
+        """
+        numbers = pd.unique(pd.Series(list(order_numbers), dtype=object).astype(str))
+        if len(numbers) == 0:
+            return None
+        self._ensure_initialized()
+
+        execution_date = execution_date or datetime.now().strftime("%Y-%m-%d")
+        stamp = datetime.now().strftime("%Y%m%d%H%M%S%f")
+        segment_path = self.segments_dir / f"{stamp}_{uuid.uuid4().hex[:8]}.csv"
+        tmp_path = self.segments_dir / f".{segment_path.name}.tmp"
+        pd.DataFrame({"Order_Number": numbers, "Execution_Date": execution_date}).to_csv(
+            tmp_path, index=False, encoding="utf-8"
+        )
+        os.replace(tmp_path, segment_path)
+        logger.info(f"History: appended {len(numbers)} records ({segment_path.name})")
+
+        if len(self._segment_paths()) >= self.compact_segments:
+            self.compact()
+        return segment_path
+
+    def compact(self) -> bool:
+        """Merges all segments into the index and applies the retention.
+
+        Segments written while the compaction runs are kept for the next one.
+        Only one machine compacts at a time (lock file); if another one is
+        compacting, this call does nothing.
+
+        Returns:
+            bool: True if a compaction ran.
+        """
+        self._ensure_initialized()
+        lock_path = self.root / "compact.lock"
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                stale = time.time() - lock_path.stat().st_mtime > _LOCK_STALE_SECONDS
+            except OSError:
+                stale = False
+            if not stale:
+                logger.info("History compaction already running elsewhere, skipping")
+                return False
+            logger.warning("Removing stale history compaction lock")
+            lock_path.unlink(missing_ok=True)
+            return self.compact()
+
+        try:
+            os.close(fd)
+            segment_paths = self._segment_paths()
+            history = self._read_all(segment_paths)
+            before = len(history)
+            if self.retention_days is not None:
+                cutoff = pd.Timestamp(datetime.now().date()) - pd.Timedelta(days=self.retention_days)
+                # Records without a date are kept: their age is unknown
+                history = history[~(history["Execution_Date"] < cutoff)].reset_index(drop=True)
+            self._write_index(history)
+            for path in segment_paths:
+                path.unlink(missing_ok=True)
+            self._write_meta({"last_compacted_at": datetime.now().isoformat(timespec="seconds")})
+            logger.info(
+                f"History compacted: {len(segment_paths)} segments merged, "
+                f"{before - len(history)} records past retention dropped, {len(history)} orders"
+            )
+            return True
+        finally:
+            lock_path.unlink(missing_ok=True)
@@ -0,0 +1,193 @@
+"""Row index of the analysis DataFrame by order and by SKU.
+
+``OrderIndex`` maps the normalized order number and SKU of every row to
+its row positions. Positions are kept in one grouped array per kind (CSR
+layout, as in allocation.py), so row removal and insertion update the
+whole index with a few array operations.
+
+An index tracks the DataFrame object it was built for; edits that replace
+the frame report it through ``remove_rows()`` / ``append_rows()``.
+``order_index_for()`` rebuilds the index when nothing kept it in sync.
+"""
+
+import weakref
+from typing import Dict, Hashable, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+_EMPTY = np.array([], dtype=np.int64)
+
+
+def normalize_order_key(value) -> str:
+    """Lookup key of an order number (or SKU): ``str(value).strip()``."""
+    return str(value).strip()
+
+
+def _normalized(column: pd.Series) -> np.ndarray:
+    return column.astype(str).str.strip().to_numpy(dtype=object)
+
+
+class PositionMap:
+    """Key -> row positions, stored as one array grouped by key.
+
+    Args:
+        keys: Key of every row, in row order.
+    """
+
+    def __init__(self, keys):
+        codes, uniques = pd.factorize(np.asarray(keys, dtype=object))
+        valid = codes >= 0
+        self._ids: Dict[Hashable, int] = {key: i for i, key in enumerate(uniques)}
+        self._set_entries(codes[valid].astype(np.int64), np.flatnonzero(valid))
+
+    def _set_entries(self, group_ids: np.ndarray, positions: np.ndarray) -> None:
+        order = np.argsort(group_ids, kind="stable")
+        self._group_ids = group_ids[order]
+        self._positions = positions[order]
+        self._starts = np.searchsorted(self._group_ids, np.arange(len(self._ids) + 1))
+
+    def __contains__(self, key) -> bool:
+        group = self._ids.get(key)
+        return group is not None and self._starts[group + 1] > self._starts[group]
+
+    def keys(self) -> List:
+        """Keys that still have rows."""
+        counts = np.diff(self._starts)
+        return [key for key, group in self._ids.items() if counts[group]]
+
+    def get(self, key) -> np.ndarray:
+        """Row positions of ``key`` in ascending order (empty if unknown)."""
+        group = self._ids.get(key)
+        if group is None:
+            return _EMPTY
+        return self._positions[self._starts[group]:self._starts[group + 1]]
+
+    def remove(self, removed: np.ndarray) -> None:
+        """Drops the removed positions and shifts the ones after them up.
+
+        Args:
+            removed: Sorted positions removed from the frame.
+        """
+        keep = ~np.isin(self._positions, removed)
+        kept = self._positions[keep]
+        self._set_entries(self._group_ids[keep], kept - np.searchsorted(removed, kept))
+
+    def add(self, keys: Iterable, positions: np.ndarray) -> None:
+        """Registers new rows (``positions`` must be past all existing rows)."""
+        group_ids = np.empty(len(positions), dtype=np.int64)
+        for i, key in enumerate(keys):
+            group = self._ids.get(key)
+            if group is None:
+                group = self._ids[key] = len(self._ids)
+            group_ids[i] = group
+        self._set_entries(
+            np.concatenate([self._group_ids, group_ids]),
+            np.concatenate([self._positions, np.asarray(positions, dtype=np.int64)]),
+        )
+
+
+class OrderIndex:
+    """Row positions of every order and SKU of an analysis DataFrame.
+
+    Args:
+        df (pd.DataFrame): Analysis DataFrame with an Order_Number column;
+            the SKU part is empty if there is no SKU column.
+
+    Raises:
+        ValueError: If the Order_Number column is missing
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        if "Order_Number" not in df.columns:
+            raise ValueError("DataFrame missing required columns: ['Order_Number']")
+        self._orders = PositionMap(_normalized(df["Order_Number"]))
+        self._has_skus = "SKU" in df.columns
+        self._skus = PositionMap(_normalized(df["SKU"]) if self._has_skus else [])
+        self.mark_synced(df)
+
+    def reflects(self, df: pd.DataFrame) -> bool:
+        """True if the index was last synced to this DataFrame object."""
+        return df is not None and self._synced_df() is df and len(df) == self._synced_rows
+
+    def mark_synced(self, df: pd.DataFrame) -> None:
+        """Records that the index matches ``df``."""
+        # A weak reference, not id(): ids of collected frames are reused.
+        self._synced_df = weakref.ref(df)
+        self._synced_rows = len(df)
+
+    def __contains__(self, order_number) -> bool:
+        return normalize_order_key(order_number) in self._orders
+
+    def rows(self, order_number) -> np.ndarray:
+        """Row positions of an order (empty if the order is not in the frame)."""
+        return self._orders.get(normalize_order_key(order_number))
+
+    def rows_for_orders(self, order_numbers: Iterable) -> np.ndarray:
+        """Sorted row positions of several orders."""
+        parts = [self.rows(order_number) for order_number in order_numbers]
+        return np.sort(np.concatenate(parts)) if parts else _EMPTY
+
+    def first_rows(self, order_numbers: Iterable) -> List[int]:
+        """First row position of each given order, skipping unknown orders."""
+        firsts = []
+        for order_number in order_numbers:
+            rows = self.rows(order_number)
+            if len(rows):
+                firsts.append(int(rows[0]))
+        return firsts
+
+    def sku_rows(self, sku) -> np.ndarray:
+        """Row positions of a SKU."""
+        return self._skus.get(normalize_order_key(sku))
+
+    def order_sku_rows(self, order_number, sku) -> np.ndarray:
+        """Row positions of a SKU within one order."""
+        return np.intersect1d(self.rows(order_number), self.sku_rows(sku), assume_unique=True)
+
+    def order_numbers(self) -> List[str]:
+        """Normalized keys of the orders in the frame."""
+        return self._orders.keys()
+
+    def remove_rows(self, df: pd.DataFrame, positions: Iterable[int]) -> None:
+        """Forgets removed rows (``df`` is the new frame, re-indexed from 0)."""
+        removed = np.unique(np.asarray(list(positions), dtype=np.int64))
+        self._orders.remove(removed)
+        self._skus.remove(removed)
+        self.mark_synced(df)
+
+    def append_rows(self, df: pd.DataFrame, positions: Iterable[int]) -> None:
+        """Registers rows appended at the end of the frame (``df`` is the new frame)."""
+        positions = np.asarray(list(positions), dtype=np.int64)
+        added = df.iloc[positions]
+        self._orders.add(_normalized(added["Order_Number"]), positions)
+        if self._has_skus:
+            self._skus.add(_normalized(added["SKU"]), positions)
+        self.mark_synced(df)
+
+
+def order_index_for(owner) -> OrderIndex:
+    """Returns the OrderIndex of ``owner.analysis_results_df``.
+
+    ``owner`` is the object holding the frame (the main window); the index
+    is stored on it as ``order_index`` and rebuilt when it no longer
+    reflects the frame.
+    """
+    df = owner.analysis_results_df
+    index = getattr(owner, "order_index", None)
+    if not isinstance(index, OrderIndex) or not index.reflects(df):
+        index = OrderIndex(df)
+        owner.order_index = index
+    return index
+
+
+def synced_order_index(owner):
+    """Returns ``owner``'s OrderIndex if it reflects the frame, else None.
+
+    For edits that replace the frame: fetch it before the edit, then report
+    the removed / appended rows so the next lookup needs no rebuild.
+    """
+    index = getattr(owner, "order_index", None)
+    if isinstance(index, OrderIndex) and index.reflects(owner.analysis_results_df):
+        return index
+    return None
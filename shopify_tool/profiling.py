@@ -0,0 +1,212 @@
+"""Per-phase profiling of the analysis workflow.
+
+A ``PhaseProfiler`` records, for every named phase, the wall time, CPU
+time, growth of the process' peak RSS and the rows going in and out:
+
+    profiler = PhaseProfiler(callback=my_hook)
+    with profiler.activate():
+        with phase("clean", rows_in=len(orders_df)) as record:
+            orders_clean = ...
+            record.rows_out = len(orders_clean)
+    profiler.save(analysis_dir / "perf.json")
+
+``phase()`` records into the profiler that is active in the current
+context and does nothing when none is, so the analysis functions carry the
+instrumentation without taking a profiler argument. Phases may nest (set
+decoding runs inside cleaning); each record keeps its parent's name.
+
+The optional callback is invoked as ``callback("start", record)`` and
+``callback("end", record)`` so external profilers (a sampling profiler,
+tracing spans, the GUI's progress bar) can hook into phase boundaries.
+"""
+
+import json
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger("ShopifyToolLogger")
+
+PERF_FILENAME = "perf.json"
+
+_active_profiler: ContextVar[Optional["PhaseProfiler"]] = ContextVar("active_profiler", default=None)
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Returns the peak resident set size of this process, if available."""
+    try:
+        if sys.platform == "win32":
+            import ctypes
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD),
+                    ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t),
+                    ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t),
+                    ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return None
+            return int(counters.PeakWorkingSetSize)
+
+        import resource
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+    except Exception:
+        return None
+
+
+class PhaseRecord:
+    """Measurements of one phase run.
+
+    ``rows_out`` (and ``rows_in``, if not known up front) are set by the
+    code inside the phase; everything else is filled in by the profiler.
+    """
+
+    def __init__(self, name: str, parent: Optional[str] = None, rows_in: Optional[int] = None):
+        self.name = name
+        self.parent = parent
+        self.rows_in = rows_in
+        self.rows_out: Optional[int] = None
+        self.wall_seconds: Optional[float] = None
+        self.cpu_seconds: Optional[float] = None
+        self.peak_rss_delta_bytes: Optional[int] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "parent": self.parent,
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": self.cpu_seconds,
+            "peak_rss_delta_bytes": self.peak_rss_delta_bytes,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "error": self.error,
+        }
+
+
+class PhaseProfiler:
+    """Collects ``PhaseRecord``s for one run.
+
+    Args:
+        callback: Optional ``callback(event, record)`` called with
+            event "start" before and "end" after every phase. Errors raised
+            by the callback are logged and ignored.
+    """
+
+    def __init__(self, callback: Optional[Callable[[str, PhaseRecord], None]] = None):
+        self.callback = callback
+        self.records: List[PhaseRecord] = []
+        self.started_at = datetime.now()
+        self._stack: List[PhaseRecord] = []
+        self._wall_started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._peak_rss_started = peak_rss_bytes()
+
+    def _notify(self, event: str, record: PhaseRecord) -> None:
+        if self.callback is None:
+            return
+        try:
+            self.callback(event, record)
+        except Exception as e:
+            logger.warning(f"Profiling callback failed on {event} of '{record.name}': {e}")
+
+    @contextmanager
+    def phase(self, name: str, rows_in: Optional[int] = None):
+        """Measures the enclosed block as phase ``name``.
+
+        Yields:
+            PhaseRecord: The record, so the block can set ``rows_out``.
+        """
+        parent = self._stack[-1].name if self._stack else None
+        record = PhaseRecord(name, parent=parent, rows_in=rows_in)
+        self.records.append(record)
+        self._stack.append(record)
+        self._notify("start", record)
+
+        rss_before = peak_rss_bytes()
+        cpu_before = time.process_time()
+        wall_before = time.perf_counter()
+        try:
+            yield record
+        except BaseException as e:
+            record.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            record.wall_seconds = round(time.perf_counter() - wall_before, 6)
+            record.cpu_seconds = round(time.process_time() - cpu_before, 6)
+            rss_after = peak_rss_bytes()
+            if rss_before is not None and rss_after is not None:
+                record.peak_rss_delta_bytes = rss_after - rss_before
+            self._stack.pop()
+            self._notify("end", record)
+
+    @contextmanager
+    def activate(self):
+        """Makes this the profiler that ``phase()`` records into."""
+        token = _active_profiler.set(self)
+        try:
+            yield self
+        finally:
+            _active_profiler.reset(token)
+
+    def to_dict(self) -> Dict:
+        """Returns the run as a JSON-serializable dictionary."""
+        peak_rss = peak_rss_bytes()
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "total_wall_seconds": round(time.perf_counter() - self._wall_started, 6),
+            "total_cpu_seconds": round(time.process_time() - self._cpu_started, 6),
+            "peak_rss_bytes": peak_rss,
+            "peak_rss_delta_bytes": (
+                peak_rss - self._peak_rss_started
+                if peak_rss is not None and self._peak_rss_started is not None else None
+            ),
+            "phases": [record.to_dict() for record in self.records],
+        }
+
+    def save(self, path) -> Path:
+        """Writes ``to_dict()`` as JSON to ``path``."""
+        path = Path(path)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+def get_active_profiler() -> Optional[PhaseProfiler]:
+    """Returns the profiler active in the current context, if any."""
+    return _active_profiler.get()
+
+
+@contextmanager
+def phase(name: str, rows_in: Optional[int] = None):
+    """Records phase ``name`` into the active profiler.
+
+    Without an active profiler the block runs unmeasured and the yielded
+    record is discarded, so callers can set ``rows_out`` unconditionally.
+    """
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield PhaseRecord(name, rows_in=rows_in)
+        return
+    with profiler.phase(name, rows_in=rows_in) as record:
+        yield record
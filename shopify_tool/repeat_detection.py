@@ -0,0 +1,163 @@
+"""Repeat-order detection against the fulfillment history.
+
+An order is a repeat when the same Order_Number was fulfilled at least
+``repeat_window_days`` days ago (see ``analysis._detect_repeated_orders``).
+``RepeatDetector`` keeps the history as one sorted array of unique order
+keys with the first and last Execution_Date of each, so a batch of order
+numbers is checked with a single ``searchsorted``.
+
+Detectors are cached by the ``history_version`` the history store puts into
+``history_df.attrs`` (see history_store.py). Frames without a version are
+not cached.
+"""
+
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger("ShopifyToolLogger")
+
+HISTORY_VERSION_ATTR = "history_version"
+
+# Detectors kept for the most recently used history versions
+_CACHE_SIZE = 8
+_detector_cache: "OrderedDict[str, RepeatDetector]" = OrderedDict()
+
+
+def _as_keys(order_numbers) -> np.ndarray:
+    """Order numbers as an object array of str (lookup keys)."""
+    return pd.Series(order_numbers, dtype=object).astype(str).to_numpy(dtype=object)
+
+
+class RepeatDetector:
+    """Sorted order/date arrays of one history for batch repeat lookups.
+
+    Attributes:
+        order_keys (np.ndarray): Unique order numbers (str), sorted
+        first_seen (np.ndarray): Earliest Execution_Date per order (datetime64, NaT if none)
+        last_seen_dates (np.ndarray): Latest Execution_Date per order
+        dated (bool): False if the history has no usable dates at all; every
+            known order then counts as a repeat (backward compatibility)
+    """
+
+    def __init__(self, order_keys: np.ndarray, first_seen: np.ndarray, last_seen_dates: np.ndarray, dated: bool):
+        self.order_keys = order_keys
+        self.first_seen = first_seen
+        self.last_seen_dates = last_seen_dates
+        self.dated = dated
+
+    @classmethod
+    def from_history(cls, history_df: pd.DataFrame) -> "RepeatDetector":
+        """Builds the sorted arrays from a history DataFrame.
+
+        Args:
+            history_df: DataFrame with Order_Number and (optionally)
+                Execution_Date; several rows per order are allowed.
+        """
+        if history_df.empty or "Order_Number" not in history_df.columns:
+            empty = np.array([], dtype=object)
+            return cls(empty, np.array([], dtype="datetime64[ns]"), np.array([], dtype="datetime64[ns]"), dated=False)
+
+        dates = None
+        if "Execution_Date" in history_df.columns:
+            dates = history_df["Execution_Date"]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, errors="coerce")
+            dates = dates.dt.normalize()
+            if dates.isna().all():
+                logger.warning("All dates in history are invalid, using full history")
+                dates = None
+        else:
+            logger.warning("History has no Execution_Date column, using full history")
+
+        records = pd.DataFrame({
+            "key": _as_keys(history_df["Order_Number"]),
+            "date": (
+                dates.to_numpy(dtype="datetime64[ns]") if dates is not None
+                else np.full(len(history_df), np.datetime64("NaT"), dtype="datetime64[ns]")
+            ),
+        })
+        per_order = records.groupby("key", sort=True)["date"].agg(["min", "max"])
+        return cls(
+            per_order.index.to_numpy(dtype=object),
+            per_order["min"].to_numpy(dtype="datetime64[ns]"),
+            per_order["max"].to_numpy(dtype="datetime64[ns]"),
+            dated=dates is not None,
+        )
+
+    @classmethod
+    def for_history(cls, history_df: pd.DataFrame) -> "RepeatDetector":
+        """Returns the cached detector of a versioned history, building it once."""
+        version = history_df.attrs.get(HISTORY_VERSION_ATTR)
+        if version is None:
+            return cls.from_history(history_df)
+        detector = _detector_cache.get(version)
+        if detector is None:
+            detector = cls.from_history(history_df)
+            _detector_cache[version] = detector
+            while len(_detector_cache) > _CACHE_SIZE:
+                _detector_cache.popitem(last=False)
+        else:
+            _detector_cache.move_to_end(version)
+        return detector
+
+    def __len__(self) -> int:
+        return len(self.order_keys)
+
+    def _locate(self, order_numbers) -> tuple:
+        """Binary search: (positions, found) for every given order number."""
+        keys = _as_keys(order_numbers)
+        positions = np.searchsorted(self.order_keys, keys)
+        in_range = positions < len(self.order_keys)
+        found = np.zeros(len(keys), dtype=bool)
+        found[in_range] = self.order_keys[positions[in_range]] == keys[in_range]
+        return np.where(found, positions, 0), found
+
+    @staticmethod
+    def cutoff_date(repeat_window_days: int = 1, today: Optional[datetime] = None) -> pd.Timestamp:
+        """First day that does NOT count: orders executed before it are repeats.
+
+        Example: repeat_window_days=1 and today=2026-01-16 gives 2026-01-16,
+        so 2026-01-15 and earlier count.
+        """
+        today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        return pd.Timestamp(today - timedelta(days=repeat_window_days - 1))
+
+    def seen_before(self, order_numbers, cutoff) -> np.ndarray:
+        """Whether each order was fulfilled before ``cutoff`` (one batch lookup).
+
+        Without any usable dates in the history every known order counts.
+        """
+        positions, found = self._locate(order_numbers)
+        if not self.dated or not len(self.order_keys):
+            return found
+        first_seen = self.first_seen[positions]
+        return found & (first_seen < np.datetime64(pd.Timestamp(cutoff), "ns"))
+
+    def repeated_mask(self, order_numbers, repeat_window_days: int = 1, today: Optional[datetime] = None) -> np.ndarray:
+        """Repeat flag for each order number for the given window."""
+        return self.seen_before(order_numbers, self.cutoff_date(repeat_window_days, today))
+
+    def repeated_order_numbers(self, repeat_window_days: int = 1, today: Optional[datetime] = None) -> np.ndarray:
+        """All history order numbers (str) that count as repeats."""
+        if not self.dated:
+            return self.order_keys
+        cutoff = np.datetime64(self.cutoff_date(repeat_window_days, today), "ns")
+        return self.order_keys[self.first_seen < cutoff]
+
+    def last_seen(self, order_numbers: Iterable) -> pd.Series:
+        """Latest fulfillment date per order, NaT for orders never seen.
+
+        Returns:
+            pd.Series of datetime64 aligned with ``order_numbers``
+        """
+        order_numbers = list(order_numbers)
+        positions, found = self._locate(order_numbers)
+        dates = np.full(len(order_numbers), np.datetime64("NaT"), dtype="datetime64[ns]")
+        if len(self.order_keys):
+            dates[found] = self.last_seen_dates[positions[found]]
+        return pd.Series(dates, index=order_numbers, name="Last_Seen")
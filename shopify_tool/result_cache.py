@@ -0,0 +1,310 @@
+"""Content-addressed cache of analysis results.
+
+Re-running the analysis on the same stock and orders files (after closing a
+dialog, reopening a session) gives the same result, so ``run_full_analysis``
+stores its output under a key made from everything the result depends on:
+
+- SHA-256 of the orders file and of the stock file (and their delimiters)
+- a hash of the relevant config: column mappings, set decoders, courier
+  mappings, rules, weight config, additional columns, repeat window and
+  low stock threshold
+- the history "version": the order numbers that count as repeats today
+  (``analysis._repeated_order_numbers``). Same-day history entries written
+  by the previous run do not change it, while the date moving on does.
+- the tool version, so an upgrade never serves results of older code
+
+Each entry is a directory with the final DataFrame and both summaries as
+pandas pickles (column blocks with their exact dtypes, categoricals
+included) plus the statistics and metadata as JSON. Entries live per client
+in ``Clients/CLIENT_{ID}/analysis_cache/`` and are evicted by age (last
+use) and by total size, least recently used first.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from .rule_plan import compile_rules
+
+logger = logging.getLogger("ShopifyToolLogger")
+
+# Bump when the stored layout or the meaning of a key changes
+CACHE_FORMAT_VERSION = 1
+
+CACHE_DIRNAME = "analysis_cache"
+DEFAULT_MAX_AGE_DAYS = 7
+DEFAULT_MAX_MB = 1024
+
+_FRAME_FILES = {
+    "final_df": "final_df.pkl",
+    "summary_present_df": "summary_present.pkl",
+    "summary_missing_df": "summary_missing.pkl",
+}
+_READ_BLOCK = 1024 * 1024
+
+
+def file_digest(path) -> str:
+    """Returns the SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def config_digest(config: dict) -> str:
+    """Hashes the parts of the client config that change the analysis result."""
+    settings = config.get("settings", {})
+    table_view = config.get("_client_config", {}).get("ui_settings", {}).get("table_view", {})
+    column_mappings = config.get("column_mappings") or {}
+    relevant = {
+        # Only the CSV mappings: the analysis injects set_decoders and
+        # additional_columns into column_mappings, they are hashed below
+        "column_mappings": {key: column_mappings.get(key) for key in ("orders", "stock")},
+        "set_decoders": config.get("set_decoders", {}),
+        "courier_mappings": config.get("courier_mappings", {}),
+        # Digest of the normalized rules, shared with the compiled plan
+        "rules": compile_rules(config.get("rules", [])).digest,
+        "weight_config": config.get("weight_config", {}),
+        "additional_columns": table_view.get("additional_columns", []),
+        "repeat_detection_days": settings.get("repeat_detection_days", 1),
+        "low_stock_threshold": settings.get("low_stock_threshold"),
+    }
+    payload = json.dumps(relevant, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def history_digest(history_df: pd.DataFrame, repeat_window_days: int = 1) -> str:
+    """Hashes the history as far as it affects today's repeat detection."""
+    from .analysis import _repeated_order_numbers
+
+    if "Order_Number" not in history_df.columns:
+        numbers = []
+    else:
+        numbers = sorted({str(n) for n in _repeated_order_numbers(history_df, repeat_window_days)})
+    return hashlib.sha256("\n".join(numbers).encode("utf-8")).hexdigest()
+
+
+def compute_cache_key(
+    orders_file_path: str,
+    stock_file_path: str,
+    orders_delimiter: str,
+    stock_delimiter: str,
+    config: dict,
+    history_df: pd.DataFrame
+) -> str:
+    """Builds the cache key of one analysis run.
+
+    Args:
+        orders_file_path: Orders CSV
+        stock_file_path: Stock CSV
+        orders_delimiter: Delimiter of the orders CSV
+        stock_delimiter: Delimiter of the stock CSV
+        config: Client config as passed to run_full_analysis (with _client_config)
+        history_df: Fulfillment history as loaded for this run
+
+    Returns:
+        str: Hex digest identifying the inputs.
+    """
+    from . import __version__
+
+    repeat_window_days = config.get("settings", {}).get("repeat_detection_days", 1)
+    parts = [
+        f"format={CACHE_FORMAT_VERSION}",
+        f"version={__version__}",
+        f"orders={file_digest(orders_file_path)}:{orders_delimiter}",
+        f"stock={file_digest(stock_file_path)}:{stock_delimiter}",
+        f"config={config_digest(config)}",
+        f"history={history_digest(history_df, repeat_window_days)}",
+    ]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+class AnalysisResultCache:
+    """Stores and restores analysis results of one client.
+
+    Args:
+        cache_dir: Directory holding the entries
+        max_age_days: Entries not used for this many days are evicted
+        max_bytes: Upper bound of the total size of all entries
+    """
+
+    def __init__(
+        self,
+        cache_dir,
+        max_age_days: float = DEFAULT_MAX_AGE_DAYS,
+        max_bytes: int = DEFAULT_MAX_MB * 1024 * 1024
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+
+    @classmethod
+    def for_client(cls, profile_manager, client_id: str, settings: Optional[dict] = None) -> "AnalysisResultCache":
+        """Creates the cache in the client's directory, sized from settings."""
+        settings = settings or {}
+        return cls(
+            profile_manager.get_client_directory(client_id) / CACHE_DIRNAME,
+            max_age_days=settings.get("analysis_cache_max_age_days", DEFAULT_MAX_AGE_DAYS),
+            max_bytes=int(settings.get("analysis_cache_max_mb", DEFAULT_MAX_MB) * 1024 * 1024),
+        )
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.cache_dir / key
+
+    @staticmethod
+    def _read_meta(entry_dir: Path) -> Optional[Dict]:
+        try:
+            with open(entry_dir / "meta.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _write_meta(entry_dir: Path, meta: Dict) -> None:
+        with open(entry_dir / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2, ensure_ascii=False)
+
+    def get(self, key: str) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, dict]]:
+        """Restores a stored result.
+
+        Returns:
+            (final_df, summary_present_df, summary_missing_df, stats), or
+            None on a miss. Unreadable entries are removed and count as a miss.
+        """
+        entry_dir = self._entry_dir(key)
+        meta = self._read_meta(entry_dir)
+        if meta is None:
+            return None
+        try:
+            frames = {name: pd.read_pickle(entry_dir / filename) for name, filename in _FRAME_FILES.items()}
+            with open(entry_dir / "stats.json", "r", encoding="utf-8") as f:
+                stats = json.load(f)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable analysis cache entry {key[:12]}: {e}")
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            return None
+
+        meta["last_used_at"] = time.time()
+        meta["hits"] = meta.get("hits", 0) + 1
+        try:
+            self._write_meta(entry_dir, meta)
+        except OSError:
+            pass
+        return frames["final_df"], frames["summary_present_df"], frames["summary_missing_df"], stats
+
+    def put(
+        self,
+        key: str,
+        final_df: pd.DataFrame,
+        summary_present_df: pd.DataFrame,
+        summary_missing_df: pd.DataFrame,
+        stats: dict,
+        info: Optional[Dict] = None
+    ) -> Path:
+        """Stores a result under ``key`` and evicts old entries.
+
+        The entry is written to a temporary directory and renamed into
+        place, so readers never see a half-written entry.
+
+        Args:
+            info: Extra metadata kept in meta.json (e.g. input file names)
+
+        Returns:
+            Path: The entry directory.
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        entry_dir = self._entry_dir(key)
+        staging_dir = self.cache_dir / f".{key}.{uuid.uuid4().hex[:8]}.tmp"
+        staging_dir.mkdir()
+        try:
+            frames = {
+                "final_df": final_df,
+                "summary_present_df": summary_present_df,
+                "summary_missing_df": summary_missing_df,
+            }
+            for name, filename in _FRAME_FILES.items():
+                frames[name].to_pickle(staging_dir / filename)
+            with open(staging_dir / "stats.json", "w", encoding="utf-8") as f:
+                json.dump(stats, f, indent=2, ensure_ascii=False, default=str)
+
+            now = time.time()
+            size = sum(p.stat().st_size for p in staging_dir.iterdir())
+            self._write_meta(staging_dir, {
+                "key": key,
+                "created_at": datetime.fromtimestamp(now).isoformat(timespec="seconds"),
+                "last_used_at": now,
+                "hits": 0,
+                "size_bytes": size,
+                "rows": len(final_df),
+                **(info or {}),
+            })
+
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(staging_dir, entry_dir)
+        finally:
+            if staging_dir.exists():
+                shutil.rmtree(staging_dir, ignore_errors=True)
+
+        self.evict(keep=key)
+        return entry_dir
+
+    def entries(self) -> Dict[str, Dict]:
+        """Returns the metadata of all complete entries by key."""
+        if not self.cache_dir.is_dir():
+            return {}
+        entries = {}
+        for entry_dir in self.cache_dir.iterdir():
+            if entry_dir.is_dir() and not entry_dir.name.startswith("."):
+                meta = self._read_meta(entry_dir)
+                if meta is not None:
+                    entries[entry_dir.name] = meta
+        return entries
+
+    def evict(self, keep: Optional[str] = None) -> int:
+        """Removes entries older than max_age_days, then least recently used
+        ones until the total size fits max_bytes.
+
+        Args:
+            keep: Key that is never evicted (the entry just written)
+
+        Returns:
+            int: Number of removed entries.
+        """
+        entries = self.entries()
+        cutoff = time.time() - self.max_age_days * 86400
+        removed = 0
+
+        for key, meta in list(entries.items()):
+            if key != keep and meta.get("last_used_at", 0) < cutoff:
+                shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+                del entries[key]
+                removed += 1
+
+        total = sum(meta.get("size_bytes", 0) for meta in entries.values())
+        for key, meta in sorted(entries.items(), key=lambda item: item[1].get("last_used_at", 0)):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total -= meta.get("size_bytes", 0)
+            removed += 1
+
+        if removed:
+            logger.info(f"Analysis cache: evicted {removed} entries from {self.cache_dir}")
+        return removed
+
+    def clear(self) -> None:
+        """Removes every entry."""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
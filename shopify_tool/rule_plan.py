@@ -0,0 +1,311 @@
+"""Compiled, immutable form of a rules config.
+
+``compile_rules()`` returns a ``RulePlan`` with:
+
+- rules normalized (priority, steps) and sorted by priority;
+- per condition the resolved operator function, the pre-parsed value (list
+  items, range, rule date, compiled regex) and its condition-cache key;
+- per rule the columns its conditions read and its actions write.
+
+Problems found while compiling (unknown operators, invalid values) are
+collected in ``RulePlan.issues``. Plans are cached by a hash of the
+normalized rules.
+"""
+
+import copy
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import pandas as pd
+
+from . import rules as _rules
+from .rules import OPERATOR_MAP, RuleEngine
+
+# Plans kept for the most recently used configs
+_CACHE_SIZE = 16
+_plan_cache: "OrderedDict[str, RulePlan]" = OrderedDict()
+
+# Columns an order-level field is computed from
+ORDER_FIELD_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "item_count": (),
+    "total_quantity": ("Quantity",),
+    "unique_sku_count": ("SKU",),
+    "max_quantity": ("Quantity",),
+    "has_sku": ("SKU",),
+    "has_product": ("Product_Name",),
+    "order_volumetric_weight": ("Order_Volumetric_Weight",),
+    "all_no_packaging": ("All_No_Packaging",),
+    "order_min_box": ("Order_Min_Box",),
+}
+
+# Order-level fields tested on every row of a column
+_ROW_FIELD_COLUMNS = {"has_sku": "SKU", "has_product": "Product_Name"}
+
+# Operators whose value is parsed once: parser, operator on the parsed value
+_PREPARED_OPERATORS = {
+    "in list": (_rules._parse_list, _rules._in_list),
+    "between": (_rules._parse_range, _rules._between),
+    "matches regex": (_rules._compile_regex_safe, _rules._matches_regex),
+}
+
+
+class CompiledCondition:
+    """One condition with its operator resolved and its value parsed.
+
+    Attributes:
+        field (str): Column or order-level field the condition tests
+        column (str): DataFrame column the operator is applied to: the field
+            itself, or SKU / Product_Name for has_sku / has_product
+        operator (str): Operator name (key of OPERATOR_MAP)
+        value: Rule value as configured
+        base_operator (str): Operator actually computed; negated operators
+            ("does not contain", ...) compute their positive form
+        negate (bool): True if the result of base_operator is inverted
+        prepared: Parsed rule value (list items, range, date, regex), or
+            the value itself for operators without parsing
+        key (tuple | None): Condition-cache key, None if not cacheable
+        always_false (bool): Order-level condition that can never match
+            (unknown operator, has_sku without value)
+    """
+
+    __slots__ = (
+        "field", "column", "operator", "value", "base_operator", "negate",
+        "prepared", "key", "always_false", "_function",
+    )
+
+    def __init__(self, field: str, operator: str, value, always_false: bool = False, column: Optional[str] = None):
+        self.field = field
+        self.column = column or field
+        self.operator = operator
+        self.value = value
+        self.always_false = always_false
+        self.key, self.negate = _rules._condition_key(self.column, operator, value)
+        self.base_operator = _rules._NEGATED_OPERATORS.get(operator, operator)
+
+        self.prepared = value
+        self._function = None
+        if always_false:
+            return
+        if self.base_operator in _PREPARED_OPERATORS:
+            parse, self._function = _PREPARED_OPERATORS[self.base_operator]
+            self.prepared = parse(value)
+        elif self.base_operator in _rules._DATE_OPERATORS:
+            self.prepared = _rules._parse_rule_date(value)
+        else:
+            self._function = getattr(_rules, OPERATOR_MAP[self.base_operator])
+
+    @property
+    def invalid_value(self) -> bool:
+        """True if the value could not be parsed for the operator."""
+        parsed = self.base_operator in _PREPARED_OPERATORS or self.base_operator in _rules._DATE_OPERATORS
+        return parsed and not self.always_false and not self.prepared
+
+    def compute(self, series: pd.Series) -> pd.Series:
+        """Result of ``base_operator`` for every value of ``series``."""
+        if self.base_operator in _rules._DATE_OPERATORS:
+            return _rules._compare_dates(_rules._parse_dates(series), self.prepared, self.base_operator)
+        return self._function(series, self.prepared)
+
+    def evaluate(self, series: pd.Series) -> pd.Series:
+        """Result of the condition's operator for every value of ``series``."""
+        result = self.compute(series)
+        return ~result if self.negate else result
+
+
+class CompiledStep:
+    """Conditions, match type and actions of one rule step.
+
+    Attributes:
+        conditions (tuple[CompiledCondition]): Conditions that take part in
+            the evaluation (separators and incomplete ones are dropped)
+        has_conditions (bool): False if the step was configured without conditions
+        match (str): Match type as configured ("ALL" / "ANY")
+        actions (tuple[dict]): Action dicts as configured
+        writes (frozenset[str]): Columns the actions modify
+    """
+
+    __slots__ = ("conditions", "has_conditions", "match", "actions", "writes")
+
+    def __init__(self, conditions, has_conditions: bool, match: str, actions):
+        self.conditions: Tuple[CompiledCondition, ...] = tuple(conditions)
+        self.has_conditions = has_conditions
+        self.match = match
+        self.actions: Tuple[dict, ...] = tuple(actions)
+        self.writes: FrozenSet[str] = frozenset(RuleEngine._columns_written_by(self.actions))
+
+
+class CompiledRule:
+    """One rule of a plan.
+
+    Attributes:
+        name (str): Rule name
+        level (str): "article" or "order"
+        priority (int): Execution priority (lower runs first)
+        steps (tuple[CompiledStep]): Steps in order
+        reads (frozenset[str]): Columns the conditions depend on
+        writes (frozenset[str]): Columns the actions modify
+        adds_rows (bool): True if an action adds product rows
+        config (dict): The normalized rule dict
+    """
+
+    __slots__ = ("name", "level", "priority", "steps", "reads", "writes", "adds_rows", "config")
+
+    def __init__(self, config: dict, steps, reads):
+        self.config = config
+        self.name = config.get("name", "Unnamed")
+        self.level = config.get("level", "article")
+        self.priority = config.get("priority", 1000)
+        self.steps: Tuple[CompiledStep, ...] = tuple(steps)
+        self.reads: FrozenSet[str] = frozenset(reads)
+        self.writes: FrozenSet[str] = frozenset().union(*(step.writes for step in self.steps))
+        self.adds_rows = any(
+            action.get("type", "").upper() == "ADD_PRODUCT"
+            for step in self.steps for action in step.actions
+        )
+
+
+class RulePlan:
+    """Compiled rules config, shared by every run of the same config.
+
+    Attributes:
+        rules (tuple[CompiledRule]): All rules in priority order
+        article_rules (tuple[CompiledRule]): Article-level rules
+        order_rules (tuple[CompiledRule]): Order-level rules
+        digest (str): Hash of the normalized rules (cache key)
+        issues (tuple[str]): Problems found while compiling
+    """
+
+    __slots__ = ("rules", "article_rules", "order_rules", "digest", "issues")
+
+    def __init__(self, rules, digest: str, issues):
+        self.rules: Tuple[CompiledRule, ...] = tuple(rules)
+        self.article_rules = tuple(rule for rule in self.rules if rule.level == "article")
+        self.order_rules = tuple(rule for rule in self.rules if rule.level == "order")
+        self.digest = digest
+        self.issues: Tuple[str, ...] = tuple(issues)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def configs(self) -> List[dict]:
+        """Copies of the normalized rule dicts, in priority order."""
+        return [copy.deepcopy(rule.config) for rule in self.rules]
+
+
+def rules_digest(rules: List[dict]) -> str:
+    """Hash of normalized rule dicts."""
+    payload = json.dumps(rules, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _compile_condition(condition: dict, level: str, rule_name: str, issues: List[str]) -> Optional[CompiledCondition]:
+    """Compiles one condition, following the engine's per-level rules.
+
+    Separators and conditions without field or operator are dropped. An
+    unknown operator drops an article-level condition; at order level it
+    never matches, except has_sku / has_product, which fall back to
+    "equals".
+    """
+    field = condition.get("field")
+    operator = condition.get("operator")
+    value = condition.get("value")
+
+    if field and field.startswith("---"):
+        return None
+    if not field or not operator:
+        issues.append(f"[RULE ENGINE] Rule '{rule_name}': condition missing field or operator: {condition}")
+        return None
+
+    always_false = False
+    if operator not in OPERATOR_MAP:
+        if level == "order" and field in ("has_sku", "has_product"):
+            issues.append(f"[RULE ENGINE] Rule '{rule_name}': unknown operator '{operator}' for {field}, using 'equals'")
+            operator = "equals"
+        else:
+            issues.append(f"[RULE ENGINE] Rule '{rule_name}': unknown operator '{operator}'")
+            if level != "order":
+                return None
+            always_false = True
+
+    if level == "order":
+        if field in ("has_sku", "has_product") and not value:
+            always_false = True
+        elif field == "all_no_packaging":
+            value = str(value).lower().strip()
+
+    column = None
+    if level == "order" and field in _ROW_FIELD_COLUMNS:
+        column = _ROW_FIELD_COLUMNS[field]
+    compiled = CompiledCondition(field, operator, value, always_false=always_false, column=column)
+    if compiled.invalid_value:
+        kinds = {
+            "in list": "Empty list value", "between": "Invalid range value",
+            "matches regex": "Invalid regex pattern",
+        }
+        kind = kinds.get(compiled.base_operator, "Invalid rule date")
+        issues.append(f"[RULE ENGINE] {kind} '{value}' for '{operator}' in rule '{rule_name}'")
+    return compiled
+
+
+def _condition_columns(field: str, level: str) -> Tuple[str, ...]:
+    """DataFrame columns a condition field depends on."""
+    if level == "order" and field in ORDER_FIELD_COLUMNS:
+        return ORDER_FIELD_COLUMNS[field]
+    return (field,)
+
+
+def compile_rule(config: dict, issues: Optional[List[str]] = None) -> CompiledRule:
+    """Compiles one normalized rule dict (with ``steps``)."""
+    issues = issues if issues is not None else []
+    name = config.get("name", "Unnamed")
+    level = config.get("level", "article")
+
+    steps = []
+    reads = {"Order_Number"} if level == "order" else set()
+    for step in config.get("steps", []):
+        raw_conditions = step.get("conditions", [])
+        conditions = []
+        for condition in raw_conditions:
+            compiled = _compile_condition(condition, level, name, issues)
+            if compiled is not None:
+                conditions.append(compiled)
+                reads.update(_condition_columns(compiled.field, level))
+        steps.append(CompiledStep(conditions, bool(raw_conditions), step.get("match", "ALL"), step.get("actions", [])))
+    return CompiledRule(config, steps, reads)
+
+
+def compile_step(step: dict, level: str = "article") -> CompiledStep:
+    """Compiles a single step dict (conditions, match, actions)."""
+    return compile_rule({"name": "step", "level": level, "steps": [step]}).steps[0]
+
+
+def compile_rules(rules_config) -> RulePlan:
+    """Returns the plan of a rules config, compiling it on first use.
+
+    The config is normalized like ``RuleEngine`` does (default priorities,
+    steps) on a copy, so the caller's dicts are left as they are.
+
+    Args:
+        rules_config (list[dict]): Rules as stored in the client config
+
+    Returns:
+        RulePlan: Cached plan for the normalized rules
+    """
+    rules = RuleEngine.normalize_rules(copy.deepcopy(list(rules_config or [])))
+    digest = rules_digest(rules)
+
+    plan = _plan_cache.get(digest)
+    if plan is not None:
+        _plan_cache.move_to_end(digest)
+        return plan
+
+    issues: List[str] = []
+    compiled = [compile_rule(rule, issues) for rule in rules]
+    plan = RulePlan(compiled, digest, issues)
+
+    _plan_cache[digest] = plan
+    while len(_plan_cache) > _CACHE_SIZE:
+        _plan_cache.popitem(last=False)
+    return plan
@@ -1,8 +1,11 @@
+import numpy as np
 import pandas as pd
 import re
 from functools import lru_cache
 from typing import Optional
 
+from .schema import ensure_categories
+
 
 """Implements a configurable rule engine to process and modify order data.
 
@@ -143,6 +146,10 @@ def _op_is_not_empty(series_val, rule_val):
 # --- Helper Functions for New Operators ---
 
 
+# Accepted date formats, tried in this order
+_DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y"]
+
+
 def _parse_date_safe(date_str: str) -> Optional[pd.Timestamp]:
     """Safely parse date string with multiple format support.
 
@@ -174,9 +181,7 @@ def _parse_date_safe(date_str: str) -> Optional[pd.Timestamp]:
     date_str = str(date_str).strip()
 
     # Try multiple formats
-    formats = ["%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y"]
-
-    for fmt in formats:
+    for fmt in _DATE_FORMATS:
         try:
             return pd.to_datetime(date_str, format=fmt)
         except (ValueError, TypeError):
@@ -186,6 +191,85 @@ def _parse_date_safe(date_str: str) -> Optional[pd.Timestamp]:
     return None
 
 
+def _parse_dates(series_val: pd.Series) -> pd.Series:
+    """Parses a whole Series of dates, one vectorized pass per format.
+
+    Column counterpart of ``_parse_date_safe``: every value is converted
+    with ``str()`` and stripped, and the first of ``_DATE_FORMATS`` that
+    matches wins. Each distinct value is parsed once. Columns that already
+    hold datetimes are used as they are.
+
+    Args:
+        series_val: pandas Series with date values
+
+    Returns:
+        pd.Series[datetime64]: Parsed dates aligned with ``series_val``,
+            NaT where the value is missing or matches no format
+
+    Example:
+        >>> _parse_dates(pd.Series(["2024-01-30", "30.01.2024", "soon"])).tolist()
+        [Timestamp('2024-01-30 00:00:00'), Timestamp('2024-01-30 00:00:00'), NaT]
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+
+    if pd.api.types.is_datetime64_any_dtype(series_val):
+        if getattr(series_val.dt, "tz", None) is not None:
+            series_val = series_val.dt.tz_localize(None)
+        return series_val
+
+    codes, uniques = pd.factorize(series_val.astype(object), use_na_sentinel=True)
+    texts = pd.Series(uniques.astype(object)).astype(str).str.strip()
+
+    # Second resolution: the formats carry no time and far dates must fit
+    parsed = pd.Series(pd.NaT, index=texts.index, dtype="datetime64[s]")
+    remaining = texts.to_numpy() != ""
+    for fmt in _DATE_FORMATS:
+        if not remaining.any():
+            break
+        attempt = pd.to_datetime(texts[remaining], format=fmt, errors="coerce")
+        parsed[remaining] = attempt.astype("datetime64[s]")
+        remaining[remaining] = attempt.isna().to_numpy()
+
+    if remaining.any():
+        logger.warning(
+            f"[RULE ENGINE] {int(remaining.sum())} date value(s) in invalid format, "
+            f"e.g. '{texts[remaining].iloc[0]}'"
+        )
+
+    dates = np.full(len(codes), np.datetime64("NaT"), dtype="datetime64[s]")
+    dates[codes >= 0] = parsed.to_numpy()[codes[codes >= 0]]
+    return pd.Series(dates, index=series_val.index)
+
+
+def _parse_rule_date(rule_val) -> Optional[pd.Timestamp]:
+    """Rule date of a date condition, without time (None if invalid)."""
+    rule_date = _parse_date_safe(rule_val)
+    return None if rule_date is None else rule_date.normalize()
+
+
+def _compare_dates(dates: pd.Series, rule_date: Optional[pd.Timestamp], operator: str) -> pd.Series:
+    """Compares parsed dates with a rule date, ignoring time components.
+
+    Args:
+        dates: Parsed dates (see ``_parse_dates``)
+        rule_date: Parsed rule date (see ``_parse_rule_date``)
+        operator: "date before", "date after" or "date equals"
+
+    Returns:
+        pd.Series[bool]: Result, False where the date is missing
+    """
+    if rule_date is None:
+        return pd.Series(False, index=dates.index, dtype=bool)
+
+    days = dates.dt.normalize()
+    if operator == "date before":
+        return days < rule_date
+    if operator == "date after":
+        return days > rule_date
+    return days == rule_date
+
+
 @lru_cache(maxsize=128)
 def _compile_regex_safe(pattern: str) -> Optional[re.Pattern]:
     """Safely compile regex pattern with caching.
@@ -283,16 +367,27 @@ def _op_in_list(series_val, rule_val):
         2    False
         dtype: bool
     """
+    return _in_list(series_val, _parse_list(rule_val))
+
+
+def _parse_list(rule_val) -> Optional[list]:
+    """Trimmed, lowercased items of a comma-separated list value.
+
+    Returns None (with a warning) if the value is empty.
+    """
     import logging
     logger = logging.getLogger(__name__)
 
     if not rule_val or pd.isna(rule_val):
         logger.warning("[RULE ENGINE] Empty list value for 'in list' operator")
-        return pd.Series([False] * len(series_val), index=series_val.index)
+        return None
 
     # Parse: split, strip, lowercase
-    list_values = [v.strip().lower() for v in str(rule_val).split(",") if v.strip()]
+    return [v.strip().lower() for v in str(rule_val).split(",") if v.strip()]
 
+
+def _in_list(series_val, list_values):
+    """``in list`` with pre-parsed items (see ``_parse_list``)."""
     if not list_values:
         return pd.Series([False] * len(series_val), index=series_val.index)
 
@@ -345,10 +440,14 @@ def _op_between(series_val, rule_val):
         3    False
         dtype: bool
     """
+    return _between(series_val, _parse_range(rule_val))
+
+
+def _between(series_val, range_tuple):
+    """``between`` with a pre-parsed (start, end) range (see ``_parse_range``)."""
     import logging
     logger = logging.getLogger(__name__)
 
-    range_tuple = _parse_range(rule_val)
     if range_tuple is None:
         return pd.Series([False] * len(series_val), index=series_val.index)
 
@@ -409,32 +508,7 @@ def _op_date_before(series_val, rule_val):
         1    False
         dtype: bool
     """
-    import logging
-    logger = logging.getLogger(__name__)
-
-    rule_date = _parse_date_safe(rule_val)
-    if rule_date is None:
-        return pd.Series([False] * len(series_val), index=series_val.index, dtype=bool)
-
-    # Normalize to ignore time
-    rule_date = rule_date.normalize()
-
-    # Parse series dates with multiple format attempts
-    series_dates = pd.Series([None] * len(series_val), index=series_val.index)
-    for idx, val in series_val.items():
-        parsed = _parse_date_safe(val)
-        if parsed is not None:
-            series_dates[idx] = parsed
-
-    # Create boolean result
-    result = pd.Series([False] * len(series_val), index=series_val.index, dtype=bool)
-    valid_mask = series_dates.notna()
-
-    if valid_mask.any():
-        valid_dates = pd.to_datetime(series_dates[valid_mask])
-        result.loc[valid_mask] = valid_dates.dt.normalize() < rule_date
-
-    return result
+    return _compare_dates(_parse_dates(series_val), _parse_rule_date(rule_val), "date before")
 
 
 def _op_date_after(series_val, rule_val):
@@ -456,32 +530,7 @@ def _op_date_after(series_val, rule_val):
         1     True
         dtype: bool
     """
-    import logging
-    logger = logging.getLogger(__name__)
-
-    rule_date = _parse_date_safe(rule_val)
-    if rule_date is None:
-        return pd.Series([False] * len(series_val), index=series_val.index, dtype=bool)
-
-    # Normalize to ignore time
-    rule_date = rule_date.normalize()
-
-    # Parse series dates with multiple format attempts
-    series_dates = pd.Series([None] * len(series_val), index=series_val.index)
-    for idx, val in series_val.items():
-        parsed = _parse_date_safe(val)
-        if parsed is not None:
-            series_dates[idx] = parsed
-
-    # Create boolean result
-    result = pd.Series([False] * len(series_val), index=series_val.index, dtype=bool)
-    valid_mask = series_dates.notna()
-
-    if valid_mask.any():
-        valid_dates = pd.to_datetime(series_dates[valid_mask])
-        result.loc[valid_mask] = valid_dates.dt.normalize() > rule_date
-
-    return result
+    return _compare_dates(_parse_dates(series_val), _parse_rule_date(rule_val), "date after")
 
 
 def _op_date_equals(series_val, rule_val):
@@ -503,32 +552,7 @@ def _op_date_equals(series_val, rule_val):
         1    False
         dtype: bool
     """
-    import logging
-    logger = logging.getLogger(__name__)
-
-    rule_date = _parse_date_safe(rule_val)
-    if rule_date is None:
-        return pd.Series([False] * len(series_val), index=series_val.index, dtype=bool)
-
-    # Normalize to ignore time
-    rule_date = rule_date.normalize()
-
-    # Parse series dates with multiple format attempts
-    series_dates = pd.Series([None] * len(series_val), index=series_val.index)
-    for idx, val in series_val.items():
-        parsed = _parse_date_safe(val)
-        if parsed is not None:
-            series_dates[idx] = parsed
-
-    # Create boolean result
-    result = pd.Series([False] * len(series_val), index=series_val.index, dtype=bool)
-    valid_mask = series_dates.notna()
-
-    if valid_mask.any():
-        valid_dates = pd.to_datetime(series_dates[valid_mask])
-        result.loc[valid_mask] = valid_dates.dt.normalize() == rule_date
-
-    return result
+    return _compare_dates(_parse_dates(series_val), _parse_rule_date(rule_val), "date equals")
 
 
 def _op_matches_regex(series_val, rule_val):
@@ -549,15 +573,16 @@ def _op_matches_regex(series_val, rule_val):
         2    False
         dtype: bool
     """
-    import logging
-    logger = logging.getLogger(__name__)
+    return _matches_regex(series_val, _compile_regex_safe(rule_val))
+
 
-    compiled_pattern = _compile_regex_safe(rule_val)
+def _matches_regex(series_val, compiled_pattern):
+    """``matches regex`` with a pre-compiled pattern (see ``_compile_regex_safe``)."""
     if compiled_pattern is None:
         return pd.Series([False] * len(series_val), index=series_val.index)
 
     # Use pandas vectorized string contains with regex
-    return series_val.astype(str).str.contains(rule_val, na=False, regex=True)
+    return series_val.astype(str).str.contains(compiled_pattern, na=False, regex=True)
 
 
 def _op_does_not_match_regex(series_val, rule_val):
@@ -573,23 +598,273 @@ def _op_does_not_match_regex(series_val, rule_val):
     return ~_op_matches_regex(series_val, rule_val)
 
 
+# --- Order Grouping (order-level rules) ---
+
+# Operators that must hold for every row of an order in has_sku / has_product
+_NEGATIVE_OPERATORS = (
+    "does not equal", "does not contain", "not in list",
+    "not between", "does not match regex",
+)
+
+
+class _OrderGroups:
+    """Rows of a DataFrame grouped by Order_Number.
+
+    Row-level results are reduced per order with ``bincount`` and order
+    metrics come from one ``groupby``. Orders are numbered 0..count-1 in
+    order of first appearance; rows with a missing Order_Number belong to
+    no order (code -1).
+
+    Args:
+        df (pd.DataFrame): DataFrame with an Order_Number column.
+    """
+
+    def __init__(self, df):
+        codes, uniques = pd.factorize(df["Order_Number"].to_numpy(dtype=object))
+        self.codes = codes
+        self.count = len(uniques)
+        self.valid = codes >= 0
+        valid_codes = codes[self.valid]
+        self.sizes = np.bincount(valid_codes, minlength=self.count)
+
+        # Position of the first row of every order
+        self.first_positions = np.full(self.count, len(df), dtype=np.int64)
+        np.minimum.at(self.first_positions, valid_codes, np.flatnonzero(self.valid))
+
+    def any(self, row_result):
+        """Per order: True if the row-level result is True for any row."""
+        hits = _as_flags(row_result, False) & self.valid
+        return np.bincount(self.codes[hits], minlength=self.count) > 0
+
+    def all(self, row_result):
+        """Per order: True if the row-level result is True for every row."""
+        hits = _as_flags(row_result, True) & self.valid
+        return np.bincount(self.codes[hits], minlength=self.count) == self.sizes
+
+    def first_values(self, column):
+        """Value of ``column`` in the first row of every order (object array)."""
+        return column.to_numpy(dtype=object)[self.first_positions]
+
+    def aggregate(self, column, how):
+        """Per-order ``sum`` / ``max`` of a column, as a Series in order number."""
+        grouped = column[self.valid].groupby(self.codes[self.valid], sort=True)
+        return getattr(grouped, how)().reset_index(drop=True)
+
+    def nunique(self, column):
+        """Distinct values per order, missing values counting as one value."""
+        pairs = pd.DataFrame({"order": self.codes, "value": column.to_numpy(dtype=object)})
+        pairs = pairs[self.valid].drop_duplicates()
+        return pd.Series(np.bincount(pairs["order"].to_numpy(), minlength=self.count))
+
+    def row_mask(self, order_flags):
+        """Row mask selecting every row of the flagged orders."""
+        return self.valid & order_flags[np.where(self.valid, self.codes, 0)]
+
+
+def _as_flags(result, fill):
+    """Boolean array of an operator result, missing values set to ``fill``."""
+    result = pd.Series(result)
+    if result.hasnans:
+        result = result.fillna(fill)
+    return result.to_numpy(dtype=bool)
+
+
+def _op_result_by_group(condition, series, codes, count):
+    """Row-level condition result where each group is evaluated on its own.
+
+    Every operator is element-wise except ``between`` / ``not between``,
+    which compare numerically only if the evaluated values contain a
+    number. That decision is made per group here, so the result equals
+    calling the operator on each group's rows separately.
+
+    Args:
+        condition (CompiledCondition): The condition (see rule_plan.py)
+        series (pd.Series): Values to test
+        codes (np.ndarray): Group of every value (-1 for no group)
+        count (int): Number of groups
+
+    Returns:
+        pd.Series[bool]: Result aligned with ``series``
+    """
+    if condition.base_operator != "between":
+        return condition.evaluate(series)
+
+    range_tuple = condition.prepared
+    if range_tuple is None:
+        result = pd.Series(False, index=series.index)
+    else:
+        start, end = range_tuple
+        numeric = pd.to_numeric(series, errors="coerce")
+        has_number = np.bincount(codes[(codes >= 0) & numeric.notna().to_numpy()], minlength=count) > 0
+        numeric_rows = np.where(codes >= 0, has_number[np.where(codes >= 0, codes, 0)], False)
+        as_str = series.astype(str)
+        result = pd.Series(
+            np.where(
+                numeric_rows,
+                _as_flags((numeric >= start) & (numeric <= end), False),
+                _as_flags((as_str >= str(start)) & (as_str <= str(end)), False),
+            ),
+            index=series.index,
+        )
+    return ~result if condition.negate else result
+
+
+# --- Condition Cache ---
+
+# Operators comparing parsed dates
+_DATE_OPERATORS = ("date before", "date after", "date equals")
+
+# Operators defined as the negation of another operator; they share its cache entry
+_NEGATED_OPERATORS = {
+    "does not contain": "contains",
+    "not in list": "in list",
+    "not between": "between",
+    "does not match regex": "matches regex",
+}
+
+
+def _condition_key(field, operator, rule_val):
+    """Cache key of a condition plus whether the cached result is negated.
+
+    The key is (field, base operator, normalized value). Values are only
+    normalized where the operator ignores the difference: list values
+    become the set of trimmed, lowercased items. The value type is part of
+    the key, because e.g. 1 and "1" compare differently on text columns.
+
+    Returns:
+        tuple: (key, negate), key is None if the value is not hashable
+    """
+    base = _NEGATED_OPERATORS.get(operator, operator)
+    if base == "in list" and isinstance(rule_val, str):
+        rule_val = frozenset(v.strip().lower() for v in rule_val.split(",") if v.strip())
+    try:
+        hash(rule_val)
+    except TypeError:
+        return None, False
+    return (field, base, type(rule_val), rule_val), base != operator
+
+
+class _ConditionCache:
+    """Row-level condition results of one DataFrame during ``RuleEngine.apply``.
+
+    Rules often test the same condition (e.g. ``Shipping_Provider equals
+    DHL``). The first evaluation on the full frame is kept and reused by
+    later rules and steps, including the negated operator (``does not
+    contain`` is ``~contains``). Date operators share the parsed dates of
+    their column, so e.g. "date after" and "date before" on the same column
+    parse it once. When actions write a column, the results and parsed
+    dates of that column are dropped (``invalidate``). Rows are never added
+    during ``apply`` (ADD_PRODUCT rows are appended at the end), so cached
+    results stay aligned with the frame.
+
+    Args:
+        df (pd.DataFrame): The frame the rules are applied to.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._results = {}
+        self._dates = {}
+
+    def result(self, condition):
+        """Result of a compiled condition for every row of the frame (pd.Series[bool])."""
+        field = condition.column
+        if condition.key is None:
+            return condition.evaluate(self.df[field])
+        result = self._results.get(condition.key)
+        if result is None:
+            if condition.base_operator in _DATE_OPERATORS:
+                result = _compare_dates(self.dates(field), condition.prepared, condition.base_operator)
+            else:
+                result = condition.compute(self.df[field])
+            self._results[condition.key] = result
+        return ~result if condition.negate else result
+
+    def dates(self, field):
+        """Parsed dates of a column (see ``_parse_dates``)."""
+        dates = self._dates.get(field)
+        if dates is None:
+            dates = self._dates[field] = _parse_dates(self.df[field])
+        return dates
+
+    def invalidate(self, columns):
+        """Drops the results of conditions on the given columns."""
+        if columns:
+            self._results = {key: result for key, result in self._results.items() if key[0] not in columns}
+            for column in columns:
+                self._dates.pop(column, None)
+
+
+# --- Incremental Re-application ---
+
+# Actions whose effect ``RuleEngine.reapply`` can take back: they only add
+# tags to Status_Note or Internal_Tags
+_TAG_ACTIONS = ("ADD_TAG", "ADD_ORDER_TAG", "SET_MULTI_TAGS", "ADD_INTERNAL_TAG")
+
+
+def _tag_actions(actions):
+    """The tag actions among ``actions``."""
+    return [action for action in actions if action.get("type", "").upper() in _TAG_ACTIONS]
+
+
+def _tags_set_by(actions):
+    """Tags the given actions add, as (Status_Note tags, Internal_Tags tags)."""
+    notes, internal = set(), set()
+    for action in _tag_actions(actions):
+        action_type = action.get("type", "").upper()
+        if action_type == "ADD_INTERNAL_TAG":
+            internal.add(action.get("value"))
+        elif action_type == "SET_MULTI_TAGS":
+            tags_value = action.get("tags") or action.get("value")
+            if isinstance(tags_value, str):
+                tags_value = tags_value.split(",")
+            if isinstance(tags_value, list):
+                notes.update(str(tag).strip() for tag in tags_value if str(tag).strip())
+        else:
+            notes.add(action.get("value"))
+    return notes, internal
+
+
+def _strip_notes(notes, tags):
+    """Removes the given tags from Status_Note values (", "-separated)."""
+    def strip(note):
+        parts = note.split(", ")
+        kept = [part for part in parts if part.strip() not in tags]
+        return note if len(kept) == len(parts) else ", ".join(kept)
+
+    return notes.fillna("").astype(str).map(strip)
+
+
+def _strip_internal_tags(values, tags):
+    """Removes the given tags from Internal_Tags values (JSON lists)."""
+    from shopify_tool.tag_manager import parse_tags, serialize_tags
+
+    def strip(value):
+        current = parse_tags(value)
+        kept = [tag for tag in current if tag not in tags]
+        return value if len(kept) == len(current) else serialize_tags(kept)
+
+    return values.map(strip)
+
+
 class RuleEngine:
     """Applies a set of configured rules to a DataFrame of order data."""
 
-    # Define order-level fields and their calculation methods
+    # Fields evaluated on the whole order rather than on single rows
     ORDER_LEVEL_FIELDS = {
-        "item_count": "_calculate_item_count",
-        "total_quantity": "_calculate_total_quantity",
-        "unique_sku_count": "_calculate_unique_sku_count",
-        "max_quantity": "_calculate_max_quantity",
-        "has_sku": "_check_has_sku",
-        "has_product": "_check_has_product",
-        "order_volumetric_weight": "_calculate_order_volumetric_weight",
-        "all_no_packaging": "_calculate_all_no_packaging",
-        "order_min_box": "_get_order_min_box",
+        "item_count",
+        "total_quantity",
+        "unique_sku_count",
+        "max_quantity",
+        "has_sku",
+        "has_product",
+        "order_volumetric_weight",
+        "all_no_packaging",
+        "order_min_box",
     }
 
-    def _normalize_priorities(self, rules):
+    @staticmethod
+    def _normalize_priorities(rules):
         """Assigns default priority to rules without priority field.
 
         Rules without priority get 1000, 1001, 1002... to execute last.
@@ -629,31 +904,56 @@ class RuleEngine:
             }]
         return rule
 
+    @classmethod
+    def normalize_rules(cls, rules_config):
+        """Adds default priorities and steps (in place) and sorts by priority.
+
+        Args:
+            rules_config (list[dict]): Rule dictionaries
+
+        Returns:
+            list[dict]: The same rule dictionaries, sorted by priority
+        """
+        # Normalize: add default priority to rules without it
+        rules = cls._normalize_priorities(rules_config)
+
+        # Normalize: convert old single-step format to steps array
+        for rule in rules:
+            cls._normalize_steps(rule)
+
+        # Sort by priority (lower number = higher priority = executes first)
+        return sorted(rules, key=lambda r: r.get("priority", 1000))
+
     def __init__(self, rules_config):
         """Initializes the RuleEngine with priority-sorted rules.
 
+        The rules are compiled into a ``RulePlan`` (see rule_plan.py), which
+        is cached per config, so engines for the same rules share one plan.
+
         Args:
-            rules_config (list[dict]): A list of dictionaries, where each
-                dictionary represents a single rule. A rule consists of
-                conditions and actions. Optional 'priority' field controls
-                execution order (lower number = higher priority = executes first).
+            rules_config (list[dict] | RulePlan): A list of dictionaries,
+                where each dictionary represents a single rule. A rule
+                consists of conditions and actions. Optional 'priority' field
+                controls execution order (lower number = higher priority =
+                executes first). A compiled plan is used as it is.
         """
         import logging
+        from .rule_plan import RulePlan, compile_rules
         logger = logging.getLogger(__name__)
 
-        if not rules_config:
+        if isinstance(rules_config, RulePlan):
+            self.plan = rules_config
+            self.rules = self.plan.configs()
+        elif not rules_config:
+            self.plan = compile_rules([])
             self.rules = []
             return
+        else:
+            self.plan = compile_rules(rules_config)
+            self.rules = self.plan.configs()
 
-        # Normalize: add default priority to rules without it
-        self.rules = self._normalize_priorities(rules_config)
-
-        # Normalize: convert old single-step format to steps array
-        for rule in self.rules:
-            self._normalize_steps(rule)
-
-        # Sort by priority (lower number = higher priority = executes first)
-        self.rules = sorted(self.rules, key=lambda r: r.get("priority", 1000))
+        for issue in self.plan.issues:
+            logger.warning(issue)
 
         logger.info(f"[RULE ENGINE] Loaded {len(self.rules)} rules (sorted by priority)")
 
@@ -714,113 +1014,219 @@ class RuleEngine:
         all_new_rows = []
 
         # Separate rules by level
-        article_rules = [r for r in self.rules if r.get("level", "article") == "article"]
-        order_rules = [r for r in self.rules if r.get("level") == "order"]
+        article_rules = self.plan.article_rules
+        order_rules = self.plan.order_rules
 
         logger.info(f"[RULE ENGINE] {len(article_rules)} article-level rules, {len(order_rules)} order-level rules")
 
+        # Condition results shared by all rules and steps of this run
+        cache = _ConditionCache(df)
+
         # Apply article-level rules with multi-step support
+        all_new_rows.extend(self._apply_article_rules(df, article_rules, cache))
+
+        # Apply order-level rules with multi-step support
+        if order_rules and "Order_Number" in df.columns:
+            all_new_rows.extend(self._apply_order_rules(df, order_rules, cache))
+
+        # Додати всі нові рядки з ADD_PRODUCT actions
+        if all_new_rows:
+            new_df = pd.DataFrame(all_new_rows)
+            df = pd.concat([df, new_df], ignore_index=True)
+            logger.info(f"[RULE ENGINE] Added {len(all_new_rows)} new product rows to DataFrame")
+
+        return df
+
+    def reapply(self, df, rows, columns=None):
+        """Re-applies the rules to the orders of manually edited rows.
+
+        After a manual edit (status toggle, added or removed item) the tags
+        set by the rules can be out of date. Instead of a full run, only the
+        affected rules are repeated, on the rows of the edited orders:
+
+        1. the tags these rules can add are removed from those rows, so tags
+           of rules that no longer match disappear;
+        2. the rules run again in priority order on those rows only.
+
+        Only the tag actions are repeated (ADD_TAG, ADD_ORDER_TAG,
+        SET_MULTI_TAGS, ADD_INTERNAL_TAG); the other actions keep the
+        result of the analysis, so e.g. a manual status change is not
+        overridden by SET_STATUS. See ``_rules_affected_by`` for which rules
+        are repeated. A tag that a repeated rule can add counts as set by
+        that rule, even where it was added by hand.
+
+        Args:
+            df (pd.DataFrame): The analysis DataFrame (modified in place).
+            rows (array-like[int]): Positions of the edited rows; all rows
+                of their orders are re-evaluated.
+            columns (Iterable[str], optional): Columns the edit changed.
+                None if rows were added or removed, which may change any
+                order-level value: every rule with tag actions is repeated.
+
+        Returns:
+            np.ndarray: Positions of the re-evaluated rows (empty if no rule
+                was affected).
+        """
+        import logging
+        logger = logging.getLogger(__name__)
+
+        rules = self._rules_affected_by(columns)
+        positions = self.rows_to_reapply(df, rows, columns)
+        if not len(positions):
+            return positions
+
+        self._prepare_df_for_actions(df)
+        sub = df.iloc[positions].copy()
+
+        notes, internal = set(), set()
+        for rule in rules:
+            for step in rule.steps:
+                step_notes, step_internal = _tags_set_by(step.actions)
+                notes |= step_notes
+                internal |= step_internal
+        if notes and "Status_Note" in sub.columns:
+            sub["Status_Note"] = _strip_notes(sub["Status_Note"], notes)
+        if internal and "Internal_Tags" in sub.columns:
+            sub["Internal_Tags"] = _strip_internal_tags(sub["Internal_Tags"], internal)
+
+        # "between" picks numeric vs text comparison on the evaluated rows,
+        # here the edited orders instead of the whole frame
+        cache = _ConditionCache(sub)
+        self._apply_article_rules(sub, [rule for rule in rules if rule.level == "article"], cache, tags_only=True)
+        order_rules = [rule for rule in rules if rule.level == "order"]
+        if order_rules and "Order_Number" in sub.columns:
+            self._apply_order_rules(sub, order_rules, cache, tags_only=True)
+
+        for column in ("Status_Note", "Internal_Tags"):
+            if column in sub.columns:
+                df.iloc[positions, df.columns.get_loc(column)] = sub[column].to_numpy()
+
+        logger.info(f"[RULE ENGINE] Re-applied {len(rules)} rules to {len(positions)} rows")
+        return positions
+
+    def rows_to_reapply(self, df, rows, columns=None):
+        """Positions of the rows ``reapply`` re-evaluates for an edit.
+
+        The rows of the edited orders, or none if the edit affects no rule.
+        Callers use it to keep a copy of those rows before ``reapply``.
+
+        Args:
+            df (pd.DataFrame): The analysis DataFrame.
+            rows (array-like[int]): Positions of the edited rows.
+            columns (Iterable[str], optional): Columns the edit changed.
+
+        Returns:
+            np.ndarray: Sorted row positions.
+        """
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        if not len(rows) or not self._rules_affected_by(columns):
+            return np.array([], dtype=np.int64)
+        if "Order_Number" not in df.columns:
+            return rows
+        order_numbers = df["Order_Number"].iloc[rows].dropna()
+        in_orders = df["Order_Number"].isin(order_numbers).to_numpy(copy=True)
+        in_orders[rows] = True
+        return np.flatnonzero(in_orders)
+
+    def _rules_affected_by(self, columns):
+        """Rules with tag actions that an edit of ``columns`` can change.
+
+        A rule is affected if its conditions read an edited column, or,
+        repeated until nothing changes, if it interacts with an affected
+        rule through a tag column: it reads one they write, or it writes
+        one they read or write (tags in one column can share values, and
+        later rules must see the tags of earlier ones as in a full run).
+
+        Args:
+            columns (Iterable[str] | None): Edited columns; None for all.
+
+        Returns:
+            list[CompiledRule]: Affected rules in priority order
+        """
+        tag_rules = []
+        for rule in self.plan.rules:
+            writes = set()
+            for step in rule.steps:
+                writes |= self._columns_written_by(_tag_actions(step.actions))
+            if writes:
+                tag_rules.append((rule, writes))
+        if columns is None:
+            return [rule for rule, _ in tag_rules]
+
+        changed = set(columns)
+        affected = set()
+        reads, writes = set(), set()
+        grew = True
+        while grew:
+            grew = False
+            for rule, rule_writes in tag_rules:
+                if rule in affected:
+                    continue
+                if rule.reads & (changed | writes) or rule_writes & (reads | writes):
+                    affected.add(rule)
+                    reads |= rule.reads
+                    writes |= rule_writes
+                    grew = True
+        return [rule for rule, _ in tag_rules if rule in affected]
+
+    def _apply_article_rules(self, df, article_rules, cache, tags_only=False):
+        """Applies article-level rules, narrowing the rows step by step.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to process (modified in place).
+            article_rules (list[CompiledRule]): Article-level rules in priority order.
+            cache (_ConditionCache): Condition results of ``df``.
+            tags_only (bool): Run only the tag actions (see ``reapply``).
+
+        Returns:
+            list[dict]: New rows from ADD_PRODUCT actions.
+        """
+        import logging
+        logger = logging.getLogger(__name__)
+
+        all_new_rows = []
         for idx, rule in enumerate(article_rules):
-            rule_name = rule.get("name", f"Rule #{idx+1}")
-            priority = rule.get("priority", 1000)
-            steps = rule.get("steps", [])
+            rule_name = rule.config.get("name", f"Rule #{idx+1}")
+            priority = rule.priority
+            steps = rule.steps
             logger.info(f"[RULE ENGINE] Applying article rule #{idx+1}: {rule_name} (Priority: {priority}, Steps: {len(steps)})")
 
             # Start with all rows eligible
             current_matches = pd.Series(True, index=df.index)
 
             for step_idx, step in enumerate(steps):
-                logger.info(f"[RULE ENGINE] Step {step_idx+1}/{len(steps)}: Conditions: {step.get('conditions', [])}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    conditions = [(c.field, c.operator, c.value) for c in step.conditions]
+                    logger.debug(f"[RULE ENGINE] Step {step_idx+1}/{len(steps)}: Conditions: {conditions}")
 
                 # Evaluate conditions only on currently matching rows
-                eligible_df = df[current_matches]
-                if eligible_df.empty:
+                eligible = current_matches.to_numpy()
+                if not eligible.any():
                     logger.info(f"[RULE ENGINE] Step {step_idx+1}: No eligible rows, stopping")
                     break
 
-                step_matches = self._get_matching_rows(eligible_df, step)
+                step_matches = self._get_matching_rows(df, step, cache=cache, rows=eligible)
 
-                # Map back to full DataFrame index
-                full_step_matches = pd.Series(False, index=df.index)
-                full_step_matches[step_matches[step_matches].index] = True
-                current_matches = current_matches & full_step_matches
+                # Map back to full DataFrame rows
+                matched = np.zeros(len(df), dtype=bool)
+                matched[eligible] = _as_flags(step_matches, False)
+                current_matches = pd.Series(matched, index=df.index)
 
-                matched_count = current_matches.sum()
+                matched_count = int(matched.sum())
                 logger.info(f"[RULE ENGINE] Step {step_idx+1}: {matched_count} rows matched (narrowed)")
 
                 # Execute step actions on narrowed rows
-                if current_matches.any():
-                    actions = step.get("actions", [])
+                if matched_count:
+                    actions = _tag_actions(step.actions) if tags_only else step.actions
                     logger.info(f"[RULE ENGINE] Step {step_idx+1}: Executing {len(actions)} actions")
                     new_rows = self._execute_actions(df, current_matches, actions)
+                    cache.invalidate(self._columns_written_by(actions) if tags_only else step.writes)
                     all_new_rows.extend(new_rows)
                 else:
                     logger.info(f"[RULE ENGINE] Step {step_idx+1}: No matches, stopping")
                     break
 
-        # Apply order-level rules with multi-step support
-        if order_rules and "Order_Number" in df.columns:
-            for order_number in df["Order_Number"].unique():
-                order_mask = df["Order_Number"] == order_number
-                order_df = df[order_mask]
-
-                for rule in order_rules:
-                    rule_name = rule.get("name", "Unnamed")
-                    priority = rule.get("priority", 1000)
-                    steps = rule.get("steps", [])
-                    logger.info(f"[RULE ENGINE] Applying order rule: {rule_name} (Priority: {priority}, Steps: {len(steps)})")
-
-                    # Track which rows in order are still eligible (for narrowing)
-                    order_eligible_mask = order_mask.copy()
-
-                    for step_idx, step in enumerate(steps):
-                        # Evaluate conditions on eligible order rows
-                        eligible_df = df[order_eligible_mask]
-                        if eligible_df.empty:
-                            break
-
-                        matches = self._evaluate_order_conditions(
-                            eligible_df,
-                            step.get("conditions", []),
-                            step.get("match", "ALL")
-                        )
-
-                        if not matches:
-                            logger.info(f"[RULE ENGINE] Order {order_number} step {step_idx+1}: No match, stopping")
-                            break
-
-                        # Separate actions by scope
-                        actions = step.get("actions", [])
-                        apply_to_all_actions = []
-                        apply_to_first_actions = []
-
-                        for action in actions:
-                            action_type = action.get("type", "").upper()
-                            if action_type == "ADD_TAG":
-                                apply_to_all_actions.append(action)
-                            else:
-                                apply_to_first_actions.append(action)
-
-                        # Apply to all rows of order
-                        if apply_to_all_actions:
-                            new_rows = self._execute_actions(df, order_eligible_mask, apply_to_all_actions)
-                            all_new_rows.extend(new_rows)
-
-                        # Apply to first row only
-                        if apply_to_first_actions:
-                            first_row_index = eligible_df.index[0]
-                            first_row_mask = pd.Series(False, index=df.index)
-                            first_row_mask[first_row_index] = True
-                            new_rows = self._execute_actions(df, first_row_mask, apply_to_first_actions)
-                            all_new_rows.extend(new_rows)
-
-        # Додати всі нові рядки з ADD_PRODUCT actions
-        if all_new_rows:
-            new_df = pd.DataFrame(all_new_rows)
-            df = pd.concat([df, new_df], ignore_index=True)
-            logger.info(f"[RULE ENGINE] Added {len(all_new_rows)} new product rows to DataFrame")
-
-        return df
+        return all_new_rows
 
     def _prepare_df_for_actions(self, df):
         """Ensures the DataFrame has the columns required for rule actions.
@@ -860,7 +1266,7 @@ class RuleEngine:
         if "Internal_Tags" in needed_columns and "Internal_Tags" not in df.columns:
             df["Internal_Tags"] = "[]"
 
-    def _get_matching_rows(self, df, rule):
+    def _get_matching_rows(self, df, rule, cache=None, rows=None):
         """Evaluates a rule's conditions and finds all matching rows.
 
         Combines the results of each individual condition in a rule using
@@ -869,69 +1275,63 @@ class RuleEngine:
 
         Args:
             df (pd.DataFrame): The DataFrame to evaluate.
-            rule (dict): The rule dictionary containing the conditions.
+            rule (dict | CompiledStep): The rule (step) containing the
+                conditions; dicts are compiled first.
+            cache (_ConditionCache, optional): Condition results of ``df``
+                shared across rules and steps. Computed directly if None.
+            rows (np.ndarray[bool], optional): Evaluate only these rows of
+                ``df``. All rows if None.
 
         Returns:
-            pd.Series[bool]: A boolean Series with the same index as the
-                DataFrame, where `True` indicates a row matches the rule's
+            pd.Series[bool]: A boolean Series with the index of the evaluated
+                rows, where `True` indicates a row matches the rule's
                 conditions.
         """
         import logging
+        from .rule_plan import CompiledStep, compile_step
         logger = logging.getLogger(__name__)
 
-        match_type = rule.get("match", "ALL").upper()
-        conditions = rule.get("conditions", [])
+        step = rule if isinstance(rule, CompiledStep) else compile_step(rule)
+        match_type = str(step.match).upper()
 
-        if not conditions:
+        whole_frame = rows is None or rows.all()
+        index = df.index if rows is None else df.index[rows]
+        evaluated_df = None
+
+        if not step.has_conditions:
             logger.warning("[RULE ENGINE] No conditions in rule")
-            return pd.Series([False] * len(df), index=df.index)
+            return pd.Series([False] * len(index), index=index)
 
         # Get a boolean Series for each individual condition
         condition_results = []
-        for cond in conditions:
-            field = cond.get("field")
-            operator = cond.get("operator")
-            value = cond.get("value")
-
-            # Skip separator fields (from UI)
-            if field and field.startswith("---"):
-                logger.info(f"[RULE ENGINE] Skipping separator field: {field}")
-                continue
-
-            # Check conditions
-            if not field:
-                logger.warning(f"[RULE ENGINE] Condition missing field: {cond}")
-                continue
-            if not operator:
-                logger.warning(f"[RULE ENGINE] Condition missing operator: {cond}")
-                continue
+        for condition in step.conditions:
+            field = condition.field
             if field not in df.columns:
                 logger.warning(f"[RULE ENGINE] Field '{field}' not in DataFrame columns: {list(df.columns)}")
                 continue
-            if operator not in OPERATOR_MAP:
-                logger.warning(f"[RULE ENGINE] Operator '{operator}' not in OPERATOR_MAP: {list(OPERATOR_MAP.keys())}")
-                continue
-
-            op_func_name = OPERATOR_MAP[operator]
-            op_func = globals()[op_func_name]
 
-            logger.info(f"[RULE ENGINE] Evaluating condition: {field} {operator} {value}")
-
-            # Log data types and sample values
-            logger.info(f"[RULE ENGINE] Field '{field}' dtype: {df[field].dtype}")
-            logger.info(f"[RULE ENGINE] Rule value type: {type(value).__name__}, value: {repr(value)}")
-            unique_vals = df[field].dropna().unique()[:5]
-            logger.info(f"[RULE ENGINE] Sample values in '{field}': {list(unique_vals)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"[RULE ENGINE] Evaluating condition: {field} {condition.operator} {condition.value!r} "
+                    f"(dtype: {df[field].dtype})"
+                )
 
-            result = op_func(df[field], value)
-            matches_count = result.sum()
-            logger.info(f"[RULE ENGINE] Condition matched {matches_count} rows")
+            # "between" decides numeric vs text on the evaluated rows, so a
+            # result for the whole frame only applies to the whole frame
+            if cache is not None and (whole_frame or condition.base_operator != "between"):
+                result = cache.result(condition)
+                if rows is not None:
+                    result = result[rows]
+            else:
+                if evaluated_df is None:
+                    evaluated_df = df if rows is None else df[rows]
+                result = condition.evaluate(evaluated_df[field])
 
             condition_results.append(result)
 
         if not condition_results:
             logger.warning("[RULE ENGINE] No valid conditions evaluated")
-            return pd.Series([False] * len(df), index=df.index)
+            return pd.Series([False] * len(index), index=index)
 
         # Combine the individual condition results based on the match type
         if match_type == "ALL":
@@ -941,6 +1341,32 @@ class RuleEngine:
             # ANY (OR logic)
             return pd.concat(condition_results, axis=1).any(axis=1)
 
+    @staticmethod
+    def _columns_written_by(actions):
+        """Columns of the DataFrame that the given actions modify.
+
+        ADD_PRODUCT is not listed: its rows are only appended after all
+        rules have run.
+
+        Args:
+            actions (list[dict]): Action dictionaries
+
+        Returns:
+            set[str]: Column names
+        """
+        columns = set()
+        for action in actions:
+            action_type = action.get("type", "").upper()
+            if action_type in ("ADD_TAG", "ADD_ORDER_TAG", "SET_MULTI_TAGS"):
+                columns.add("Status_Note")
+            elif action_type == "ADD_INTERNAL_TAG":
+                columns.add("Internal_Tags")
+            elif action_type == "SET_STATUS":
+                columns.add("Order_Fulfillment_Status")
+            elif action_type in ("COPY_FIELD", "CALCULATE") and action.get("target"):
+                columns.add(action["target"])
+        return columns
+
     def _execute_actions(self, df, matches, actions):
         """Executes actions, modifying DataFrame in-place.
 
@@ -1009,6 +1435,7 @@ class RuleEngine:
                 df.loc[matches, "Internal_Tags"] = new_tags
 
             elif action_type == "SET_STATUS":
+                ensure_categories(df, "Order_Fulfillment_Status", [value])
                 df.loc[matches, "Order_Fulfillment_Status"] = value
 
             elif action_type == "COPY_FIELD":
@@ -1026,6 +1453,7 @@ class RuleEngine:
                 if target not in df.columns:
                     df[target] = ""
 
+                ensure_categories(df, target, df.loc[matches, source])
                 df.loc[matches, target] = df.loc[matches, source]
                 logger.info(f"[RULE ENGINE] Copied {source} -> {target} for {matches.sum()} rows")
 
@@ -1198,215 +1626,179 @@ class RuleEngine:
 
         return new_rows
 
-    def _evaluate_order_conditions(self, order_df, conditions, match_type):
+    def _apply_order_rules(self, df, order_rules, cache=None, tags_only=False):
+        """Applies order-level rules to all orders at once.
+
+        Each step is evaluated for every order still eligible for the rule;
+        the actions of the step then run once for all matching orders:
+        ADD_TAG on all rows of those orders, other actions on their first
+        row. Rules run in priority order and every step sees the changes
+        made by the previous ones, as when orders were processed one by
+        one (actions only touch the rows of the order that matched).
+
+        Args:
+            df (pd.DataFrame): The DataFrame to process (modified in place).
+            order_rules (list[CompiledRule]): Order-level rules in priority order.
+            cache (_ConditionCache, optional): Condition results of ``df``
+                shared with the article-level rules.
+            tags_only (bool): Run only the tag actions (see ``reapply``).
+
+        Returns:
+            list[dict]: New rows from ADD_PRODUCT actions, grouped by order
+                in order of appearance.
         """
-        Evaluate conditions on order-level (entire order group).
+        import logging
+        logger = logging.getLogger(__name__)
+
+        groups = _OrderGroups(df)
+        if not groups.count:
+            return []
+        if cache is None:
+            cache = _ConditionCache(df)
+
+        # (first row of the order, new row); sorted by order at the end
+        new_rows = []
+
+        for rule in order_rules:
+            rule_name = rule.name
+            priority = rule.priority
+            steps = rule.steps
+            logger.info(f"[RULE ENGINE] Applying order rule: {rule_name} (Priority: {priority}, Steps: {len(steps)})")
+
+            # Orders that matched every step so far
+            eligible = np.ones(groups.count, dtype=bool)
+
+            for step_idx, step in enumerate(steps):
+                matched = eligible & self._evaluate_order_conditions_grouped(
+                    df, groups, step.conditions, step.match, cache
+                )
+                logger.info(f"[RULE ENGINE] Order rule '{rule_name}' step {step_idx+1}: {int(matched.sum())} orders matched")
+                if not matched.any():
+                    break
+                eligible = matched
+
+                # Separate actions by scope
+                actions = _tag_actions(step.actions) if tags_only else step.actions
+                apply_to_all_actions = [a for a in actions if a.get("type", "").upper() == "ADD_TAG"]
+                apply_to_first_actions = [a for a in actions if a.get("type", "").upper() != "ADD_TAG"]
+
+                # Apply to all rows of the matching orders
+                if apply_to_all_actions:
+                    order_rows = pd.Series(groups.row_mask(matched), index=df.index)
+                    self._execute_actions(df, order_rows, apply_to_all_actions)
+                    cache.invalidate(self._columns_written_by(apply_to_all_actions))
+
+                # Apply to the first row of each matching order
+                if apply_to_first_actions:
+                    first_positions = np.sort(groups.first_positions[matched])
+                    first_rows = np.zeros(len(df), dtype=bool)
+                    first_rows[first_positions] = True
+                    step_rows = self._execute_actions(
+                        df, pd.Series(first_rows, index=df.index), apply_to_first_actions
+                    )
+                    cache.invalidate(self._columns_written_by(apply_to_first_actions))
+                    # Every ADD_PRODUCT adds one row per first row, in row order
+                    for i, row in enumerate(step_rows):
+                        new_rows.append((first_positions[i % len(first_positions)], row))
+
+        new_rows.sort(key=lambda item: item[0])
+        return [row for _, row in new_rows]
+
+    def _evaluate_order_conditions_grouped(self, df, groups, conditions, match_type, cache=None):
+        """Evaluates order-level conditions for every order at once.
+
+        Order-level fields are computed per order; any other field matches
+        if at least one row of the order does.
 
         Args:
-            order_df: DataFrame rows for single order
-            conditions: List of condition dicts
-            match_type: "ALL" or "ANY"
+            df (pd.DataFrame): The full DataFrame
+            groups (_OrderGroups): Order grouping of ``df``
+            conditions (list[CompiledCondition]): Compiled order-level conditions
+            match_type (str): "ALL" or "ANY"
+            cache (_ConditionCache, optional): Row-level condition results
+                of ``df`` to reuse
 
         Returns:
-            bool: True if conditions met
+            np.ndarray[bool]: Per order (in ``groups`` numbering), True if
+                the conditions are met
         """
         results = []
+        none = np.zeros(groups.count, dtype=bool)
+        per_order = np.arange(groups.count)
 
         for condition in conditions:
-            field = condition.get("field")
-            operator = condition.get("operator")
-            value = condition.get("value")
-
-            if not all([field, operator]):
+            field = condition.field
+            if condition.always_false:
+                results.append(none)
                 continue
 
-            # Skip separator fields (from UI)
-            if field and field.startswith("---"):
+            if field in ("has_sku", "has_product"):
+                if condition.column not in df.columns:
+                    results.append(none)
+                    continue
+                row_result = self._order_row_result(df, groups, condition, cache)
+                if condition.operator in _NEGATIVE_OPERATORS:
+                    results.append(groups.all(row_result))
+                else:
+                    results.append(groups.any(row_result))
                 continue
 
-            # Check if this is an order-level field
             if field in self.ORDER_LEVEL_FIELDS:
-                # Calculate order-level metric
-                calc_method_name = self.ORDER_LEVEL_FIELDS[field]
-                calc_method = getattr(self, calc_method_name)
-
-                # Methods that apply operator internally and return bool directly
-                if field in ("has_sku", "has_product", "all_no_packaging", "order_min_box"):
-                    field_value = calc_method(order_df, value, operator)
-                    result = field_value
-                else:
-                    # For numeric fields: wrap in Series, use global operator
-                    field_value = calc_method(order_df, None)
-                    if operator not in OPERATOR_MAP:
-                        result = False
-                    else:
-                        scalar_series = pd.Series([field_value])
-                        op_func = globals()[OPERATOR_MAP[operator]]
-                        result = bool(op_func(scalar_series, value).iloc[0])
-
-            else:
-                # Regular article-level field - check if ANY row matches
-                if field not in order_df.columns or operator not in OPERATOR_MAP:
-                    result = False
+                if field == "all_no_packaging":
+                    if "All_No_Packaging" not in df.columns:
+                        results.append(none)
+                        continue
+                    raw = pd.Series(groups.first_values(df["All_No_Packaging"]))
+                    flags = raw.astype(str).str.lower().isin(["true", "1", "yes"]).to_numpy()
+                    field_values = pd.Series(np.where(flags, "true", "false").tolist())
+                elif field == "order_min_box":
+                    if "Order_Min_Box" not in df.columns:
+                        results.append(none)
+                        continue
+                    field_values = pd.Series([str(v) for v in groups.first_values(df["Order_Min_Box"])])
                 else:
-                    op_func = globals()[OPERATOR_MAP[operator]]
-                    series_result = op_func(order_df[field], value)
-                    result = series_result.any()  # At least one row matches
+                    field_values = self._order_metric(df, groups, field)
+                row_result = _op_result_by_group(condition, field_values, per_order, groups.count)
+                results.append(_as_flags(row_result, False))
+                continue
 
-            results.append(result)
+            # Regular article-level field - check if ANY row of the order matches
+            if field not in df.columns:
+                results.append(none)
+                continue
+            row_result = self._order_row_result(df, groups, condition, cache)
+            results.append(groups.any(row_result))
 
         if not results:
-            return False
+            return none
 
         # Combine results based on match type
         if match_type == "ALL":
-            return all(results)
+            return np.logical_and.reduce(results)
         else:  # ANY
-            return any(results)
-
-    def _calculate_item_count(self, order_df, sku_value=None):
-        """Count unique items (rows) in order."""
-        return len(order_df)
-
-    def _calculate_total_quantity(self, order_df, sku_value=None):
-        """Sum all quantities in order."""
-        if "Quantity" in order_df.columns:
-            return order_df["Quantity"].sum()
-        return 0
-
-    def _calculate_unique_sku_count(self, order_df, sku_value=None):
-        """Count unique SKUs in order."""
-        if "SKU" in order_df.columns:
-            return len(order_df["SKU"].unique())
-        return 0
-
-    def _calculate_max_quantity(self, order_df, sku_value=None):
-        """Max quantity of any single line item in order."""
-        if "Quantity" in order_df.columns:
-            return order_df["Quantity"].max()
-        return 0
-
-    def _calculate_order_volumetric_weight(self, order_df, sku_value=None):
-        """Return pre-computed order volumetric weight from enriched DataFrame column.
-
-        Requires enrich_dataframe_with_weights() to have been called before apply().
-        Returns 0.0 if the column is not present.
-        """
-        if "Order_Volumetric_Weight" in order_df.columns:
-            return float(order_df["Order_Volumetric_Weight"].iloc[0])
-        return 0.0
-
-    def _calculate_all_no_packaging(self, order_df, rule_value, operator="equals"):
-        """Evaluate all_no_packaging against rule value + operator.
-
-        Reads the pre-computed All_No_Packaging column and applies the operator
-        so rules can test both True and False explicitly.
-        E.g. {"field": "all_no_packaging", "operator": "equals", "value": "true"}
-             {"field": "all_no_packaging", "operator": "equals", "value": "false"}
-
-        Requires enrich_dataframe_with_weights() to have been called before apply().
-        Returns False if the column is not present.
-        """
-        if "All_No_Packaging" not in order_df.columns:
-            return False
-        raw = order_df["All_No_Packaging"].iloc[0]
-        bool_val = raw if isinstance(raw, bool) else str(raw).lower() in ("true", "1", "yes")
-        # Represent as string for operator comparison ("true"/"false")
-        col_str = "true" if bool_val else "false"
-        if operator not in OPERATOR_MAP:
-            return False
-        op_func = globals()[OPERATOR_MAP[operator]]
-        result_series = op_func(pd.Series([col_str]), str(rule_value).lower().strip())
-        return bool(result_series.iloc[0])
-
-    def _get_order_min_box(self, order_df, rule_value, operator="equals"):
-        """Return bool: True if Order_Min_Box matches the condition.
-
-        Reads the pre-computed Order_Min_Box column (populated by
-        enrich_dataframe_with_weights). Applies operator internally
-        like has_sku/has_product since it returns a bool directly.
-        """
-        if "Order_Min_Box" not in order_df.columns:
-            return False
-        box_value = str(order_df["Order_Min_Box"].iloc[0])
-        if operator not in OPERATOR_MAP:
-            return False
-        op_func = globals()[OPERATOR_MAP[operator]]
-        result_series = op_func(pd.Series([box_value]), rule_value)
-        return bool(result_series.iloc[0])
-
-    def _check_has_sku(self, order_df, sku_value, operator="equals"):
-        """Check if order contains SKU matching the condition.
-
-        Uses all operators from the global OPERATOR_MAP.
-
-        Args:
-            order_df: DataFrame rows for single order
-            sku_value: Value to match against
-            operator: String operator (any from OPERATOR_MAP)
-
-        Returns:
-            bool: True if condition matches
-                  - For positive operators: True if ANY SKU matches
-                  - For negative operators: True if ALL SKUs match (i.e., NONE have the value)
-        """
-        if "SKU" not in order_df.columns or not sku_value:
-            return False
-
-        sku_series = order_df["SKU"]
-
-        if operator not in OPERATOR_MAP:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"[RULE ENGINE] Unknown operator '{operator}' for has_sku, using 'equals'")
-            operator = "equals"
-
-        op_func = globals()[OPERATOR_MAP[operator]]
-        result_series = op_func(sku_series, sku_value)
-
-        # For negative operators, ALL SKUs must match (i.e., NONE have the unwanted value)
-        # For positive operators, ANY SKU can match
-        negative_operators = [
-            "does not equal", "does not contain", "not in list",
-            "not between", "does not match regex",
-        ]
-        if operator in negative_operators:
-            return result_series.all()
-        else:
-            return result_series.any()
+            return np.logical_or.reduce(results)
 
-    def _check_has_product(self, order_df, product_value, operator="equals"):
-        """Check if order contains Product_Name matching the condition.
-
-        Same logic as _check_has_sku but operates on Product_Name column.
-
-        Args:
-            order_df: DataFrame rows for single order
-            product_value: Value to match against
-            operator: String operator (any from OPERATOR_MAP)
+    @staticmethod
+    def _order_row_result(df, groups, condition, cache=None):
+        """Row-level result of a condition on its column, each order evaluated on its own."""
+        if cache is not None and condition.base_operator != "between":
+            return cache.result(condition)
+        return _op_result_by_group(condition, df[condition.column], groups.codes, groups.count)
 
-        Returns:
-            bool: True if condition matches
-        """
-        if "Product_Name" not in order_df.columns or not product_value:
-            return False
-
-        product_series = order_df["Product_Name"]
-
-        if operator not in OPERATOR_MAP:
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"[RULE ENGINE] Unknown operator '{operator}' for has_product, using 'equals'")
-            operator = "equals"
-
-        op_func = globals()[OPERATOR_MAP[operator]]
-        result_series = op_func(product_series, product_value)
-
-        negative_operators = [
-            "does not equal", "does not contain", "not in list",
-            "not between", "does not match regex",
-        ]
-        if operator in negative_operators:
-            return result_series.all()
-        else:
-            return result_series.any()
+    @staticmethod
+    def _order_metric(df, groups, field):
+        """Numeric order metric of every order as a Series in order number."""
+        if field == "item_count":
+            return pd.Series(groups.sizes)
+        if field == "order_volumetric_weight":
+            if "Order_Volumetric_Weight" not in df.columns:
+                return pd.Series(np.zeros(groups.count))
+            return pd.Series(groups.first_values(df["Order_Volumetric_Weight"])).astype(float)
+        if field == "unique_sku_count":
+            if "SKU" not in df.columns:
+                return pd.Series(np.zeros(groups.count, dtype=np.int64))
+            return groups.nunique(df["SKU"])
+        # total_quantity / max_quantity
+        if "Quantity" not in df.columns:
+            return pd.Series(np.zeros(groups.count, dtype=np.int64))
+        return groups.aggregate(df["Quantity"], "sum" if field == "total_quantity" else "max")
@@ -0,0 +1,108 @@
+"""Compact column schema for the analysis DataFrame.
+
+The analysis result is pickled into the session, held by the GUI and
+snapshotted for undo, so the per-row cost of its columns matters. The
+schema declared here is applied at the end of ``run_analysis``:
+
+- low-cardinality labels become categoricals. Every categorical is created
+  with the values downstream code writes into it (``""`` for packing list
+  blanking, ``"Unknown"`` for courier stats, ``"Manual"`` for added rows),
+  so those writes keep working;
+- high-cardinality text is left as it is. Arrow strings would make session
+  and undo pickles unreadable on workstations without ``pyarrow``;
+- integer counters are narrowed to ``int32``. Narrower types are not used
+  because stock is adjusted in place (toggle, undo) and must not wrap.
+
+Columns whose values are not all strings (or integers, for the counters)
+are left as they are, so unusual inputs never change meaning.
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype, is_integer_dtype
+from typing import Dict, Iterable, List
+
+CATEGORY_COLUMNS: Dict[str, List[str]] = {
+    "Order_Type": ["Single", "Multi"],
+    "Order_Fulfillment_Status": ["Fulfillable", "Not Fulfillable"],
+    "Shipping_Provider": ["Unknown", ""],
+    "Destination_Country": [""],
+    "Source": ["Order", "Manual"],
+    "Warehouse_Name": ["N/A", ""],
+    "Stock_Alert": ["", "Low Stock"],
+}
+
+INTEGER_COLUMNS: List[str] = ["Quantity", "Stock", "Final_Stock"]
+
+COMPACT_INT_DTYPE = np.int32
+
+
+def _is_text(series: pd.Series) -> bool:
+    return infer_dtype(series, skipna=True) in ("string", "empty")
+
+
+def apply_compact_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """Returns a copy of ``df`` with the compact column schema applied.
+
+    Args:
+        df (pd.DataFrame): The analysis DataFrame.
+
+    Returns:
+        pd.DataFrame: The same data with categorical labels and ``int32``
+            counters.
+    """
+    df = df.copy()
+
+    for column, base_categories in CATEGORY_COLUMNS.items():
+        if column not in df.columns or isinstance(df[column].dtype, pd.CategoricalDtype):
+            continue
+        if not _is_text(df[column]):
+            continue
+        observed = pd.unique(df[column].dropna())
+        categories = list(base_categories) + [v for v in observed if v not in base_categories]
+        df[column] = pd.Categorical(df[column], categories=categories)
+
+    limits = np.iinfo(COMPACT_INT_DTYPE)
+    for column in INTEGER_COLUMNS:
+        if column not in df.columns or not is_integer_dtype(df[column].dtype):
+            continue
+        values = df[column]
+        if values.empty or (values.min() >= limits.min and values.max() <= limits.max):
+            df[column] = values.astype(COMPACT_INT_DTYPE)
+
+    return df
+
+
+def ensure_categories(df: pd.DataFrame, column: str, values: Iterable) -> None:
+    """Adds ``values`` to the categories of a categorical column in place.
+
+    Call this before writing arbitrary values (e.g. a rule's SET_STATUS
+    value) into a column that may be categorical. Non-categorical columns
+    are left untouched.
+    """
+    if column not in df.columns or not isinstance(df[column].dtype, pd.CategoricalDtype):
+        return
+    missing = [
+        v for v in pd.unique(pd.Series(list(values), dtype=object).dropna())
+        if v not in df[column].cat.categories
+    ]
+    if missing:
+        df[column] = df[column].cat.add_categories(missing)
+
+
+def memory_report(df: pd.DataFrame) -> pd.DataFrame:
+    """Compares per-column memory before and after the compact schema.
+
+    Returns:
+        pd.DataFrame: One row per column plus a ``TOTAL`` row, with
+            ``Before_Bytes``, ``After_Bytes``, ``After_Dtype`` and ``Ratio``.
+    """
+    compact = apply_compact_schema(df)
+    report = pd.DataFrame({
+        "Before_Bytes": df.memory_usage(deep=True, index=False),
+        "After_Bytes": compact.memory_usage(deep=True, index=False),
+        "After_Dtype": compact.dtypes.astype(str),
+    })
+    report.loc["TOTAL"] = [report["Before_Bytes"].sum(), report["After_Bytes"].sum(), ""]
+    report["Ratio"] = (report["After_Bytes"] / report["Before_Bytes"]).round(3)
+    return report
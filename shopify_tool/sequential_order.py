@@ -76,12 +76,7 @@ def generate_sequential_order_map(
     unique_orders = fulfillable_df['Order_Number'].unique()
 
     # Sort with numeric awareness (ORDER-1, ORDER-2, ORDER-10)
-    def natural_sort_key(s):
-        """Convert string to list of strings and numbers for natural sorting."""
-        return [int(text) if text.isdigit() else text.lower()
-                for text in re.split(r'(\d+)', str(s))]
-
-    unique_orders_sorted = sorted(unique_orders, key=natural_sort_key)
+    unique_orders_sorted = sorted(unique_orders, key=_natural_sort_key)
 
     # Assign sequential numbers (1-indexed)
     order_map = {
@@ -89,7 +84,65 @@ def generate_sequential_order_map(
         for idx, order_num in enumerate(unique_orders_sorted)
     }
 
-    # Save to JSON
+    _save_sequential_order_map(order_map, json_path)
+
+    logger.info(f"Generated sequential order map: {len(order_map)} orders")
+
+    return order_map
+
+
+def extend_sequential_order_map(
+    analysis_results_df: pd.DataFrame,
+    session_path: Path
+) -> Dict[str, int]:
+    """
+    Number Fulfillable orders that are not in the sequential order map yet.
+
+    Used after orders were appended to a session: existing numbers (possibly
+    already printed on labels) are kept, new orders get the numbers after
+    the highest existing one, in natural sort order.
+
+    Args:
+        analysis_results_df: Analysis results DataFrame
+        session_path: Path to session directory
+
+    Returns:
+        Dict mapping Order_Number to sequential ID (1-indexed)
+    """
+    json_path = session_path / "analysis" / "sequential_order.json"
+    if not json_path.exists():
+        return generate_sequential_order_map(analysis_results_df, session_path)
+
+    order_map = load_sequential_order_map(session_path)
+    fulfillable_df = analysis_results_df[
+        analysis_results_df['Order_Fulfillment_Status'] == 'Fulfillable'
+    ]
+    new_orders = [
+        order_num for order_num in fulfillable_df['Order_Number'].unique()
+        if str(order_num) not in order_map
+    ]
+    if not new_orders:
+        return order_map
+
+    next_number = max(order_map.values(), default=0) + 1
+    for offset, order_num in enumerate(sorted(new_orders, key=_natural_sort_key)):
+        order_map[str(order_num)] = next_number + offset
+
+    _save_sequential_order_map(order_map, json_path)
+
+    logger.info(f"Extended sequential order map: {len(new_orders)} new orders, {len(order_map)} total")
+
+    return order_map
+
+
+def _natural_sort_key(s):
+    """Convert string to list of strings and numbers for natural sorting."""
+    return [int(text) if text.isdigit() else text.lower()
+            for text in re.split(r'(\d+)', str(s))]
+
+
+def _save_sequential_order_map(order_map: Dict[str, int], json_path: Path) -> None:
+    """Write the order map to sequential_order.json."""
     json_path.parent.mkdir(parents=True, exist_ok=True)
 
     data = {
@@ -102,10 +155,6 @@ def generate_sequential_order_map(
     with open(json_path, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
-    logger.info(f"Generated sequential order map: {len(order_map)} orders")
-
-    return order_map
-
 
 def load_sequential_order_map(session_path: Path) -> Dict[str, int]:
     """
@@ -8,6 +8,7 @@ This module provides functionality to:
 """
 
 import logging
+import numpy as np
 import pandas as pd
 from typing import Dict, List, Any
 
@@ -56,82 +57,137 @@ def decode_sets_in_orders(
         orders_df["Is_Set_Component"] = False
         return orders_df
 
-    expanded_rows = []
-    set_orders_count = 0
+    sku_values = orders_df["SKU"].to_numpy(dtype=object)
+    used_sets = [sku for sku in pd.unique(sku_values) if _is_hashable(sku) and sku in set_decoders]
+    table = _SetComponentsTable(set_decoders, used_sets)
 
-    for idx, row in orders_df.iterrows():
-        sku = row["SKU"]
-        quantity = row["Quantity"]
+    # Rows per input row: the set's valid components, or the row itself.
+    # A set without components is kept as a regular row; a set whose
+    # components are all invalid produces no rows.
+    set_codes = pd.Index(table.expanded_sets, dtype=object).get_indexer(sku_values)
+    is_set = set_codes >= 0
+    counts = np.ones(len(orders_df), dtype=np.int64)
+    counts[is_set] = table.counts[set_codes[is_set]]
 
-        # Check if this SKU is a set
-        if sku in set_decoders:
-            components = set_decoders[sku]
+    table.log_warnings(sku_values)
+    set_orders_count = int(is_set.sum())
 
+    if counts.sum() == 0:
+        logger.warning("No rows after set expansion")
+        # Return empty DataFrame with correct columns
+        result_df = orders_df.copy()
+        result_df["Original_SKU"] = None
+        result_df["Original_Quantity"] = None
+        result_df["Is_Set_Component"] = False
+        return result_df.iloc[0:0]  # Empty with columns
+
+    positions = np.repeat(np.arange(len(orders_df)), counts)
+    result_df = orders_df.iloc[positions].copy()
+    quantities = result_df["Quantity"].to_numpy()
+
+    # k-th component of each expanded set row
+    is_component = is_set[positions]
+    row_starts = np.repeat(np.cumsum(counts) - counts, counts)
+    component_rows = (
+        table.offsets[set_codes[positions[is_component]]]
+        + (np.arange(len(positions)) - row_starts)[is_component]
+    )
+
+    new_skus = result_df["SKU"].to_numpy(dtype=object).copy()
+    new_skus[is_component] = table.skus[component_rows]
+    new_quantities = quantities.astype(object)
+    new_quantities[is_component] = quantities[is_component] * table.quantities[component_rows]
+
+    result_df["Original_SKU"] = result_df["SKU"].to_numpy(dtype=object)
+    result_df["Original_Quantity"] = quantities
+    result_df["SKU"] = new_skus
+    result_df["Quantity"] = new_quantities
+    result_df["Is_Set_Component"] = is_component
+    # Column types are inferred from the expanded values, exactly like the
+    # row-by-row rebuild this replaces (e.g. a text column left with only
+    # NaN becomes float, a categorical becomes text)
+    result_df = pd.DataFrame(
+        {column: result_df[column].to_numpy(dtype=object) for column in result_df.columns},
+        index=result_df.index,
+    ).infer_objects()
+
+    logger.info(
+        f"Decoded {set_orders_count} set orders into components. "
+        f"Total rows: {len(orders_df)} → {len(result_df)}"
+    )
+
+    return result_df
+
+
+def _is_hashable(value) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+class _SetComponentsTable:
+    """Valid components of the sets used by an order export, as flat arrays.
+
+    Components of set ``expanded_sets[i]`` are
+    ``skus[offsets[i]:offsets[i] + counts[i]]`` (same for ``quantities``).
+    Sets without any components are not in ``expanded_sets``: their rows
+    stay as they are.
+    """
+
+    def __init__(self, set_decoders: Dict[str, List[Dict[str, Any]]], used_sets: List):
+        self.expanded_sets = []
+        self._warnings = {}
+        counts, skus, quantities = [], [], []
+
+        for set_sku in used_sets:
+            components = set_decoders[set_sku]
             # Validate set has components
             if not components:
-                logger.warning(f"Set '{sku}' has no components defined, skipping")
-                # Keep original row but add tracking columns
-                new_row = row.copy()
-                new_row["Original_SKU"] = sku
-                new_row["Original_Quantity"] = quantity
-                new_row["Is_Set_Component"] = False
-                expanded_rows.append(new_row)
+                self._warnings[set_sku] = [f"Set '{set_sku}' has no components defined, skipping"]
                 continue
 
-            logger.debug(f"Decoding set {sku} (qty: {quantity}) → {len(components)} components")
-            set_orders_count += 1
-
-            # Expand into components
+            warnings = []
+            valid = 0
             for component in components:
                 component_sku = component.get("sku")
                 component_qty = component.get("quantity")
 
                 # Validate component
                 if not component_sku:
-                    logger.warning(f"Component in set '{sku}' has no SKU, skipping component")
+                    warnings.append(f"Component in set '{set_sku}' has no SKU, skipping component")
                     continue
 
                 if not component_qty or component_qty <= 0:
-                    logger.warning(
-                        f"Component '{component_sku}' in set '{sku}' has invalid quantity: {component_qty}, skipping"
+                    warnings.append(
+                        f"Component '{component_sku}' in set '{set_sku}' has invalid quantity: "
+                        f"{component_qty}, skipping"
                     )
                     continue
 
-                # Create expanded row
-                new_row = row.copy()
-                new_row["SKU"] = component_sku
-                new_row["Quantity"] = quantity * component_qty  # Multiply quantities
-                new_row["Original_SKU"] = sku
-                new_row["Original_Quantity"] = quantity
-                new_row["Is_Set_Component"] = True
-
-                expanded_rows.append(new_row)
-
-        else:
-            # Regular SKU - keep as-is with tracking columns
-            new_row = row.copy()
-            new_row["Original_SKU"] = sku
-            new_row["Original_Quantity"] = quantity
-            new_row["Is_Set_Component"] = False
-            expanded_rows.append(new_row)
-
-    if not expanded_rows:
-        logger.warning("No rows after set expansion")
-        # Return empty DataFrame with correct columns
-        result_df = orders_df.copy()
-        result_df["Original_SKU"] = None
-        result_df["Original_Quantity"] = None
-        result_df["Is_Set_Component"] = False
-        return result_df.iloc[0:0]  # Empty with columns
-
-    result_df = pd.DataFrame(expanded_rows)
-
-    logger.info(
-        f"Decoded {set_orders_count} set orders into components. "
-        f"Total rows: {len(orders_df)} → {len(result_df)}"
-    )
-
-    return result_df
+                skus.append(component_sku)
+                quantities.append(component_qty)
+                valid += 1
+
+            logger.debug(f"Set {set_sku} → {len(components)} components")
+            if warnings:
+                self._warnings[set_sku] = warnings
+            self.expanded_sets.append(set_sku)
+            counts.append(valid)
+
+        self.counts = np.array(counts, dtype=np.int64)
+        self.offsets = np.cumsum(self.counts) - self.counts
+        self.skus = np.array(skus, dtype=object)
+        self.quantities = np.array(quantities, dtype=object)
+
+    def log_warnings(self, sku_values: np.ndarray) -> None:
+        """Logs the validation warnings once per order line of the set, in row order."""
+        if not self._warnings:
+            return
+        for sku in sku_values[pd.Series(sku_values, dtype=object).isin(list(self._warnings)).to_numpy()]:
+            for message in self._warnings[sku]:
+                logger.warning(message)
 
 
 def import_sets_from_csv(csv_path: str) -> Dict[str, List[Dict[str, Any]]]:
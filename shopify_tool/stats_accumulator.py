@@ -0,0 +1,301 @@
+"""Incremental statistics for interactive edits of the analysis DataFrame.
+
+``recalculate_statistics`` scans the whole frame. After a single toggle or
+a bulk tag change only a handful of rows differ, so the GUI keeps a
+``StatsAccumulator`` instead: it is built once from a full pass and then
+fed the rows that changed. Every edit is expressed as rows leaving the
+statistics (their state before the edit) and rows entering them (their
+state after it):
+
+- status flip / tag change: ``update_rows(before, after)``
+- row delete: ``remove_rows(rows)``
+- row insert: ``add_rows(rows)``
+
+``stats()`` returns the same dictionary layout as
+``recalculate_statistics`` and ``check_consistency()`` compares the two.
+"""
+
+import weakref
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+FULFILLABLE = "Fulfillable"
+NOT_FULFILLABLE = "Not Fulfillable"
+
+
+def _bump(counter: Dict, key, amount) -> None:
+    """Adds ``amount`` to ``counter[key]``, dropping the key at zero."""
+    value = counter.get(key, 0) + amount
+    if value:
+        counter[key] = value
+    else:
+        counter.pop(key, None)
+
+
+class _SkuTotals:
+    """Running per-SKU numbers for the SKU summary."""
+
+    __slots__ = ("rows", "total", "fulfillable", "product_names", "warehouse_names")
+
+    def __init__(self):
+        self.rows = 0
+        self.total = 0
+        self.fulfillable = 0
+        # name -> row count, in first-seen order; the first live key is shown
+        self.product_names = {}
+        self.warehouse_names = {}
+
+
+class StatsAccumulator:
+    """Maintains analysis statistics under row-level deltas.
+
+    Args:
+        df (pd.DataFrame): The analysis DataFrame to start from. It needs
+            the same columns as ``recalculate_statistics``.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        missing = [
+            col for col in ["Order_Fulfillment_Status", "Order_Number", "Quantity", "System_note"]
+            if col not in df.columns
+        ]
+        if missing:
+            raise ValueError(f"DataFrame missing required columns: {missing}")
+
+        self.has_tags = "Internal_Tags" in df.columns
+        self.has_sku_summary = all(
+            col in df.columns for col in ["SKU", "Product_Name", "Warehouse_Name"]
+        )
+
+        # status -> {order: rows}; only the two statuses that feed the totals
+        self._order_rows = {FULFILLABLE: {}, NOT_FULFILLABLE: {}}
+        self._quantity = {FULFILLABLE: 0, NOT_FULFILLABLE: 0}
+        # provider -> {order: rows}, fulfillable rows only
+        self._courier_rows = {}
+        self._courier_repeat_rows = {}
+        self._tags = {}
+        self._skus = {}
+
+        self._apply(df, 1)
+        self._synced_df = weakref.ref(df)
+        self._synced_rows = len(df)
+        self._pending = False
+
+    # ------------------------------------------------------------------
+    # Deltas
+    # ------------------------------------------------------------------
+
+    def add_rows(self, rows: pd.DataFrame) -> None:
+        """Adds inserted rows (or the new state of edited rows)."""
+        self._apply(rows, 1)
+
+    def remove_rows(self, rows: pd.DataFrame) -> None:
+        """Removes deleted rows (or the old state of edited rows)."""
+        self._apply(rows, -1)
+
+    def update_rows(self, before: pd.DataFrame, after: pd.DataFrame) -> None:
+        """Replaces the old state of edited rows with their new state."""
+        self._apply(before, -1)
+        self._apply(after, 1)
+
+    def _apply(self, rows: pd.DataFrame, sign: int) -> None:
+        if rows is None or rows.empty:
+            return
+
+        status = rows["Order_Fulfillment_Status"]
+        for label in (FULFILLABLE, NOT_FULFILLABLE):
+            in_status = rows[(status == label).to_numpy()]
+            if in_status.empty:
+                continue
+            counts = in_status.groupby("Order_Number", sort=False, observed=True).size()
+            orders = self._order_rows[label]
+            for order, n in zip(counts.index.tolist(), counts.tolist()):
+                _bump(orders, order, sign * n)
+            self._quantity[label] += sign * in_status["Quantity"].sum()
+
+        completed = rows[(status == FULFILLABLE).to_numpy()]
+        if not completed.empty:
+            if "Shipping_Provider" in completed.columns:
+                providers = completed["Shipping_Provider"].astype(object).fillna("Unknown")
+            else:
+                providers = pd.Series("Unknown", index=completed.index, dtype=object)
+            keys = pd.DataFrame({
+                "provider": providers.to_numpy(),
+                "order": completed["Order_Number"].astype(object).to_numpy(),
+            })
+            repeat = (completed["System_note"] == "Repeat").to_numpy()
+            for target, pair_rows in ((self._courier_rows, keys), (self._courier_repeat_rows, keys[repeat])):
+                pairs = pair_rows.groupby(["provider", "order"], sort=False).size()
+                for (provider, order), n in zip(pairs.index.tolist(), pairs.tolist()):
+                    _bump(target.setdefault(provider, {}), order, sign * n)
+
+        if self.has_tags and "Internal_Tags" in rows.columns:
+            from shopify_tool.tag_manager import parse_tags
+
+            codes, tag_strings = pd.factorize(rows["Internal_Tags"])
+            frequencies = np.bincount(codes[codes >= 0], minlength=len(tag_strings))
+            for tags_json, frequency in zip(tag_strings, frequencies.tolist()):
+                for tag in parse_tags(tags_json):
+                    _bump(self._tags, tag, sign * frequency)
+
+        if self.has_sku_summary:
+            self._apply_skus(rows, status, sign)
+
+    def _apply_skus(self, rows: pd.DataFrame, status: pd.Series, sign: int) -> None:
+        has_sku = rows["SKU"].notna().to_numpy()
+        sku_rows = rows[has_sku]
+        if sku_rows.empty:
+            return
+        fulfillable = (status == FULFILLABLE).to_numpy()[has_sku]
+        frame = pd.DataFrame({
+            "SKU": sku_rows["SKU"].astype(object).to_numpy(),
+            "Quantity": sku_rows["Quantity"].to_numpy(),
+            "Fulfillable": sku_rows["Quantity"].where(fulfillable, 0).to_numpy(),
+        })
+        grouped = frame.groupby("SKU", sort=False).agg(
+            rows=("Quantity", "size"), total=("Quantity", "sum"), fulfillable=("Fulfillable", "sum")
+        )
+        for sku, n, total, fulfillable in zip(
+            grouped.index.tolist(), grouped["rows"].tolist(),
+            grouped["total"].tolist(), grouped["fulfillable"].tolist()
+        ):
+            entry = self._skus.get(sku)
+            if entry is None:
+                entry = self._skus[sku] = _SkuTotals()
+            entry.rows += sign * n
+            entry.total += sign * total
+            entry.fulfillable += sign * fulfillable
+
+        for column, attribute in (("Product_Name", "product_names"), ("Warehouse_Name", "warehouse_names")):
+            names = pd.DataFrame({
+                "SKU": frame["SKU"],
+                "name": sku_rows[column].astype(object).to_numpy(),
+            }).dropna()
+            pairs = names.groupby(["SKU", "name"], sort=False).size()
+            for (sku, name), n in zip(pairs.index.tolist(), pairs.tolist()):
+                _bump(getattr(self._skus[sku], attribute), name, sign * n)
+
+        for sku in set(frame["SKU"].tolist()):
+            if self._skus[sku].rows <= 0:
+                del self._skus[sku]
+
+    # ------------------------------------------------------------------
+    # Results
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict:
+        """Returns statistics in the ``recalculate_statistics`` layout.
+
+        Couriers are sorted by name, tags by count (ties in first-seen
+        order) and SKUs by total quantity (ties by SKU).
+        """
+        stats = {
+            "total_orders_completed": len(self._order_rows[FULFILLABLE]),
+            "total_orders_not_completed": len(self._order_rows[NOT_FULFILLABLE]),
+            "total_items_to_write_off": int(self._quantity[FULFILLABLE]),
+            "total_items_not_to_write_off": int(self._quantity[NOT_FULFILLABLE]),
+        }
+
+        stats["couriers_stats"] = [
+            {
+                "courier_id": provider,
+                "orders_assigned": len(orders),
+                "repeated_orders_found": len(self._courier_repeat_rows.get(provider, {})),
+            }
+            for provider, orders in sorted(self._courier_rows.items(), key=lambda item: item[0])
+            if orders
+        ]
+
+        stats["tags_breakdown"] = (
+            dict(sorted(self._tags.items(), key=lambda x: x[1], reverse=True))
+            if self.has_tags else None
+        )
+
+        sku_summary = None
+        if self.has_sku_summary:
+            sku_summary = []
+            for sku in sorted(self._skus, key=lambda s: (-self._skus[s].total, s)):
+                entry = self._skus[sku]
+                sku_summary.append({
+                    "SKU": sku,
+                    "Total_Quantity": entry.total,
+                    "Product_Name": next(iter(entry.product_names), np.nan),
+                    "Warehouse_Name": next(iter(entry.warehouse_names), np.nan),
+                    "Fulfillable_Items": entry.fulfillable,
+                    "Not_Fulfillable_Items": entry.total - entry.fulfillable,
+                })
+        stats["sku_summary"] = sku_summary
+        return stats
+
+    def check_consistency(self, df: pd.DataFrame) -> List[str]:
+        """Compares the running statistics with a full recompute of ``df``.
+
+        Ordering of equal counts (tags, SKUs) is not compared.
+
+        Returns:
+            list[str]: Human-readable differences; empty when consistent.
+        """
+        from shopify_tool.analysis import recalculate_statistics
+
+        expected = recalculate_statistics(df)
+        actual = self.stats()
+        differences = []
+
+        for key in [
+            "total_orders_completed", "total_orders_not_completed",
+            "total_items_to_write_off", "total_items_not_to_write_off",
+            "couriers_stats", "tags_breakdown",
+        ]:
+            if actual[key] != expected[key]:
+                differences.append(f"{key}: {actual[key]!r} != {expected[key]!r}")
+
+        def by_sku(summary: Optional[List[Dict]]):
+            if summary is None:
+                return None
+            return {
+                row["SKU"]: {k: (None if pd.isna(v) else v) for k, v in row.items()}
+                for row in summary
+            }
+
+        actual_skus = by_sku(actual["sku_summary"])
+        expected_skus = by_sku(expected["sku_summary"])
+        if actual_skus != expected_skus:
+            if actual_skus is None or expected_skus is None:
+                differences.append(f"sku_summary: {actual_skus!r} != {expected_skus!r}")
+            else:
+                for sku in sorted(set(actual_skus) | set(expected_skus), key=str):
+                    if actual_skus.get(sku) != expected_skus.get(sku):
+                        differences.append(
+                            f"sku_summary[{sku}]: {actual_skus.get(sku)!r} != {expected_skus.get(sku)!r}"
+                        )
+        return differences
+
+    # ------------------------------------------------------------------
+    # GUI synchronisation
+    # ------------------------------------------------------------------
+
+    def reflects(self, df: pd.DataFrame) -> bool:
+        """True if the accumulator was last synced to this DataFrame object."""
+        return (
+            df is not None
+            and self._synced_df() is df
+            and len(df) == self._synced_rows
+            and self.has_tags == ("Internal_Tags" in df.columns)
+        )
+
+    def mark_synced(self, df: pd.DataFrame) -> None:
+        """Records that the deltas for the edit producing ``df`` were applied."""
+        self._synced_df = weakref.ref(df)
+        self._synced_rows = len(df)
+        self._pending = True
+
+    def consume_sync(self, df: pd.DataFrame) -> bool:
+        """Returns True once per ``mark_synced`` if ``df`` is still the synced frame.
+
+        A refresh that was not preceded by ``mark_synced`` (undo, rules,
+        session load) gets False and should fall back to a full recompute.
+        """
+        pending, self._pending = self._pending, False
+        return pending and self.reflects(df)
@@ -0,0 +1,128 @@
+"""Live stock of a loaded analysis for manual edits.
+
+``StockLedger`` holds the remaining stock of every SKU (the ``Final_Stock``
+shown on its rows) and the row positions of that SKU. A toggle,
+force-fulfill or added product changes the stock of the edited order's
+SKUs and writes it back to those rows only.
+
+Row removal and insertion are reported via ``remove_rows()`` /
+``append_rows()``; a ledger that does not match the current frame is
+rebuilt (``StockLedger.for_frame``).
+"""
+
+import weakref
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .order_index import PositionMap
+
+
+class StockLedger:
+    """Remaining stock per SKU plus the rows that display it.
+
+    Args:
+        df (pd.DataFrame): Analysis DataFrame with SKU and Final_Stock columns.
+            The remaining stock of a SKU is the Final_Stock of its first row.
+
+    Raises:
+        ValueError: If a required column is missing
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        missing = [col for col in ["SKU", "Final_Stock"] if col not in df.columns]
+        if missing:
+            raise ValueError(f"DataFrame missing required columns: {missing}")
+
+        self._rows = PositionMap(df["SKU"].to_numpy(dtype=object))
+        final_stock = df["Final_Stock"].to_numpy()
+        self._stock: Dict = {sku: final_stock[self._rows.get(sku)[0]] for sku in self._rows.keys()}
+
+        self.mark_synced(df)
+
+    def reflects(self, df: pd.DataFrame) -> bool:
+        """True if the ledger was last synced to this DataFrame object."""
+        return df is not None and self._synced_df() is df and len(df) == self._synced_rows
+
+    def mark_synced(self, df: pd.DataFrame) -> None:
+        """Records that the ledger matches ``df``."""
+        self._synced_df = weakref.ref(df)
+        self._synced_rows = len(df)
+
+    def __contains__(self, sku) -> bool:
+        return sku in self._stock
+
+    def available(self, sku, default=None):
+        """Remaining stock of a SKU (``default`` if the SKU has no rows)."""
+        return self._stock.get(sku, default)
+
+    def snapshot(self) -> Dict:
+        """Copy of the SKU -> remaining stock mapping."""
+        return dict(self._stock)
+
+    @staticmethod
+    def order_demand(order_rows: pd.DataFrame) -> pd.Series:
+        """Quantity per SKU of an order's rows."""
+        return order_rows.groupby("SKU", observed=True)["Quantity"].sum()
+
+    def lacking(self, demand: pd.Series) -> List:
+        """SKUs whose remaining stock does not cover the demand.
+
+        SKUs the ledger does not know are not checked.
+        """
+        return [
+            sku for sku, needed in demand.items()
+            if sku in self._stock and needed > self._stock[sku]
+        ]
+
+    def consume(self, df: pd.DataFrame, demand: pd.Series) -> None:
+        """Takes the demand from the remaining stock and updates those rows."""
+        self._adjust(df, demand, -1)
+
+    def release(self, df: pd.DataFrame, demand: pd.Series) -> None:
+        """Returns the demand to the remaining stock and updates those rows."""
+        self._adjust(df, demand, 1)
+
+    def _adjust(self, df: pd.DataFrame, demand: pd.Series, sign: int) -> None:
+        column = df.columns.get_loc("Final_Stock")
+        for sku, quantity in demand.items():
+            if sku not in self._stock:
+                continue
+            self._stock[sku] = self._stock[sku] + sign * quantity
+            df.iloc[self._rows.get(sku), column] = self._stock[sku]
+
+    def append_rows(self, df: pd.DataFrame, positions: Iterable[int]) -> None:
+        """Registers rows appended to the frame (``df`` is the new frame).
+
+        Appended rows of known SKUs are set to the SKU's remaining stock;
+        a new SKU starts with the Final_Stock of its first appended row.
+        """
+        column = df.columns.get_loc("Final_Stock")
+        sku_column = df.columns.get_loc("SKU")
+        positions = [position for position in positions if not pd.isna(df.iat[position, sku_column])]
+        skus = [df.iat[position, sku_column] for position in positions]
+        for position, sku in zip(positions, skus):
+            if sku in self._stock:
+                df.iat[position, column] = self._stock[sku]
+            else:
+                self._stock[sku] = df.iat[position, column]
+        self._rows.add(skus, np.asarray(positions, dtype=np.int64))
+        self.mark_synced(df)
+
+    def remove_rows(self, df: pd.DataFrame, positions: Iterable[int]) -> None:
+        """Forgets removed rows (``df`` is the new frame, re-indexed from 0).
+
+        Rows after a removed one move up, so the stored positions are
+        shifted. The remaining stock is not changed: removing an item does
+        not return stock, same as before the ledger existed.
+        """
+        self._rows.remove(np.unique(np.asarray(list(positions), dtype=np.int64)))
+        self.mark_synced(df)
+
+    @classmethod
+    def for_frame(cls, df: pd.DataFrame, ledger: Optional["StockLedger"] = None) -> "StockLedger":
+        """Returns ``ledger`` if it still reflects ``df``, else a new ledger."""
+        if ledger is not None and ledger.reflects(df):
+            return ledger
+        return cls(df)
@@ -17,6 +17,10 @@ from typing import Optional, Tuple, Dict, Any, List
 
 import pandas as pd
 
+from .order_index import order_index_for, synced_order_index
+from .rule_plan import compile_rules
+from .rules import RuleEngine
+
 
 class UndoManager:
     """Manages undo history for DataFrame operations.
@@ -39,6 +43,8 @@ class UndoManager:
         self.current_position = 0
         self.max_history = 20
 
+        self._rule_engine = None
+
         # Load existing history if available
         self._load_history()
 
@@ -234,17 +240,18 @@ class UndoManager:
             df = self.main_window.analysis_results_df
 
             # Find rows for this order
-            mask = df["Order_Number"].astype(str).str.strip() == str(order_number).strip()
+            order_labels = df.index[order_index_for(self.main_window).rows(order_number)]
 
-            if not mask.any():
+            if order_labels.empty:
                 self.log.warning(f"Order {order_number} not found in DataFrame")
                 return False
 
             # Restore the affected columns from before state
             # Key columns that change: Order_Fulfillment_Status
-            df.loc[mask, "Order_Fulfillment_Status"] = affected_rows_before["Order_Fulfillment_Status"].values[0]
+            df.loc[order_labels, "Order_Fulfillment_Status"] = affected_rows_before["Order_Fulfillment_Status"].values[0]
 
             self.main_window.analysis_results_df = df
+            self._reapply_rules(order_index_for(self.main_window).rows(order_number), ["Order_Fulfillment_Status"])
             self.log.info(f"Restored status for order {order_number}")
 
             return True
@@ -270,15 +277,15 @@ class UndoManager:
             df = self.main_window.analysis_results_df
 
             # Find rows for this order
-            mask = df["Order_Number"].astype(str).str.strip() == str(order_number).strip()
+            order_labels = df.index[order_index_for(self.main_window).rows(order_number)]
 
-            if not mask.any():
+            if order_labels.empty:
                 self.log.warning(f"Order {order_number} not found in DataFrame")
                 return False
 
             # Restore Status_Note from before state
             if "Status_Note" in affected_rows_before.columns:
-                for idx, original_idx in enumerate(df[mask].index):
+                for idx, original_idx in enumerate(order_labels):
                     if idx < len(affected_rows_before):
                         df.loc[original_idx, "Status_Note"] = affected_rows_before.iloc[idx]["Status_Note"]
 
@@ -308,15 +315,15 @@ class UndoManager:
             df = self.main_window.analysis_results_df
 
             # Find rows for this order
-            mask = df["Order_Number"].astype(str).str.strip() == str(order_number).strip()
+            order_labels = df.index[order_index_for(self.main_window).rows(order_number)]
 
-            if not mask.any():
+            if order_labels.empty:
                 self.log.warning(f"Order {order_number} not found in DataFrame")
                 return False
 
             # Restore Internal_Tags from before state
             if "Internal_Tags" in affected_rows_before.columns:
-                for idx, original_idx in enumerate(df[mask].index):
+                for idx, original_idx in enumerate(order_labels):
                     if idx < len(affected_rows_before):
                         df.loc[original_idx, "Internal_Tags"] = affected_rows_before.iloc[idx]["Internal_Tags"]
 
@@ -341,13 +348,11 @@ class UndoManager:
         """
         try:
             # Restore the removed row by concatenating it back
-            self.main_window.analysis_results_df = pd.concat(
-                [self.main_window.analysis_results_df, affected_rows_before],
-                ignore_index=True
-            )
+            self._restore_rows(affected_rows_before)
 
             order_number = params.get("order_number", "unknown")
             sku = params.get("sku", "unknown")
+            self._reapply_rules(order_index_for(self.main_window).rows(order_number))
             self.log.info(f"Restored item {sku} to order {order_number}")
 
             return True
@@ -368,10 +373,7 @@ class UndoManager:
         """
         try:
             # Restore all removed rows by concatenating them back
-            self.main_window.analysis_results_df = pd.concat(
-                [self.main_window.analysis_results_df, affected_rows_before],
-                ignore_index=True
-            )
+            self._restore_rows(affected_rows_before)
 
             order_number = params.get("order_number", "unknown")
             self.log.info(f"Restored order {order_number} with {len(affected_rows_before)} items")
@@ -382,6 +384,41 @@ class UndoManager:
             self.log.error(f"Failed to undo remove order: {e}", exc_info=True)
             return False
 
+    def _restore_rows(self, rows: pd.DataFrame) -> None:
+        """Appends removed rows back to the DataFrame.
+
+        The order index is kept in sync when it matched the DataFrame
+        before the restore.
+        """
+        index = synced_order_index(self.main_window)
+        df = self.main_window.analysis_results_df
+        self.main_window.analysis_results_df = pd.concat([df, rows], ignore_index=True)
+        if index is not None:
+            index.append_rows(self.main_window.analysis_results_df, range(len(df), len(df) + len(rows)))
+
+    def _reapply_rules(self, positions, columns=None) -> None:
+        """Brings the rule tags of the restored orders up to date.
+
+        The edit being undone re-applied the rules after it ran, so the
+        tags have to follow the restored values as well.
+
+        Args:
+            positions: Row positions of the restored rows.
+            columns: Columns the undo restored; None if rows were added back.
+        """
+        rules = (self.main_window.active_profile_config or {}).get("rules")
+        df = self.main_window.analysis_results_df
+        if not rules or df is None or not len(positions):
+            return
+
+        try:
+            plan = compile_rules(rules)
+            if self._rule_engine is None or self._rule_engine.plan is not plan:
+                self._rule_engine = RuleEngine(plan)
+            self._rule_engine.reapply(df, positions, columns)
+        except Exception as e:
+            self.log.error(f"Failed to re-apply rules after undo: {e}", exc_info=True)
+
     def _get_history_path(self) -> Optional[Path]:
         """Get path to operations_history.json.
 
@@ -593,10 +630,7 @@ class UndoManager:
                 return False
 
             # Restore removed rows
-            self.main_window.analysis_results_df = pd.concat(
-                [self.main_window.analysis_results_df, affected_rows_before],
-                ignore_index=True
-            )
+            self._restore_rows(affected_rows_before)
 
             sku = params.get("sku", "unknown")
             removed_count = params.get("removed_count", len(affected_rows_before))
@@ -624,10 +658,7 @@ class UndoManager:
                 return False
 
             # Restore removed rows
-            self.main_window.analysis_results_df = pd.concat(
-                [self.main_window.analysis_results_df, affected_rows_before],
-                ignore_index=True
-            )
+            self._restore_rows(affected_rows_before)
 
             removed_orders = params.get("removed_orders", 0)
             removed_items = params.get("removed_items", len(affected_rows_before))
@@ -655,10 +686,7 @@ class UndoManager:
                 return False
 
             # Restore deleted rows
-            self.main_window.analysis_results_df = pd.concat(
-                [self.main_window.analysis_results_df, affected_rows_before],
-                ignore_index=True
-            )
+            self._restore_rows(affected_rows_before)
 
             deleted_orders = params.get("deleted_orders", 0)
             deleted_items = params.get("deleted_items", len(affected_rows_before))
@@ -51,3 +51,72 @@ def minimal_dataframe():
         "col_a": ["x", "y", "z"],
         "col_b": [1, 2, 3],
     })
+
+
+# ----------------------------------------------------------------------
+# File server with client profiles and input CSVs
+#
+# Modules change what ``file_server`` builds by overriding the fixtures it
+# depends on: ``server_clients``, ``client_config``, ``stock_rows`` and
+# ``order_rows``.
+# ----------------------------------------------------------------------
+
+@pytest.fixture
+def server_clients():
+    """Client ID -> name of the profiles created on ``file_server``."""
+    return {"TEST": "Test Client"}
+
+
+@pytest.fixture
+def client_config():
+    """Top-level keys written into every client's shopify config."""
+    return {}
+
+
+@pytest.fixture
+def stock_rows():
+    """Contents of stock.csv (warehouse export columns, ';'-separated)."""
+    return {
+        "Артикул": ["SKU-1", "SKU-2"],
+        "Име": ["Product 1", "Product 2"],
+        "Наличност": [10, 0],
+    }
+
+
+@pytest.fixture
+def order_rows():
+    """Contents of orders.csv (Shopify export columns)."""
+    return {
+        "Name": ["#1", "#2"],
+        "Lineitem sku": ["SKU-1", "SKU-2"],
+        "Lineitem quantity": [1, 1],
+        "Shipping Method": ["dhl", "dpd"],
+        "Shipping Country": ["BG", "BG"],
+        "Tags": ["", ""],
+        "Notes": ["", ""],
+    }
+
+
+@pytest.fixture
+def file_server(tmp_path, server_clients, client_config, stock_rows, order_rows):
+    """ProfileManager of a temporary file server at ``tmp_path / "file_server"``.
+
+    The input files are written to ``tmp_path / "stock.csv"`` and
+    ``tmp_path / "orders.csv"``.
+    """
+    from shopify_tool.profile_manager import ProfileManager
+
+    server_root = tmp_path / "file_server"
+    server_root.mkdir()
+    profile_manager = ProfileManager(str(server_root))
+    for client_id, client_name in server_clients.items():
+        profile_manager.create_client_profile(client_id, client_name)
+        if client_config:
+            config = profile_manager.load_shopify_config(client_id)
+            config.update(client_config)
+            profile_manager.save_shopify_config(client_id, config)
+    ProfileManager._config_cache.clear()
+
+    pd.DataFrame(stock_rows).to_csv(tmp_path / "stock.csv", index=False, sep=";")
+    pd.DataFrame(order_rows).to_csv(tmp_path / "orders.csv", index=False)
+    return profile_manager
@@ -0,0 +1,257 @@
+"""
+Tests for the pre-grouped stock allocation engine.
+
+The engine must produce exactly the same fulfillment results as the
+original per-order replay, which is kept here as a reference.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from shopify_tool.allocation import (
+    OrderLines,
+    SHORTAGE_COLUMNS,
+    allocate_stock,
+    format_shortage_reasons,
+    summarize_shortages_by_sku,
+)
+from shopify_tool.analysis import (
+    _calculate_final_stock,
+    _prioritize_orders,
+    _simulate_stock_allocation,
+)
+
+
+def _reference_allocation(orders_df, stock_df, prioritized_orders):
+    """Original quadratic allocation loop (filter + groupby per order)."""
+    live_stock = pd.Series(stock_df.Stock.values, index=stock_df.SKU).to_dict()
+    results = {}
+    for order_number in prioritized_orders["Order_Number"]:
+        order_items = orders_df[orders_df["Order_Number"] == order_number]
+        required = order_items.groupby("SKU")["Quantity"].sum()
+        reasons = []
+        for sku, qty in required.items():
+            available = live_stock.get(sku, 0)
+            if available == 0:
+                reasons.append(f"{sku}: Out of stock")
+            elif qty > available:
+                reasons.append(f"{sku}: Insufficient stock (need {int(qty)}, have {int(available)})")
+        if reasons:
+            results[order_number] = {"fulfillable": False, "reason": "; ".join(reasons)}
+        else:
+            results[order_number] = {"fulfillable": True, "reason": ""}
+            for sku, qty in required.items():
+                live_stock[sku] -= qty
+    return results
+
+
+def _reference_final_stock(stock_df, fulfillment_results, orders_df):
+    """Original Phase 4: replay every fulfillable order to get final stock."""
+    live_stock = pd.Series(stock_df.Stock.values, index=stock_df.SKU).to_dict()
+    for order_number, result in fulfillment_results.items():
+        if result.get("fulfillable", False):
+            order_items = orders_df[orders_df["Order_Number"] == order_number]
+            for sku, qty in order_items.groupby("SKU")["Quantity"].sum().items():
+                if sku in live_stock:
+                    live_stock[sku] -= qty
+    return pd.Series(live_stock, name="Final_Stock").reset_index().rename(columns={"index": "SKU"})
+
+
+def _random_dataset(seed, n_orders=300, n_skus=40):
+    rng = np.random.default_rng(seed)
+    lines_per_order = rng.integers(1, 5, size=n_orders)
+    order_numbers = np.repeat([f"#{1000 + i}" for i in range(n_orders)], lines_per_order)
+    skus = rng.choice([f"SKU-{i:03d}" for i in range(n_skus + 5)], size=len(order_numbers))
+    orders_df = pd.DataFrame({
+        "Order_Number": order_numbers,
+        "SKU": skus,
+        "Quantity": rng.integers(1, 4, size=len(order_numbers)),
+    })
+    stock_df = pd.DataFrame({
+        "SKU": [f"SKU-{i:03d}" for i in range(n_skus)],
+        "Stock": rng.integers(0, 30, size=n_skus),
+    })
+    return orders_df, stock_df
+
+
+class TestOrderLines:
+    def test_groups_lines_per_order_in_csr_layout(self):
+        orders_df = pd.DataFrame({
+            "Order_Number": ["B", "A", "B", "B"],
+            "SKU": ["S2", "S1", "S1", "S2"],
+            "Quantity": [1, 2, 3, 4],
+        })
+
+        lines = OrderLines.from_dataframe(orders_df, stock_skus=["S1"])
+
+        assert list(lines.order_keys) == ["A", "B"]
+        assert lines.offsets.tolist() == [0, 1, 3]
+        # Stock SKUs get the first codes, order-only SKUs follow
+        assert list(lines.sku_vocab) == ["S1", "S2"]
+        assert lines.sku_codes.tolist() == [0, 0, 1]
+        # Duplicate SKU lines within an order are summed
+        assert lines.quantities.tolist() == [2, 3, 5]
+        assert len(lines) == 2
+
+
+class TestAllocateStock:
+    def test_insufficient_and_out_of_stock_reasons(self):
+        orders_df = pd.DataFrame({
+            "Order_Number": ["O1", "O1", "O2"],
+            "SKU": ["A", "B", "C"],
+            "Quantity": [5, 1, 1],
+        })
+        stock_df = pd.DataFrame({"SKU": ["A", "B"], "Stock": [3, 0]})
+
+        results = allocate_stock(orders_df, stock_df, ["O1", "O2"]).fulfillment_results
+
+        assert results["O1"] == {
+            "fulfillable": False,
+            "reason": "A: Insufficient stock (need 5, have 3); B: Out of stock",
+        }
+        assert results["O2"] == {"fulfillable": False, "reason": "C: Out of stock"}
+
+    def test_order_without_stock_lines_is_fulfillable(self):
+        orders_df = pd.DataFrame({"Order_Number": ["O1"], "SKU": ["A"], "Quantity": [1]})
+        stock_df = pd.DataFrame({"SKU": ["A"], "Stock": [1]})
+
+        results = allocate_stock(orders_df, stock_df, ["O1", "O-EMPTY"]).fulfillment_results
+
+        assert results["O-EMPTY"] == {"fulfillable": True, "reason": ""}
+
+    @pytest.mark.parametrize("seed", [0, 1, 2, 3])
+    def test_matches_reference_allocation(self, seed):
+        orders_df, stock_df = _random_dataset(seed)
+        prioritized = _prioritize_orders(orders_df)
+
+        expected = _reference_allocation(orders_df, stock_df, prioritized)
+        actual = _simulate_stock_allocation(orders_df, stock_df, prioritized).fulfillment_results
+
+        assert actual == expected
+        assert list(actual) == list(expected)
+
+    def test_matches_reference_with_no_sku_rows(self):
+        orders_df, stock_df = _random_dataset(7, n_orders=50)
+        orders_df["Has_SKU"] = True
+        extra = pd.DataFrame({
+            "Order_Number": ["#1000", "#9999"],
+            "SKU": ["NO_SKU", "NO_SKU"],
+            "Quantity": [1, 1],
+            "Has_SKU": [False, False],
+        })
+        orders_df = pd.concat([orders_df, extra], ignore_index=True)
+        prioritized = _prioritize_orders(orders_df)
+
+        expected = _reference_allocation(
+            orders_df[orders_df["Has_SKU"]], stock_df, prioritized
+        )
+        actual = _simulate_stock_allocation(orders_df, stock_df, prioritized).fulfillment_results
+
+        assert actual == expected
+        assert actual["#9999"] == {"fulfillable": True, "reason": ""}
+
+
+class TestAllocationLedger:
+    def test_deductions_and_consumption(self):
+        orders_df = pd.DataFrame({
+            "Order_Number": ["O1", "O1", "O2", "O3", "O3"],
+            "SKU": ["A", "B", "A", "A", "A"],
+            "Quantity": [1, 2, 5, 1, 1],
+        })
+        stock_df = pd.DataFrame({"SKU": ["A", "B", "C"], "Stock": [4, 2, 7]})
+
+        ledger = allocate_stock(orders_df, stock_df, ["O1", "O2", "O3"])
+
+        deductions = ledger.deductions()
+        assert deductions["Order_Number"].tolist() == ["O1", "O1", "O3"]
+        assert deductions["SKU"].tolist() == ["A", "B", "A"]
+        assert deductions["Quantity"].tolist() == [1, 2, 2]
+        assert ledger.consumed_by_sku().to_dict() == {"A": 3, "B": 2}
+
+        final_stock = ledger.final_stock_levels()
+        assert final_stock["SKU"].tolist() == ["A", "B", "C"]
+        assert final_stock["Final_Stock"].tolist() == [1, 0, 7]
+
+    def test_empty_ledger(self):
+        orders_df = pd.DataFrame({"Order_Number": ["O1"], "SKU": ["X"], "Quantity": [1]})
+        stock_df = pd.DataFrame({"SKU": ["A"], "Stock": [1]})
+
+        ledger = allocate_stock(orders_df, stock_df, ["O1"])
+
+        assert ledger.deductions().empty
+        assert ledger.consumed_by_sku().empty
+        assert ledger.final_stock_levels()["Final_Stock"].tolist() == [1]
+
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    def test_final_stock_matches_replay(self, seed):
+        orders_df, stock_df = _random_dataset(seed)
+        prioritized = _prioritize_orders(orders_df)
+
+        ledger = _simulate_stock_allocation(orders_df, stock_df, prioritized)
+        expected = _reference_final_stock(stock_df, ledger.fulfillment_results, orders_df)
+
+        pd.testing.assert_frame_equal(_calculate_final_stock(ledger), expected)
+
+
+class TestShortageTable:
+    def _ledger(self):
+        orders_df = pd.DataFrame({
+            "Order_Number": ["O1", "O1", "O2", "O3"],
+            "SKU": ["A", "B", "A", "C"],
+            "Quantity": [5, 1, 2, 1],
+        })
+        stock_df = pd.DataFrame({"SKU": ["A", "B"], "Stock": [3, 0]})
+        return allocate_stock(orders_df, stock_df, ["O1", "O2", "O3"])
+
+    def test_shortage_rows(self):
+        shortages = self._ledger().shortages
+
+        assert list(shortages.columns) == SHORTAGE_COLUMNS
+        assert shortages["Order_Number"].tolist() == ["O1", "O1", "O3"]
+        assert shortages["SKU"].tolist() == ["A", "B", "C"]
+        assert shortages["Needed"].tolist() == [5, 1, 1]
+        assert shortages["Available"].tolist() == [3, 0, 0]
+        assert shortages["Kind"].tolist() == ["insufficient", "out_of_stock", "out_of_stock"]
+
+    def test_reasons_are_derived_from_table(self):
+        ledger = self._ledger()
+
+        reasons = format_shortage_reasons(ledger.shortages)
+
+        assert reasons.to_dict() == {
+            "O1": "A: Insufficient stock (need 5, have 3); B: Out of stock",
+            "O3": "C: Out of stock",
+        }
+        assert ledger.fulfillment_results["O1"]["reason"] == reasons["O1"]
+        assert ledger.fulfillment_results["O2"] == {"fulfillable": True, "reason": ""}
+
+    def test_summarize_by_sku(self):
+        orders_df = pd.DataFrame({
+            "Order_Number": ["O1", "O2", "O3"],
+            "SKU": ["A", "A", "B"],
+            "Quantity": [2, 3, 1],
+        })
+        stock_df = pd.DataFrame({"SKU": ["A"], "Stock": [1]})
+        shortages = allocate_stock(orders_df, stock_df, ["O1", "O2", "O3"]).shortages
+
+        summary = summarize_shortages_by_sku(shortages)
+
+        assert summary.to_dict("records") == [
+            {"SKU": "A", "Orders_Blocked": 2, "Total_Needed": 5, "Out_Of_Stock_Orders": 0},
+            {"SKU": "B", "Orders_Blocked": 1, "Total_Needed": 1, "Out_Of_Stock_Orders": 1},
+        ]
+
+    def test_empty_shortage_table(self):
+        orders_df = pd.DataFrame({"Order_Number": ["O1"], "SKU": ["A"], "Quantity": [1]})
+        stock_df = pd.DataFrame({"SKU": ["A"], "Stock": [1]})
+        shortages = allocate_stock(orders_df, stock_df, ["O1"]).shortages
+
+        assert shortages.empty
+        assert format_shortage_reasons(shortages).empty
+        assert summarize_shortages_by_sku(shortages).empty
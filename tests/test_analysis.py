@@ -6,7 +6,7 @@ import os
 # Add the project root to the Python path to allow for correct module imports
 # This ensures that we can import from the 'shopify_tool' package
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
-from shopify_tool.analysis import _generalize_shipping_method, run_analysis, toggle_order_fulfillment
+from shopify_tool.analysis import CourierMatcher, _generalize_shipping_method, run_analysis, toggle_order_fulfillment
 
 
 # Test cases for the _generalize_shipping_method function
@@ -84,6 +84,41 @@ def test_generalize_shipping_method_with_mappings(input_method, courier_mappings
     assert _generalize_shipping_method(input_method, courier_mappings) == expected_output
 
 
+def test_courier_matcher_respects_mapping_order():
+    """The first courier in mapping order wins, not the leftmost match in the text."""
+    matcher = CourierMatcher({
+        "DHL": {"patterns": ["dhl"]},
+        "DPD": {"patterns": ["dpd"]},
+    })
+    assert matcher.match("dpd pickup, dhl delivery") == "DHL"
+    assert matcher.match("Parcel (DPD)") == "DPD"
+
+
+def test_courier_matcher_escapes_patterns_and_skips_empty_couriers():
+    matcher = CourierMatcher({
+        "Empty": {"patterns": []},
+        "Express": {"patterns": ["express (24h)"]},
+        "dpd": "DPD",
+    })
+    assert matcher.match("EXPRESS (24H) delivery") == "Express"
+    assert matcher.match("express 24h") == "Express 24H"
+    assert matcher.match("dpd classic") == "DPD"
+
+
+def test_courier_matcher_map_series_matches_per_value_results():
+    courier_mappings = {"DHL": {"patterns": ["dhl", "dhl express"]}, "speedy": "Speedy"}
+    methods = pd.Series(
+        ["DHL Express", None, "speedy", "", "custom courier", "DHL Express", pd.NA, "  "],
+        index=[10, 11, 12, 13, 14, 15, 16, 17],
+    )
+
+    result = CourierMatcher(courier_mappings).map_series(methods)
+
+    expected = [_generalize_shipping_method(m, courier_mappings) for m in methods]
+    assert result.tolist() == expected
+    assert result.index.tolist() == methods.index.tolist()
+
+
 def test_run_analysis_with_courier_mappings():
     """Tests that run_analysis correctly uses courier_mappings parameter."""
     # Create test data
@@ -0,0 +1,79 @@
+"""Tests for the parallel multi-client batch runner (shopify_tool/batch_runner.py)."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shopify_tool import batch_runner
+
+
+@pytest.fixture
+def server_clients():
+    """Two clients sharing one set of input files."""
+    return {"AAA": "Client A", "BBB": "Client B"}
+
+
+def _job(tmp_path, client_id, **extra):
+    return {
+        "client_id": client_id,
+        "orders": str(tmp_path / "orders.csv"),
+        "stock": str(tmp_path / "stock.csv"),
+        "reports": False,
+        **extra,
+    }
+
+
+def test_batch_isolates_failures_and_writes_summary(file_server, tmp_path):
+    log_dir = tmp_path / "batch_logs"
+    jobs = [
+        _job(tmp_path, "AAA"),
+        _job(tmp_path, "NOPE"),
+        _job(tmp_path, "BBB", orders=str(tmp_path / "missing.csv")),
+        _job(tmp_path, "AAA"),
+    ]
+
+    summary = batch_runner.run_batch(
+        jobs, server_path=str(file_server.base_path), max_workers=4, log_dir=str(log_dir)
+    )
+
+    results = summary["results"]
+    assert [r["client_id"] for r in results] == ["AAA", "NOPE", "BBB", "AAA"]
+    assert [r["success"] for r in results] == [True, False, False, False]
+    assert summary["succeeded"] == 1 and summary["failed"] == 3
+    # Only two jobs were runnable, so only two workers were started
+    assert summary["max_workers"] == 2
+
+    assert results[0]["statistics"]["total_orders_completed"] == 1
+    assert Path(results[0]["session_path"], "analysis", "fulfillment_analysis.xlsx").exists()
+    assert "does not exist" in results[1]["message"]
+    assert "more than once" in results[3]["message"]
+
+    # Each started client has its own log file
+    assert Path(results[0]["log_file"]).name == "CLIENT_AAA.log"
+    assert Path(results[0]["log_file"]).stat().st_size > 0
+    assert Path(results[2]["log_file"]).exists()
+
+    written = json.loads((log_dir / "batch_summary.json").read_text(encoding="utf-8"))
+    assert written["succeeded"] == 1
+    assert len(written["results"]) == 4
+
+
+def test_main_reads_manifest(file_server, tmp_path, capsys):
+    manifest = tmp_path / "batch.json"
+    manifest.write_text(json.dumps({
+        "server_path": str(file_server.base_path),
+        "max_workers": 1,
+        "jobs": [_job(tmp_path, "AAA"), _job(tmp_path, "BBB")],
+    }), encoding="utf-8")
+
+    exit_code = batch_runner.main([str(manifest), "--json"])
+
+    assert exit_code == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["max_workers"] == 1
+    assert summary["succeeded"] == 2
+    assert Path(summary["log_dir"]).parent == file_server.get_logs_path()
@@ -0,0 +1,79 @@
+"""Tests for the synthetic data generator and benchmark suite (benchmarks/)."""
+
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks import run_benchmarks
+from benchmarks.synthetic_data import generate_dataset, generate_for_line_items
+from shopify_tool.analysis import run_analysis
+
+
+def test_generator_knobs():
+    dataset = generate_dataset(
+        n_orders=400, lines_per_order={1: 1, 3: 1}, n_skus=50, set_share=0.0,
+        tag_density=0.0, history_size=100, repeat_share=0.1, seed=7,
+    )
+    orders = dataset.orders_df
+
+    lines = orders.groupby("Name").size()
+    assert set(lines.unique()) <= {1, 3}
+    assert len(lines) == 400
+    assert not orders["Lineitem sku"].str.startswith("SET-").any()
+    assert dataset.config["set_decoders"] == {}
+    assert orders["Tags"].fillna("").eq("").all()
+    # Order-level fields are only on the first line of an order
+    assert orders["Shipping Method"].notna().sum() == 400
+    assert len(dataset.history_df) == 100
+    assert dataset.history_df["Order_Number"].isin(orders["Name"]).sum() == 10
+
+    again = generate_dataset(
+        n_orders=400, lines_per_order={1: 1, 3: 1}, n_skus=50, set_share=0.0,
+        tag_density=0.0, history_size=100, repeat_share=0.1, seed=7,
+    )
+    pd.testing.assert_frame_equal(again.orders_df, orders)
+
+
+def test_scarcity_controls_fulfillment():
+    plenty = generate_for_line_items(600, stock_scarcity=0.0, set_share=0.2, history_size=0)
+    final_df, _, _, stats = run_analysis(
+        plenty.stock_df, plenty.orders_df, plenty.history_df,
+        plenty.analysis_mappings(), plenty.config["courier_mappings"],
+    )
+    assert plenty.orders_df["Lineitem sku"].str.startswith("SET-").any()
+    assert not final_df["SKU"].astype(str).str.startswith("SET-").any()  # sets were decoded
+    assert stats["total_orders_not_completed"] == 0
+
+    scarce = generate_for_line_items(600, stock_scarcity=1.0, set_share=0.0, history_size=0)
+    _, _, _, stats = run_analysis(
+        scarce.stock_df, scarce.orders_df, scarce.history_df,
+        scarce.analysis_mappings(), scarce.config["courier_mappings"],
+    )
+    assert stats["total_orders_not_completed"] > 0
+
+
+def test_suite_writes_results_and_compares(tmp_path):
+    document = run_benchmarks.run_suite(
+        [run_benchmarks.parse_scale("300")], repeat=2,
+        targets=["recalculate_statistics", "build_packing_order_data"], set_share=0.0,
+    )
+    path = run_benchmarks.save_results(document, tmp_path / "current.json")
+
+    written = json.loads(path.read_text(encoding="utf-8"))
+    assert written["schema_version"] == run_benchmarks.RESULTS_SCHEMA_VERSION
+    assert written["environment"]["pandas"] == pd.__version__
+    scale = written["scales"][0]
+    assert set(scale["results"]) == {"recalculate_statistics", "build_packing_order_data"}
+    assert len(scale["results"]["recalculate_statistics"]["seconds"]) == 2
+
+    slower = json.loads(json.dumps(written))
+    for result in slower["scales"][0]["results"].values():
+        result["median"] = result["median"] * 2 + 1
+    rows = run_benchmarks.compare_results(written, slower)
+    assert len(rows) == 2
+    assert all(row["regression"] for row in rows)
+    assert not any(row["regression"] for row in run_benchmarks.compare_results(written, written))
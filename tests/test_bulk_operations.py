@@ -181,6 +181,13 @@ class TestSelectionHelper:
         selection_helper.toggle_row(0)
         assert not selection_helper.has_selection()
 
+    def test_checkbox_only_on_first_row_of_order(self, qapp, selection_helper):
+        """Test that the checkbox delegate finds the first row through the order index."""
+        from gui.checkbox_delegate import CheckboxDelegate
+        delegate = CheckboxDelegate(selection_helper)
+
+        assert [delegate._is_first_row_of_order(row) for row in range(4)] == [True, False, True, True]
+
 
 class TestBulkOperationsToolbar:
     """Test BulkOperationsToolbar class."""
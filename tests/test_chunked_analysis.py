@@ -0,0 +1,150 @@
+"""Tests for the chunked analysis mode (shopify_tool/chunked_analysis.py)."""
+
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from shopify_tool import core
+from shopify_tool.analysis import run_analysis
+from shopify_tool.chunked_analysis import ColumnSpillStore, run_analysis_chunked
+
+ORDERS_MAPPINGS = {
+    "Name": "Order_Number",
+    "Lineitem sku": "SKU",
+    "Lineitem quantity": "Quantity",
+    "Lineitem name": "Product_Name",
+    "Shipping Method": "Shipping_Method",
+    "Shipping Country": "Shipping_Country",
+    "Tags": "Tags",
+    "Notes": "Notes",
+    "Total": "Total_Price",
+}
+STOCK_MAPPINGS = {"Артикул": "SKU", "Име": "Product_Name", "Наличност": "Stock"}
+
+
+def _orders_csv(n_orders=300, seed=0):
+    """Shopify-style export: order-level fields only on an order's first line."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for order in range(n_orders):
+        for line in range(int(rng.integers(1, 4))):
+            first = line == 0
+            rows.append({
+                "Name": f"#{1000 + order}" if first or rng.random() < 0.5 else None,
+                "Lineitem sku": None if rng.random() < 0.05 else rng.choice(["A", "B", "C", "SET1", "07", "D"]),
+                "Lineitem quantity": int(rng.integers(1, 3)),
+                "Lineitem name": rng.choice(["Product 1", "Product 2", None]),
+                "Shipping Method": rng.choice(["dhl", "dpd express", "speedy"]) if first else None,
+                "Shipping Country": "BG" if first else None,
+                # Only filled near the end, so early chunks parse it as all-blank
+                "Notes": "fragile" if order > 250 and first else None,
+                "Tags": None,
+                "Total": 10.5 if first else None,
+                "Vendor": "Vendor" if first else None,
+                "Unused": "x",
+            })
+    return pd.DataFrame(rows).to_csv(index=False)
+
+
+def _inputs(set_decoders):
+    stock_df = pd.DataFrame({
+        "Артикул": ["A", "B", "C", "7"],
+        "Име": ["Stock A", "Stock B", "Stock C", "Stock 7"],
+        "Наличност": [30, 5, 0, 9],
+    })
+    history_df = pd.DataFrame({
+        "Order_Number": ["#1005", "#1100"],
+        "Execution_Date": ["2020-01-01", "2020-01-01"],
+    })
+    column_mappings = {
+        "orders": ORDERS_MAPPINGS,
+        "stock": STOCK_MAPPINGS,
+        "set_decoders": set_decoders,
+        "additional_columns": [
+            {"csv_name": "Vendor", "internal_name": "Vendor", "enabled": True, "is_order_level": True}
+        ],
+    }
+    return stock_df, history_df, column_mappings
+
+
+@pytest.mark.parametrize("chunk_rows", [40, 100000])
+@pytest.mark.parametrize("set_decoders", [{}, {"SET1": [{"sku": "A", "quantity": 1}, {"sku": "B", "quantity": 2}]}])
+def test_results_identical_to_in_memory(tmp_path, chunk_rows, set_decoders):
+    csv_text = _orders_csv()
+    stock_df, history_df, column_mappings = _inputs(set_decoders)
+    dtype = {"Lineitem sku": str}
+
+    expected = run_analysis(
+        stock_df, pd.read_csv(io.StringIO(csv_text), dtype=dtype), history_df, column_mappings
+    )
+    actual = run_analysis_chunked(
+        stock_df, pd.read_csv(io.StringIO(csv_text), dtype=dtype, chunksize=chunk_rows),
+        history_df, column_mappings, spill_dir=tmp_path / "spill"
+    )
+
+    pd.testing.assert_frame_equal(actual[0], expected[0])
+    pd.testing.assert_frame_equal(actual[1], expected[1])
+    pd.testing.assert_frame_equal(actual[2], expected[2])
+    assert actual[3] == expected[3]
+    assert list((tmp_path / "spill").iterdir()) == []  # spill files are removed
+
+
+def test_empty_orders_fall_back_to_in_memory():
+    stock_df, history_df, column_mappings = _inputs({})
+    header = pd.DataFrame(columns=list(ORDERS_MAPPINGS))
+
+    final_df, _, _, stats = run_analysis_chunked(stock_df, [header], history_df, column_mappings)
+
+    assert final_df.empty
+    assert stats["total_orders_completed"] == 0
+
+
+def test_spill_store_reads_column_subsets(tmp_path):
+    with ColumnSpillStore(tmp_path) as store:
+        store.append(pd.DataFrame({"a": [1, 2], "b": ["x", "y"]}, index=[5, 6]))
+        store.append(pd.DataFrame({"a": [3], "b": ["z"]}))
+
+        assert store.total_rows == 3
+        assert store.read(1, ["b"]).to_dict("list") == {"b": ["z"]}
+        assert store.read_column("a").tolist() == [1, 2, 3]
+        assert store.read_column("a", [1, 0]).tolist() == [3, 1, 2]
+        with pytest.raises(ValueError):
+            store.append(pd.DataFrame({"a": [4]}))
+        path = store.path
+
+    assert not path.exists()
+
+
+def test_run_full_analysis_chunked_setting(tmp_path, mocker):
+    mocker.patch("shopify_tool.core.get_persistent_data_path", return_value=str(tmp_path / "history.csv"))
+    stock_df, _, _ = _inputs({})
+    stock_file = tmp_path / "stock.csv"
+    stock_df.to_csv(stock_file, index=False, sep=";")
+    orders_file = tmp_path / "orders.csv"
+    orders_file.write_text(_orders_csv(n_orders=60), encoding="utf-8")
+    config = {
+        "settings": {"low_stock_threshold": 4},
+        "column_mappings": {"orders": ORDERS_MAPPINGS, "stock": STOCK_MAPPINGS},
+        "rules": [],
+    }
+
+    results = []
+    for chunked in (False, True):
+        output_dir = tmp_path / f"output_{chunked}"
+        output_dir.mkdir()
+        config["settings"].update({"chunked_analysis": chunked, "analysis_chunk_rows": 25})
+        (tmp_path / "history.csv").unlink(missing_ok=True)
+        success, _, final_df, stats = core.run_full_analysis(
+            str(stock_file), str(orders_file), str(output_dir), ";", ",", config
+        )
+        assert success
+        results.append((final_df, stats))
+
+    pd.testing.assert_frame_equal(results[1][0], results[0][0])
+    assert results[1][1] == results[0][1]
@@ -0,0 +1,96 @@
+"""Tests for the headless command-line interface (shopify_tool/cli.py)."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from shopify_tool import cli
+from shopify_tool.session_manager import SessionManager
+
+
+@pytest.fixture
+def client_config():
+    """A packing list and a stock export configured for the client."""
+    return {
+        "packing_list_configs": [
+            {"name": "DHL Orders", "output_filename": "dhl_orders.xlsx",
+             "filters": [{"field": "Shipping_Provider", "operator": "==", "value": "DHL"}]}
+        ],
+        "stock_export_configs": [{"name": "Writeoff", "filters": []}],
+    }
+
+
+def _args(profile_manager, *extra):
+    server_root = profile_manager.base_path
+    tmp_path = server_root.parent
+    return [
+        "--client", "TEST",
+        "--orders", str(tmp_path / "orders.csv"),
+        "--stock", str(tmp_path / "stock.csv"),
+        "--server-path", str(server_root),
+        *extra,
+    ]
+
+
+def test_runs_analysis_and_all_reports(file_server, capsys):
+    exit_code = cli.main(_args(file_server, "--json"))
+
+    assert exit_code == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["statistics"]["total_orders_completed"] == 1
+    assert [r["type"] for r in summary["reports"]] == ["packing_list", "stock_export"]
+    assert all(r["success"] for r in summary["reports"])
+    assert summary["timings"]["startup_seconds"] >= 0
+
+    session_path = Path(summary["session_path"])
+    assert (session_path / "analysis" / "fulfillment_analysis.xlsx").exists()
+    assert (session_path / "packing_lists" / "dhl_orders.xlsx").exists()
+    assert len(list((session_path / "stock_exports").glob("Writeoff_*.xls"))) == 1
+
+
+def test_existing_session_by_name(file_server, capsys):
+    session_path = SessionManager(file_server).create_session("TEST")
+
+    exit_code = cli.main(_args(file_server, "--session", Path(session_path).name, "--no-reports"))
+
+    assert exit_code == 0
+    output = capsys.readouterr().out
+    assert f"Session:  {session_path}" in output
+    assert "Startup:" in output
+
+
+def test_unknown_client_and_session_fail(file_server, capsys):
+    assert cli.main(_args(file_server, "--session", "1999-01-01_1")) == 1
+    assert "Session not found" in capsys.readouterr().err
+
+    args = _args(file_server)
+    args[1] = "NOPE"
+    assert cli.main(args) == 1
+    assert "Client does not exist" in capsys.readouterr().err
+
+
+def test_headless_run_never_imports_gui_or_pdf_libraries(file_server, tmp_path):
+    script = (
+        "import json, sys\n"
+        "from shopify_tool.cli import HEAVY_MODULES, main\n"
+        f"code = main({_args(file_server, '--no-reports')!r})\n"
+        "loaded = sorted({m.split('.')[0] for m in sys.modules} & set(HEAVY_MODULES))\n"
+        "print(json.dumps({'code': code, 'loaded': loaded}))\n"
+    )
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=tmp_path, env=env,
+        capture_output=True, text=True, timeout=120,
+    )
+
+    assert result.returncode == 0, result.stderr
+    outcome = json.loads(result.stdout.strip().splitlines()[-1])
+    assert outcome == {"code": 0, "loaded": []}
@@ -0,0 +1,131 @@
+"""Tests for appending late orders to an analyzed session (shopify_tool/delta_analysis.py)."""
+
+import json
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shopify_tool import core
+from shopify_tool.sequential_order import load_sequential_order_map
+from shopify_tool.session_manager import SessionManager
+
+
+def _orders(rows):
+    return pd.DataFrame(rows, columns=["Name", "Lineitem sku", "Lineitem quantity", "Shipping Method", "Tags"])
+
+
+@pytest.fixture
+def stock_rows():
+    """SKU-3 is only ordered by the late orders."""
+    return {"Артикул": ["SKU-1", "SKU-2", "SKU-3"], "Име": ["P1", "P2", "P3"], "Наличност": [3, 1, 5]}
+
+
+@pytest.fixture
+def order_rows():
+    """The orders of the first analysis."""
+    return _orders([
+        ["#1", "SKU-1", 1, "dhl", ""],
+        ["#2", "SKU-2", 1, "dpd", ""],
+    ])
+
+
+@pytest.fixture
+def analyzed_session(file_server, tmp_path):
+    """Client TEST with a session analyzed on orders #1 and #2."""
+    profile_manager = file_server
+    session_manager = SessionManager(profile_manager)
+
+    config = profile_manager.load_shopify_config("TEST")
+    config["settings"]["low_stock_threshold"] = 1
+    success, session_path, _, _ = core.run_full_analysis(
+        str(tmp_path / "stock.csv"), str(tmp_path / "orders.csv"), None, ";", ",", config,
+        client_id="TEST", session_manager=session_manager, profile_manager=profile_manager,
+    )
+    assert success
+    session_manager.update_session_info(session_path, {
+        "statistics": {"packing_lists_count": 1, "packing_lists": ["DHL.xlsx"]},
+    })
+    return profile_manager, session_manager, session_path, config
+
+
+def test_append_allocates_new_orders_against_remaining_stock(analyzed_session, tmp_path, mocker):
+    profile_manager, session_manager, session_path, config = analyzed_session
+    # Manually un-fulfill #1: its SKU-1 goes back to the free stock
+    state_path = Path(session_path) / "analysis" / "current_state.pkl"
+    state = pd.read_pickle(state_path)
+    state.loc[state["Order_Number"] == "#1", "Order_Fulfillment_Status"] = "Not Fulfillable"
+    state.loc[state["SKU"] == "SKU-1", "Final_Stock"] = 3
+    state.to_pickle(state_path)
+
+    config["rules"] = [{
+        "name": "All", "conditions": [{"field": "Order_Number", "operator": "is not empty", "value": ""}],
+        "actions": [{"type": "ADD_TAG", "value": "checked"}],
+    }]
+    _orders([
+        ["#2", "SKU-2", 1, "dpd", ""],  # already in the session: skipped
+        ["#3", "SKU-1", 2, "dhl", ""],
+        ["#3", "SKU-3", 1, None, None],
+        ["#4", "SKU-1", 2, "dhl", ""],
+        ["#5", "SKU-2", 1, "dhl", ""],
+    ]).to_csv(tmp_path / "late.csv", index=False)
+    full_run = mocker.spy(core, "_run_analysis_and_rules")
+
+    success, result_path, final_df, stats = core.run_full_analysis(
+        None, str(tmp_path / "late.csv"), None, ";", ",", config,
+        client_id="TEST", session_manager=session_manager, profile_manager=profile_manager,
+        session_path=session_path, append_to_session=True,
+    )
+
+    assert success and result_path == session_path
+    assert full_run.call_count == 0
+    status = final_df.groupby("Order_Number", observed=True)["Order_Fulfillment_Status"].first()
+    assert status.astype(str).to_dict() == {
+        "#1": "Not Fulfillable", "#2": "Fulfillable",
+        "#3": "Fulfillable", "#4": "Not Fulfillable", "#5": "Not Fulfillable",
+    }
+    assert list(final_df["Order_Number"]) == ["#1", "#2", "#3", "#3", "#4", "#5"]
+    # Existing SKU-1 row sees the stock the new order consumed; Stock stays the file stock
+    sku1 = final_df[final_df["SKU"] == "SKU-1"]
+    assert (sku1["Final_Stock"] == 1).all() and (sku1["Stock"] == 3).all()
+    assert (sku1["Stock_Alert"].astype(str) == "").all()
+    # Rules ran on the new rows only
+    is_new = final_df["Order_Number"].isin(["#3", "#4", "#5"])
+    assert (final_df.loc[is_new, "Status_Note"] == "checked").all()
+    assert (final_df.loc[~is_new, "Status_Note"] == "").all()
+    assert stats["total_orders_completed"] == 2
+
+    saved = pd.read_pickle(Path(session_path) / "analysis" / "current_state.pkl")
+    assert len(saved) == 6
+    info = session_manager.get_session_info(session_path)
+    assert info["appended_orders_files"] == ["orders_append_1.csv"]
+    assert info["statistics"]["packing_lists"] == ["DHL.xlsx"]
+    assert (Path(session_path) / "input" / "orders_export.csv").read_text().count("#3") == 0
+    analysis_data = json.loads((Path(session_path) / "analysis" / "analysis_data.json").read_text(encoding="utf-8"))
+    assert analysis_data["total_orders"] == 5
+
+    # #2 keeps its number, #3 is numbered after it
+    assert load_sequential_order_map(Path(session_path)) == {"#1": 1, "#2": 2, "#3": 3}
+
+
+def test_append_requires_analyzed_session(analyzed_session, tmp_path):
+    profile_manager, session_manager, session_path, config = analyzed_session
+    _orders([["#9", "SKU-1", 1, "dhl", ""]]).to_csv(tmp_path / "late.csv", index=False)
+
+    success, message, _, _ = core.run_full_analysis(
+        None, str(tmp_path / "late.csv"), None, ";", ",", config,
+        client_id="TEST", session_manager=session_manager, profile_manager=profile_manager,
+        append_to_session=True,
+    )
+    assert not success and "existing session" in message
+
+    (Path(session_path) / "analysis" / "current_state.pkl").unlink()
+    success, message, _, _ = core.run_full_analysis(
+        None, str(tmp_path / "late.csv"), None, ";", ",", config,
+        client_id="TEST", session_manager=session_manager, profile_manager=profile_manager,
+        session_path=session_path, append_to_session=True,
+    )
+    assert not success and "no analysis result" in message
@@ -0,0 +1,101 @@
+"""Tests for the append-only fulfillment history store (shopify_tool/history_store.py)."""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shopify_tool import core
+from shopify_tool.history_store import FulfillmentHistoryStore
+from shopify_tool.session_manager import SessionManager
+
+
+def _days_ago(days):
+    return (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def test_imports_legacy_csv_and_appends(tmp_path):
+    legacy = tmp_path / "fulfillment_history.csv"
+    legacy.write_text(
+        f"Order_Number,Execution_Date\n1001,{_days_ago(10)}\n#B,not a date\n#A,{_days_ago(3)}\n",
+        encoding="utf-8",
+    )
+    store = FulfillmentHistoryStore(tmp_path / "history", legacy_csv=legacy)
+
+    history = store.load()
+    assert list(history["Order_Number"]) == ["#A", "#B", "1001"]
+    assert history["Execution_Date"].dtype == "datetime64[ns]"
+    assert pd.isna(history.loc[1, "Execution_Date"])
+
+    store.append(["#A", "#C"])
+    store.append(["#C"], execution_date=_days_ago(1))
+    assert len(list((tmp_path / "history" / "segments").glob("*.csv"))) == 2
+    assert legacy.read_text(encoding="utf-8").count("\n") == 4  # legacy file is untouched
+
+    history = store.load().set_index("Order_Number")["Execution_Date"]
+    assert history["#A"] == pd.Timestamp(datetime.now().date())
+    assert history["#C"] == pd.Timestamp(_days_ago(1))  # written last wins
+
+    found = store.lookup(["#C", "1001", "#missing", 1001])
+    assert list(found["Order_Number"]) == ["#C", "1001"]
+
+
+def test_compaction_applies_retention(tmp_path):
+    store = FulfillmentHistoryStore(tmp_path, retention_days=30, compact_segments=3)
+    store.append(["#old"], execution_date=_days_ago(40))
+    store.append(["#recent"], execution_date=_days_ago(5))
+    assert len(list(store.segments_dir.glob("*.csv"))) == 2
+
+    # The third segment triggers the compaction
+    store.append(["#today"])
+    assert list(store.segments_dir.glob("*.csv")) == []
+    assert list(pd.read_pickle(store.index_path)["Order_Number"]) == ["#recent", "#today"]
+
+    # Another machine holds the lock: nothing happens
+    (tmp_path / "compact.lock").touch()
+    store.append(["#next"])
+    assert not store.compact()
+    assert len(list(store.segments_dir.glob("*.csv"))) == 1
+    assert "#next" in set(store.load()["Order_Number"])
+
+
+@pytest.fixture
+def stock_rows():
+    """Enough stock of one SKU for both orders."""
+    return {"Артикул": ["SKU-1"], "Име": ["P1"], "Наличност": [5]}
+
+
+@pytest.fixture
+def order_rows():
+    """Order #1 was fulfilled two days ago, #2 is new."""
+    return {
+        "Name": ["#1", "#2"], "Lineitem sku": ["SKU-1", "SKU-1"], "Lineitem quantity": [1, 1],
+        "Shipping Method": ["dhl", "dhl"],
+    }
+
+
+def test_analysis_appends_a_segment(file_server, tmp_path):
+    profile_manager = file_server
+    client_dir = profile_manager.get_client_directory("TEST")
+    (client_dir / "fulfillment_history.csv").write_text(
+        f"Order_Number,Execution_Date\n#1,{_days_ago(2)}\n", encoding="utf-8"
+    )
+
+    config = profile_manager.load_shopify_config("TEST")
+    config["settings"]["analysis_cache_enabled"] = False
+
+    success, _, final_df, _ = core.run_full_analysis(
+        str(tmp_path / "stock.csv"), str(tmp_path / "orders.csv"), None, ";", ",", config,
+        client_id="TEST", session_manager=SessionManager(profile_manager), profile_manager=profile_manager,
+    )
+
+    assert success
+    notes = final_df.set_index("Order_Number")["System_note"]
+    assert notes["#1"] == "Repeat" and notes["#2"] == ""
+    store = FulfillmentHistoryStore.for_client(profile_manager, "TEST")
+    assert len(list(store.segments_dir.glob("*.csv"))) == 1
+    assert set(store.load()["Order_Number"]) == {"#1", "#2"}
@@ -0,0 +1,224 @@
+"""
+Regression tests for the vectorized _merge_results_to_dataframe.
+
+The reference below is the original row-wise implementation (Python
+map/apply for statuses, fulfillment reasons, NO_SKU notes and the
+Packaging_Tags migration). The vectorized merge must produce exactly the
+same DataFrame on the existing test fixtures.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from shopify_tool.analysis import (
+    _calculate_final_stock,
+    _clean_and_prepare_data,
+    _detect_repeated_orders,
+    _generalize_shipping_method,
+    _merge_results_to_dataframe,
+    _prioritize_orders,
+    _simulate_stock_allocation,
+)
+from shopify_tool.set_decoder import import_sets_from_csv
+from shopify_tool.tag_manager import add_tag
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+def _reference_merge(orders_df, stock_df, order_item_counts, final_stock_levels,
+                     fulfillment_results, history_df, courier_mappings=None,
+                     repeat_window_days=1, additional_columns_config=None):
+    """Original row-wise merge (before vectorization)."""
+    if "Product_Name" in orders_df.columns and "Product_Name" in stock_df.columns:
+        final_df = pd.merge(orders_df, stock_df, on="SKU", how="left", suffixes=('', '_stock'))
+        if 'Product_Name_stock' in final_df.columns:
+            final_df = final_df.drop(columns=['Product_Name_stock'])
+    else:
+        final_df = pd.merge(orders_df, stock_df, on="SKU", how="left")
+
+    if "Product_Name" in stock_df.columns:
+        stock_lookup = dict(zip(stock_df["SKU"], stock_df["Product_Name"]))
+        final_df["Warehouse_Name"] = final_df["SKU"].map(stock_lookup).fillna("N/A")
+    else:
+        final_df["Warehouse_Name"] = "N/A"
+
+    final_df = pd.merge(final_df, order_item_counts, on="Order_Number")
+    final_df = pd.merge(final_df, final_stock_levels, on="SKU", how="left")
+    final_df["Final_Stock"] = final_df["Final_Stock"].fillna(final_df["Stock"])
+    final_df["Order_Type"] = np.where(final_df["item_count"] > 1, "Multi", "Single")
+    final_df["Stock"] = final_df["Stock"].fillna(0)
+
+    if "Shipping_Method" in final_df.columns:
+        final_df["Shipping_Provider"] = final_df["Shipping_Method"].apply(
+            lambda method: _generalize_shipping_method(method, courier_mappings)
+        )
+    else:
+        final_df["Shipping_Provider"] = "Unknown"
+
+    def get_fulfillment_status(order_number):
+        result = fulfillment_results.get(order_number, {})
+        if isinstance(result, dict):
+            return "Fulfillable" if result.get("fulfillable", False) else "Not Fulfillable"
+        return result
+
+    final_df["Order_Fulfillment_Status"] = final_df["Order_Number"].map(get_fulfillment_status)
+
+    if "Shipping_Country" in final_df.columns:
+        final_df["Destination_Country"] = final_df["Shipping_Country"].fillna("")
+    else:
+        final_df["Destination_Country"] = ""
+
+    final_df["System_note"] = _detect_repeated_orders(final_df, history_df, repeat_window_days)
+
+    def add_fulfillment_reason(row):
+        result = fulfillment_results.get(row["Order_Number"], {})
+        if isinstance(result, dict) and not result.get("fulfillable", True):
+            reason = result.get("reason", "Unknown reason")
+            existing_note = row["System_note"]
+            if pd.notna(existing_note) and existing_note != "":
+                return f"{existing_note}; Cannot fulfill: {reason}"
+            return f"Cannot fulfill: {reason}"
+        return row["System_note"]
+
+    final_df["System_note"] = final_df.apply(add_fulfillment_reason, axis=1)
+
+    if "Has_SKU" in final_df.columns:
+        no_sku_mask = final_df["Has_SKU"] == False  # noqa: E712
+        if no_sku_mask.any():
+            final_df.loc[no_sku_mask, "Order_Fulfillment_Status"] = "Not Fulfillable"
+            final_df.loc[no_sku_mask, "System_note"] = final_df.loc[no_sku_mask, "System_note"].apply(
+                lambda note: f"{note} [NO_SKU]" if pd.notna(note) and note != "" else "[NO_SKU]"
+            )
+
+    final_df["Stock_Alert"] = ""
+    final_df["Status_Note"] = ""
+    final_df["Source"] = "Order"
+    final_df["Internal_Tags"] = "[]"
+
+    if "Packaging_Tags" in final_df.columns:
+        def migrate_tag(row):
+            packaging_tag = row["Packaging_Tags"]
+            if pd.notna(packaging_tag) and packaging_tag != "":
+                return add_tag(row["Internal_Tags"], str(packaging_tag))
+            return row["Internal_Tags"]
+
+        final_df["Internal_Tags"] = final_df.apply(migrate_tag, axis=1)
+
+    output_columns = [
+        "Order_Number", "Order_Type", "SKU", "Product_Name", "Warehouse_Name",
+        "Quantity", "Stock", "Final_Stock", "Source", "Stock_Alert",
+        "Order_Fulfillment_Status", "Shipping_Provider", "Destination_Country",
+        "Shipping_Method", "Tags", "Notes", "System_note", "Status_Note", "Internal_Tags",
+    ]
+    if "Total_Price" in final_df.columns:
+        output_columns.insert(6, "Total_Price")
+    if "Subtotal" in final_df.columns:
+        output_columns.insert(7, "Subtotal")
+    if "Has_SKU" in final_df.columns:
+        output_columns.insert(3, "Has_SKU")
+    if additional_columns_config:
+        output_columns.extend(
+            col["internal_name"] for col in additional_columns_config
+            if col.get("enabled", False) and col["internal_name"] in final_df.columns
+        )
+    return final_df[[col for col in output_columns if col in final_df.columns]].copy()
+
+
+def _sets_fixture():
+    orders_df = pd.read_csv(os.path.join(DATA_DIR, "orders_with_sets.csv"))
+    stock_df = pd.read_csv(os.path.join(DATA_DIR, "stock_for_sets.csv"))
+    column_mappings = {
+        "orders": {
+            "Name": "Order_Number",
+            "Lineitem sku": "SKU",
+            "Lineitem quantity": "Quantity",
+            "Shipping Method": "Shipping_Method",
+        },
+        "stock": {"SKU": "SKU", "Product_Name": "Product_Name", "Stock": "Stock"},
+        "set_decoders": import_sets_from_csv(os.path.join(DATA_DIR, "test_sets.csv")),
+    }
+    history_df = pd.DataFrame({"Order_Number": ["ORDER-002"], "Execution_Date": ["2020-01-01"]})
+    return orders_df, stock_df, history_df, column_mappings, None
+
+
+def _mixed_fixture():
+    """NO_SKU lines, repeats, shortages and Packaging_Tags in one dataset."""
+    orders_df = pd.DataFrame({
+        "Order_Number": ["#1", "#1", "#2", "#3", "#3", "#4", "#5"],
+        "SKU": ["A", None, "B", "A", "C", "D", None],
+        "Quantity": [2, 1, 5, 1, 1, 1, 1],
+        "Shipping_Method": ["DHL Express", None, "dpd", "Custom courier", None, "dhl", "dpd"],
+        "Shipping_Country": ["BG", None, "RO", "GR", None, "BG", "DE"],
+        "Product_Name": ["Prod A", "Shipping", "Prod B", "Prod A", "Prod C", "Prod D", None],
+        "Packaging_Tags": ["BOX", "", None, "BAG", "BOX", None, "BOX"],
+    })
+    stock_df = pd.DataFrame({
+        "SKU": ["A", "B", "C"],
+        "Product_Name": ["Warehouse A", "Warehouse B", "Warehouse C"],
+        "Stock": [3, 2, 0],
+    })
+    history_df = pd.DataFrame({
+        "Order_Number": ["#2", "#4"],
+        "Execution_Date": ["2020-01-01", "2020-01-02"],
+    })
+    additional_columns = [{
+        "csv_name": "Packaging_Tags",
+        "internal_name": "Packaging_Tags",
+        "enabled": True,
+        "is_order_level": False,
+    }]
+    return orders_df, stock_df, history_df, None, additional_columns
+
+
+@pytest.mark.parametrize("fixture", [_sets_fixture, _mixed_fixture])
+def test_vectorized_merge_matches_row_wise_reference(fixture):
+    orders_df, stock_df, history_df, column_mappings, additional_columns = fixture()
+    courier_mappings = {"DHL": {"patterns": ["dhl"]}, "DPD": {"patterns": ["dpd"]}}
+
+    orders_clean, stock_clean = _clean_and_prepare_data(
+        orders_df, stock_df, column_mappings, additional_columns
+    )
+    prioritized = _prioritize_orders(orders_clean)
+    ledger = _simulate_stock_allocation(orders_clean, stock_clean, prioritized)
+    final_stock = _calculate_final_stock(ledger)
+    item_counts = orders_clean.groupby("Order_Number").size().rename("item_count")
+
+    expected = _reference_merge(
+        orders_clean, stock_clean, item_counts, final_stock, ledger.fulfillment_results,
+        history_df, courier_mappings, 1, additional_columns
+    )
+    actual = _merge_results_to_dataframe(
+        orders_clean, stock_clean, item_counts, final_stock, ledger.fulfillment_results,
+        history_df, courier_mappings, 1, additional_columns, shortages=ledger.shortages
+    )
+
+    pd.testing.assert_frame_equal(actual, expected)
+
+
+def test_mixed_fixture_covers_all_row_wise_paths():
+    """Guard that the regression fixture really exercises every replaced branch."""
+    orders_df, stock_df, history_df, _, additional_columns = _mixed_fixture()
+    orders_clean, stock_clean = _clean_and_prepare_data(orders_df, stock_df, None, additional_columns)
+    prioritized = _prioritize_orders(orders_clean)
+    ledger = _simulate_stock_allocation(orders_clean, stock_clean, prioritized)
+    item_counts = orders_clean.groupby("Order_Number").size().rename("item_count")
+
+    result = _merge_results_to_dataframe(
+        orders_clean, stock_clean, item_counts, _calculate_final_stock(ledger),
+        ledger.fulfillment_results, history_df, None, 1, additional_columns,
+        shortages=ledger.shortages
+    )
+
+    notes = result.set_index(["Order_Number", "SKU"])["System_note"]
+    assert notes[("#2", "B")] == "Repeat; Cannot fulfill: B: Insufficient stock (need 5, have 2)"
+    assert notes[("#1", "NO_SKU")] == "[NO_SKU]"
+    assert notes[("#5", "NO_SKU")] == "[NO_SKU]"
+    tags = result.set_index(["Order_Number", "SKU"])["Internal_Tags"]
+    assert tags[("#1", "A")] == '["BOX"]'
+    assert tags[("#1", "NO_SKU")] == "[]"
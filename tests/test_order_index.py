@@ -0,0 +1,76 @@
+"""Tests for the order/SKU row index (shopify_tool/order_index.py)."""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shopify_tool.order_index import OrderIndex, order_index_for, synced_order_index
+
+
+def _df():
+    return pd.DataFrame({
+        "Order_Number": ["#1", "#2 ", "#1", 1003, "#2"],
+        "SKU": ["A", "B", "B", "A", " A"],
+    })
+
+
+def _as_dict(index, keys):
+    return {key: list(index.rows(key)) for key in keys}
+
+
+def test_lookups_use_normalized_keys():
+    index = OrderIndex(_df())
+
+    assert list(index.rows("#1")) == [0, 2]
+    assert list(index.rows(" #2")) == [1, 4]
+    assert list(index.rows(1003)) == [3] and "1003" in index
+    assert len(index.rows("#missing")) == 0 and "#missing" not in index
+    assert list(index.sku_rows("A")) == [0, 3, 4]
+    assert list(index.order_sku_rows("#2", "A")) == [4]
+    assert list(index.rows_for_orders(["#2", "1003"])) == [1, 3, 4]
+    assert index.first_rows(["1003", "#missing", "#1"]) == [3, 0]
+
+
+def test_removal_and_append_match_a_rebuilt_index():
+    df = _df()
+    owner = SimpleNamespace(analysis_results_df=df)
+    index = order_index_for(owner)
+    assert order_index_for(owner) is index
+
+    df = df.drop([0, 1]).reset_index(drop=True)
+    owner.analysis_results_df = df
+    assert synced_order_index(owner) is None
+    index.remove_rows(df, [0, 1])
+    assert synced_order_index(owner) is index
+
+    restored = pd.DataFrame({"Order_Number": ["#1", "#4"], "SKU": ["A", "C"]})
+    df = pd.concat([df, restored], ignore_index=True)
+    index.append_rows(df, [3, 4])
+
+    keys = ["#1", "#2", "1003", "#4"]
+    assert _as_dict(index, keys) == _as_dict(OrderIndex(df), keys)
+    assert list(index.sku_rows("A")) == list(OrderIndex(df).sku_rows("A")) == [1, 2, 3]
+    assert sorted(index.order_numbers()) == ["#1", "#2", "#4", "1003"]
+
+    # A frame replaced without reporting it gets a fresh index
+    owner.analysis_results_df = df.iloc[::-1].reset_index(drop=True)
+    assert list(order_index_for(owner).rows("#4")) == [0]
+    assert np.array_equal(order_index_for(owner).rows("#1"), [1, 4])
+
+
+def test_index_is_tied_to_the_frame_object(monkeypatch):
+    import shopify_tool.order_index as order_index_module
+
+    # Simulate a recycled id(): every frame of the same length collides
+    monkeypatch.setattr(order_index_module, "id", lambda obj: 0, raising=False)
+    owner = SimpleNamespace(analysis_results_df=_df())
+    index = order_index_for(owner)
+
+    owner.analysis_results_df = _df().iloc[::-1].reset_index(drop=True)
+    assert not index.reflects(owner.analysis_results_df)
+    assert list(order_index_for(owner).rows("1003")) == [1]
@@ -0,0 +1,93 @@
+"""Tests for per-phase profiling (shopify_tool/profiling.py)."""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shopify_tool import core
+from shopify_tool.profiling import PERF_FILENAME, PhaseProfiler, get_active_profiler, phase
+from shopify_tool.session_manager import SessionManager
+
+
+def test_phase_records_nesting_rows_and_callback():
+    events = []
+    profiler = PhaseProfiler(callback=lambda event, record: events.append((event, record.name)))
+
+    with profiler.activate():
+        assert get_active_profiler() is profiler
+        with phase("clean", rows_in=10) as outer:
+            with phase("set_decoding", rows_in=10) as inner:
+                inner.rows_out = 14
+            outer.rows_out = 14
+    assert get_active_profiler() is None
+
+    assert events == [("start", "clean"), ("start", "set_decoding"), ("end", "set_decoding"), ("end", "clean")]
+    records = profiler.to_dict()["phases"]
+    assert [(r["name"], r["parent"]) for r in records] == [("clean", None), ("set_decoding", "clean")]
+    assert records[0]["rows_in"] == 10 and records[0]["rows_out"] == 14
+    assert records[0]["wall_seconds"] >= records[1]["wall_seconds"] >= 0
+    assert records[0]["cpu_seconds"] >= 0
+
+
+def test_failed_phase_is_recorded_and_reraised():
+    profiler = PhaseProfiler(callback=lambda event, record: 1 / 0)  # callback errors are ignored
+
+    with profiler.activate():
+        with pytest.raises(KeyError):
+            with phase("merge"):
+                raise KeyError("SKU")
+
+    assert profiler.records[0].error == "KeyError: 'SKU'"
+    assert profiler.records[0].wall_seconds is not None
+
+
+def test_phase_without_active_profiler_is_a_no_op():
+    with phase("allocate", rows_in=3) as record:
+        record.rows_out = 3
+    assert get_active_profiler() is None
+
+
+@pytest.fixture
+def order_rows():
+    """Three rows, so the phases report distinct row counts."""
+    return {
+        "Name": ["#1", "#2", "#2"], "Lineitem sku": ["SKU-1", "SKU-2", "SKU-1"],
+        "Lineitem quantity": [1, 1, 1], "Shipping Method": ["dhl", "dpd", "dpd"],
+        "Shipping Country": ["BG", "BG", "BG"],
+    }
+
+
+def test_run_full_analysis_writes_perf_json(file_server, tmp_path):
+    profile_manager = file_server
+    session_manager = SessionManager(profile_manager)
+
+    config = profile_manager.load_shopify_config("TEST")
+    config["rules"] = [{
+        "name": "Tag DHL", "match": "ALL",
+        "conditions": [{"field": "Shipping_Provider", "operator": "equals", "value": "DHL"}],
+        "actions": [{"type": "ADD_TAG", "value": "dhl"}],
+    }]
+    ended = []
+
+    success, session_path, _, _ = core.run_full_analysis(
+        str(tmp_path / "stock.csv"), str(tmp_path / "orders.csv"), None, ";", ",", config,
+        client_id="TEST", session_manager=session_manager, profile_manager=profile_manager,
+        profile_callback=lambda event, record: ended.append(record.name) if event == "end" else None,
+    )
+
+    assert success
+    perf = json.loads((Path(session_path) / "analysis" / PERF_FILENAME).read_text(encoding="utf-8"))
+    names = [record["name"] for record in perf["phases"]]
+    for name in ["load", "load_history", "analysis", "clean", "prioritize", "allocate", "merge",
+                 "rules", "save_excel", "save_json", "history_update"]:
+        assert name in names
+    assert sorted(names) == sorted(ended)
+    by_name = {record["name"]: record for record in perf["phases"]}
+    assert by_name["clean"]["parent"] == "analysis"
+    assert by_name["load"]["rows_out"] == 3
+    assert by_name["analysis"]["rows_out"] == 3
+    assert perf["total_wall_seconds"] >= by_name["analysis"]["wall_seconds"]
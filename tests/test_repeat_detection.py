@@ -0,0 +1,56 @@
+"""Tests for the cached repeat detector (shopify_tool/repeat_detection.py)."""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shopify_tool import repeat_detection
+from shopify_tool.history_store import FulfillmentHistoryStore
+from shopify_tool.repeat_detection import RepeatDetector
+
+
+def _days_ago(days):
+    return (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def test_batch_lookup_and_last_seen():
+    history = pd.DataFrame({
+        "Order_Number": ["#A", "#B", "#A", "1001", "#C"],
+        "Execution_Date": [_days_ago(0), _days_ago(3), _days_ago(10), _days_ago(1), "not a date"],
+    })
+    detector = RepeatDetector.from_history(history)
+
+    orders = ["#A", "#B", "#C", 1001, "#new"]
+    assert list(detector.repeated_mask(orders, repeat_window_days=1)) == [True, True, False, True, False]
+    assert list(detector.repeated_mask(orders, repeat_window_days=5)) == [True, False, False, False, False]
+    assert sorted(detector.repeated_order_numbers(2)) == ["#A", "#B"]
+
+    last_seen = detector.last_seen(["#A", "#C", "#new"])
+    assert last_seen["#A"] == pd.Timestamp(_days_ago(0))
+    assert pd.isna(last_seen["#C"]) and pd.isna(last_seen["#new"])
+
+
+def test_undated_history_counts_every_order():
+    detector = RepeatDetector.from_history(pd.DataFrame({"Order_Number": ["#1", "#2"]}))
+    assert list(detector.repeated_mask(["#2", "#3"], repeat_window_days=30)) == [True, False]
+    assert not RepeatDetector.from_history(pd.DataFrame()).repeated_mask(["#1"]).any()
+
+
+def test_detector_is_cached_per_history_version(tmp_path, mocker):
+    repeat_detection._detector_cache.clear()
+    store = FulfillmentHistoryStore(tmp_path)
+    store.append(["#1"], execution_date=_days_ago(2))
+    build = mocker.spy(RepeatDetector, "from_history")
+
+    first = store.repeat_detector()
+    assert store.repeat_detector() is first
+    assert build.call_count == 1
+
+    store.append(["#2"], execution_date=_days_ago(2))
+    second = store.repeat_detector()
+    assert second is not first
+    assert list(second.repeated_mask(["#1", "#2"])) == [True, True]
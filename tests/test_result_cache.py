@@ -0,0 +1,142 @@
+"""Tests for the content-addressed analysis result cache (shopify_tool/result_cache.py)."""
+
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shopify_tool import core
+from shopify_tool.history_store import FulfillmentHistoryStore
+from shopify_tool.result_cache import CACHE_DIRNAME, AnalysisResultCache, history_digest
+from shopify_tool.session_manager import SessionManager
+
+
+@pytest.fixture
+def stock_rows():
+    """One unit of SKU-2, so order #3 misses out."""
+    return {"Артикул": ["SKU-1", "SKU-2"], "Име": ["Product 1", "Product 2"], "Наличност": [10, 1]}
+
+
+@pytest.fixture
+def order_rows():
+    """Orders with blanks and a VIP tag for the rule tests."""
+    return {
+        "Name": ["#1", "#2", "#2", "#3"], "Lineitem sku": ["SKU-1", "SKU-2", "SKU-1", "SKU-2"],
+        "Lineitem quantity": [1, 1, 1, 1], "Shipping Method": ["dhl", "dpd", None, "dhl"],
+        "Shipping Country": ["BG", "BG", None, "RO"], "Tags": ["", "VIP", None, ""],
+    }
+
+
+def _run(profile_manager, config):
+    tmp_path = Path(profile_manager.base_path).parent
+    return core.run_full_analysis(
+        str(tmp_path / "stock.csv"), str(tmp_path / "orders.csv"), None, ";", ",", config,
+        client_id="TEST", session_manager=SessionManager(profile_manager),
+        profile_manager=profile_manager,
+    )
+
+
+def _history_store(profile_manager):
+    return FulfillmentHistoryStore.for_client(profile_manager, "TEST")
+
+
+def test_rerun_restores_cached_result(file_server, mocker):
+    config = file_server.load_shopify_config("TEST")
+    config["rules"] = [{
+        "name": "VIP", "conditions": [{"field": "Tags", "operator": "contains", "value": "VIP"}],
+        "actions": [{"type": "ADD_TAG", "value": "vip-check"}],
+    }]
+    analysis_spy = mocker.spy(core, "_run_analysis_and_rules")
+
+    success, first_session, first_df, first_stats = _run(file_server, config)
+    assert success
+    # The first run wrote today's fulfilments to the history; they do not
+    # count as repeats today, so the rerun still hits the cache
+    assert "#1" in set(_history_store(file_server).load()["Order_Number"])
+    success, second_session, second_df, second_stats = _run(file_server, config)
+    assert success
+
+    assert analysis_spy.call_count == 1
+    pd.testing.assert_frame_equal(second_df, first_df)
+    assert second_stats == first_stats
+    assert second_session != first_session
+    assert (Path(second_session) / "analysis" / "fulfillment_analysis.xlsx").exists()
+    perf = json.loads((Path(second_session) / "analysis" / "perf.json").read_text(encoding="utf-8"))
+    names = [record["name"] for record in perf["phases"]]
+    assert "cache_lookup" in names and "analysis" not in names
+
+    # A rule change is a different key
+    config["rules"][0]["actions"][0]["value"] = "vip-2"
+    assert _run(file_server, config)[0]
+    assert analysis_spy.call_count == 2
+
+
+def test_history_and_setting_invalidate(file_server, mocker):
+    config = file_server.load_shopify_config("TEST")
+    analysis_spy = mocker.spy(core, "_run_analysis_and_rules")
+    assert _run(file_server, config)[0]
+
+    # An order fulfilled yesterday turns into a repeat: new history version
+    yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
+    _history_store(file_server).append(["#1"], execution_date=yesterday)
+    success, _, final_df, _ = _run(file_server, config)
+    assert success
+    assert analysis_spy.call_count == 2
+    assert (final_df.loc[final_df["Order_Number"] == "#1", "System_note"] == "Repeat").all()
+
+    config["settings"]["analysis_cache_enabled"] = False
+    assert _run(file_server, config)[0]
+    assert analysis_spy.call_count == 3
+
+
+def test_history_digest_ignores_same_day_entries():
+    today = datetime.now().strftime("%Y-%m-%d")
+    old = (datetime.now() - timedelta(days=3)).strftime("%Y-%m-%d")
+    base = pd.DataFrame({"Order_Number": ["#1"], "Execution_Date": [old]})
+    with_today = pd.concat([base, pd.DataFrame({"Order_Number": ["#2"], "Execution_Date": [today]})])
+
+    assert history_digest(with_today, 1) == history_digest(base, 1)
+    assert history_digest(base, 5) != history_digest(base, 1)
+
+
+def _frames(rows):
+    final_df = pd.DataFrame({"Order_Number": [f"#{i}" for i in range(rows)], "Quantity": range(rows)})
+    return final_df, final_df.head(1), final_df.head(0)
+
+
+def test_eviction_by_age_and_size(tmp_path):
+    cache = AnalysisResultCache(tmp_path / CACHE_DIRNAME, max_age_days=1, max_bytes=10**9)
+    cache.put("old", *_frames(10), {"n": 1})
+    meta_path = tmp_path / CACHE_DIRNAME / "old" / "meta.json"
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    meta["last_used_at"] = time.time() - 3 * 86400
+    meta_path.write_text(json.dumps(meta), encoding="utf-8")
+
+    cache.put("a", *_frames(10), {"n": 2})
+    assert set(cache.entries()) == {"a"}
+
+    entry_size = cache.entries()["a"]["size_bytes"]
+    cache.max_bytes = int(entry_size * 2.5)
+    cache.put("b", *_frames(10), {"n": 3})
+    assert cache.get("a") is not None  # "a" is now the most recently used
+    cache.put("c", *_frames(10), {"n": 4})
+    assert set(cache.entries()) == {"a", "c"}
+
+    final_df, present, missing, stats = cache.get("c")
+    assert len(final_df) == 10 and len(present) == 1 and missing.empty
+    assert stats == {"n": 4}
+
+
+def test_unreadable_entry_is_a_miss(tmp_path):
+    cache = AnalysisResultCache(tmp_path)
+    entry = cache.put("key", *_frames(3), {})
+    (entry / "final_df.pkl").write_bytes(b"not a pickle")
+
+    assert cache.get("key") is None
+    assert not entry.exists()
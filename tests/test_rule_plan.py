@@ -0,0 +1,82 @@
+"""Tests for compiled rule plans (shopify_tool/rule_plan.py)."""
+
+import copy
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shopify_tool.rule_plan import compile_rules
+from shopify_tool.rules import RuleEngine
+
+
+RULES = [
+    {
+        "name": "Big DHL orders",
+        "level": "order",
+        "conditions": [
+            {"field": "total_quantity", "operator": "is greater than", "value": "2"},
+            {"field": "has_sku", "operator": "equals", "value": "B"},
+        ],
+        "actions": [{"type": "ADD_ORDER_TAG", "value": "BIG"}],
+    },
+    {
+        "name": "Weird values",
+        "conditions": [
+            {"field": "Quantity", "operator": "between", "value": "x-y"},
+            {"field": "SKU", "operator": "matches regex", "value": "(unclosed"},
+            {"field": "Shipping_Provider", "operator": "equals", "value": "DHL"},
+        ],
+        "match": "ANY",
+        "actions": [{"type": "SET_STATUS", "value": "Check"}],
+    },
+]
+
+
+def test_plan_is_compiled_once_per_config():
+    rules = copy.deepcopy(RULES)
+
+    plan = compile_rules(rules)
+
+    assert compile_rules(copy.deepcopy(RULES)) is plan
+    # The caller's dicts are not normalized in place
+    assert rules == RULES
+    assert [rule.name for rule in plan.rules] == ["Big DHL orders", "Weird values"]
+    assert [rule.priority for rule in plan.rules] == [1000, 1001]
+
+    changed = copy.deepcopy(RULES)
+    changed[1]["conditions"][2]["value"] = "DPD"
+    assert compile_rules(changed) is not plan
+
+    # An engine built from the config gets the same plan and leaves it as is
+    assert RuleEngine(rules).plan is plan
+    assert rules == RULES
+
+
+def test_plan_records_columns_and_issues():
+    plan = compile_rules(RULES)
+    order_rule, article_rule = plan.rules
+
+    assert order_rule.level == "order"
+    assert order_rule.reads == {"Order_Number", "Quantity", "SKU"}
+    assert order_rule.writes == {"Status_Note"}
+    assert article_rule.reads == {"Quantity", "SKU", "Shipping_Provider"}
+    assert article_rule.writes == {"Order_Fulfillment_Status"}
+    assert not article_rule.adds_rows
+    assert len(plan.issues) == 2
+    assert "Invalid range value" in plan.issues[0]
+    assert "Invalid regex pattern" in plan.issues[1]
+
+    df = pd.DataFrame({
+        "Order_Number": ["#1", "#1", "#2"],
+        "SKU": ["A", "B", "B"],
+        "Quantity": [2, 1, 1],
+        "Shipping_Provider": ["DHL", "DHL", "DPD"],
+        "Order_Fulfillment_Status": ["Fulfillable"] * 3,
+    })
+    result = RuleEngine(plan).apply(df)
+
+    assert list(result["Status_Note"]) == ["BIG", "", ""]
+    assert list(result["Order_Fulfillment_Status"]) == ["Check", "Check", "Fulfillable"]
@@ -759,6 +759,51 @@ def test_order_level_has_sku_negative_operators():
     assert "NO_MASKS" in order_1002.iloc[0]["Status_Note"]
 
 
+def test_order_level_rules_see_earlier_rules_and_group_new_rows():
+    """Order rules run for all orders at once but keep per-order semantics."""
+    df = pd.DataFrame({
+        "Order_Number": ["#1", "#2", "#1", "#3", "#2"],
+        "SKU": ["7", "B", "3x", "A", "3x"],
+        "Quantity": [2, 1, 3, 1, 1],
+        "Shipping_Provider": ["DHL", "DPD", "DHL", "DHL", "DPD"],
+        "Status_Note": ["", "", "", "", ""],
+        "Order_Fulfillment_Status": ["Fulfillable"] * 5,
+    })
+    rules = [
+        {
+            "name": "Big orders", "level": "order", "priority": 1,
+            "conditions": [{"field": "total_quantity", "operator": "is greater than", "value": "1"}],
+            "actions": [{"type": "ADD_TAG", "value": "BIG"}, {"type": "ADD_PRODUCT", "sku": "GIFT"}],
+        },
+        {
+            # Reads the note written by the first rule
+            "name": "Hold big DHL", "level": "order", "priority": 2,
+            "conditions": [
+                {"field": "Status_Note", "operator": "contains", "value": "BIG"},
+                {"field": "Shipping_Provider", "operator": "equals", "value": "DHL"},
+            ],
+            "actions": [{"type": "SET_STATUS", "value": "Not Fulfillable"}, {"type": "ADD_PRODUCT", "sku": "CARD"}],
+        },
+        {
+            # "between" compares text only in orders without numeric SKUs (#2)
+            "name": "Range", "level": "order", "priority": 3,
+            "conditions": [{"field": "has_sku", "operator": "between", "value": "1-5"}],
+            "actions": [{"type": "ADD_ORDER_TAG", "value": "RANGE"}],
+        },
+    ]
+
+    result = RuleEngine(rules).apply(df)
+
+    assert list(result["Status_Note"][:5]) == ["BIG", "BIG, RANGE", "BIG", "", "BIG"]
+    # Non-tag actions only touch the first row of the order
+    assert list(result["Order_Fulfillment_Status"][:5]) == [
+        "Not Fulfillable", "Fulfillable", "Fulfillable", "Fulfillable", "Fulfillable",
+    ]
+    # New rows are grouped by order, in order of appearance
+    added = result.iloc[5:]
+    assert list(zip(added["Order_Number"], added["SKU"])) == [("#1", "GIFT"), ("#1", "CARD"), ("#2", "GIFT")]
+
+
 def test_ui_field_selector_includes_order_level_fields():
     """Tests that get_available_rule_fields includes order-level fields."""
     from gui.settings_window_pyside import SettingsWindow
@@ -1004,6 +1049,45 @@ def test_date_operators_multiple_formats(date_sample_df):
     assert sorted(matched_orders) == sorted(["#2002", "#2004"])
 
 
+def test_date_column_is_parsed_once_per_apply(date_sample_df, monkeypatch):
+    """Date conditions on one column share its parsed dates; datetime columns are used directly."""
+    import shopify_tool.rules as rules_module
+
+    parsed_columns = []
+    original_parse = rules_module._parse_dates
+
+    def counting_parse(series_val):
+        parsed_columns.append(series_val.name)
+        return original_parse(series_val)
+
+    monkeypatch.setattr(rules_module, "_parse_dates", counting_parse)
+
+    df = date_sample_df.copy()
+    df["Paid_At"] = pd.to_datetime(["2024-01-29 23:30", None, "2024-01-31 08:00", None, None])
+    rules = [
+        {
+            "name": "Window",
+            "conditions": [
+                {"field": "Order_Date", "operator": "date after", "value": "2024-01-15"},
+                {"field": "Order_Date", "operator": "date before", "value": "15.02.2024"},
+            ],
+            "actions": [{"type": "ADD_INTERNAL_TAG", "value": "window"}],
+        },
+        {
+            "name": "Paid",
+            "conditions": [{"field": "Paid_At", "operator": "date equals", "value": "29/01/2024"}],
+            "actions": [{"type": "ADD_INTERNAL_TAG", "value": "paid"}],
+        },
+    ]
+
+    result = RuleEngine(rules).apply(df)
+
+    assert parsed_columns == ["Order_Date", "Paid_At"]
+    tags = result.set_index("Order_Number")["Internal_Tags"]
+    assert [order for order, tag in tags.items() if "window" in tag] == ["#2002", "#2004"]
+    assert [order for order, tag in tags.items() if "paid" in tag] == ["#2001"]
+
+
 @pytest.mark.parametrize(
     "invalid_date",
     [
@@ -2276,3 +2360,76 @@ def test_normalize_steps_already_has_steps():
     }
     result = RuleEngine._normalize_steps(new_rule)
     assert len(result["steps"]) == 2
+
+
+def test_condition_results_are_shared_and_invalidated_by_actions(sample_df, monkeypatch):
+    """Repeated conditions are evaluated once until an action writes their column."""
+    from shopify_tool.rule_plan import CompiledCondition
+
+    calls = []
+    original_compute = CompiledCondition.compute
+
+    def counting_compute(condition, series_val):
+        calls.append((series_val.name, condition.base_operator))
+        return original_compute(condition, series_val)
+
+    monkeypatch.setattr(CompiledCondition, "compute", counting_compute)
+
+    dhl = {"field": "Shipping_Provider", "operator": "equals", "value": "DHL"}
+    rules = [
+        {"name": "Tag", "priority": 1, "conditions": [
+            dhl, {"field": "Status_Note", "operator": "does not contain", "value": "HOLD"},
+        ], "actions": [{"type": "ADD_TAG", "value": "HOLD"}]},
+        {"name": "Sees tag", "priority": 2, "conditions": [
+            dhl, {"field": "Status_Note", "operator": "contains", "value": "HOLD"},
+        ], "actions": [{"type": "ADD_INTERNAL_TAG", "value": "held"}]},
+        {"name": "Order level", "priority": 3, "level": "order", "conditions": [
+            dhl, {"field": "Status_Note", "operator": "contains", "value": "HOLD"},
+        ], "actions": [{"type": "ADD_ORDER_TAG", "value": "CHECK"}]},
+    ]
+
+    result = RuleEngine(rules).apply(sample_df)
+
+    # "contains HOLD" is computed again only after ADD_TAG wrote Status_Note
+    assert calls == [
+        ("Shipping_Provider", "equals"), ("Status_Note", "contains"), ("Status_Note", "contains"),
+    ]
+    dhl_rows = result["Shipping_Provider"] == "DHL"
+    assert result.loc[dhl_rows, "Internal_Tags"].str.contains("held").all()
+    assert list(result["Status_Note"]) == ["HOLD, CHECK", "HOLD", "Repeat", "", "Repeat, HOLD, CHECK"]
+
+
+def test_reapply_updates_rule_tags_of_edited_orders(sample_df):
+    """After a manual edit, tags of rules that no longer match are removed and new ones added."""
+    rules = [
+        {"name": "Ready", "conditions": [
+            {"field": "Order_Fulfillment_Status", "operator": "equals", "value": "Fulfillable"},
+        ], "actions": [{"type": "ADD_TAG", "value": "READY"}]},
+        {"name": "DHL ready", "conditions": [
+            {"field": "Status_Note", "operator": "contains", "value": "READY"},
+            {"field": "Shipping_Provider", "operator": "equals", "value": "DHL"},
+        ], "actions": [{"type": "ADD_INTERNAL_TAG", "value": "dhl_ready"}]},
+        {"name": "Blocked", "level": "order", "conditions": [
+            {"field": "Order_Fulfillment_Status", "operator": "equals", "value": "Not Fulfillable"},
+        ], "actions": [{"type": "ADD_ORDER_TAG", "value": "CHECK"}, {"type": "ADD_INTERNAL_TAG", "value": "blocked"}]},
+    ]
+    engine = RuleEngine(rules)
+    result = engine.apply(sample_df.copy())
+    result.loc[1, "Status_Note"] = "READY, gift"
+
+    # Manual toggles: #1001 becomes Not Fulfillable, #1003 Fulfillable
+    result.loc[[0, 1], "Order_Fulfillment_Status"] = "Not Fulfillable"
+    result.loc[3, "Order_Fulfillment_Status"] = "Fulfillable"
+    assert len(engine.rows_to_reapply(result, [0, 3], ["Quantity"])) == 0
+
+    positions = engine.reapply(result, [0, 3], ["Order_Fulfillment_Status"])
+
+    assert list(positions) == [0, 1, 3]
+    # Order-level actions other than ADD_TAG touch the first row of the order
+    assert list(result["Status_Note"]) == ["CHECK", "gift", "Repeat, READY", "READY", "Repeat, READY"]
+    assert list(result["Internal_Tags"]) == ['["blocked"]', "[]", "[]", "[]", '["dhl_ready"]']
+
+    edited = sample_df.copy()
+    edited["Order_Fulfillment_Status"] = result["Order_Fulfillment_Status"]
+    expected = RuleEngine(rules).apply(edited)
+    assert list(expected["Internal_Tags"]) == list(result["Internal_Tags"])
@@ -0,0 +1,194 @@
+"""
+Tests for the compact analysis DataFrame schema (shopify_tool/schema.py)
+and the downstream consumers that write into it.
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from shopify_tool import analysis
+from shopify_tool.packing_lists import create_packing_list
+from shopify_tool.rules import RuleEngine
+from shopify_tool.schema import (
+    CATEGORY_COLUMNS,
+    apply_compact_schema,
+    ensure_categories,
+    memory_report,
+)
+
+
+def _analysis_df():
+    stock_df = pd.DataFrame({
+        "SKU": ["A", "B", "C"],
+        "Product_Name": ["Prod A", "Prod B", "Prod C"],
+        "Stock": [5, 1, 0],
+    })
+    orders_df = pd.DataFrame({
+        "Order_Number": ["#1", "#1", "#2", "#3", "#4"],
+        "SKU": ["A", "B", "B", "C", "A"],
+        "Quantity": [1, 1, 1, 1, 2],
+        "Shipping_Method": ["dhl", "dhl", "dpd", "dpd", None],
+        "Shipping_Country": ["BG", "BG", "RO", None, "DE"],
+    })
+    history_df = pd.DataFrame({"Order_Number": []})
+    final_df, _, _, _ = analysis.run_analysis(stock_df, orders_df, history_df)
+    return final_df
+
+
+class TestApplyCompactSchema:
+    def test_run_analysis_returns_compact_dtypes(self):
+        final_df = _analysis_df()
+
+        for column in ["Order_Type", "Order_Fulfillment_Status", "Shipping_Provider",
+                       "Destination_Country", "Source", "Warehouse_Name"]:
+            assert isinstance(final_df[column].dtype, pd.CategoricalDtype), column
+        assert final_df["Quantity"].dtype == np.int32
+        assert final_df["Stock"].dtype == np.int32
+        assert final_df["Final_Stock"].dtype == np.int32
+
+    def test_values_are_unchanged(self):
+        df = pd.DataFrame({
+            "Order_Number": ["#1", "#2", "#3"],
+            "Order_Fulfillment_Status": ["Fulfillable", "Not Fulfillable", "Fulfillable"],
+            "Warehouse_Name": ["N/A", "Prod", None],
+            "Quantity": [1, 2, 3],
+        })
+
+        compact = apply_compact_schema(df)
+
+        pd.testing.assert_frame_equal(compact.astype(object), df.astype(object))
+        assert "Low Stock" not in compact["Warehouse_Name"].cat.categories
+        assert "" in compact["Warehouse_Name"].cat.categories
+
+    def test_non_text_and_float_columns_are_left_alone(self):
+        df = pd.DataFrame({
+            "Order_Number": [1001, 1002],
+            "Source": ["Order", 1],
+            "Final_Stock": [1.0, np.nan],
+        })
+
+        compact = apply_compact_schema(df)
+
+        assert compact["Order_Number"].dtype == np.int64
+        assert compact["Source"].dtype == object
+        assert compact["Final_Stock"].dtype == np.float64
+
+    def test_text_columns_keep_their_dtype(self):
+        df = pd.DataFrame({"SKU": ["A", "B"], "Product_Name": ["Prod A", None]})
+
+        compact = apply_compact_schema(df)
+
+        assert compact["SKU"].dtype == df["SKU"].dtype
+        assert compact["Product_Name"].dtype == df["Product_Name"].dtype
+
+    def test_memory_report_shows_savings(self):
+        df = pd.DataFrame({
+            "Order_Fulfillment_Status": ["Fulfillable", "Not Fulfillable"] * 500,
+            "Quantity": np.arange(1000),
+        })
+
+        report = memory_report(df)
+
+        assert report.loc["TOTAL", "After_Bytes"] < report.loc["TOTAL", "Before_Bytes"]
+        assert report.loc["Quantity", "After_Dtype"] == "int32"
+
+
+class TestConsumers:
+    def test_default_categories_accept_blanking_writes(self):
+        final_df = _analysis_df()
+
+        for column, categories in CATEGORY_COLUMNS.items():
+            if column in final_df.columns and "" in categories:
+                blanked = final_df[column].fillna("").where(~final_df["Order_Number"].duplicated(), "")
+                assert blanked.isna().sum() == 0
+
+    def test_rules_set_custom_status_and_copy_field(self):
+        final_df = _analysis_df()
+        rules = [
+            {
+                "name": "Hold DPD",
+                "match": "ALL",
+                "conditions": [{"field": "Shipping_Provider", "operator": "equals", "value": "DPD"}],
+                "actions": [{"type": "SET_STATUS", "value": "On Hold"}],
+            },
+            {
+                "name": "Copy SKU",
+                "match": "ALL",
+                "conditions": [{"field": "Order_Number", "operator": "equals", "value": "#1"}],
+                "actions": [{"type": "COPY_FIELD", "source": "SKU", "target": "Warehouse_Name"}],
+            },
+        ]
+
+        result = RuleEngine(rules).apply(final_df)
+
+        dpd = result["Shipping_Provider"] == "DPD"
+        assert (result.loc[dpd, "Order_Fulfillment_Status"] == "On Hold").all()
+        order_1 = result["Order_Number"] == "#1"
+        assert result.loc[order_1, "Warehouse_Name"].tolist() == result.loc[order_1, "SKU"].tolist()
+
+    def test_toggle_and_statistics(self):
+        final_df = _analysis_df()
+        before = analysis.recalculate_statistics(final_df)
+
+        success, _, toggled = analysis.toggle_order_fulfillment(final_df.copy(), "#1")
+
+        assert success
+        assert toggled.loc[toggled["Order_Number"] == "#1", "Order_Fulfillment_Status"].iloc[0] == "Not Fulfillable"
+        after = analysis.recalculate_statistics(toggled)
+        assert after["total_orders_completed"] == before["total_orders_completed"] - 1
+        assert all(c["orders_assigned"] > 0 for c in after["couriers_stats"])
+
+        success, _, restored = analysis.toggle_order_fulfillment(toggled, "#1")
+
+        assert success
+        pd.testing.assert_series_equal(restored["Final_Stock"], final_df["Final_Stock"])
+
+    def test_packing_list(self, tmp_path):
+        final_df = _analysis_df()
+        output_file = tmp_path / "packing.xlsx"
+
+        create_packing_list(final_df, str(output_file))
+
+        assert output_file.exists()
+        written = pd.read_excel(output_file, header=None).astype(str)
+        order_cells = written.isin(final_df["Order_Number"].astype(str).tolist()).sum().sum()
+        assert order_cells == int((final_df["Order_Fulfillment_Status"] == "Fulfillable").sum())
+
+    def test_added_rows_and_undo_snapshots(self):
+        final_df = _analysis_df()
+        new_row = final_df.iloc[0].copy()
+        new_row["Source"] = "Manual"
+
+        combined = pd.concat([final_df, pd.DataFrame([new_row])], ignore_index=True)
+        records = final_df.head(2).to_dict("records")
+        restored = pd.concat([combined, pd.DataFrame(records)], ignore_index=True)
+
+        assert combined["Source"].iloc[-1] == "Manual"
+        assert len(restored) == len(final_df) + 3
+        assert isinstance(records[0]["Quantity"], int)
+
+    def test_pandas_model_displays_values(self):
+        pytest.importorskip("PySide6")
+        from gui.pandas_model import PandasModel
+
+        final_df = _analysis_df()
+        model = PandasModel(final_df)
+        column = final_df.columns.get_loc("Order_Fulfillment_Status")
+
+        assert model.data(model.index(0, column)) == str(final_df["Order_Fulfillment_Status"].iloc[0])
+
+
+def test_ensure_categories_ignores_plain_columns():
+    df = pd.DataFrame({"Status": ["x"], "Cat": pd.Categorical(["x"])})
+
+    ensure_categories(df, "Status", ["y"])
+    ensure_categories(df, "Cat", ["y", None, "x"])
+
+    assert df["Status"].dtype != "category"
+    assert list(df["Cat"].cat.categories) == ["x", "y"]
@@ -395,6 +395,33 @@ class TestEdgeCases:
         result_skus = sorted(result["SKU"].tolist())
         assert result_skus == ["ANOTHER-GOOD", "GOOD-COMP"]
 
+    def test_expansion_keeps_row_order_index_and_warnings(self, caplog):
+        """Components follow their set row in place; warnings are logged per order line."""
+        orders_df = pd.DataFrame({
+            "Order_Number": ["ORDER-001", "ORDER-002", "ORDER-002", "ORDER-003"],
+            "SKU": ["BAD-SET", "SKU-X", "KIT", "BAD-SET"],
+            "Quantity": [1, 4, 2, 3],
+        }, index=[10, 11, 12, 13])
+        set_decoders = {
+            "KIT": [{"sku": "HAT", "quantity": 1}, {"sku": "", "quantity": 1}, {"sku": "SCARF", "quantity": 3}],
+            "BAD-SET": [{"sku": "ONLY-BAD", "quantity": 0}],
+        }
+
+        with caplog.at_level("WARNING", logger="shopify_tool.set_decoder"):
+            result = decode_sets_in_orders(orders_df, set_decoders)
+
+        assert result.index.tolist() == [11, 12, 12]  # all-invalid sets produce no rows
+        assert result["SKU"].tolist() == ["SKU-X", "HAT", "SCARF"]
+        assert result["Quantity"].tolist() == [4, 2, 6]
+        assert result["Original_SKU"].tolist() == ["SKU-X", "KIT", "KIT"]
+        assert result["Original_Quantity"].tolist() == [4, 2, 2]
+        assert result["Is_Set_Component"].tolist() == [False, True, True]
+        assert [r.getMessage() for r in caplog.records] == [
+            "Component 'ONLY-BAD' in set 'BAD-SET' has invalid quantity: 0, skipping",
+            "Component in set 'KIT' has no SKU, skipping component",
+            "Component 'ONLY-BAD' in set 'BAD-SET' has invalid quantity: 0, skipping",
+        ]
+
     def test_csv_with_duplicate_pairs(self):
         """Test CSV with duplicate (Set_SKU, Component_SKU) pairs - last one wins."""
         csv_content = """Set_SKU,Component_SKU,Component_Quantity
@@ -182,3 +182,85 @@ def test_recalculate_statistics_sku_fulfillable_counts():
     assert s2_data["Total_Quantity"] == 5
     assert s2_data["Fulfillable_Items"] == 0
     assert s2_data["Not_Fulfillable_Items"] == 5
+
+
+def _reference_statistics(df):
+    """Row-wise statistics (per-courier filters, apply, per-cell tag parsing)."""
+    from collections import Counter
+    from shopify_tool.tag_manager import parse_tags
+
+    completed = df[df["Order_Fulfillment_Status"] == "Fulfillable"].copy()
+    not_completed = df[df["Order_Fulfillment_Status"] == "Not Fulfillable"]
+    couriers = []
+    if not completed.empty:
+        completed["Shipping_Provider"] = completed["Shipping_Provider"].astype(object).fillna("Unknown")
+        for provider, group in completed.groupby("Shipping_Provider"):
+            couriers.append({
+                "courier_id": provider,
+                "orders_assigned": int(group["Order_Number"].nunique()),
+                "repeated_orders_found": int(group[group["System_note"] == "Repeat"]["Order_Number"].nunique()),
+            })
+    tags = Counter()
+    for tags_json in df["Internal_Tags"].dropna():
+        tags.update(parse_tags(tags_json))
+    temp = df.copy()
+    temp["Fulfillable_Qty"] = temp.apply(
+        lambda row: row["Quantity"] if row["Order_Fulfillment_Status"] == "Fulfillable" else 0, axis=1
+    )
+    skus = temp.groupby("SKU").agg({
+        "Quantity": "sum", "Product_Name": "first", "Warehouse_Name": "first", "Fulfillable_Qty": "sum"
+    }).reset_index()
+    skus.columns = ["SKU", "Total_Quantity", "Product_Name", "Warehouse_Name", "Fulfillable_Items"]
+    skus["Not_Fulfillable_Items"] = skus["Total_Quantity"] - skus["Fulfillable_Items"]
+    return {
+        "total_orders_completed": int(completed["Order_Number"].nunique()),
+        "total_orders_not_completed": int(not_completed["Order_Number"].nunique()),
+        "total_items_to_write_off": int(completed["Quantity"].sum()),
+        "total_items_not_to_write_off": int(not_completed["Quantity"].sum()),
+        "couriers_stats": couriers,
+        "tags_breakdown": dict(sorted(tags.items(), key=lambda x: x[1], reverse=True)),
+        "sku_summary": skus.sort_values("Total_Quantity", ascending=False).to_dict("records"),
+    }
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_recalculate_statistics_matches_row_wise_reference(seed):
+    """Vectorized statistics equal the row-wise computation, order included."""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    n = 500
+    df = pd.DataFrame({
+        "Order_Number": rng.choice([f"#{i}" for i in range(150)], size=n),
+        "SKU": rng.choice([f"S{i}" for i in range(40)], size=n),
+        "Quantity": rng.integers(1, 5, size=n),
+        "Order_Fulfillment_Status": rng.choice(["Fulfillable", "Not Fulfillable", "On Hold"], size=n),
+        "Product_Name": rng.choice(["P1", "P2"], size=n),
+        "Warehouse_Name": rng.choice(["W1", "W2", "N/A"], size=n),
+        "Shipping_Provider": rng.choice(["DHL", "DPD", "PostOne", None], size=n),
+        "System_note": rng.choice(["", "Repeat", "Repeat; Cannot fulfill"], size=n),
+        "Internal_Tags": rng.choice(['[]', '["A", "B"]', '["B"]', '["C", "A"]', '["Z"]'], size=n),
+    })
+
+    assert recalculate_statistics(df) == _reference_statistics(df)
+
+
+def test_recalculate_statistics_without_shipping_provider():
+    """Older sessions without Shipping_Provider count everything as Unknown."""
+    df = pd.DataFrame({
+        "Order_Number": ["A", "A", "B"],
+        "SKU": ["S1", "S2", "S1"],
+        "Quantity": [1, 1, 1],
+        "Order_Fulfillment_Status": ["Fulfillable", "Fulfillable", "Fulfillable"],
+        "Product_Name": ["P1", "P2", "P1"],
+        "Warehouse_Name": ["W1", "W2", "W1"],
+        "System_note": ["", "", "Repeat"],
+        "Internal_Tags": ["[]", "[]", "[]"],
+    })
+
+    stats = recalculate_statistics(df)
+
+    assert stats["couriers_stats"] == [
+        {"courier_id": "Unknown", "orders_assigned": 2, "repeated_orders_found": 1}
+    ]
+    assert "Shipping_Provider" not in df.columns
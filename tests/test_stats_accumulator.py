@@ -0,0 +1,164 @@
+"""Tests for incremental statistics maintenance (shopify_tool/stats_accumulator.py)."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from shopify_tool.analysis import recalculate_statistics, toggle_order_fulfillment
+from shopify_tool.schema import apply_compact_schema
+from shopify_tool.stats_accumulator import StatsAccumulator
+from shopify_tool.tag_manager import add_tag, remove_tag
+
+
+def _frame(rng, n):
+    order_numbers = rng.choice([f"#{i}" for i in range(n // 3 + 1)], size=n).astype(object)
+    order_numbers[rng.random(n) < 0.01] = None
+    return pd.DataFrame({
+        "Order_Number": order_numbers,
+        "SKU": rng.choice([f"S{i}" for i in range(30)] + [None], size=n),
+        "Quantity": rng.integers(1, 5, size=n),
+        "Order_Fulfillment_Status": rng.choice(["Fulfillable", "Not Fulfillable", "On Hold"], size=n),
+        "Product_Name": rng.choice(["Product", None], size=n),
+        "Warehouse_Name": "Warehouse",
+        "Shipping_Provider": rng.choice(["DHL", "DPD", None], size=n),
+        "System_note": rng.choice(["", "Repeat"], size=n),
+        "Internal_Tags": rng.choice(['[]', '["A", "B"]', '["B"]', None], size=n),
+        "Final_Stock": 5,
+    })
+
+
+def test_initial_stats_match_full_computation():
+    df = pd.DataFrame({
+        "Order_Number": ["A", "A", "B", "C"],
+        "SKU": ["S1", "S2", "S1", "S3"],
+        "Quantity": [1, 2, 3, 4],
+        "Order_Fulfillment_Status": ["Fulfillable", "Fulfillable", "Not Fulfillable", "Fulfillable"],
+        "Product_Name": ["P1", "P2", "P1", "P3"],
+        "Warehouse_Name": ["W1", "W2", "W1", "W3"],
+        "Shipping_Provider": ["DHL", "DHL", "DPD", None],
+        "System_note": ["Repeat", "", "", ""],
+        "Internal_Tags": ['["X"]', '[]', '["X", "Y"]', '["Y"]'],
+    })
+
+    assert StatsAccumulator(df).stats() == recalculate_statistics(df)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_deltas_stay_consistent_with_full_recompute(compact):
+    rng = np.random.default_rng(11)
+    df = _frame(rng, 600)
+    if compact:
+        df = apply_compact_schema(df)
+    accumulator = StatsAccumulator(df)
+    assert accumulator.check_consistency(df) == []
+
+    for step in range(24):
+        kind = step % 4
+        if kind == 0:  # status flip
+            idx = rng.choice(df.index, size=15, replace=False)
+            before = df.loc[idx].copy()
+            df.loc[idx, "Order_Fulfillment_Status"] = rng.choice(["Fulfillable", "Not Fulfillable"])
+            accumulator.update_rows(before, df.loc[idx])
+        elif kind == 1:  # tag add / remove
+            idx = rng.choice(df.index, size=10, replace=False)
+            before = df.loc[idx].copy()
+            if step % 8 == 1:
+                df.loc[idx, "Internal_Tags"] = df.loc[idx, "Internal_Tags"].apply(lambda t: add_tag(t, "NEW"))
+            else:
+                df.loc[idx, "Internal_Tags"] = df.loc[idx, "Internal_Tags"].apply(lambda t: remove_tag(t, "B"))
+            accumulator.update_rows(before, df.loc[idx])
+        elif kind == 2:  # row delete
+            idx = rng.choice(df.index, size=12, replace=False)
+            accumulator.remove_rows(df.loc[idx])
+            df = df.drop(idx).reset_index(drop=True)
+        else:  # row insert
+            new_rows = _frame(rng, 8)
+            if compact:
+                new_rows = apply_compact_schema(new_rows)
+            accumulator.add_rows(new_rows)
+            df = pd.concat([df, new_rows], ignore_index=True)
+
+        assert accumulator.check_consistency(df) == [], step
+
+
+def test_toggle_delta():
+    rng = np.random.default_rng(5)
+    df = _frame(rng, 200)
+    accumulator = StatsAccumulator(df)
+    order = df.loc[df["Order_Fulfillment_Status"] == "Fulfillable", "Order_Number"].dropna().iloc[0]
+    mask = (df["Order_Number"] == order).to_numpy()
+    before = df[mask].copy()
+
+    success, _, df = toggle_order_fulfillment(df, order)
+
+    assert success
+    accumulator.update_rows(before, df[mask])
+    assert accumulator.check_consistency(df) == []
+
+
+def test_removing_every_row_of_a_sku_drops_it():
+    df = pd.DataFrame({
+        "Order_Number": ["A", "B"],
+        "SKU": ["S1", "S2"],
+        "Quantity": [1, 1],
+        "Order_Fulfillment_Status": ["Fulfillable", "Fulfillable"],
+        "Product_Name": ["P1", "P2"],
+        "Warehouse_Name": ["W1", "W2"],
+        "Shipping_Provider": ["DHL", "DPD"],
+        "System_note": ["", ""],
+        "Internal_Tags": ["[]", '["T"]'],
+    })
+    accumulator = StatsAccumulator(df)
+
+    accumulator.remove_rows(df.iloc[[1]])
+
+    stats = accumulator.stats()
+    assert [row["SKU"] for row in stats["sku_summary"]] == ["S1"]
+    assert stats["couriers_stats"] == [{"courier_id": "DHL", "orders_assigned": 1, "repeated_orders_found": 0}]
+    assert stats["tags_breakdown"] == {}
+
+
+def test_check_consistency_reports_drift():
+    rng = np.random.default_rng(2)
+    df = _frame(rng, 50)
+    accumulator = StatsAccumulator(df)
+
+    df.loc[df.index[0], "Quantity"] = 1000  # edit not reported to the accumulator
+
+    assert accumulator.check_consistency(df)
+
+
+def test_sync_is_consumed_once():
+    rng = np.random.default_rng(4)
+    df = _frame(rng, 30)
+    accumulator = StatsAccumulator(df)
+
+    assert not accumulator.consume_sync(df)  # nothing applied yet
+
+    accumulator.mark_synced(df)
+    assert accumulator.consume_sync(df)
+    assert not accumulator.consume_sync(df)
+
+    accumulator.mark_synced(df)
+    assert not accumulator.consume_sync(df.copy())  # a different frame needs a full recompute
+
+
+def test_sync_is_tied_to_the_frame_object(monkeypatch):
+    import shopify_tool.stats_accumulator as stats_accumulator_module
+
+    # Simulate a recycled id(): every frame of the same length collides
+    monkeypatch.setattr(stats_accumulator_module, "id", lambda obj: 0, raising=False)
+    rng = np.random.default_rng(5)
+    accumulator = StatsAccumulator(_frame(rng, 30))
+
+    assert not accumulator.reflects(_frame(rng, 30))
+
+
+def test_missing_required_columns():
+    with pytest.raises(ValueError):
+        StatsAccumulator(pd.DataFrame({"Order_Number": ["A"]}))
@@ -0,0 +1,80 @@
+"""Tests for the live stock ledger used by manual edits (shopify_tool/stock_ledger.py)."""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from shopify_tool.analysis import toggle_order_fulfillment
+from shopify_tool.schema import apply_compact_schema
+from shopify_tool.stock_ledger import StockLedger
+
+
+def _analysis_df():
+    return apply_compact_schema(pd.DataFrame({
+        "Order_Number": ["#1", "#1", "#2", "#3"],
+        "SKU": ["A", "B", "A", "B"],
+        "Quantity": [2, 1, 3, 1],
+        "Stock": [5, 2, 5, 2],
+        "Final_Stock": [3, 1, 3, 1],
+        "Order_Fulfillment_Status": ["Fulfillable", "Fulfillable", "Not Fulfillable", "Not Fulfillable"],
+    }))
+
+
+def test_toggles_reuse_the_ledger_and_write_only_affected_rows():
+    df = _analysis_df()
+    ledger = StockLedger(df)
+
+    success, _, df = toggle_order_fulfillment(df, "#2", ledger=ledger)
+    assert success
+    assert list(df["Final_Stock"]) == [0, 1, 0, 1]
+    assert ledger.reflects(df) and ledger.available("A") == 0
+
+    success, _, _ = toggle_order_fulfillment(df, "#1", ledger=ledger)
+    assert success
+    assert list(df["Final_Stock"]) == [2, 2, 2, 2]
+
+    success, message, _ = toggle_order_fulfillment(df, "#3", ledger=ledger)
+    assert success and list(df["Final_Stock"]) == [2, 1, 2, 1]
+
+    # A ledger of another frame is not trusted: the copy is read afresh
+    copied = df.copy()
+    ledger.consume(df, pd.Series({"A": 2}))
+    assert list(df["Final_Stock"]) == [0, 1, 0, 1]
+    success, _, copied = toggle_order_fulfillment(copied, "#1", ledger=ledger)
+    assert success and list(copied["Final_Stock"]) == [0, 0, 0, 0]
+
+
+def test_row_removal_and_insertion_keep_positions():
+    df = _analysis_df()
+    ledger = StockLedger(df)
+
+    df = df[df["Order_Number"] != "#1"].reset_index(drop=True)
+    ledger.remove_rows(df, [0, 1])
+    assert ledger.reflects(df)
+
+    added = pd.DataFrame({"Order_Number": ["#2", "#2"], "SKU": ["B", "C"], "Quantity": [1, 4],
+                          "Stock": [2, 0], "Final_Stock": [0, 7],
+                          "Order_Fulfillment_Status": ["Not Fulfillable"] * 2})
+    df = pd.concat([df, added], ignore_index=True)
+    ledger.append_rows(df, [2, 3])
+    assert list(df["Final_Stock"]) == [3, 1, 1, 7]  # known SKU takes the ledger's stock
+
+    ledger.consume(df, StockLedger.order_demand(df[df["Order_Number"] == "#2"]))
+    assert list(df["Final_Stock"]) == [0, 0, 0, 3]
+    assert ledger.snapshot() == {"A": 0, "B": 0, "C": 3}
+
+
+def test_ledger_is_tied_to_the_frame_object(monkeypatch):
+    import shopify_tool.stock_ledger as stock_ledger_module
+
+    # Simulate a recycled id(): every frame of the same length collides
+    monkeypatch.setattr(stock_ledger_module, "id", lambda obj: 0, raising=False)
+    ledger = StockLedger(_analysis_df())
+    ledger.consume(_analysis_df(), pd.Series({"A": 3}))
+
+    df = _analysis_df()
+    assert not ledger.reflects(df)
+    assert StockLedger.for_frame(df, ledger).available("A") == 3
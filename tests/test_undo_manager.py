@@ -23,6 +23,7 @@ def make_mock_mw(session_path=None, client_id="TEST_CLIENT"):
     mw.session_path = session_path
     mw.current_client_id = client_id
     mw.analysis_stats = None
+    mw.active_profile_config = None
     mw.analysis_results_df = pd.DataFrame({
         "Order_Number": ["ORD-1", "ORD-1"],
         "SKU": ["A", "B"],
@@ -157,6 +158,41 @@ class TestUndo:
         assert (restored["Order_Fulfillment_Status"] == "Fulfillable").all()
         assert not um.can_undo()
 
+    def test_undo_reapplies_rule_tags(self, temp_dir):
+        um, mw = make_undo_manager(temp_dir)
+        mw.active_profile_config = {"rules": [{
+            "name": "Blocked",
+            "conditions": [{"field": "Order_Fulfillment_Status", "operator": "equals", "value": "Not Fulfillable"}],
+            "actions": [{"type": "ADD_TAG", "value": "BLOCKED"}],
+        }]}
+        # State after a toggle to Not Fulfillable and the removal of item B
+        mw.analysis_results_df = pd.DataFrame({
+            "Order_Number": ["ORD-1"],
+            "SKU": ["A"],
+            "Order_Fulfillment_Status": ["Not Fulfillable"],
+            "Status_Note": ["BLOCKED"],
+        })
+
+        with patch.object(um, '_save_history'):
+            um.record_operation(
+                "toggle_status", "Toggle ORD-1", {"order_number": "ORD-1"},
+                pd.DataFrame({"Order_Fulfillment_Status": ["Fulfillable"]})
+            )
+            um.record_operation(
+                "remove_item", "Remove B", {"order_number": "ORD-1", "sku": "B"},
+                pd.DataFrame({"Order_Number": ["ORD-1"], "SKU": ["B"],
+                              "Order_Fulfillment_Status": ["Not Fulfillable"], "Status_Note": [""]})
+            )
+            assert um.undo()[0]
+            # The restored row gets the tag of its order's status
+            assert list(mw.analysis_results_df["Status_Note"]) == ["BLOCKED", "BLOCKED"]
+
+            assert um.undo()[0]
+
+        restored = mw.analysis_results_df
+        assert list(restored["Order_Fulfillment_Status"]) == ["Fulfillable", "Fulfillable"]
+        assert list(restored["Status_Note"]) == ["", ""]
+
     def test_undo_blocked_for_different_client(self, temp_dir):
         um, mw = make_undo_manager(temp_dir)
         mw.current_client_id = "CLIENT_B"